@@ -17,7 +17,8 @@ from app.schemas.attendance_request_approval import (
 )
 from app.core.dependencies import get_current_user
 from app.models.user import User
-from app.services.notification_service import send_attendance_request_decision_email
+from app.services.notification_service import enqueue_attendance_request_decision_email
+from app.services.dashboard_cache import invalidate_on_commit
 
 router = APIRouter(
     prefix="/admin/attendance-request-approvals",
@@ -91,10 +92,8 @@ def create_approval(
             existing_daily.notes = f"{request.request_type} Approved: {request.reason}"
 
     db.add(approval)
-    db.commit()
-    db.refresh(approval)
 
-    # Send notification email (non-blocking failures)
+    # Queue the notification email in the same transaction
     request_user = db.query(User).filter(User.id == request.user_id).first()
     if request_user and request_user.email:
         project_names = None
@@ -102,7 +101,8 @@ def create_approval(
             project = db.query(Project).filter(Project.id == request.project_id).first()
             if project and project.name:
                 project_names = project.name
-        send_attendance_request_decision_email(
+        enqueue_attendance_request_decision_email(
+            db,
             user_email=request_user.email,
             user_name=request_user.name or request_user.email,
             decision=payload.decision,
@@ -113,6 +113,11 @@ def create_approval(
             project_names=project_names,
         )
 
+    # Approved leave is looked up over the whole request range
+    invalidate_on_commit(db, day=request.start_date, until=request.end_date)
+    db.commit()
+    db.refresh(approval)
+
     return approval
 
 # ------------------------------------------------------------------
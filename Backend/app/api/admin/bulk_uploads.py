@@ -1,39 +1,31 @@
 # app/api/admin/bulk_uploads.py
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.db.session import get_db  # Use centralized get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db, AsyncSessionLocal  # Use centralized get_db
 from app.db.async_compat import run_with_sync_session
 from app.core.dependencies import get_current_user
 from app.models.project import Project
-from app.models.user import User, UserRole
-from app.models.user_quality import UserQuality, QualityRating
-from app.models.project_members import ProjectMember
+from app.models.user import User
+from app.models.user_quality import QualityRating
+from app.core.http_cache import invalidate_tables
+from app.schemas.job import JobResponse
+from app.services.bulk_import import BULK_IMPORT_READ_SIZE, CsvImportError, import_projects, import_users
+from app.services.dashboard_cache import invalidate_on_commit
+from app.services.jobs import JobContext, ProgressReader, job_manager
+from app.services.quality_assessments import QualityAssessmentItem, submit_quality_assessments
 import csv
 import io
-from datetime import datetime, timedelta
+import os
+import shutil
+from datetime import datetime
 
 router = APIRouter(prefix="/admin/bulk_uploads", tags=["Admin - BulkUploads"])
 
-# For now kept the format for writing a CSV
-# email, name, role, date_of_joining, soul_id, work_role
-USER_REQUIRED_FIELDS = {
-        "email",
-        "name",
-        "role",
-        "date_of_joining",
-        "soul_id",
-        "work_role",
-    }
-
-# For now kept the format for writing the project CSV
-# code, name, is_active, start_date, end_date
-PROJECT_REQUIRED_FIELDS = {
-    "code",
-    "name",
-    "is_active",
-    "start_date",
-    "end_date"
-}
+# CSV formats for users and projects: see USER_HEADERS / PROJECT_HEADERS
+# in app/services/bulk_import.py
 
 @router.post("/list/users")
 @run_with_sync_session()
@@ -67,257 +59,82 @@ def list_users(
         "items": results
     }
 
-@router.post("/users")
-@run_with_sync_session()
-def bulk_upload_users(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user)
-):
+async def _import_and_commit(db: AsyncSession, importer, upload, table: str) -> dict:
+    """Run a bulk_import importer and commit; CsvImportError becomes a 400."""
+    try:
+        result = await importer(db, upload)
+    except CsvImportError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=e.detail)
+
+    if result["inserted"]:
+        # Raw-SQL merge: tell the caches that the table changed
+        invalidate_on_commit(db)
+        await db.commit()
+        invalidate_tables([table])
+    return result
+
+def _check_csv(file: UploadFile) -> None:
     if not file.filename or not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Upload a valid .csv file")
 
-    content = file.file.read().decode("utf-8-sig")  # utf-8-sig automatically strips BOM if present
-    reader = csv.DictReader(io.StringIO(content))
-    rows = list(reader)
-
-    if not rows:
-        raise HTTPException(status_code=400, detail="CSV file is empty")
-   
-    if not reader.fieldnames:
-        raise HTTPException(status_code=400, detail="CSV headers / column names are missing")
-
-    # Validate headers
-    if not (USER_REQUIRED_FIELDS == set(reader.fieldnames)):
-        missing = USER_REQUIRED_FIELDS - set(reader.fieldnames)
-        extra = set(reader.fieldnames) - USER_REQUIRED_FIELDS
-         
-        detail = {
-            "missing": 0 if not missing else f"count: {len(missing)}; {', '.join(missing)}",
-            "extra": 0 if not extra else f"count: {len(extra)}; {', '.join(extra)}"
-        }
-
-        raise HTTPException(
-            status_code=400,
-            detail=detail
-        )
-
-    # Extract emails
-    emails_from_file = {
-        row["email"].strip().lower()
-        for row in rows
-        if row.get("email")
-    }
+async def _start_import_job(kind: str, importer, table: str, file: UploadFile, user: User) -> dict:
+    """
+    Spool the upload next to the job and import it in the background;
+    progress is bytes of the file read so far.
+    """
+    job = job_manager.create(kind, owner_id=user.id, params={"filename": file.filename})
+    spool_path = job_manager.path(job["id"], "upload.csv")
 
-    # Fetch existing emails from the DB to check for the conflicting emails
-    emails_from_db = {
-        email for (email,) in
-        db.query(User.email)
-          .filter(User.email.in_(emails_from_file))
-          .all()
-    }
+    def _spool():
+        with open(spool_path, "wb") as out:
+            shutil.copyfileobj(file.file, out, BULK_IMPORT_READ_SIZE)
 
-    insert_list = []
-    error_list = []
+    await run_in_threadpool(_spool)
 
-    for line_no, row in enumerate(rows, start=2):
-        # Check the size of the row: should have exactly 6 entries
-        if not (6 == len(row)):
-            error_list.append(
-                f"Line {line_no}: 'row' should have exactly 6 values"
-            )
-            continue
+    async def run(ctx: JobContext):
+        ctx.progress(0, os.path.getsize(spool_path))
+        with open(spool_path, "rb") as fh:
+            async with AsyncSessionLocal() as db:
+                return await _import_and_commit(db, importer, ProgressReader(fh, ctx), table)
 
-        # Normalize
-        email = row["email"].strip().lower()
-        
-        # Empty field check
-        for field in USER_REQUIRED_FIELDS:
-            value = row.get(field)
-            if not value or not value.strip():
-                error_list.append(
-                    f"Line {line_no}: '{field}' is missing or 'row' has less than 6 values"
-                )
-                break
-        else:
-            # Duplicate email check
-            if email in emails_from_db:
-                error_list.append(
-                    f"Line {line_no}: email '{email}' already exists"
-                )
-                continue
+    return job_manager.start(job["id"], run)
 
-            # Create User
-            insert_list.append(
-                User(
-                    email=email,
-                    name=row["name"].strip(),
-                    role=UserRole(row["role"]),
-                    soul_id=row["soul_id"].strip(),
-                    work_role=row["work_role"].strip(),
-                    doj=row["date_of_joining"].strip(),
-                    default_shift_id=None,
-                )
-            )
-
-    if insert_list:
-        db.bulk_save_objects(insert_list)
-        db.commit()
+@router.post("/users")
+async def bulk_upload_users(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user)
+):
+    _check_csv(file)
+    return await _import_and_commit(db, import_users, file, "users")
 
-    return {
-        "inserted": len(insert_list),
-        "errors": error_list,
-    }
+@router.post("/users/jobs", response_model=JobResponse, status_code=202)
+async def bulk_upload_users_job(
+    file: UploadFile = File(...),
+    user: User = Depends(get_current_user)
+):
+    """Same as POST /users, run as a background job (poll GET /jobs/{id})."""
+    _check_csv(file)
+    return await _start_import_job("bulk_upload_users", import_users, "users", file, user)
 
 @router.post("/projects")
-@run_with_sync_session()
-def bulk_upload_projects(
+async def bulk_upload_projects(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    if not file.filename or not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Upload a valid .csv file")
-
-    content = file.file.read().decode("utf-8-sig")  # utf-8-sig automatically strips BOM if present
-    reader = csv.DictReader(io.StringIO(content))
-    rows = list(reader)
+    _check_csv(file)
+    return await _import_and_commit(db, import_projects, file, "projects")
 
-    if not rows:
-        raise HTTPException(status_code=400, detail="CSV file is empty")
-    
-    if not reader.fieldnames:
-        raise HTTPException(status_code=400, detail="CSV headers / column names are missing")
-
-    if not (PROJECT_REQUIRED_FIELDS == set(reader.fieldnames)):
-        missing = PROJECT_REQUIRED_FIELDS - set(reader.fieldnames)
-        extra = set(reader.fieldnames) - PROJECT_REQUIRED_FIELDS
-         
-        detail = {
-            "missing": 0 if not missing else f"count: {len(missing)}; {', '.join(missing)}",
-            "extra": 0 if not extra else f"count: {len(extra)}; {', '.join(extra)}"
-        }
-
-        raise HTTPException(
-            status_code=400,
-            detail=detail
-        )
-
-    # Extract codes
-    codes_from_file = {
-        row["code"].strip().lower()
-        for row in rows
-        if row.get("code")
-    }
-
-    # Fetch existing emails from the DB to check for the conflicting codes
-    codes_from_db = {
-        code for (code,) in
-        db.query(Project.code)
-          .filter(Project.code.in_(codes_from_file))
-          .all()
-    }
-    
-    insert_list = []
-    error_list = []
-
-    for line_no, row in enumerate(rows, start=2):
-        # Skip empty rows (rows where all fields are empty or whitespace)
-        if not row or all(not str(value).strip() if value else True for value in row.values()):
-            continue
-        
-        # Check the size of the row: should have exactly 5 entries
-        if not (5 == len(row)):
-            error_list.append(
-                f"Line {line_no}: 'row' should have exactly 5 values"
-            )
-            continue
-
-        # Normalize
-        code = row.get("code", "").strip().lower()
-        
-        # Skip if code is empty (empty row)
-        if not code:
-            continue
-
-        # Track validation errors for this row
-        row_errors = []
-        
-        # Empty field check
-        for field in PROJECT_REQUIRED_FIELDS:
-            if field != "end_date" and field != "is_active" and (not row.get(field) or not row[field].strip()):
-                row_errors.append(
-                    f"Line {line_no}: '{field}' is missing or 'row' has less than 5 values"
-                )
-                break
-        
-        # Validate dates separately (after field checks)
-        start_date_str = row.get("start_date", "").strip() if row.get("start_date") else ""
-        end_date_str = row.get("end_date", "").strip() if row.get("end_date") else ""
-        
-        # Validate start_date format (must be YYYY-MM-DD)
-        start_date = None
-        if start_date_str:
-            try:
-                from datetime import datetime
-                start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                row_errors.append(
-                    f"Line {line_no}: Invalid 'start_date' format '{start_date_str}'. Use YYYY-MM-DD format (e.g., 2024-01-15)"
-                )
-        else:
-            row_errors.append(
-                f"Line {line_no}: 'start_date' is required and cannot be empty"
-            )
-        
-        # Validate end_date format (can be empty, but if provided must be YYYY-MM-DD)
-        end_date = None
-        if end_date_str:
-            try:
-                from datetime import datetime
-                end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                row_errors.append(
-                    f"Line {line_no}: Invalid 'end_date' format '{end_date_str}'. Use YYYY-MM-DD format (e.g., 2024-12-31) or leave empty"
-                )
-        
-        # Validate date relationship: end_date should be >= start_date (if both are valid)
-        if start_date and end_date and end_date < start_date:
-            row_errors.append(
-                f"Line {line_no}: 'end_date' ({end_date_str}) cannot be earlier than 'start_date' ({start_date_str})"
-            )
-        
-        # If there are validation errors, add them and skip this row
-        if row_errors:
-            error_list.extend(row_errors)
-            continue
-        
-        # Duplicate check
-        if code in codes_from_db:
-            error_list.append(
-                f"Line {line_no}: Project code '{code}' already exists"
-            )
-            continue
-
-        # Create Project (use parsed date objects)
-        insert_list.append(
-            Project(
-                code=code,
-                name=row["name"].strip(),
-                is_active=True if row["is_active"].strip().upper() in ['TRUE', '1', 'YES'] else False,
-                start_date=start_date,  # Use parsed date object
-                end_date=end_date if end_date_str else None,  # Use parsed date object or None
-            )
-        )
-
-    if insert_list:
-        db.bulk_save_objects(insert_list)
-        db.commit()
-
-    return {
-        "inserted": len(insert_list),
-        "errors": error_list,
-    }
+@router.post("/projects/jobs", response_model=JobResponse, status_code=202)
+async def bulk_upload_projects_job(
+    file: UploadFile = File(...),
+    user: User = Depends(get_current_user)
+):
+    """Same as POST /projects, run as a background job (poll GET /jobs/{id})."""
+    _check_csv(file)
+    return await _start_import_job("bulk_upload_projects", import_projects, "projects", file, user)
 
 # Quality assessment CSV format:
 # user_email, project_code, metric_date, rating, quality_score (optional), work_role (optional), notes (optional)
@@ -329,17 +146,21 @@ QUALITY_REQUIRED_FIELDS = {
 }
 
 @router.post("/quality")
-@run_with_sync_session()
-def bulk_upload_quality(
+async def bulk_upload_quality(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Bulk upload quality assessments from CSV file"""
+    """
+    Bulk upload quality assessments from CSV file.
+
+    Rows are validated first; the valid ones are written together by
+    submit_quality_assessments (one work-role lookup, one UPDATE, one INSERT).
+    """
     if not file.filename or not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Upload a valid .csv file")
 
-    content = file.file.read().decode("utf-8-sig")  # utf-8-sig automatically strips BOM if present
+    content = (await file.read()).decode("utf-8-sig")  # utf-8-sig automatically strips BOM if present
     reader = csv.DictReader(io.StringIO(content))
     rows = list(reader)
 
@@ -359,25 +180,30 @@ def bulk_upload_quality(
         )
 
     # Get user and project mappings
-    users_by_email = {u.email.lower(): u for u in db.query(User).all()}
-    projects_by_code = {p.code.lower(): p for p in db.query(Project).all()}
+    users_by_email = {
+        email.lower(): user_id
+        for user_id, email in (await db.execute(select(User.id, User.email))).all()
+    }
+    projects_by_code = {
+        code.lower(): project_id
+        for project_id, code in (await db.execute(select(Project.id, Project.code))).all()
+    }
 
-    success_count = 0
+    items = []
     error_list = []
-
     for line_no, row in enumerate(rows, start=2):
         try:
             # Get user
             user_email = row["user_email"].strip().lower()
-            user = users_by_email.get(user_email)
-            if not user:
+            user_id = users_by_email.get(user_email)
+            if not user_id:
                 error_list.append(f"Line {line_no}: User with email '{row['user_email']}' not found")
                 continue
 
             # Get project
             project_code = row["project_code"].strip().lower()
-            project = projects_by_code.get(project_code)
-            if not project:
+            project_id = projects_by_code.get(project_code)
+            if not project_id:
                 error_list.append(f"Line {line_no}: Project with code '{row['project_code']}' not found")
                 continue
 
@@ -430,67 +256,32 @@ def bulk_upload_quality(
                     error_list.append(f"Line {line_no}: Invalid critical_rate '{row['critical_rate']}'")
                     continue
 
+            # Resolved from project_members for the whole batch when empty
             work_role = row.get("work_role", "").strip() or None
-            if not work_role:
-                # Try to get from project_members
-                member = db.query(ProjectMember).filter(
-                    ProjectMember.user_id == user.id,
-                    ProjectMember.project_id == project.id
-                ).first()
-                if member:
-                    work_role = member.work_role
-                else:
-                    work_role = "UNKNOWN"
-
             notes = row.get("notes", "").strip() or None
 
-            # Convert metric_date (date) to datetime for valid_from
-            # Use start of day (00:00:00) for the metric_date
-            valid_from_datetime = datetime.combine(metric_date, datetime.min.time())
-            
-            # Archive existing current quality record
-            current_quality = db.query(UserQuality).filter(
-                UserQuality.user_id == user.id,
-                UserQuality.project_id == project.id,
-                UserQuality.is_current == True
-            ).first()
-
-            if current_quality:
-                current_quality.is_current = False
-                # Set valid_to to the end of the day before metric_date
-                # This ensures the previous record is valid up to but not including metric_date
-                prev_day = metric_date - timedelta(days=1)
-                current_quality.valid_to = datetime.combine(prev_day, datetime.max.time())
-
-            # Create new quality record
-            new_quality = UserQuality(
-                user_id=user.id,
-                project_id=project.id,
-                work_role=work_role,
+            items.append(QualityAssessmentItem(
+                user_id=user_id,
+                project_id=project_id,
+                metric_date=metric_date,
                 rating=rating,
                 quality_score=quality_score,
                 accuracy=accuracy,
                 critical_rate=critical_rate,
                 notes=notes,
-                source="MANUAL",
-                assessed_by_user_id=current_user.id,
-                assessed_at=datetime.now(),
-                is_current=True,
-                valid_from=valid_from_datetime,
-                valid_to=None
-            )
-
-            db.add(new_quality)
-            success_count += 1
+                work_role=work_role,
+            ))
 
         except Exception as e:
             error_list.append(f"Line {line_no}: Unexpected error - {str(e)}")
             continue
 
-    if success_count > 0:
-        db.commit()
+    if items:
+        # Superseded versions end the day before the new metric_date
+        await submit_quality_assessments(db, items, current_user.id, close_at_previous_day=True)
+        await db.commit()
 
     return {
-        "inserted": success_count,
+        "inserted": len(items),
         "errors": error_list,
     }
@@ -1,10 +1,12 @@
 # app/api/admin/dashboard.py
-from fastapi import APIRouter, Depends
+import asyncio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, cast, String
 from datetime import date, datetime
 
-from app.db.session import get_db  # Use centralized get_db
+from app.db.session import get_db, AsyncSessionLocal  # Use centralized get_db
 from app.db.async_compat import run_with_sync_session
 from app.models.user import User, UserRole
 from app.models.project import Project
@@ -16,11 +18,18 @@ from app.schemas.dashboard import (
     PendingApprovalResponse
 )
 from app.core.dependencies import get_current_user
+from app.utils.serialization import FastJSONResponse, json_dumps
+from app.services.dashboard_cache import cached_dashboard
+from app.services import live_feed
+from app.services.active_sessions import registry as active_registry
 
 # Define the Router
 router = APIRouter(prefix="/admin/dashboard", tags=["Admin - Dashboard"])
 
+SSE_HEARTBEAT_SECONDS = 15
+
 @router.get("/stats", response_model=GlobalStatsResponse)
+@cached_dashboard("global_stats")
 @run_with_sync_session()
 def get_global_stats(db: Session = Depends(get_db)):
     """
@@ -53,15 +62,8 @@ def get_global_stats(db: Session = Depends(get_db)):
        
     )
 
-@router.get("/live", response_model=list[LiveWorkerResponse])
-@run_with_sync_session()
-def get_live_workers(db: Session = Depends(get_db)):
-    """
-    Returns a list of users who have Clocked In but NOT Clocked Out.
-    
-    OPTIMIZED: Uses eager loading to avoid N+1 queries and proper indexing.
-    Expected performance: 10-100x faster with index.
-    """
+def _load_live_workers(db: Session) -> list:
+    """Active sessions (clocked in, not out) as plain dicts, newest first."""
     from sqlalchemy.orm import joinedload
     
     # Eager load relationships to avoid N+1 queries
@@ -78,28 +80,96 @@ def get_live_workers(db: Session = Depends(get_db)):
     )
 
     results = []
-    now = datetime.now()
 
     for session in active_sessions:
         # Calculate how long they have been running (in minutes)
         duration = 0
         if session.clock_in_at:
             # Simple difference between NOW and Start Time
-            delta = now - session.clock_in_at
+            delta = datetime.now(session.clock_in_at.tzinfo) - session.clock_in_at
             duration = int(delta.total_seconds() / 60)
 
-        results.append(LiveWorkerResponse(
-            user_id=session.user_id,
-            user_name=session.user.name if session.user else "Unknown",
-            project_name=session.project.name if session.project else "Unknown",
-            work_role=session.work_role,
-            clock_in_time=session.clock_in_at,
-            current_duration_minutes=duration
-        ))
-
+        results.append({
+            "user_id": session.user_id,
+            "user_name": session.user.name if session.user else "Unknown",
+            "project_name": session.project.name if session.project else "Unknown",
+            "work_role": session.work_role,
+            "clock_in_time": session.clock_in_at,
+            "current_duration_minutes": duration,
+        })
     return results
 
 
+@router.get("/live", response_model=list[LiveWorkerResponse])
+@run_with_sync_session()
+def get_live_workers(db: Session = Depends(get_db)):
+    """
+    Returns a list of users who have Clocked In but NOT Clocked Out.
+    
+    OPTIMIZED: Uses eager loading to avoid N+1 queries and proper indexing.
+    Expected performance: 10-100x faster with index.
+    For a push-based feed use GET /admin/dashboard/live/stream.
+    """
+    # Plain dicts rendered by orjson - avoids a model per row plus re-validation
+    if active_registry.authoritative:
+        return FastJSONResponse(active_registry.live_workers())
+    return FastJSONResponse(_load_live_workers(db))
+
+
+async def _live_snapshot() -> list:
+    if active_registry.authoritative:
+        return active_registry.live_workers()
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(_load_live_workers)
+
+
+def _sse(event_name: str, data) -> bytes:
+    return b"event: " + event_name.encode() + b"\ndata: " + json_dumps(data) + b"\n\n"
+
+
+@router.get("/live/stream")
+async def stream_live_workers(
+    request: Request,
+    _: User = Depends(get_current_user),
+):
+    """
+    Server-Sent Events feed of live workers.
+
+    Sends one `snapshot` event (same rows as GET /live), then `clock_in` /
+    `clock_out` deltas as they are committed, plus a comment heartbeat.
+    The subscription starts before the snapshot is read, so a delta may
+    repeat what the snapshot already shows - clients apply them by user_id.
+    A `resync` event means events may have been missed: reload the snapshot.
+    """
+    async def events():
+        queue = live_feed.broker.subscribe()
+        try:
+            yield b"retry: 3000\n\n"
+            yield _sse("snapshot", await _live_snapshot())
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": heartbeat\n\n"
+                    continue
+
+                if item.get("type") == "resync":
+                    yield _sse("snapshot", await _live_snapshot())
+                else:
+                    yield _sse(item.get("type", "message"), item)
+        finally:
+            live_feed.broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/pending-approvals", response_model=list[PendingApprovalResponse])
 @run_with_sync_session()
 def get_pending_approvals(
@@ -142,7 +212,7 @@ def get_pending_approvals(
         # Calculate Duration from stored minutes or timestamps
         duration = 0.0
         if item.minutes_worked:
-            duration = float(item.minutes_worked)
+            duration = item.minutes_worked
         elif item.clock_out_at and item.clock_in_at:
              duration = (item.clock_out_at - item.clock_in_at).total_seconds() / 60.0
 
@@ -1,11 +1,12 @@
 from app.db.async_compat import run_with_sync_session
-from datetime import date
-from typing import Optional
+from datetime import date, timedelta
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, aliased
-from sqlalchemy import cast, String
+from sqlalchemy import cast, String, text
 
 from app.core.dependencies import get_current_user, get_db
 from app.models.project_members import ProjectMember
@@ -14,43 +15,87 @@ from app.models.attendance_daily import AttendanceDaily
 from app.models.shift import Shift
 from app.models.history import TimeHistory
 from app.models.attendance_request import AttendanceRequest
+from app.services.dashboard_cache import cached_dashboard
+from app.utils.timezone import today_ist
 
 router = APIRouter(
     prefix="/admin/project-resource-allocation",
     tags=["Admin - Dashboard"],
 )
 
+# Longest range GET /range serves in one request
+RESOURCE_ALLOCATION_MAX_DAYS = 62
+# Most projects GET /batch serves in one request
+RESOURCE_ALLOCATION_MAX_PROJECTS = 200
 
-@router.get("/")
-@run_with_sync_session()
-def project_resource_allocation(
-    project_id: str = Query(..., description="Project UUID"),
-    target_date: date = Query(date.today()),
-    only_active: bool = Query(True),
-    only_pm_apm: bool = Query(False),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Returns resource allocation snapshot for a project on a given date.
+# Members x days from one date spine. Status resolution matches
+# project_resource_allocation: approved leave (unless PRESENT), then the
+# attendance record, then ABSENT.
+_RANGE_ALLOCATION_SQL = text("""
+    WITH days AS (
+        SELECT generate_series(CAST(:start AS date), CAST(:end AS date), interval '1 day')::date AS day
+    )
+    SELECT
+        d.day,
+        pm.project_id,
+        u.id AS user_id,
+        u.name,
+        u.email,
+        u.role::text AS designation,
+        pm.work_role,
+        mgr.name AS reporting_manager,
+        s.name AS shift,
+        CASE
+            WHEN lv.request_type IS NOT NULL
+                 AND (ad.status IS NULL OR ad.status::text <> 'PRESENT')
+                THEN CASE WHEN lv.request_type = 'HALF-DAY' THEN 'HALF_DAY_LEAVE' ELSE 'ON_LEAVE' END
+            WHEN ad.status IS NOT NULL THEN ad.status::text
+            ELSE 'ABSENT'
+        END AS attendance_status,
+        ad.first_clock_in_at AS first_clock_in,
+        ad.last_clock_out_at AS last_clock_out,
+        COALESCE(ad.minutes_worked, 0) AS minutes_worked
+    FROM project_members pm
+    CROSS JOIN days d
+    JOIN users u ON u.id = pm.user_id
+    LEFT JOIN users mgr ON mgr.id = u.rpm_user_id
+    LEFT JOIN shifts s ON s.id = u.default_shift_id
+    LEFT JOIN attendance_daily ad
+        ON ad.user_id = u.id AND ad.attendance_date = d.day
+    LEFT JOIN LATERAL (
+        SELECT ar.request_type::text AS request_type
+        FROM attendance_requests ar
+        WHERE ar.user_id = u.id
+          AND ar.status::text = 'APPROVED'
+          AND ar.start_date <= d.day
+          AND ar.end_date >= d.day
+          AND ar.request_type::text IN ('SICK_LEAVE', 'FULL-DAY', 'HALF-DAY', 'OTHER')
+        ORDER BY ar.request_type::text = 'HALF-DAY'
+        LIMIT 1
+    ) lv ON true
+    WHERE (CAST(:project_id AS uuid) IS NULL OR pm.project_id = CAST(:project_id AS uuid))
+      AND (NOT :only_active OR pm.is_active)
+      AND (NOT :only_pm_apm OR pm.work_role IN ('PM', 'APM'))
+    ORDER BY d.day, pm.project_id, u.name
+""")
 
-    Tables involved:
-    - project_members
-    - users (employee + reporting manager)
-    - attendance_daily
-    - shifts (via users.default_shift_id)
-    """
-    
-    # Convert string project_id to UUID for proper filtering
-    try:
-        project_id_uuid = UUID(project_id)
-    except (ValueError, TypeError):
-        from fastapi import HTTPException, status
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid project_id format: {project_id}"
-        )
+# Distinct (user, work_role) per project and day, as in /role-counts
+_RANGE_ROLE_COUNTS_SQL = text("""
+    SELECT sheet_date, project_id, work_role, count(DISTINCT user_id) AS users
+    FROM history
+    WHERE sheet_date BETWEEN :start AND :end
+      AND (CAST(:project_id AS uuid) IS NULL OR project_id = CAST(:project_id AS uuid))
+      AND work_role IS NOT NULL AND btrim(work_role) <> '' AND work_role <> 'Unknown'
+    GROUP BY sheet_date, project_id, work_role
+""")
 
+
+def _load_allocations(db: Session, project_ids: List[UUID], target_date: date, only_active: bool, only_pm_apm: bool):
+    """
+    {project_id: [resource, ...]} for `project_ids` on `target_date`: one
+    members x users x attendance x shift query and one leave query, however
+    many projects are asked for.
+    """
     Manager = aliased(User)
 
     query = (
@@ -70,7 +115,7 @@ def project_resource_allocation(
         )
         # ✅ FIX: shift comes from USER, not project_member
         .outerjoin(Shift, User.default_shift_id == Shift.id)
-        .filter(ProjectMember.project_id == project_id_uuid)
+        .filter(ProjectMember.project_id.in_(project_ids))
         # Removed date range filtering - show all active members regardless of assignment dates
         # The target_date is still used for attendance data, but doesn't filter project members
     )
@@ -85,7 +130,7 @@ def project_resource_allocation(
     rows = query.all()
 
     # Get all user IDs from the result to check for approved leaves.
-    user_ids = [row[1].id for row in rows]  # row[1] is User
+    user_ids = list({row[1].id for row in rows})  # row[1] is User
 
     # Query approved leave requests for these users on the target date.
     approved_leaves = {}
@@ -104,7 +149,7 @@ def project_resource_allocation(
         for leave in leave_requests:
             approved_leaves[leave.user_id] = leave.request_type
 
-    result = []
+    result = {project_id: [] for project_id in project_ids}
 
     for pm, user, manager, attendance, shift in rows:
         # PRIORITY:
@@ -125,7 +170,7 @@ def project_resource_allocation(
         else:
             attendance_status = "ABSENT"
 
-        result.append(
+        result[pm.project_id].append(
             {
                 "user_id": user.id,
                 "name": user.name,
@@ -147,6 +192,73 @@ def project_resource_allocation(
             }
         )
 
+    return result
+
+
+def _load_role_counts(db: Session, project_ids: List[UUID], target_date: date):
+    """
+    {project_id: {work_role: users}} for `project_ids` on `target_date`.
+    Counts each unique (user_id, work_role) combination separately, in one
+    query over TimeHistory.
+    """
+    role_combinations = (
+        db.query(
+            TimeHistory.project_id,
+            TimeHistory.user_id,
+            TimeHistory.work_role
+        )
+        .filter(
+            TimeHistory.project_id.in_(project_ids),
+            TimeHistory.sheet_date == target_date
+        )
+        .distinct()
+        .all()
+    )
+
+    # Count how many users worked in each role
+    # Each unique (user_id, work_role) combination counts as 1
+    role_counts = {project_id: {} for project_id in project_ids}
+    for project_id, user_id, work_role in role_combinations:
+        if work_role and work_role.strip() and work_role != "Unknown":
+            counts = role_counts[project_id]
+            counts[work_role] = counts.get(work_role, 0) + 1
+    return role_counts
+
+
+def _parse_project_id(project_id: str) -> UUID:
+    # Convert string project_id to UUID for proper filtering
+    try:
+        return UUID(project_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid project_id format: {project_id}"
+        )
+
+
+@router.get("/")
+@cached_dashboard("resource_allocation", date_param="target_date", project_param="project_id")
+@run_with_sync_session()
+def project_resource_allocation(
+    project_id: str = Query(..., description="Project UUID"),
+    target_date: date = Query(date.today()),
+    only_active: bool = Query(True),
+    only_pm_apm: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Returns resource allocation snapshot for a project on a given date.
+
+    Tables involved:
+    - project_members
+    - users (employee + reporting manager)
+    - attendance_daily
+    - shifts (via users.default_shift_id)
+    """
+    project_id_uuid = _parse_project_id(project_id)
+    result = _load_allocations(db, [project_id_uuid], target_date, only_active, only_pm_apm)[project_id_uuid]
+
     return {
         "project_id": project_id,
         "date": target_date,
@@ -156,6 +268,7 @@ def project_resource_allocation(
 
 
 @router.get("/role-counts")
+@cached_dashboard("role_counts", date_param="target_date", project_param="project_id")
 @run_with_sync_session()
 def get_project_role_counts(
     project_id: str = Query(..., description="Project UUID"),
@@ -171,40 +284,125 @@ def get_project_role_counts(
     Example: If user clocks in as "ANNOTATION" in morning and "QC" in afternoon,
     both roles will be counted (ANNOTATION: 1, QC: 1).
     """
-    try:
-        project_id_uuid = UUID(project_id)
-    except (ValueError, TypeError):
-        from fastapi import HTTPException, status
+    project_id_uuid = _parse_project_id(project_id)
+
+    return {
+        "project_id": project_id,
+        "date": target_date,
+        "role_counts": _load_role_counts(db, [project_id_uuid], target_date)[project_id_uuid]
+    }
+
+
+@router.get("/batch")
+@cached_dashboard("resource_allocation_batch", date_param="target_date")
+@run_with_sync_session()
+def project_resource_allocation_batch(
+    project_ids: List[UUID] = Query(..., description="Project UUIDs (repeat the parameter)"),
+    target_date: Optional[date] = Query(None, description="Defaults to today (IST)"),
+    only_active: bool = Query(True),
+    only_pm_apm: bool = Query(False),
+    include_role_counts: bool = Query(True),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    GET / and /role-counts for several projects at once: one entry per
+    project (in request order) with the single-project allocation shape plus
+    its role_counts. Backed by one IN-filtered query per table instead of
+    two requests per project.
+    """
+    target_date = target_date or today_ist()
+    project_ids = list(dict.fromkeys(project_ids))
+    if len(project_ids) > RESOURCE_ALLOCATION_MAX_PROJECTS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid project_id format: {project_id}"
+            detail=f"At most {RESOURCE_ALLOCATION_MAX_PROJECTS} projects per request.",
         )
-    
-    # Query TimeHistory to get all unique (user_id, work_role) combinations
-    # Note: TimeHistory is already imported at the top
-    
-    role_combinations = (
-        db.query(
-            TimeHistory.user_id,
-            TimeHistory.work_role
-        )
-        .filter(
-            TimeHistory.project_id == project_id_uuid,
-            TimeHistory.sheet_date == target_date
+
+    allocations = _load_allocations(db, project_ids, target_date, only_active, only_pm_apm)
+    role_counts = _load_role_counts(db, project_ids, target_date) if include_role_counts else {}
+
+    projects = []
+    for project_id in project_ids:
+        resources = allocations[project_id]
+        entry = {
+            "project_id": str(project_id),
+            "date": target_date,
+            "total_resources": len(resources),
+            "resources": resources,
+        }
+        if include_role_counts:
+            entry["role_counts"] = role_counts[project_id]
+        projects.append(entry)
+
+    return {"date": target_date, "projects": projects}
+
+
+@router.get("/range")
+@cached_dashboard("resource_allocation_range", date_param="start", project_param="project_id", until_param="end")
+async def project_resource_allocation_range(
+    start: date = Query(..., description="First day (inclusive)"),
+    end: date = Query(..., description="Last day (inclusive)"),
+    project_id: Optional[UUID] = Query(None, description="Project UUID; all projects when omitted"),
+    only_active: bool = Query(True),
+    only_pm_apm: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Resource allocation and role counts for every day in start..end, for one
+    project or all projects: one entry per (date, project) in the shape of
+    GET / plus its role_counts. Two queries for the whole range, so a week
+    view is one request instead of one allocation + one role-count call
+    per day.
+    """
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'end' cannot be before 'start'.")
+    if (end - start).days + 1 > RESOURCE_ALLOCATION_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range is limited to {RESOURCE_ALLOCATION_MAX_DAYS} days.",
         )
-        .distinct()
-        .all()
-    )
-    
-    # Count how many users worked in each role
-    # Each unique (user_id, work_role) combination counts as 1
-    role_counts = {}
-    for user_id, work_role in role_combinations:
-        if work_role and work_role.strip() and work_role != "Unknown":
-            role_counts[work_role] = role_counts.get(work_role, 0) + 1
-    
+
+    params = {"start": start, "end": end, "project_id": project_id}
+    rows = (await db.execute(
+        _RANGE_ALLOCATION_SQL,
+        {**params, "only_active": only_active, "only_pm_apm": only_pm_apm},
+    )).mappings().all()
+    role_rows = (await db.execute(_RANGE_ROLE_COUNTS_SQL, params)).all()
+
+    entries = {}
+
+    def entry_for(day, pid):
+        entry = entries.get((day, pid))
+        if entry is None:
+            entry = entries[(day, pid)] = {
+                "project_id": str(pid),
+                "date": day,
+                "total_resources": 0,
+                "resources": [],
+                "role_counts": {},
+            }
+        return entry
+
+    # A single project gets an entry for every day, even without members
+    if project_id is not None:
+        for offset in range((end - start).days + 1):
+            entry_for(start + timedelta(days=offset), project_id)
+
+    for row in rows:
+        resource = dict(row)
+        day, pid = resource.pop("day"), resource.pop("project_id")
+        entry = entry_for(day, pid)
+        entry["resources"].append(resource)
+        entry["total_resources"] += 1
+
+    for sheet_date, pid, work_role, users in role_rows:
+        entry_for(sheet_date, pid)["role_counts"][work_role] = users
+
     return {
-        "project_id": project_id,
-        "date": target_date,
-        "role_counts": role_counts
+        "start": start,
+        "end": end,
+        "project_id": str(project_id) if project_id else None,
+        "days": sorted(entries.values(), key=lambda e: (e["date"], e["project_id"])),
     }
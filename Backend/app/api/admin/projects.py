@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import or_, select
+from sqlalchemy import or_, select, delete, update, func, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import Optional, List
 from uuid import UUID
 from datetime import date
 from app.db.session import get_db  # Use centralized get_db
 from app.db.async_compat import run_with_sync_session
+from app.core.http_cache import http_cache
 from app.models.project import Project
 from app.schemas.project import ProjectCreate, ProjectResponse
 from app.schemas.project import ProjectMemberDetail
@@ -17,7 +19,9 @@ from app.models.user import User
 
 # --- IMPORTS FOR PROJECT MEMBERS (WORKERS) ---
 from app.models.project_members import ProjectMember
-from app.schemas.project_members import MemberAssign, MemberResponse
+from app.schemas.project_members import MemberAssign, MemberResponse, BulkMembersUpdate
+from app.services.dashboard_cache import invalidate_on_commit
+from app.utils.timezone import today_ist
 from pydantic import BaseModel
 
 class MemberRoleUpdate(BaseModel):
@@ -29,12 +33,16 @@ class BulkOwnersUpdate(BaseModel):
 
 router = APIRouter(prefix="/admin/projects", tags=["Admin - Projects"])
 
+# Most projects GET /members serves in one request
+MEMBERS_MAX_PROJECTS = 200
+
 # ==========================================
 #              CORE PROJECT APIs
 # ==========================================
 from app.core.dependencies import get_current_user
 # --- GET LIST REQUEST (With Search, Status & Date Interval) ---
 @router.get("/", response_model=list[ProjectResponse])
+@http_cache("projects", "project_members", response_model=list[ProjectResponse], per_user=True)
 async def list_projects(
     db: AsyncSession = Depends(get_db),
     # 1. ADD THIS LINE: We need to know WHO is asking to find their role
@@ -105,6 +113,43 @@ async def list_projects(
         p.current_user_role = role_map.get(p.id, "N/A")
 
     return projects
+# --- LIST MEMBERS OF SEVERAL PROJECTS ---
+# Registered before GET /{project_id} so "members" is not parsed as a UUID.
+@router.get("/members", response_model=dict[UUID, list[ProjectMemberDetail]])
+@http_cache("project_members", "users", response_model=dict[UUID, list[ProjectMemberDetail]])
+async def list_members_of_projects(
+    project_ids: List[UUID] = Query(..., description="Project UUIDs (repeat the parameter)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    GET /{project_id}/members for several projects in one query:
+    {project_id: [member, ...]} with an entry (possibly empty) per project.
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    if len(project_ids) > MEMBERS_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MEMBERS_MAX_PROJECTS} projects per request.",
+        )
+    result = await db.execute(
+        select(ProjectMember, User)
+        .join(User, ProjectMember.user_id == User.id)
+        .where(ProjectMember.project_id.in_(project_ids))
+    )
+
+    members = {project_id: [] for project_id in project_ids}
+    for member, user in result.all():
+        members[member.project_id].append(ProjectMemberDetail(
+            user_id=user.id,
+            name=user.name,
+            email=user.email,
+            work_role=member.work_role,
+            is_active=member.is_active,
+            assigned_from=member.assigned_from,
+            assigned_to=member.assigned_to
+        ))
+    return members
+
 # --- GET SINGLE PROJECT REQUEST ---
 @router.get("/{project_id}", response_model=ProjectResponse)
 @run_with_sync_session()
@@ -304,56 +349,54 @@ def remove_project_owner(
 
 # --- BULK UPDATE OWNERS ---
 @router.put("/{project_id}/owners/bulk")
-@run_with_sync_session()
-def bulk_update_project_owners(
+async def bulk_update_project_owners(
     project_id: UUID,
     payload: BulkOwnersUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Replace all owners for a project with the provided list of user IDs.
+    New owners get `work_role`; owners that stay keep their role.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    if not await db.scalar(select(Project.id).filter(Project.id == project_id)):
         raise HTTPException(status_code=404, detail="Project not found")
 
-    current_owners = db.query(ProjectOwner).filter(
-        ProjectOwner.project_id == project_id
-    ).all()
-    current_owner_ids = {o.user_id for o in current_owners}
-
     new_owner_ids = set(payload.user_ids)
+    await _ensure_users_exist(db, new_owner_ids)
+
+    result = await db.execute(
+        select(ProjectOwner.user_id).filter(ProjectOwner.project_id == project_id)
+    )
+    current_owner_ids = set(result.scalars().all())
+
     to_remove = current_owner_ids - new_owner_ids
     to_add = new_owner_ids - current_owner_ids
 
     if to_remove:
-        db.query(ProjectOwner).filter(
-            ProjectOwner.project_id == project_id,
-            ProjectOwner.user_id.in_(to_remove)
-        ).delete(synchronize_session=False)
-
-    for user_id in to_add:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            db.add(ProjectOwner(
-                project_id=project_id,
-                user_id=user_id,
-                work_role=payload.work_role
-            ))
-
-    db.commit()
-
-    updated_owners = db.query(ProjectOwner).filter(
-        ProjectOwner.project_id == project_id
-    ).all()
-
+        await db.execute(
+            delete(ProjectOwner).filter(
+                ProjectOwner.project_id == project_id,
+                ProjectOwner.user_id.in_(to_remove)
+            )
+        )
+    db.add_all([
+        ProjectOwner(project_id=project_id, user_id=user_id, work_role=payload.work_role)
+        for user_id in to_add
+    ])
+    await db.commit()
+
+    result = await db.execute(
+        select(ProjectOwner, User.name)
+        .outerjoin(User, ProjectOwner.user_id == User.id)
+        .filter(ProjectOwner.project_id == project_id)
+    )
     owners = [{
         "id": str(owner.id),
         "project_id": str(owner.project_id),
         "user_id": str(owner.user_id),
-        "user_name": owner.user.name if owner.user else "Unknown",
+        "user_name": user_name or "Unknown",
         "work_role": owner.work_role,
-    } for owner in updated_owners]
+    } for owner, user_name in result.all()]
 
     return {
         "message": "Owners updated successfully",
@@ -362,6 +405,19 @@ def bulk_update_project_owners(
         "removed": len(to_remove),
     }
 
+
+async def _ensure_users_exist(db: AsyncSession, user_ids) -> None:
+    """One query for all IDs; 400 listing the unknown ones."""
+    if not user_ids:
+        return
+    result = await db.execute(select(User.id).filter(User.id.in_(user_ids)))
+    missing = set(user_ids) - set(result.scalars().all())
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown user IDs: {', '.join(sorted(str(user_id) for user_id in missing))}"
+        )
+
 # ==========================================
 #      PROJECT MEMBERS (WORKERS) APIs
 # ==========================================
@@ -404,6 +460,7 @@ def assign_member(
         is_active=True
     )
     db.add(member)
+    invalidate_on_commit(db, project_id=project_id)
     db.commit()
     db.refresh(member)
     
@@ -412,9 +469,113 @@ def assign_member(
     return member
 
 
+# --- BULK ASSIGN MEMBERS ---
+# Registered before PUT /{project_id}/members/{user_id} so "bulk" is not
+# taken for a user ID.
+@router.put("/{project_id}/members/bulk")
+async def bulk_update_project_members(
+    project_id: UUID,
+    payload: BulkMembersUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Make `members` the project's active members in one transaction: users
+    without an active assignment are added, changed work roles / end dates
+    are updated, and (with deactivate_missing) the rest are deactivated.
+    """
+    if not await db.scalar(select(Project.id).filter(Project.id == project_id)):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # Last entry wins for a user listed twice
+    desired = {item.user_id: item for item in payload.members}
+    await _ensure_users_exist(db, set(desired))
+
+    result = await db.execute(
+        select(ProjectMember).filter(
+            ProjectMember.project_id == project_id,
+            ProjectMember.is_active == True
+        )
+    )
+    current = {member.user_id: member for member in result.scalars().all()}
+
+    today = today_ist()
+    to_add = [item for user_id, item in desired.items() if user_id not in current]
+    updated = 0
+    for user_id, member in current.items():
+        item = desired.get(user_id)
+        if item is None:
+            continue
+        changed = False
+        if member.work_role != item.work_role:
+            member.work_role = item.work_role
+            changed = True
+        if "assigned_to" in item.model_fields_set and member.assigned_to != item.assigned_to:
+            member.assigned_to = item.assigned_to
+            changed = True
+        updated += changed
+
+    to_deactivate = [
+        member.id for user_id, member in current.items()
+        if payload.deactivate_missing and user_id not in desired
+    ]
+
+    if to_add:
+        # Skips a user who got an active assignment concurrently
+        # (uq_project_members_user_project_active)
+        await db.execute(
+            pg_insert(ProjectMember)
+            .values([{
+                "project_id": project_id,
+                "user_id": item.user_id,
+                "work_role": item.work_role,
+                "assigned_from": item.assigned_from or today,
+                "assigned_to": item.assigned_to,
+                "is_active": True,
+            } for item in to_add])
+            .on_conflict_do_nothing(
+                index_elements=[ProjectMember.user_id, ProjectMember.project_id],
+                index_where=ProjectMember.is_active == true(),
+            )
+        )
+    if to_deactivate:
+        await db.execute(
+            update(ProjectMember)
+            .filter(ProjectMember.id.in_(to_deactivate))
+            .values(
+                is_active=False,
+                assigned_to=func.least(func.coalesce(ProjectMember.assigned_to, today), today),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    invalidate_on_commit(db, project_id=project_id)
+    await db.commit()
+
+    result = await db.execute(
+        select(ProjectMember, User.name)
+        .join(User, ProjectMember.user_id == User.id)
+        .filter(
+            ProjectMember.project_id == project_id,
+            ProjectMember.is_active == True
+        )
+    )
+    members = []
+    for member, user_name in result.all():
+        member.user_name = user_name
+        members.append(MemberResponse.model_validate(member))
+
+    return {
+        "message": "Members updated successfully",
+        "members": members,
+        "added": len(to_add),
+        "updated": updated,
+        "deactivated": len(to_deactivate),
+    }
+
+
 # --- LIST MEMBERS ---
 
 @router.get("/{project_id}/members", response_model=list[ProjectMemberDetail])
+@http_cache("project_members", "users", response_model=list[ProjectMemberDetail])
 @run_with_sync_session()
 def list_project_members(
     project_id: UUID,
@@ -464,6 +625,7 @@ def remove_project_member(
 
     # 2. Delete the record
     db.delete(member_record)
+    invalidate_on_commit(db, project_id=project_id)
     db.commit()
 
     return {"message": "Member removed successfully"}
@@ -481,6 +643,7 @@ def remove_project_member(project_id: UUID, user_id: UUID, db: Session = Depends
         raise HTTPException(status_code=404, detail="Member assignment not found")
     
     db.delete(member)
+    invalidate_on_commit(db, project_id=project_id)
     db.commit()
     return {"message": "Member removed"}
 
@@ -502,6 +665,7 @@ def update_project_member_role(
         raise HTTPException(status_code=404, detail="Member assignment not found")
     
     member.work_role = payload.work_role
+    invalidate_on_commit(db, project_id=project_id)
     db.commit()
     db.refresh(member)
     return member
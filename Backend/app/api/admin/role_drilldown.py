@@ -8,6 +8,7 @@ from uuid import UUID
 from app.db.session import get_db
 from app.db.async_compat import run_with_sync_session
 from app.core.dependencies import get_current_user
+from app.services.dashboard_cache import cached_dashboard
 
 from app.models.project_members import ProjectMember
 from app.models.attendance_daily import AttendanceDaily
@@ -21,6 +22,7 @@ router = APIRouter(
 )
 
 @router.get("/")
+@cached_dashboard("role_drilldown", date_param="date_", project_param="project_id")
 @run_with_sync_session()
 def role_drilldown(
     project_id: UUID,
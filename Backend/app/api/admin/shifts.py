@@ -5,6 +5,7 @@ from typing import List
 
 from app.db.session import get_db
 from app.db.async_compat import run_with_sync_session
+from app.core.http_cache import http_cache
 from app.models.shift import Shift
 from app.schemas.shift import ShiftCreate, ShiftUpdate, ShiftResponse
 
@@ -20,6 +21,7 @@ def create_shift(payload: ShiftCreate, db: Session = Depends(get_db)):
     return shift
 
 @router.get("/", response_model=List[ShiftResponse])
+@http_cache("shifts", response_model=List[ShiftResponse])
 @run_with_sync_session()
 def list_shifts(db: Session = Depends(get_db)):
     return db.query(Shift).all()
@@ -1,19 +1,31 @@
+import base64
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import (
+    Date, and_, cast, exists, func, literal, literal_column, or_, select, true, tuple_, union, union_all,
+)
 from typing import List, Optional
 from uuid import UUID
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from pydantic import BaseModel
 
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.db.async_compat import run_with_sync_session
 from app.models.user_daily_metrics import UserDailyMetrics
 from app.models.user_quality import UserQuality, QualityRating
 from app.models.user import User
+from app.models.project import Project
 from app.models.project_members import ProjectMember
 from app.core.dependencies import get_current_user
+from app.services.dashboard_cache import invalidate_on_commit
+from app.services.quality_assessments import QualityAssessmentItem, submit_quality_assessments
+from app.services.quality_compaction import compact_user_quality
+from app.services.jobs import JobContext, job_manager
+from app.schemas.job import JobResponse
+from app.utils.serialization import FastJSONResponse, serialize_rows
 from app.schemas.user_daily_metrics import (
     UserDailyMetricsCreate,
     UserDailyMetricsResponse
@@ -59,6 +71,9 @@ async def get_daily_metrics(
     project_id: Optional[UUID] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    updated_since: Optional[datetime] = Query(
+        None, description="Only rows created or changed at/after this time (delta sync)"
+    ),
     limit: int = Query(1000, ge=1, le=5000),
     offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_db),
@@ -84,24 +99,21 @@ async def get_daily_metrics(
         query = query.filter(UserDailyMetrics.metric_date >= start_date)
     if end_date:
         query = query.filter(UserDailyMetrics.metric_date <= end_date)
+    if updated_since:
+        query = query.filter(UserDailyMetrics.updated_at >= updated_since)
 
-    query = query.order_by(UserDailyMetrics.metric_date.desc()).offset(offset).limit(limit)
+    # id breaks ties so offset pages are stable
+    query = query.order_by(UserDailyMetrics.metric_date.desc(), UserDailyMetrics.id).offset(offset).limit(limit)
     result = await db.execute(query)
-    rows = result.all()
-    return [
-        UserDailyMetricsResponse(
-            id=row.id,
-            user_id=row.user_id,
-            project_id=row.project_id,
-            work_role=row.work_role,
-            metric_date=row.metric_date,
-            hours_worked=float(row.hours_worked) if row.hours_worked is not None else 0.0,
-            tasks_completed=row.tasks_completed or 0,
-            productivity_score=float(row.productivity_score) if row.productivity_score is not None else None,
-            notes=row.notes,
+    # Fast path: rows come straight from typed columns, so skip building a
+    # Pydantic model per row and the response_model re-validation.
+    return FastJSONResponse(
+        serialize_rows(
+            result.all(),
+            result.keys(),
+            defaults={"hours_worked": 0.0, "tasks_completed": 0},
         )
-        for row in rows
-    ]
+    )
 
 @router.post("/batch", response_model=List[UserDailyMetricsResponse])
 @run_with_sync_session()
@@ -148,194 +160,209 @@ class QualityRatingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+def _encode_quality_cursor(metric_date: date, user_id, project_id) -> str:
+    return base64.urlsafe_b64encode(
+        json.dumps([metric_date.isoformat(), str(user_id), str(project_id)]).encode()
+    ).decode()
+
+
+def _decode_quality_cursor(cursor: str):
+    try:
+        metric_date, user_id, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(metric_date), UUID(user_id), UUID(project_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _quality_ratings_query(
+    user_id: Optional[UUID],
+    project_id: Optional[UUID],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    updated_since: Optional[datetime],
+    cursor: Optional[str],
+    limit: Optional[int],
+):
+    """
+    One SELECT for the quality-ratings rows, ordered by
+    (metric_date, user_id, project_id) DESC for keyset pagination:
+
+    - assessed: current UserQuality records, on the day they are valid from
+    - spine:    the distinct (user, project, day) keys of UserDailyMetrics in
+                the range that are not assessed that day, each LEFT JOIN
+                LATERAL to the newest UserQuality version valid on that day
+                (an index-only probe on (user_id, project_id, valid_from DESC),
+                see migrations/004_quality_ratings_indexes.sql)
+
+    All filters are applied in SQL; dates are compared to valid_from/valid_to
+    as ranges, so the timestamp indexes stay usable.
+    """
+    quality_scope = []
+    metric_scope = []
+    if user_id:
+        quality_scope.append(UserQuality.user_id == user_id)
+        metric_scope.append(UserDailyMetrics.user_id == user_id)
+    if project_id:
+        quality_scope.append(UserQuality.project_id == project_id)
+        metric_scope.append(UserDailyMetrics.project_id == project_id)
+
+    metric_range = []
+    assessed_range = []
+    if start_date:
+        metric_range.append(UserDailyMetrics.metric_date >= start_date)
+        assessed_range.append(UserQuality.valid_from >= literal(start_date, Date))
+    if end_date:
+        metric_range.append(UserDailyMetrics.metric_date <= end_date)
+        assessed_range.append(UserQuality.valid_from < literal(end_date + timedelta(days=1), Date))
+
+    if updated_since:
+        # Pairs with a quality record or daily metric written since then
+        changed = union(
+            select(UserQuality.user_id, UserQuality.project_id).filter(
+                UserQuality.updated_at >= updated_since, *quality_scope
+            ),
+            select(UserDailyMetrics.user_id, UserDailyMetrics.project_id).filter(
+                UserDailyMetrics.updated_at >= updated_since, *metric_scope, *metric_range
+            ),
+        ).cte("changed")
+        changed_pairs = select(changed.c.user_id, changed.c.project_id)
+        quality_scope.append(tuple_(UserQuality.user_id, UserQuality.project_id).in_(changed_pairs))
+        metric_scope.append(tuple_(UserDailyMetrics.user_id, UserDailyMetrics.project_id).in_(changed_pairs))
+
+    assessed_date = cast(UserQuality.valid_from, Date)
+    assessed = (
+        select(
+            UserQuality.user_id,
+            UserQuality.project_id,
+            assessed_date.label("metric_date"),
+            UserQuality.rating.label("quality_rating"),
+            UserQuality.quality_score,
+            UserQuality.accuracy,
+            UserQuality.critical_rate,
+            UserQuality.source,
+            UserQuality.assessed_by_user_id.label("assessed_by"),
+            UserQuality.notes,
+        )
+        .filter(UserQuality.is_current == True, *quality_scope, *assessed_range)
+        .distinct(UserQuality.user_id, UserQuality.project_id, assessed_date)
+        .order_by(UserQuality.user_id, UserQuality.project_id, assessed_date, UserQuality.valid_from.desc())
+        .cte("assessed")
+    )
+
+    spine = (
+        select(UserDailyMetrics.user_id, UserDailyMetrics.project_id, UserDailyMetrics.metric_date)
+        .filter(*metric_scope, *metric_range)
+        .distinct()
+        .subquery("spine")
+    )
+    # Only the version id is picked per day, so the probe is an index-only
+    # scan however much history a pair has; the chosen row is then read by PK
+    version = (
+        select(UserQuality.id.label("version_id"))
+        .filter(
+            UserQuality.user_id == spine.c.user_id,
+            UserQuality.project_id == spine.c.project_id,
+            # valid_from::date <= day and valid_to::date >= day, as ranges
+            UserQuality.valid_from < spine.c.metric_date + literal_column("1"),
+            or_(UserQuality.valid_to.is_(None), UserQuality.valid_to >= spine.c.metric_date),
+        )
+        .order_by(UserQuality.valid_from.desc())
+        .limit(1)
+        .lateral("version")
+    )
+    chosen = aliased(UserQuality, name="chosen")
+    resolved = (
+        select(
+            spine.c.user_id,
+            spine.c.project_id,
+            spine.c.metric_date,
+            chosen.rating.label("quality_rating"),
+            chosen.quality_score,
+            chosen.accuracy,
+            chosen.critical_rate,
+            chosen.source,
+            chosen.assessed_by_user_id.label("assessed_by"),
+            chosen.notes,
+        )
+        .select_from(
+            spine.outerjoin(version, true()).outerjoin(chosen, chosen.id == version.c.version_id)
+        )
+        .filter(
+            ~exists().where(
+                assessed.c.user_id == spine.c.user_id,
+                assessed.c.project_id == spine.c.project_id,
+                assessed.c.metric_date == spine.c.metric_date,
+            )
+        )
+    )
+
+    rows = union_all(select(assessed), resolved).subquery("quality_rows")
+    query = select(rows)
+    if cursor:
+        query = query.filter(
+            tuple_(rows.c.metric_date, rows.c.user_id, rows.c.project_id) < tuple_(*_decode_quality_cursor(cursor))
+        )
+    query = query.order_by(rows.c.metric_date.desc(), rows.c.user_id.desc(), rows.c.project_id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
 @router.get("/quality-ratings", response_model=List[QualityRatingResponse])
 async def get_quality_ratings(
     user_id: Optional[UUID] = None,
     project_id: Optional[UUID] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    updated_since: Optional[datetime] = Query(
+        None, description="Only (user, project) pairs with a change at/after this time (delta sync)"
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Keyset page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get quality ratings for users/projects in a date range.
     Uses SCD (Slowly Changing Dimension) logic from UserQuality table.
     Returns the quality rating that was valid for each (user, project, date) combination.
-    
-    OPTIMIZED: Eliminates N+1 queries by batch fetching quality records.
-    Expected performance: 30s -> <1s for large datasets.
-    
-    This endpoint returns quality assessments even if there's no corresponding UserDailyMetrics record.
-    It queries UserQuality directly to show manual assessments.
+
+    This endpoint returns quality assessments even if there's no corresponding UserDailyMetrics record:
+    current UserQuality records appear on the date they are valid from, and every
+    other (user, project, date) with daily metrics gets the version valid that day
+    (None values if not assessed).
+
+    One SQL statement (see _quality_ratings_query), newest date first. Pass
+    `limit` for keyset pages: the X-Next-Cursor response header goes back as
+    `cursor` while more rows remain.
+
+    With updated_since, only the (user, project) pairs that have a quality
+    record or daily metric created/changed since then are returned, with all
+    of their rows in the range; clients replace those pairs' rows.
     """
-    from sqlalchemy import cast, Date as SQLDate
-    
-    results = []
-    seen_combinations = set()  # Track (user_id, project_id, date) to avoid duplicates
-    
-    # First, get quality ratings from UserQuality table directly
-    # This ensures manual quality assessments show up even without daily metrics
-    quality_query = select(UserQuality).filter(
-        UserQuality.is_current == True
-    )
-    
-    if user_id:
-        quality_query = quality_query.filter(UserQuality.user_id == user_id)
-    if project_id:
-        quality_query = quality_query.filter(UserQuality.project_id == project_id)
-    
-    # Get all current quality records
-    quality_result = await db.execute(quality_query)
-    quality_records = quality_result.scalars().all()
-    
-    # For each quality record, use the valid_from date as the metric_date
-    # This shows the date the quality assessment applies to (the date it was assessed for)
-    for quality_record in quality_records:
-        # Use valid_from date as that's when the quality assessment becomes valid
-        if quality_record.valid_from:
-            target_date = quality_record.valid_from.date()
-        else:
-            continue  # Skip if no date available
-        
-        # Apply date filters if provided
-        if start_date and target_date < start_date:
-            continue
-        if end_date and target_date > end_date:
-            continue
-        
-        key = (quality_record.user_id, quality_record.project_id, target_date)
-        if key not in seen_combinations:
-            seen_combinations.add(key)
-            rating = quality_record.rating.value if hasattr(quality_record.rating, 'value') else str(quality_record.rating)
-            results.append({
-                "user_id": quality_record.user_id,
-                "project_id": quality_record.project_id,
-                "metric_date": target_date,
-                "quality_rating": rating,
-                "quality_score": float(quality_record.quality_score) if quality_record.quality_score else None,
-                "accuracy": float(quality_record.accuracy) if quality_record.accuracy else None,
-                "critical_rate": float(quality_record.critical_rate) if quality_record.critical_rate else None,
-                "source": quality_record.source,
-                "assessed_by": quality_record.assessed_by_user_id,
-                "notes": quality_record.notes
-            })
-    
-    # Also get quality ratings for dates that have UserDailyMetrics (for backward compatibility)
-    metrics_query = select(UserDailyMetrics)
-    
-    if user_id:
-        metrics_query = metrics_query.filter(UserDailyMetrics.user_id == user_id)
-    if project_id:
-        metrics_query = metrics_query.filter(UserDailyMetrics.project_id == project_id)
-    if start_date:
-        metrics_query = metrics_query.filter(UserDailyMetrics.metric_date >= start_date)
-    if end_date:
-        metrics_query = metrics_query.filter(UserDailyMetrics.metric_date <= end_date)
-    
-    metrics_result = await db.execute(metrics_query)
-    metrics = metrics_result.scalars().all()
-    
-    # OPTIMIZATION: Batch fetch all quality records in ONE query instead of N queries
-    if metrics:
-        # Collect unique (user_id, project_id) combinations from metrics
-        unique_combinations = set((m.user_id, m.project_id) for m in metrics 
-                                  if (m.user_id, m.project_id, m.metric_date) not in seen_combinations)
-        
-        if unique_combinations:
-            # Build conditions for all (user_id, project_id) pairs
-            # We'll fetch all quality records for these combinations, then filter by date in Python
-            # This is still much faster than N queries
-            conditions = []
-            for u_id, p_id in unique_combinations:
-                conditions.append(
-                    and_(
-                        UserQuality.user_id == u_id,
-                        UserQuality.project_id == p_id,
-                        UserQuality.is_current == True
-                    )
-                )
-            
-            # Fetch all relevant quality records in ONE query
-            if conditions:
-                all_quality_query = select(UserQuality).filter(
-                    or_(*conditions) if len(conditions) > 1 else conditions[0]
-                ).order_by(
-                    UserQuality.user_id,
-                    UserQuality.project_id,
-                    UserQuality.valid_from.desc()
-                )
-                all_quality_result = await db.execute(all_quality_query)
-                all_quality_records = all_quality_result.scalars().all()
-            else:
-                all_quality_records = []
-            
-            # Build a map: (user_id, project_id) -> list of quality records sorted by valid_from DESC
-            quality_map = {}
-            for qr in all_quality_records:
-                key = (qr.user_id, qr.project_id)
-                if key not in quality_map:
-                    quality_map[key] = []
-                quality_map[key].append(qr)
-            
-            # Now process metrics using the pre-fetched quality records
-            for metric in metrics:
-                target_date = metric.metric_date
-                key = (metric.user_id, metric.project_id, target_date)
-                
-                # Skip if we already have this combination from UserQuality query
-                if key in seen_combinations:
-                    continue
-                
-                # Find the quality record valid for this date using SCD logic
-                quality_record = None
-                quality_list = quality_map.get((metric.user_id, metric.project_id), [])
-                
-                for qr in quality_list:
-                    # Use CAST instead of func.date() to allow index usage
-                    valid_from_date = qr.valid_from.date() if qr.valid_from else None
-                    valid_to_date = qr.valid_to.date() if qr.valid_to else None
-                    
-                    if valid_from_date and valid_from_date <= target_date:
-                        if valid_to_date is None or valid_to_date >= target_date:
-                            quality_record = qr
-                            break  # Already sorted DESC, so first match is most recent
-                
-                # Quality is manually assessed - return None if not assessed
-                if quality_record:
-                    rating = quality_record.rating.value if hasattr(quality_record.rating, 'value') else str(quality_record.rating)
-                    quality_score = float(quality_record.quality_score) if quality_record.quality_score else None
-                    accuracy = float(quality_record.accuracy) if quality_record.accuracy else None
-                    critical_rate = float(quality_record.critical_rate) if quality_record.critical_rate else None
-                    source = quality_record.source
-                    assessed_by = quality_record.assessed_by_user_id
-                    notes = quality_record.notes
-                else:
-                    # No quality assessment exists - return None values
-                    rating = None
-                    quality_score = None
-                    accuracy = None
-                    critical_rate = None
-                    source = None
-                    assessed_by = None
-                    notes = None
-                
-                seen_combinations.add(key)
-                results.append({
-                    "user_id": metric.user_id,
-                    "project_id": metric.project_id,
-                    "metric_date": target_date,
-                    "quality_rating": rating,
-                    "quality_score": quality_score,
-                    "accuracy": accuracy,
-                    "critical_rate": critical_rate,
-                    "source": source,
-                    "assessed_by": assessed_by,
-                    "notes": notes
-                })
-    
-    # Sort by date descending
-    results.sort(key=lambda x: x["metric_date"], reverse=True)
-    
-    return results
+    query = _quality_ratings_query(user_id, project_id, start_date, end_date, updated_since, cursor, limit)
+    rows = (await db.execute(query)).all()
+
+    results = [
+        {
+            "user_id": row.user_id,
+            "project_id": row.project_id,
+            "metric_date": row.metric_date,
+            "quality_rating": row.quality_rating.value if hasattr(row.quality_rating, "value") else row.quality_rating,
+            "quality_score": row.quality_score or None,
+            "accuracy": row.accuracy or None,
+            "critical_rate": row.critical_rate or None,
+            "source": row.source,
+            "assessed_by": row.assessed_by,
+            "notes": row.notes,
+        }
+        for row in rows
+    ]
+
+    headers = {}
+    if limit and len(rows) == limit:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = _encode_quality_cursor(last.metric_date, last.user_id, last.project_id)
+    return FastJSONResponse(results, headers=headers)
 
 # =====================================================================
 # QUALITY ASSESSMENT ENDPOINT
@@ -371,35 +398,8 @@ class QualityAssessmentResponse(BaseModel):
     class Config:
         from_attributes = True
 
-@router.post("/quality", response_model=QualityAssessmentResponse)
-async def create_quality_assessment(
-    payload: QualityAssessmentCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Create or update a quality assessment for a user on a specific date.
-    Uses SCD Type 2 versioning - archives old record and creates new one.
-    """
-    # Get current user (assessor)
-    assessed_by = current_user.id
-    
-    # Get work_role from project_members if not provided
-    work_role = payload.work_role
-    if not work_role:
-        member_result = await db.execute(
-            select(ProjectMember).filter(
-                ProjectMember.user_id == payload.user_id,
-                ProjectMember.project_id == payload.project_id
-            )
-        )
-        member = member_result.scalar_one_or_none()
-        if member:
-            work_role = member.work_role
-        else:
-            work_role = "UNKNOWN"
-    
-    # Validate rating
+def _validate_quality_assessment(payload: QualityAssessmentCreate) -> QualityRating:
+    """Validate rating and score ranges; raises HTTPException(400)."""
     try:
         rating_enum = QualityRating(payload.rating.upper())
     except ValueError:
@@ -408,7 +408,6 @@ async def create_quality_assessment(
             detail=f"Invalid rating. Must be one of: {[r.value for r in QualityRating]}"
         )
     
-    # Validate quality_score if provided
     if payload.quality_score is not None:
         if payload.quality_score < 0 or payload.quality_score > 10:
             raise HTTPException(
@@ -416,7 +415,6 @@ async def create_quality_assessment(
                 detail="Quality score must be between 0 and 10"
             )
     
-    # Validate accuracy if provided
     if payload.accuracy is not None:
         if payload.accuracy < 0 or payload.accuracy > 100:
             raise HTTPException(
@@ -424,13 +422,43 @@ async def create_quality_assessment(
                 detail="Accuracy must be between 0 and 100"
             )
     
-    # Validate critical_rate if provided
     if payload.critical_rate is not None:
         if payload.critical_rate < 0 or payload.critical_rate > 100:
             raise HTTPException(
                 status_code=400,
                 detail="Critical rate must be between 0 and 100"
             )
+    return rating_enum
+
+@router.post("/quality", response_model=QualityAssessmentResponse)
+async def create_quality_assessment(
+    payload: QualityAssessmentCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Create or update a quality assessment for a user on a specific date.
+    Uses SCD Type 2 versioning - archives old record and creates new one.
+    """
+    # Get current user (assessor)
+    assessed_by = current_user.id
+    
+    # Get work_role from project_members if not provided
+    work_role = payload.work_role
+    if not work_role:
+        member_result = await db.execute(
+            select(ProjectMember).filter(
+                ProjectMember.user_id == payload.user_id,
+                ProjectMember.project_id == payload.project_id
+            )
+        )
+        member = member_result.scalar_one_or_none()
+        if member:
+            work_role = member.work_role
+        else:
+            work_role = "UNKNOWN"
+    
+    rating_enum = _validate_quality_assessment(payload)
     
     # Find existing current quality record
     current_quality_result = await db.execute(
@@ -470,6 +498,8 @@ async def create_quality_assessment(
     )
     
     db.add(new_quality)
+    # Closing the previous version changes the rating of every day it covered
+    invalidate_on_commit(db)
     await db.commit()
     await db.refresh(new_quality)
     
@@ -479,9 +509,9 @@ async def create_quality_assessment(
         user_id=new_quality.user_id,
         project_id=new_quality.project_id,
         rating=new_quality.rating.value,
-        quality_score=float(new_quality.quality_score) if new_quality.quality_score else None,
-        accuracy=float(new_quality.accuracy) if new_quality.accuracy else None,
-        critical_rate=float(new_quality.critical_rate) if new_quality.critical_rate else None,
+        quality_score=new_quality.quality_score or None,
+        accuracy=new_quality.accuracy or None,
+        critical_rate=new_quality.critical_rate or None,
         notes=new_quality.notes,
         source=new_quality.source,
         assessed_by_user_id=new_quality.assessed_by_user_id,
@@ -490,3 +520,125 @@ async def create_quality_assessment(
         valid_from=new_quality.valid_from,
         valid_to=new_quality.valid_to,
     )
+
+
+# =====================================================================
+# BATCH QUALITY ASSESSMENT ENDPOINT
+# =====================================================================
+
+QUALITY_BATCH_MAX_ITEMS = 1000
+
+class QualityAssessmentBatchRequest(BaseModel):
+    items: List[QualityAssessmentCreate]
+
+class QualityAssessmentBatchItemResult(BaseModel):
+    index: int
+    status: str  # "created" or "error"
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+class QualityAssessmentBatchResponse(BaseModel):
+    created: int
+    errors: int
+    results: List[QualityAssessmentBatchItemResult]
+
+async def _existing_user_and_project_ids(db: AsyncSession, user_ids: set, project_ids: set):
+    """(user ids, project ids) of the given ones that exist, in one round trip."""
+    rows = (await db.execute(union_all(
+        select(literal("user").label("kind"), User.id).filter(User.id.in_(user_ids)),
+        select(literal("project").label("kind"), Project.id).filter(Project.id.in_(project_ids)),
+    ))).all()
+    return (
+        {row.id for row in rows if row.kind == "user"},
+        {row.id for row in rows if row.kind == "project"},
+    )
+
+@router.post("/quality/batch", response_model=QualityAssessmentBatchResponse)
+async def create_quality_assessments_batch(
+    payload: QualityAssessmentBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Create many quality assessments at once (same rules as POST /quality).
+
+    Invalid items (bad rating or scores, unknown user or project) are
+    reported in `results` and skipped; the valid ones are written with one
+    id check, one work-role lookup, one UPDATE closing the superseded
+    versions and one multi-row INSERT. Items for the same user/project are
+    applied in order, so the last one becomes current.
+    """
+    if len(payload.items) > QUALITY_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {QUALITY_BATCH_MAX_ITEMS} assessments per batch"
+        )
+
+    # Unknown ids would fail the whole INSERT on a foreign key: check them
+    # all with one statement and report those items instead
+    known_users, known_projects = await _existing_user_and_project_ids(
+        db, {item.user_id for item in payload.items}, {item.project_id for item in payload.items}
+    )
+
+    results: List[QualityAssessmentBatchItemResult] = []
+    valid: List[tuple] = []
+    for index, item in enumerate(payload.items):
+        try:
+            rating_enum = _validate_quality_assessment(item)
+        except HTTPException as exc:
+            results.append(QualityAssessmentBatchItemResult(index=index, status="error", detail=exc.detail))
+            continue
+        if item.user_id not in known_users:
+            results.append(QualityAssessmentBatchItemResult(
+                index=index, status="error", detail=f"User {item.user_id} not found"
+            ))
+            continue
+        if item.project_id not in known_projects:
+            results.append(QualityAssessmentBatchItemResult(
+                index=index, status="error", detail=f"Project {item.project_id} not found"
+            ))
+            continue
+        valid.append((index, QualityAssessmentItem(
+            user_id=item.user_id,
+            project_id=item.project_id,
+            metric_date=item.metric_date,
+            rating=rating_enum,
+            quality_score=item.quality_score,
+            accuracy=item.accuracy,
+            critical_rate=item.critical_rate,
+            notes=item.notes,
+            work_role=item.work_role,
+        )))
+
+    if valid:
+        ids = await submit_quality_assessments(db, [item for _, item in valid], current_user.id)
+        await db.commit()
+        results.extend(
+            QualityAssessmentBatchItemResult(index=index, status="created", id=new_id)
+            for (index, _), new_id in zip(valid, ids)
+        )
+
+    results.sort(key=lambda result: result.index)
+    return QualityAssessmentBatchResponse(
+        created=len(valid),
+        errors=len(payload.items) - len(valid),
+        results=results,
+    )
+
+
+# =====================================================================
+# QUALITY HISTORY COMPACTION
+# =====================================================================
+
+@router.post("/quality/compact/jobs", response_model=JobResponse, status_code=202)
+async def compact_quality_history_job(user: User = Depends(get_current_user)):
+    """
+    Merge identical consecutive quality versions and archive old closed ones
+    (also run daily by the scheduler), as a background job. The result has
+    rows saved and the quality-ratings lookup latency before and after.
+    """
+    async def run(ctx: JobContext):
+        async with AsyncSessionLocal() as db:
+            return await compact_user_quality(db)
+
+    return job_manager.submit("compact_user_quality", run, owner_id=user.id)
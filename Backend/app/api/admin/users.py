@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy import func, select, case, and_, or_, literal, cast, String
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, case, and_, or_, literal, cast, String, update, values, column, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, Session
+from sqlalchemy.orm import aliased
 # TODO: Convert remaining endpoints to async - for now using AsyncSession everywhere
 # When converting, change Session to AsyncSession and add async/await
-from app.db.session import get_db  # Use centralized get_db
-from app.db.async_compat import run_with_sync_session
+from app.db.session import get_db, AsyncSessionLocal  # Use centralized get_db
 from app.models.shift import Shift
 from app.models.user import User, UserRole
 from app.models.project_members import ProjectMember
@@ -13,12 +13,17 @@ from app.models.attendance_daily import AttendanceDaily, AttendanceStatus
 from app.models.attendance_request import AttendanceRequest
 from app.models.history import TimeHistory
 from app.core.dependencies import get_current_user
+from app.core.http_cache import http_cache
+from app.services.dashboard_cache import cached_dashboard
 from app.utils.timezone import today_ist
+from app.utils.serialization import json_dumps
 from app.schemas.user import UserBatchUpdateRequest, UserCreate, UserResponse, UserUpdate, UserQualityUpdate, UserSystemUpdate, UsersAdminSearchFilters, UserBatchUpdate
 from typing import List, Optional
 from uuid import UUID
 from datetime import date
 from math import ceil
+import base64
+import json
 import os
 import logging
 
@@ -97,6 +102,7 @@ async def list_users(
         )
 
 @router.get("/kpi_cards_info")
+@cached_dashboard("kpi_cards")
 async def kpi_cards_info(
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
@@ -130,6 +136,7 @@ async def kpi_cards_info(
     }
 
 @router.get("/reporting_managers")
+@http_cache("users")
 async def list_rep_managers(
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
@@ -149,6 +156,7 @@ async def list_rep_managers(
     ]
 
 @router.get("/project_managers")
+@http_cache("users")
 async def list_project_managers(
     db: AsyncSession = Depends(get_db),
     _: User = Depends(get_current_user)
@@ -172,47 +180,41 @@ async def list_project_managers(
         "role": m.role.value if hasattr(m.role, "value") else str(m.role),
     } for m in managers]
 
-@router.post("/users_with_filter")
-@run_with_sync_session()
-def search_with_filters(
-    payload: UsersAdminSearchFilters,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user)
-):
-    date_str = payload.date
-    email = payload.email
-    name = payload.name
-    allocated = payload.allocated
-    work_role = payload.work_role
-    is_active = payload.is_active
-    status = payload.status
+def _encode_cursor(name: str, user_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([name, str(user_id)]).encode()).decode()
 
-    # Parse date string to date object, default to IST today if not provided
-    if date_str:
-        try:
-            from datetime import datetime as dt
-            today = dt.fromisoformat(date_str).date() if isinstance(date_str, str) else date_str
-        except (ValueError, AttributeError):
-            today = today_ist()
-    else:
-        today = today_ist()
+
+def _decode_cursor(cursor: str):
+    try:
+        name, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return name, UUID(user_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _users_with_filter_query(payload: UsersAdminSearchFilters, today: date, with_total: bool):
+    """
+    One SELECT for the users_with_filter rows, ordered by (name, id) for
+    keyset pagination. today_status is computed once in an inner select and
+    filtered on from outside; with_total adds count(*) OVER () over all
+    matching rows (before the cursor / limit apply).
+    """
     Manager = aliased(User)
 
     project_count_sq = (
-        db.query(
+        select(
             ProjectMember.user_id.label("user_id"),
             func.count(ProjectMember.id).label("project_count"),
-
         )
         .group_by(ProjectMember.user_id)
         .subquery()
     )
 
-    # Query attendance status for today
     # Use func.max() which will prioritize PRESENT (alphabetically PRESENT > ABSENT > UNKNOWN)
     # If user has multiple records for different projects, PRESENT will be selected
+    # (idx_attendance_daily_date_user)
     attendance_sq = (
-        db.query(
+        select(
             AttendanceDaily.user_id.label("user_id"),
             func.max(AttendanceDaily.status).label("status"),
         )
@@ -221,9 +223,9 @@ def search_with_filters(
         .subquery()
     )
 
-    # Query approved leave requests for today.
+    # Approved leave requests covering the day (idx_attendance_requests_status_range)
     leave_sq = (
-        db.query(
+        select(
             AttendanceRequest.user_id.label("user_id"),
             func.max(AttendanceRequest.request_type).label("leave_type"),
         )
@@ -240,7 +242,7 @@ def search_with_filters(
     # Mark user as not allocated only when they currently have an active
     # session on the dedicated "Not allocated" project.
     active_not_allocated_sq = (
-        db.query(TimeHistory.user_id.label("user_id"))
+        select(TimeHistory.user_id.label("user_id"))
         .filter(
             TimeHistory.project_id == NOT_ALLOCATED_PROJECT_ID,
             TimeHistory.clock_out_at.is_(None),
@@ -248,17 +250,6 @@ def search_with_filters(
         .distinct()
         .subquery()
     )
-    
-    # Debug: Log the date being used for the query
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"[ATTENDANCE QUERY] Querying attendance for date: {today}, type: {type(today)}")
-    
-    # Debug: Count how many attendance records exist for today
-    attendance_count = db.query(AttendanceDaily).filter(
-        AttendanceDaily.attendance_date == today
-    ).count()
-    logger.info(f"[ATTENDANCE QUERY] Found {attendance_count} attendance records for date {today}")
 
     # Compute today_status: prioritize approved leave, then attendance record.
     today_status_expr = case(
@@ -276,8 +267,8 @@ def search_with_filters(
         else_=literal("UNKNOWN"),
     )
 
-    query = (
-        db.query(
+    inner = (
+        select(
             User.id,
             User.name,
             User.email,
@@ -286,15 +277,8 @@ def search_with_filters(
             User.is_active,
             User.default_shift_id.label("shift_id"),
             Shift.name.label("shift_name"),
-            Manager.name.label("reporting_manager"),
             Manager.id.label("reporting_manager_id"),
-            # case(
-            #     (User.work_role == "CONTRACTOR", True),
-            #     else_=False
-            # ).label("is_contractor"),
-            func.coalesce(project_count_sq.c.project_count, 0).label(
-                "allocated_projects"
-            ),
+            func.coalesce(project_count_sq.c.project_count, 0).label("allocated_projects"),
             case(
                 (active_not_allocated_sq.c.user_id.isnot(None), True),
                 else_=False,
@@ -307,64 +291,127 @@ def search_with_filters(
         .outerjoin(leave_sq, leave_sq.c.user_id == User.id)
         .outerjoin(active_not_allocated_sq, active_not_allocated_sq.c.user_id == User.id)
         .outerjoin(Shift, Shift.id == User.default_shift_id)
-    ) 
+    )
 
     # ---- Filters ----
-    if email:
-        query = query.filter(User.email.ilike(f"%{email}%"))
+    if payload.email:
+        inner = inner.filter(User.email.ilike(f"%{payload.email}%"))
 
-    if name:
-        query = query.filter(User.name.ilike(f"%{name}%"))
+    if payload.name:
+        inner = inner.filter(User.name.ilike(f"%{payload.name}%"))
 
-    if work_role:
-        query = query.filter(User.work_role == work_role)
+    if payload.work_role:
+        inner = inner.filter(User.work_role == payload.work_role)
 
-    if is_active is not None:
-        query = query.filter(User.is_active == is_active)
+    if payload.is_active is not None:
+        inner = inner.filter(User.is_active == payload.is_active)
 
-    if allocated is not None:
-        if allocated:
-            query = query.filter(
-                func.coalesce(project_count_sq.c.project_count, 0) > 0
-            )
+    rows = inner.subquery("filtered_users")
+    query = select(rows)
+
+    if payload.allocated is not None:
+        if payload.allocated:
+            query = query.filter(rows.c.allocated_projects > 0)
         else:
-            query = query.filter(
-                func.coalesce(project_count_sq.c.project_count, 0) == 0
-            )
+            query = query.filter(rows.c.allocated_projects == 0)
 
-    if status is not None:
-        query = query.filter(today_status_expr == status)
+    if payload.status is not None:
+        query = query.filter(rows.c.today_status == payload.status)
 
+    if with_total:
+        query = select(query.add_columns(func.count().over().label("total")).subquery("counted_users"))
 
-    total = query.count()
-    results = (
-        query
-        .order_by(User.name.asc())
-        .all()
-    )
+    page = query.subquery("page") if payload.cursor else None
+    if page is not None:
+        cursor_name, cursor_id = _decode_cursor(payload.cursor)
+        query = select(page).filter(tuple_(page.c.name, page.c.id) > tuple_(cursor_name, cursor_id))
+
+    columns = query.selected_columns
+    query = query.order_by(columns.name.asc(), columns.id.asc())
+    if payload.limit:
+        query = query.limit(payload.limit)
+    return query
+
+
+def _user_filter_item(r) -> dict:
+    return {
+        "id": r.id,
+        "name": r.name,
+        "email": r.email,
+        "role": r.role.value if hasattr(r.role, 'value') else str(r.role),  # Convert enum to string
+        "work_role": r.work_role,
+        "is_active": r.is_active,
+        "shift_id": r.shift_id,
+        "shift_name": r.shift_name,
+        "rpm_user_id": r.reporting_manager_id,
+        "allocated_projects": r.allocated_projects,
+        "is_not_allocated": r.is_not_allocated,
+        "today_status": r.today_status,
+    }
+
+
+@router.post("/users_with_filter")
+async def search_with_filters(
+    payload: UsersAdminSearchFilters,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user)
+):
+    """
+    Users with allocation and today's attendance status, ordered by name.
+
+    Pass `limit` for keyset pages (meta.next_cursor -> `cursor`); meta.total
+    comes from the same query (include_total=false skips it). With
+    `Accept: application/x-ndjson` the rows are streamed one JSON object per
+    line, followed by a {"meta": ...} line.
+    """
+    date_str = payload.date
+
+    # Parse date string to date object, default to IST today if not provided
+    if date_str:
+        try:
+            from datetime import datetime as dt
+            today = dt.fromisoformat(date_str).date() if isinstance(date_str, str) else date_str
+        except (ValueError, AttributeError):
+            today = today_ist()
+    else:
+        today = today_ist()
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        query = _users_with_filter_query(payload, today, with_total=False)
+        return StreamingResponse(_stream_users_with_filter(query, payload.limit), media_type="application/x-ndjson")
+
+    query = _users_with_filter_query(payload, today, with_total=payload.include_total)
+    results = (await db.execute(query)).all()
+
+    total = None
+    if payload.include_total:
+        total = results[0].total if results else (0 if not payload.cursor else None)
+    next_cursor = None
+    if payload.limit and len(results) == payload.limit:
+        next_cursor = _encode_cursor(results[-1].name, results[-1].id)
 
     # ---- Response ----
     return {
-        "items": [{
-            "id": r.id,
-            "name": r.name,
-            "email": r.email,
-            "role": r.role.value if hasattr(r.role, 'value') else str(r.role),  # Convert enum to string
-            "work_role": r.work_role,
-            "is_active": r.is_active,
-            "shift_id": r.shift_id,
-            "shift_name": r.shift_name,
-            "rpm_user_id": r.reporting_manager_id,
-            "allocated_projects": r.allocated_projects,
-            "is_not_allocated": r.is_not_allocated,
-            "today_status": r.today_status,
-        }
-        for r in results
-        ],
+        "items": [_user_filter_item(r) for r in results],
         "meta": {
             "total": total,
+            "next_cursor": next_cursor,
         }
-    } 
+    }
+
+
+async def _stream_users_with_filter(query, limit: Optional[int]):
+    # Own session: the request's session is closed once the handler returns
+    count, last = 0, None
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=500))
+        async for r in result:
+            count += 1
+            last = r
+            yield json_dumps(_user_filter_item(r)) + b"\n"
+    next_cursor = _encode_cursor(last.name, last.id) if limit and count == limit else None
+    yield json_dumps({"meta": {"count": count, "next_cursor": next_cursor}}) + b"\n"
 
 @router.post("/", response_model=UserResponse)
 async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -567,42 +614,57 @@ async def bulk_upadte_users(
     _: User = Depends(get_current_user)
 ):
 
+    """
+    Apply per-user changes in a few statements: one SELECT for the targets,
+    then one UPDATE ... FROM (VALUES ...) per distinct set of changed columns.
+    Items that fail validation are reported in `failed`; the rest are applied.
+    """
     updated_ids = []
     failed = []
 
+    target_ids = {item.id for item in payload.updates}
+    existing_ids = set()
+    if target_ids:
+        result = await db.execute(select(User.id).filter(User.id.in_(target_ids)))
+        existing_ids = set(result.scalars().all())
+
+    # Later items for the same user win, as when they were applied one by one
+    pending = {}
     for item in payload.updates:
         user_id = item.id
-        changes = item.changes.dict(exclude_unset=True)
+        changes = item.changes.model_dump(exclude_unset=True)
 
         if not changes:
             continue  # nothing to update
 
-        result = await db.execute(select(User).filter(User.id == user_id))
-        user = result.scalar_one_or_none()
-
-        if not user:
+        if user_id not in existing_ids:
             failed.append({
                 "id": str(user_id),
                 "error": "User not found"
             })
             continue
 
-        if "rpm_user_id" in changes and str(changes["rpm_user_id"]).split(" — ")[0] == user.id:
+        if "rpm_user_id" in changes and changes["rpm_user_id"] == user_id:
             failed.append({
                 "id": str(user_id),
                 "error": "User cannot be their own reporting manager"
             })
             continue
 
-        for field, value in changes.items():
-            setattr(user, field, value)
-
+        pending.setdefault(user_id, {}).update(changes)
         updated_ids.append(str(user_id))
 
+    groups = {}
+    for user_id, changes in pending.items():
+        groups.setdefault(tuple(sorted(changes)), []).append((user_id, changes))
+
     try:
+        for columns, rows in groups.items():
+            await _update_users_from_values(db, columns, rows)
         await db.commit()
     except Exception as e:
         await db.rollback()
+        logger.error(f"Bulk user update failed: {e}")
         raise HTTPException(status_code=500, detail="Batch update failed")
 
     return {
@@ -613,6 +675,32 @@ async def bulk_upadte_users(
     }
 
 
+# Stay well below asyncpg's 32767 bind parameters per statement
+_BULK_UPDATE_MAX_PARAMS = 30000
+
+
+async def _update_users_from_values(db: AsyncSession, columns, rows) -> None:
+    """UPDATE users SET <columns> FROM (VALUES (id, ...), ...) for `rows`."""
+    table = User.__table__
+    rows_per_statement = max(1, _BULK_UPDATE_MAX_PARAMS // (len(columns) + 1))
+    for start in range(0, len(rows), rows_per_statement):
+        chunk = rows[start:start + rows_per_statement]
+        changes = values(
+            column("id", table.c.id.type),
+            *[column(name, table.c[name].type) for name in columns],
+            name="changes",
+        ).data([
+            (user_id, *[row[name] for name in columns])
+            for user_id, row in chunk
+        ])
+        # NULLs in VALUES are untyped: cast back to the column type
+        await db.execute(
+            update(User)
+            .where(User.id == changes.c.id)
+            .values({name: cast(changes.c[name], table.c[name].type) for name in columns})
+        )
+
+
 @router.delete("/{user_id}")
 async def deactivate_user(
     user_id: UUID,
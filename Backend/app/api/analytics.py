@@ -4,7 +4,7 @@ from sqlalchemy import func, cast, String
 from datetime import date
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.db.async_compat import run_with_sync_session
 from app.models.history import TimeHistory
 from app.models.user_daily_metrics import UserDailyMetrics
@@ -14,6 +14,10 @@ from app.models.project_members import ProjectMember
 # Import your specific UserQuality model
 from app.models.user_quality import UserQuality, QualityRating 
 from app.models.user import User
+from app.services.dashboard_cache import invalidate_on_commit
+from app.core.dependencies import get_current_user
+from app.schemas.job import JobResponse
+from app.services.jobs import JobContext, job_manager
 
 router = APIRouter(prefix="/analytics", tags=["Analytics Engine"])
 
@@ -43,7 +47,7 @@ def calculate_daily_productivity(
 
     # --- STEP 2: Benchmarks ---
     total_project_tasks = sum(log.total_tasks for log in daily_logs)
-    total_project_hours = sum(float(log.total_mins or 0) for log in daily_logs) / 60
+    total_project_hours = sum((log.total_mins or 0) for log in daily_logs) / 60
     active_users = len(daily_logs)
     
     avg_tasks = total_project_tasks / active_users if active_users > 0 else 0
@@ -103,7 +107,7 @@ def calculate_daily_productivity(
             )
             db.add(u_metric)
 
-        u_metric.hours_worked = float(log.total_mins or 0) / 60
+        u_metric.hours_worked = (log.total_mins or 0) / 60
         u_metric.tasks_completed = log.total_tasks
         u_metric.productivity_score = score
         
@@ -126,6 +130,9 @@ def calculate_daily_productivity(
                 current_quality.quality_score = score
                 current_quality.assessed_at = func.now()
                 needs_new_version = False
+            elif current_quality.rating == rating_label and current_quality.quality_score == score:
+                # Same grade as the current version: it stays valid, no new history row
+                needs_new_version = False
             else:
                 # It's an old record. Archive it.
                 current_quality.is_current = False
@@ -171,6 +178,7 @@ def calculate_daily_productivity(
     if active_users > 0:
         p_metric.avg_productivity_score = total_score_sum / active_users
 
+    invalidate_on_commit(db, day=calculation_date, project_id=project_id)
     db.commit()
     
     return {
@@ -180,3 +188,19 @@ def calculate_daily_productivity(
         "processed_users": active_users,
         "details": results_summary
     }
+
+@router.post("/calculate-all/jobs", response_model=JobResponse, status_code=202)
+async def calculate_all_projects_job(user: User = Depends(get_current_user)):
+    """
+    Manual trigger for the scheduler's all-projects recalculation (last 30
+    days), run as a background job; progress counts projects.
+    """
+    from app.services.scheduler_service import _calculate_all_projects_automatically_sync
+
+    async def run(ctx: JobContext):
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(
+                lambda session: _calculate_all_projects_automatically_sync(session, progress=ctx.progress)
+            )
+
+    return job_manager.submit("calculate_all_projects", run, owner_id=user.id)
@@ -18,7 +18,7 @@ from app.models.user import User
 from app.models.project_members import ProjectMember
 from app.models.project_owners import ProjectOwner
 from app.models.project import Project
-from app.services.notification_service import send_attendance_request_created_email
+from app.services.notification_service import enqueue_attendance_request_created_emails
 
 
 router = APIRouter(
@@ -49,10 +49,9 @@ def create_request(
 )
 
     db.add(req)
-    db.commit()
-    db.refresh(req)
 
-    # Notify project owners + RPM about the new request
+    # Notify project owners + RPM about the new request. The emails are
+    # queued in the same transaction and sent by the outbox dispatcher.
     recipients = {}
 
     if user.rpm_user_id:
@@ -85,17 +84,19 @@ def create_request(
             if owner.email and owner.id != user.id:
                 recipients[owner.id] = owner
 
-    for recipient in recipients.values():
-        send_attendance_request_created_email(
-            recipient_email=recipient.email,
-            recipient_name=recipient.name or recipient.email,
-            requester_name=user.name or user.email,
-            request_type=req.request_type,
-            start_date=str(req.start_date),
-            end_date=str(req.end_date),
-            reason=req.reason,
-            project_names=project_names,
-        )
+    enqueue_attendance_request_created_emails(
+        db,
+        recipients=[(recipient.email, recipient.name) for recipient in recipients.values()],
+        requester_name=user.name or user.email,
+        request_type=req.request_type,
+        start_date=str(req.start_date),
+        end_date=str(req.end_date),
+        reason=req.reason,
+        project_names=project_names,
+    )
+
+    db.commit()
+    db.refresh(req)
 
     return req
 
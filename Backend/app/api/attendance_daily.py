@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
@@ -6,6 +7,7 @@ from uuid import UUID
 from app.db.session import get_db
 from app.db.async_compat import run_with_sync_session
 from app.models.attendance_daily import AttendanceDaily
+from app.services.dashboard_cache import invalidate_on_commit
 from app.schemas.attendance_daily import (
     AttendanceDailyCreate,
     AttendanceDailyUpdate,
@@ -17,6 +19,23 @@ router = APIRouter(
     tags=["Attendance Daily"]
 )
 
+# Unique index on attendance_daily(user_id, attendance_date)
+ATTENDANCE_DATE_INDEX = "uq_attendance_daily_user_date"
+
+
+def _commit_attendance(db: Session) -> None:
+    """Commit; a second entry for the same (user, date) becomes a 409."""
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if ATTENDANCE_DATE_INDEX in str(e.orig):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Attendance entry for this user and date already exists",
+            )
+        raise
+
 #CREATE (POST)
 @router.post("/", response_model=AttendanceDailyResponse)
 @run_with_sync_session()
@@ -27,7 +46,8 @@ def create_attendance(
     attendance = AttendanceDaily(**payload.model_dump())
 
     db.add(attendance)
-    db.commit()
+    invalidate_on_commit(db, day=attendance.attendance_date)
+    _commit_attendance(db)
     db.refresh(attendance)
 
     return attendance
@@ -93,10 +113,13 @@ def update_attendance(
 
     update_data = payload.model_dump(exclude_unset=True)
 
+    invalidate_on_commit(db, day=attendance.attendance_date)
     for field, value in update_data.items():
         setattr(attendance, field, value)
+    if "attendance_date" in update_data:
+        invalidate_on_commit(db, day=attendance.attendance_date)
 
-    db.commit()
+    _commit_attendance(db)
     db.refresh(attendance)
 
     return attendance
@@ -118,5 +141,6 @@ def delete_attendance(
             detail="Attendance entry not found",
         )
 
+    invalidate_on_commit(db, day=attendance.attendance_date)
     db.delete(attendance)
     db.commit()
@@ -0,0 +1,71 @@
+"""
+Status, results and cancellation for background jobs (app/services/jobs.py).
+
+Jobs are started by the `.../jobs` POST endpoints of the feature that owns
+them (bulk uploads, report exports, metrics recalculation); those return the
+job, and the client polls GET /jobs/{job_id} until it is SUCCEEDED.
+"""
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.core.dependencies import get_current_user
+from app.models.user import User, UserRole
+from app.schemas.job import JobResponse
+from app.services.jobs import JobStatus, job_manager
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+
+def _get_owned_job(job_id: str, current_user: User) -> dict:
+    job = job_manager.get(job_id)
+    # Other users' jobs are reported as missing rather than forbidden
+    if job is None or (
+        current_user.role != UserRole.ADMIN and job["owner_id"] != str(current_user.id)
+    ):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Progress (done/total/percent), ETA and outcome of a job."""
+    return _get_owned_job(job_id, current_user)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, current_user: User = Depends(get_current_user)):
+    """
+    The job's artifact (streamed from disk), or its JSON result when it
+    produced no file.
+    """
+    job = _get_owned_job(job_id, current_user)
+    if job["status"] == JobStatus.FAILED.value:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job['error']}")
+    if job["status"] != JobStatus.SUCCEEDED.value:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    artifact = job["artifact"]
+    if artifact is None:
+        return job["result"]
+    if not os.path.exists(artifact["path"]):
+        raise HTTPException(status_code=410, detail="Job result has expired")
+    return FileResponse(
+        artifact["path"],
+        media_type=artifact["media_type"],
+        filename=artifact["filename"],
+    )
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Cancel a queued or running job. A finished job is deleted together
+    with its artifact.
+    """
+    _get_owned_job(job_id, current_user)
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -8,6 +8,7 @@ from datetime import date
 from app.db.session import get_db
 from app.db.async_compat import run_with_sync_session
 from app.core.dependencies import get_current_user
+from app.core.http_cache import http_cache
 from app.models.user import User, UserRole
 from app.models.project import Project
 from app.models.project_owners import ProjectOwner
@@ -21,6 +22,7 @@ router = APIRouter(prefix="/project_manager", tags=["Project Manager"])
 
 # --- 1. GET PROJECTS MANAGED BY USER ---
 @router.get("/projects", response_model=List[ProjectResponse])
+@http_cache("projects", "project_owners", "users", response_model=List[ProjectResponse], per_user=True)
 @run_with_sync_session()
 def get_managed_projects(
     db: Session = Depends(get_db),
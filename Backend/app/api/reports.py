@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_
 from uuid import UUID
 from datetime import date, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple
 import pandas as pd
 import io
 
-from app.db.session import get_db
+from app.db.session import get_db, AsyncSessionLocal
 from app.db.async_compat import run_with_sync_session
+from app.core.dependencies import get_current_user
+from app.schemas.job import JobResponse
+from app.services.jobs import JobContext, job_manager
 from app.utils.timezone import today_ist
 from app.models.project import Project
 from app.models.user import User
@@ -76,7 +80,7 @@ def export_project_daily_report(
                 rating_text = q_record.rating.value if hasattr(q_record.rating, 'value') else q_record.rating
             
             # Calculate Minutes
-            hours = float(metric.hours_worked or 0)
+            hours = metric.hours_worked or 0
             minutes = int(hours * 60)
 
             data.append({
@@ -100,18 +104,54 @@ def export_project_daily_report(
     return response
 
 
+def _csv_response(filename: str, df: Optional[pd.DataFrame]) -> StreamingResponse:
+    response = StreamingResponse(iter([_to_csv(df)]), media_type="text/csv")
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+def _to_csv(df: Optional[pd.DataFrame]) -> str:
+    if df is None:
+        return "No data available"
+    stream = io.StringIO()
+    df.to_csv(stream, index=False)
+    return stream.getvalue()
+
+
+def _start_report_job(kind: str, builder, params: dict, user: User) -> dict:
+    """
+    Run `builder(sync_session, **params, progress=...)` as a background job
+    and keep the CSV it returns as the job's artifact.
+    """
+    async def run(ctx: JobContext):
+        async with AsyncSessionLocal() as db:
+            filename, df = await db.run_sync(
+                lambda session: builder(session, **params, progress=ctx.progress)
+            )
+        path = ctx.artifact_path(filename)
+
+        def _write():
+            with open(path, "w", newline="") as fh:
+                fh.write(_to_csv(df))
+
+        await run_in_threadpool(_write)
+        ctx.set_artifact(path, filename, "text/csv")
+        return {"rows": 0 if df is None else len(df)}
+
+    return job_manager.submit(kind, run, owner_id=user.id, params=params)
+
+
 # ------------------------------------------------------------------
 # 2. ROLE DRILLDOWN (Daily Roster)
 # ------------------------------------------------------------------
-@router.get("/role-drilldown")
-@run_with_sync_session()
-def export_role_drilldown(
+def build_role_drilldown(
+    db: Session,
     report_date: Optional[date] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     project_id: Optional[UUID] = None,
-    db: Session = Depends(get_db)
-):
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[str, pd.DataFrame]:
     # Support both single date and date range mode.
     if start_date and end_date:
         date_list = []
@@ -136,7 +176,9 @@ def export_role_drilldown(
             ProjectMember.is_active == True
         ).join(User, ProjectMember.user_id == User.id).all()
 
-        for current_date in date_list:
+        for day_index, current_date in enumerate(date_list):
+            if progress:
+                progress(day_index, len(date_list))
             for m in members:
                 att = db.query(AttendanceDaily).filter(
                     AttendanceDaily.user_id == m.user_id,
@@ -184,7 +226,9 @@ def export_role_drilldown(
             ProjectMember.is_active == True
         ).join(User, ProjectMember.user_id == User.id).all()
 
-        for current_date in date_list:
+        for day_index, current_date in enumerate(date_list):
+            if progress:
+                progress(day_index, len(date_list))
             for m in all_members:
                 project = project_map.get(m.project_id)
                 if not project:
@@ -230,11 +274,8 @@ def export_role_drilldown(
                     "hours_worked": hours
                 })
 
-    df = pd.DataFrame(data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
+    if progress:
+        progress(len(date_list), len(date_list))
 
     if start_date and end_date:
         date_label = f"{start_date}_to_{end_date}"
@@ -242,25 +283,53 @@ def export_role_drilldown(
         date_label = str(date_list[0])
 
     if project_id:
-        project = db.query(Project).filter(Project.id == project_id).first()
         filename = f"roster_{project.code}_{date_label}.csv"
     else:
         filename = f"roster_all_projects_{date_label}.csv"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    return filename, pd.DataFrame(data)
+
+
+@router.get("/role-drilldown")
+@run_with_sync_session()
+def export_role_drilldown(
+    report_date: Optional[date] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    project_id: Optional[UUID] = None,
+    db: Session = Depends(get_db)
+):
+    filename, df = build_role_drilldown(db, report_date, start_date, end_date, project_id)
+    return _csv_response(filename, df)
+
+
+@router.post("/role-drilldown/jobs", response_model=JobResponse, status_code=202)
+async def export_role_drilldown_job(
+    report_date: Optional[date] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    project_id: Optional[UUID] = None,
+    user: User = Depends(get_current_user)
+):
+    """Role drilldown CSV as a background job, for multi-month ranges."""
+    params = {
+        "report_date": report_date,
+        "start_date": start_date,
+        "end_date": end_date,
+        "project_id": project_id,
+    }
+    return _start_report_job("report_role_drilldown", build_role_drilldown, params, user)
 
 
 # ------------------------------------------------------------------
 # 3. PROJECT ALL-TIME HISTORY
 # ------------------------------------------------------------------
-@router.get("/project-history")
-@run_with_sync_session()
-def export_project_history(
+def build_project_history(
+    db: Session,
     project_id: UUID,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
-):
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[str, Optional[pd.DataFrame]]:
     project = db.query(Project).filter(Project.id == project_id).first()
     query = db.query(UserDailyMetrics).filter(UserDailyMetrics.project_id == project_id)
 
@@ -271,22 +340,34 @@ def export_project_history(
 
     metrics = query.all()
     
+    code = project.code if project else project_id
+    if start_date and end_date:
+        filename = f"history_{code}_{start_date}_to_{end_date}.csv"
+    elif start_date:
+        filename = f"history_{code}_from_{start_date}.csv"
+    elif end_date:
+        filename = f"history_{code}_until_{end_date}.csv"
+    else:
+        filename = f"history_{code}_all_time.csv"
+
     if not metrics:
-        return StreamingResponse(iter(["No data available"]), media_type="text/csv")
+        return filename, None
 
     user_map = {}
     for m in metrics:
         if m.user_id not in user_map:
             user_map[m.user_id] = {"hours": 0, "tasks": 0, "scores": [], "dates": []}
         
-        user_map[m.user_id]["hours"] += float(m.hours_worked or 0)
+        user_map[m.user_id]["hours"] += m.hours_worked or 0
         user_map[m.user_id]["tasks"] += (m.tasks_completed or 0)
         if m.productivity_score:
-            user_map[m.user_id]["scores"].append(float(m.productivity_score))
+            user_map[m.user_id]["scores"].append(m.productivity_score)
         user_map[m.user_id]["dates"].append(m.metric_date)
 
     summary_data = []
-    for uid, stats in user_map.items():
+    for user_index, (uid, stats) in enumerate(user_map.items()):
+        if progress:
+            progress(user_index, len(user_map))
         user = db.query(User).get(uid)
         avg_score = sum(stats["scores"]) / len(stats["scores"]) if stats["scores"] else 0
         
@@ -303,36 +384,44 @@ def export_project_history(
             "avg_score": round(avg_score, 2)
         })
 
-    df = pd.DataFrame(summary_data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
+    return filename, pd.DataFrame(summary_data)
 
-    if start_date and end_date:
-        filename = f"history_{project.code}_{start_date}_to_{end_date}.csv"
-    elif start_date:
-        filename = f"history_{project.code}_from_{start_date}.csv"
-    elif end_date:
-        filename = f"history_{project.code}_until_{end_date}.csv"
-    else:
-        filename = f"history_{project.code}_all_time.csv"
 
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+@router.get("/project-history")
+@run_with_sync_session()
+def export_project_history(
+    project_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    filename, df = build_project_history(db, project_id, start_date, end_date)
+    if df is None:
+        return StreamingResponse(iter(["No data available"]), media_type="text/csv")
+    return _csv_response(filename, df)
+
+
+@router.post("/project-history/jobs", response_model=JobResponse, status_code=202)
+async def export_project_history_job(
+    project_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    user: User = Depends(get_current_user)
+):
+    params = {"project_id": project_id, "start_date": start_date, "end_date": end_date}
+    return _start_report_job("report_project_history", build_project_history, params, user)
 
 
 # ------------------------------------------------------------------
 # 4. USER PERFORMANCE REPORT
 # ------------------------------------------------------------------
-@router.get("/user-performance")
-@run_with_sync_session()
-def export_user_performance(
+def build_user_performance(
+    db: Session,
     user_id: UUID,
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
-):
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[str, pd.DataFrame]:
     user = db.query(User).get(user_id)
     if not user:
         raise HTTPException(404, "User not found")
@@ -344,7 +433,9 @@ def export_user_performance(
     ).order_by(UserDailyMetrics.metric_date).all()
     
     data = []
-    for m in metrics:
+    for metric_index, m in enumerate(metrics):
+        if progress:
+            progress(metric_index, len(metrics))
         proj = db.query(Project).get(m.project_id)
         
         target_date = m.metric_date
@@ -365,10 +456,10 @@ def export_user_performance(
         
         if q_record:
             rating_text = q_record.rating.value if hasattr(q_record.rating, 'value') else q_record.rating
-            accuracy_value = float(q_record.accuracy) if q_record.accuracy is not None else None
-            critical_rate_value = float(q_record.critical_rate) if q_record.critical_rate is not None else None
+            accuracy_value = q_record.accuracy
+            critical_rate_value = q_record.critical_rate
 
-        hours = float(m.hours_worked or 0)
+        hours = m.hours_worked or 0
         minutes = int(hours * 60)
 
         data.append({
@@ -384,10 +475,27 @@ def export_user_performance(
             "Critical Rate": round(critical_rate_value, 2) if critical_rate_value is not None else "N/A"
         })
 
-    df = pd.DataFrame(data)
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename=report_{user.name}_{start_date}.csv"
-    return response
+    return f"report_{user.name}_{start_date}.csv", pd.DataFrame(data)
+
+
+@router.get("/user-performance")
+@run_with_sync_session()
+def export_user_performance(
+    user_id: UUID,
+    start_date: date,
+    end_date: date,
+    db: Session = Depends(get_db)
+):
+    filename, df = build_user_performance(db, user_id, start_date, end_date)
+    return _csv_response(filename, df)
+
+
+@router.post("/user-performance/jobs", response_model=JobResponse, status_code=202)
+async def export_user_performance_job(
+    user_id: UUID,
+    start_date: date,
+    end_date: date,
+    user: User = Depends(get_current_user)
+):
+    params = {"user_id": user_id, "start_date": start_date, "end_date": end_date}
+    return _start_report_job("report_user_performance", build_user_performance, params, user)
@@ -0,0 +1,90 @@
+"""
+Type-ahead lookup for users and projects.
+
+Backed by the pg_trgm GIN indexes from migrations/003_search_trgm.sql: the
+substring (ILIKE '%q%') and fuzzy (similarity operator %) predicates are both
+served by a bitmap index scan, so the cost grows with the number of matches
+rather than the size of the table. Results are ranked prefix matches first,
+then by trigram similarity, and capped at SEARCH_MAX_LIMIT per type.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.dependencies import get_current_user
+from app.db.session import get_db
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.search import SearchResponse
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+SEARCH_MAX_LIMIT = 50
+SEARCH_TYPES = ("users", "projects")
+
+
+def _like_escape(term: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _ranked(columns, term: str):
+    """
+    (where, order_by, score) for a ranked trigram match of `term` on `columns`.
+    A prefix match on any column ranks first, then the best similarity.
+    """
+    escaped = _like_escape(term)
+    prefix = or_(*[column.ilike(f"{escaped}%") for column in columns])
+    matches = or_(
+        *[column.ilike(f"%{escaped}%") for column in columns],
+        *[column.op("%")(term) for column in columns],
+    )
+    score = func.greatest(*[func.similarity(column, term) for column in columns])
+    return matches, (prefix.desc(), score.desc()), score
+
+
+# Not behind http_cache: its validator (count and max(updated_at) of users
+# and projects) would cost more than the indexed lookup, and type-ahead
+# rarely repeats a query string.
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: Optional[List[str]] = Query(None, description="users and/or projects (default both)"),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT),
+    include_inactive: bool = False,
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """
+    Ranked users (name, email) and projects (name, code) matching `q`.
+    Inactive users/projects are left out unless include_inactive=true.
+    """
+    term = q.strip()
+    wanted = set(types or SEARCH_TYPES)
+    response = {"query": term, "users": [], "projects": []}
+    if not term:
+        return response
+
+    if "users" in wanted:
+        matches, order_by, score = _ranked([User.name, User.email], term)
+        query = select(
+            User.id, User.name, User.email, User.role, User.is_active, score.label("score")
+        ).filter(matches)
+        if not include_inactive:
+            query = query.filter(User.is_active == True)
+        result = await db.execute(query.order_by(*order_by, User.name).limit(limit))
+        response["users"] = [dict(row._mapping) for row in result.all()]
+
+    if "projects" in wanted:
+        matches, order_by, score = _ranked([Project.name, Project.code], term)
+        query = select(
+            Project.id, Project.name, Project.code, Project.is_active, score.label("score")
+        ).filter(matches)
+        if not include_inactive:
+            query = query.filter(Project.is_active == True)
+        result = await db.execute(query.order_by(*order_by, Project.name).limit(limit))
+        response["projects"] = [dict(row._mapping) for row in result.all()]
+
+    return response
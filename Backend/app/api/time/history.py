@@ -1,4 +1,6 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
+from sqlalchemy import case, func, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from datetime import datetime, date, timedelta
 from typing import List, Optional
@@ -10,162 +12,209 @@ from app.models.history import TimeHistory, ApprovalStatus
 from app.models.project import Project
 from app.models.attendance_daily import AttendanceDaily, AttendanceStatus
 from app.models.project_members import ProjectMember
-from app.models.project_owners import ProjectOwner
+from app.models.notification_outbox import NotificationOutbox
 from app.schemas.history import TimeHistoryResponse, ClockInRequest, ClockOutRequest, HomeTimeResponse
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.utils.timezone import now_ist, today_ist
+from app.core.http_cache import invalidate_tables
+from app.services.dashboard_cache import invalidate_on_commit
+from app.services.live_feed import publish_on_commit
+from app.services.notification_outbox import mark_enqueued
+from app.services.notification_service import auto_allocation_email_insert
+from app.services.active_sessions import registry as active_registry
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.history import ApprovalRequest
 
 router = APIRouter(prefix="/time", tags=["Time Tracking"])
 MAX_SESSION_DURATION = timedelta(hours=14)
+# Unique partial index on history(user_id) WHERE clock_out_at IS NULL
+ACTIVE_SESSION_INDEX = "uq_history_user_active_session"
+
+
+def _find_active_session(db: Session, user_id):
+    return db.query(TimeHistory).filter(
+        TimeHistory.user_id == user_id,
+        TimeHistory.clock_out_at == None
+    ).first()
 
 # --- 1. CLOCK IN ---
+def _clock_in_statement(user: User, payload: ClockInRequest, clock_in_at: datetime, today: date):
+    """
+    Auto-allocation, attendance upsert and the session insert as one
+    statement (data-modifying CTEs), returning the new session row.
+
+    - project_members: ON CONFLICT on the partial unique index
+      (user_id, project_id) WHERE is_active; `auto_allocated` is 1 when a row
+      was inserted.
+    - notification_outbox: on auto-allocation, the email to the project's
+      owner (looked up in the same statement); `allocation_emails` is 1 when
+      it was queued.
+    - attendance_daily: ON CONFLICT (user_id, attendance_date). An existing
+      LEAVE/WFH/PRESENT status is kept; UNKNOWN/ABSENT become PRESENT.
+    - history: a second open session for the user violates
+      uq_history_user_active_session.
+
+    Python-side column defaults are not applied to INSERTs nested in a
+    CTE, so every NOT NULL column without a server default is set here.
+    """
+    work_role = payload.work_role or "Panelist"
+
+    new_member = (
+        pg_insert(ProjectMember)
+        .values(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            project_id=payload.project_id,
+            work_role=work_role,
+            assigned_from=today,
+            assigned_to=None,
+            is_active=True,
+            updated_at=func.now(),
+        )
+        .on_conflict_do_nothing(
+            index_elements=[ProjectMember.user_id, ProjectMember.project_id],
+            index_where=ProjectMember.is_active == true(),
+        )
+        .returning(ProjectMember.id)
+        .cte("new_member")
+    )
+
+    allocation_email = auto_allocation_email_insert(
+        new_member,
+        project_id=payload.project_id,
+        user_name=user.name,
+        user_email=user.email,
+        work_role=work_role,
+        allocation_date=str(today),
+    ).returning(NotificationOutbox.id).cte("allocation_email")
+
+    attendance = pg_insert(AttendanceDaily).values(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        project_id=payload.project_id,
+        attendance_date=today,
+        status=AttendanceStatus.PRESENT,
+        minutes_late=0,
+        first_clock_in_at=clock_in_at,
+        source="CLOCK_IN",
+        shift_id=user.default_shift_id,
+    )
+    # Don't override LEAVE or WFH status that might have been set by attendance requests
+    attendance = attendance.on_conflict_do_update(
+        index_elements=[AttendanceDaily.user_id, AttendanceDaily.attendance_date],
+        set_={
+            "status": case(
+                (
+                    AttendanceDaily.status.in_([AttendanceStatus.UNKNOWN, AttendanceStatus.ABSENT]),
+                    attendance.excluded.status,
+                ),
+                else_=AttendanceDaily.status,
+            ),
+            "project_id": attendance.excluded.project_id,
+            "first_clock_in_at": attendance.excluded.first_clock_in_at,
+            "source": attendance.excluded.source,
+            "updated_at": func.now(),
+        },
+    ).returning(AttendanceDaily.id).cte("attendance")
+
+    new_session = (
+        pg_insert(TimeHistory)
+        .values(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            project_id=payload.project_id,
+            work_role=payload.work_role,
+            clock_in_at=clock_in_at,
+            sheet_date=today,
+            tasks_completed=0,
+            status=ApprovalStatus.PENDING,
+            updated_at=func.now(),
+        )
+        .returning(*TimeHistory.__table__.c)
+        .cte("new_session")
+    )
+
+    return (
+        select(
+            new_session,
+            Project.name.label("project_name"),
+            select(func.count()).select_from(new_member).scalar_subquery().label("auto_allocated"),
+            select(func.count()).select_from(allocation_email).scalar_subquery().label("allocation_emails"),
+        )
+        .outerjoin(Project, Project.id == new_session.c.project_id)
+        # Not read by the SELECT; add_cte makes sure the upsert is emitted
+        .add_cte(attendance)
+    )
+
+
 @router.post("/clock-in", response_model=TimeHistoryResponse)
-@run_with_sync_session()
-def clock_in(
+async def clock_in(
     payload: ClockInRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     import logging
     logger = logging.getLogger(__name__)
 
-    # Check if user already has an active session (where clock_out_at is NULL)
-    active_session = db.query(TimeHistory).filter(
-        TimeHistory.user_id == current_user.id,
-        TimeHistory.clock_out_at == None
-    ).first()
-
-    if active_session:
+    # The registry answers "already clocked in?" without a query. Otherwise
+    # (and for races with other workers) the unique partial index on
+    # history rejects the insert below.
+    if active_registry.authoritative and active_registry.get(current_user.id) is not None:
         raise HTTPException(
             status_code=400, 
             detail="You are already clocked in. Please clock out first."
         )
 
-    # Create new session
-    # Note: sheet_date defaults to today, status defaults to 'PENDING'
     clock_in_at = payload.clock_in_at or now_ist()
     today = today_ist()
 
-    # --- AUTO-ALLOCATION LOGIC ---
-    # Check if user is already allocated to this project.
-    existing_allocation = db.query(ProjectMember).filter(
-        ProjectMember.user_id == current_user.id,
-        ProjectMember.project_id == payload.project_id,
-        ProjectMember.is_active == True
-    ).first()
-
-    if not existing_allocation:
-        logger.info(f"[CLOCK_IN] User {current_user.id} not allocated to project {payload.project_id}. Auto-allocating...")
+    try:
+        row = (await db.execute(_clock_in_statement(current_user, payload, clock_in_at, today))).one()
+        session_data = {column.name: getattr(row, column.name) for column in TimeHistory.__table__.c}
+        session_data["status"] = row.status.value
+        session_data["project_name"] = row.project_name
+
+        publish_on_commit(db, {
+            "type": "clock_in",
+            "history_id": str(row.id),
+            "user_id": str(current_user.id),
+            "user_name": current_user.name,
+            "project_id": str(payload.project_id),
+            "project_name": row.project_name or "Unknown",
+            "sheet_date": today.isoformat(),
+            "work_role": payload.work_role,
+            "clock_in_time": clock_in_at.isoformat(),
+        })
+        if row.allocation_emails:
+            # Queued by the statement; the outbox dispatcher sends it after commit
+            mark_enqueued(db)
+        elif row.auto_allocated:
+            logger.warning(f"[CLOCK_IN] No project owner found for project {payload.project_id}")
+        # attendance_daily is read per user across projects -> whole date
+        invalidate_on_commit(db, day=today)
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if ACTIVE_SESSION_INDEX in str(e.orig):
+            raise HTTPException(
+                status_code=400,
+                detail="You are already clocked in. Please clock out first."
+            )
+        raise
 
-        # Get project details for logging/notification
-        project = db.query(Project).filter(Project.id == payload.project_id).first()
-        project_name = project.name if project else "Unknown Project"
+    logger.info(f"[CLOCK_IN] User {current_user.id} clocked in on {today} (project {payload.project_id})")
 
-        # Create new project member allocation.
-        new_allocation = ProjectMember(
-            user_id=current_user.id,
-            project_id=payload.project_id,
-            work_role=payload.work_role or "Panelist",
-            assigned_from=today,
-            assigned_to=None,
-            is_active=True
+    if row.auto_allocated:
+        # Core upsert, not an ORM flush: drop cached member lists explicitly
+        invalidate_tables([ProjectMember.__tablename__])
+        logger.info(
+            f"[CLOCK_IN] Auto-allocated user {current_user.name} to project {row.project_name} as {payload.work_role}"
         )
-        db.add(new_allocation)
-        logger.info(f"[CLOCK_IN] Auto-allocated user {current_user.name} to project {project_name} as {payload.work_role}")
 
-        # Send notification to project owner/PM (best effort).
-        try:
-            project_owner = db.query(ProjectOwner).filter(
-                ProjectOwner.project_id == payload.project_id
-            ).first()
-
-            if project_owner:
-                pm_user = db.query(User).filter(User.id == project_owner.user_id).first()
-                if pm_user:
-                    from app.services.notification_service import send_auto_allocation_email
-                    send_auto_allocation_email(
-                        pm_email=pm_user.email,
-                        pm_name=pm_user.name,
-                        user_name=current_user.name,
-                        user_email=current_user.email,
-                        project_name=project_name,
-                        work_role=payload.work_role or "Panelist",
-                        allocation_date=str(today)
-                    )
-                    logger.info(f"[CLOCK_IN] Sent auto-allocation notification to PM {pm_user.email}")
-                else:
-                    logger.warning("[CLOCK_IN] PM user not found for project owner")
-            else:
-                logger.warning(f"[CLOCK_IN] No project owner found for project {payload.project_id}")
-        except Exception as e:
-            # Never fail clock-in if notification fails.
-            logger.error(f"[CLOCK_IN] Failed to send auto-allocation notification: {e}")
-    # --- END AUTO-ALLOCATION LOGIC ---
-
-    new_session = TimeHistory(
-        user_id=current_user.id,
-        project_id=payload.project_id,
-        work_role=payload.work_role,
-        clock_in_at=clock_in_at,
-        sheet_date=today,
-        tasks_completed=0,
-        status=ApprovalStatus.PENDING,
-        
-    )
-    
-    db.add(new_session)
-    
-    # Create or update AttendanceDaily record to mark user as PRESENT
-    # This ensures the admin dashboard shows the correct present count
-    # Check for existing record for this user and date (across all projects)
-    existing_attendance = db.query(AttendanceDaily).filter(
-        AttendanceDaily.user_id == current_user.id,
-        AttendanceDaily.attendance_date == today
-    ).first()
-
-    logger.info(f"[CLOCK_IN] User {current_user.id} clocking in on {today} (type: {type(today)})")
-    
-    if existing_attendance:
-        logger.info(f"[CLOCK_IN] Found existing attendance record with status: {existing_attendance.status}")
-        # Update existing record - only update status if it's not already set by a request (LEAVE/WFH)
-        # Don't override LEAVE or WFH status that might have been set by attendance requests
-        if existing_attendance.status in [AttendanceStatus.UNKNOWN, AttendanceStatus.ABSENT]:
-            existing_attendance.status = AttendanceStatus.PRESENT
-            logger.info(f"[CLOCK_IN] Updated status to PRESENT")
-        # Update project_id if it's different (user might have switched projects)
-        if existing_attendance.project_id != payload.project_id:
-            existing_attendance.project_id = payload.project_id
-        existing_attendance.first_clock_in_at = clock_in_at
-        existing_attendance.source = "CLOCK_IN"
-    else:
-        # Create new attendance record
-        logger.info(f"[CLOCK_IN] Creating new attendance record with status PRESENT")
-        attendance_record = AttendanceDaily(
-            user_id=current_user.id,
-            project_id=payload.project_id,
-            attendance_date=today,
-            status=AttendanceStatus.PRESENT,
-            first_clock_in_at=clock_in_at,
-            source="CLOCK_IN",
-            shift_id=current_user.default_shift_id
-        )
-        db.add(attendance_record)
-    
-    db.commit()
-    # Refresh the attendance record for consistency
-    if existing_attendance:
-        db.refresh(existing_attendance)
-        logger.info(f"[CLOCK_IN] Final attendance status after commit: {existing_attendance.status}")
-    else:
-        db.refresh(attendance_record)
-        logger.info(f"[CLOCK_IN] Final attendance status after commit: {attendance_record.status}")
-    db.refresh(new_session)
-    if new_session.project:
-        new_session.project_name = new_session.project.name
-    return new_session
+    return session_data
 
 # --- 2. CLOCK OUT ---
 @router.put("/clock-out", response_model=TimeHistoryResponse)
@@ -175,11 +224,17 @@ def clock_out(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Find the active session for this user
-    active_session = db.query(TimeHistory).filter(
-        TimeHistory.user_id == current_user.id,
-        TimeHistory.clock_out_at == None
-    ).first()
+    # Find the active session for this user (primary-key load when the
+    # registry knows it; a miss falls back to the query so a clock-in on
+    # another worker that has not been broadcast yet is still found)
+    active_session = None
+    entry = active_registry.get(current_user.id) if active_registry.authoritative else None
+    if entry:
+        active_session = db.get(TimeHistory, entry["id"])
+        if active_session is not None and active_session.clock_out_at is not None:
+            active_session = None
+    if active_session is None:
+        active_session = _find_active_session(db, current_user.id)
 
     if not active_session:
         raise HTTPException(
@@ -209,6 +264,12 @@ def clock_out(
         existing_attendance.last_clock_out_at = clock_out_at
         existing_attendance.minutes_worked = active_session.minutes_worked
     
+    invalidate_on_commit(db, day=active_session.sheet_date)
+    publish_on_commit(db, {
+        "type": "clock_out",
+        "history_id": str(active_session.id),
+        "user_id": str(current_user.id),
+    })
     db.commit()
     db.refresh(active_session)
     if active_session.project:
@@ -278,6 +339,7 @@ def approve_session(
     session.approved_by_user_id = current_user.id
     session.approved_at = now_ist()
     
+    invalidate_on_commit(db, day=session.sheet_date, project_id=session.project_id)
     db.commit()
     db.refresh(session)
     
@@ -306,20 +368,8 @@ def approve_session(
     return session
 
 # --- 5. GET CURRENT ACTIVE SESSION (For Home Page Logic) ---
-@router.get("/current", response_model=Optional[TimeHistoryResponse])
-@run_with_sync_session()
-def get_current_active_session(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Checks if the user has a session running (Clock Out is NULL).
-    Returns the session details if yes, or null if no.
-    """
-    active_session = db.query(TimeHistory).filter(
-        TimeHistory.user_id == current_user.id,
-        TimeHistory.clock_out_at == None
-    ).first()
+def _load_current_session(db: Session, user_id):
+    active_session = _find_active_session(db, user_id)
 
     if active_session:
         # Manually attach project name so the UI can display "Working on: Project Alpha"
@@ -330,6 +380,21 @@ def get_current_active_session(
     return None
 
 
+@router.get("/current", response_model=Optional[TimeHistoryResponse])
+async def get_current_active_session(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Checks if the user has a session running (Clock Out is NULL).
+    Returns the session details if yes, or null if no.
+    Served from the active-session registry when it is authoritative.
+    """
+    if active_registry.authoritative:
+        return active_registry.get(current_user.id)
+    return await db.run_sync(_load_current_session, current_user.id)
+
+
 # --- 6. GET HOME DATA (current session + today's sessions in one call) ---
 @router.get("/home", response_model=HomeTimeResponse)
 @run_with_sync_session()
@@ -343,13 +408,11 @@ def get_home_time_data(
     """
     today = today_ist()
 
-    # 1. Active session (clock_out_at IS NULL)
-    active_session = db.query(TimeHistory).filter(
-        TimeHistory.user_id == current_user.id,
-        TimeHistory.clock_out_at == None
-    ).first()
-    if active_session and active_session.project:
-        active_session.project_name = active_session.project.name
+    # 1. Active session (clock_out_at IS NULL) - registry first, DB as fallback
+    if active_registry.authoritative:
+        active_session = active_registry.get(current_user.id)
+    else:
+        active_session = _load_current_session(db, current_user.id)
 
     # 2. Today's sessions (single query)
     today_sessions = (
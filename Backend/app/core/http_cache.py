@@ -0,0 +1,266 @@
+"""
+Conditional-GET caching for slow-changing list endpoints.
+
+    @router.get("/", response_model=List[ShiftResponse])
+    @http_cache("shifts", response_model=List[ShiftResponse])
+    @run_with_sync_session()
+    def list_shifts(db: Session = Depends(get_db)): ...
+
+On every request one cheap query computes a validator from count(*) and
+max(updated_at) of the listed tables. The weak ETag is derived from that
+validator plus the request variant (path, query string, user when
+per_user=True, today's date), so:
+
+- a matching If-None-Match returns 304 without running the handler;
+- otherwise the rendered body can be served from an in-process LRU keyed by
+  the same variant, as long as its validator still matches.
+
+Because the validator is read from the database on every request the cache is
+safe with several workers. Writes made through the ORM in this process also
+drop dependent entries eagerly (see the Session events at the bottom);
+raw-SQL writers can call invalidate_tables().
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from email.utils import format_datetime
+from functools import wraps
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.utils.serialization import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "512"))
+
+_REQUEST_PARAM = "_http_cache_request"
+_DIRTY_TABLES_KEY = "http_cache_dirty_tables"
+
+
+class _ResponseCache:
+    """Thread-safe LRU of rendered bodies: key -> (etag, body, tables)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, bytes, frozenset]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes, tables: frozenset) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, body, tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        tables = set(tables)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = _ResponseCache(HTTP_CACHE_MAX_ENTRIES)
+
+
+def invalidate_tables(tables: Iterable[str]) -> None:
+    """Drop cached responses that depend on any of `tables`."""
+    dropped = response_cache.invalidate_tables(tables)
+    if dropped:
+        logger.debug("http_cache: dropped %d entries for %s", dropped, sorted(tables))
+
+
+async def compute_validator(db: AsyncSession, tables: Tuple[str, ...]) -> Tuple[str, Optional[datetime]]:
+    """
+    One round trip: count(*) and max(updated_at) for every table.
+    Returns (validator string, newest updated_at).
+    """
+    columns = []
+    for name in tables:
+        table = Base.metadata.tables[name]
+        columns.append(select(func.count()).select_from(table).scalar_subquery())
+        columns.append(select(func.max(table.c.updated_at)).scalar_subquery())
+    row = (await db.execute(select(*columns))).one()
+
+    last_modified = max((v for v in row[1::2] if v is not None), default=None)
+    validator = "|".join(
+        f"{count}:{updated.isoformat() if updated else ''}"
+        for count, updated in zip(row[0::2], row[1::2])
+    )
+    return validator, last_modified
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _render(result: Any, adapter: Optional[TypeAdapter]) -> bytes:
+    if adapter is not None:
+        content = adapter.dump_python(
+            adapter.validate_python(result, from_attributes=True),
+            mode="json",
+            by_alias=True,
+        )
+    else:
+        content = jsonable_encoder(result)
+    return FastJSONResponse(content).body
+
+
+def http_cache(
+    *tables: str,
+    response_model: Any = None,
+    per_user: bool = False,
+    server_cache: bool = True,
+    max_age: int = 0,
+    db_param: str = "db",
+    user_param: str = "current_user",
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    ETag / Last-Modified caching for GET routes whose output only depends on
+    `tables` (each must have an updated_at column), the query string and -
+    with per_user=True - the current user.
+
+    Place it directly under the @router.get decorator (above
+    @run_with_sync_session for legacy handlers) and pass the same
+    response_model as the route, since the body is rendered here.
+    """
+    for name in tables:
+        if name not in Base.metadata.tables:
+            raise ValueError(f"http_cache: unknown table {name!r}")
+    table_set = frozenset(tables)
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+    cache_control = f"private, max-age={max_age}" if max_age else "private, no-cache"
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(func)
+        if per_user and user_param not in signature.parameters:
+            raise ValueError(f"http_cache(per_user=True) needs a {user_param!r} parameter on {func.__name__}")
+        is_coroutine = inspect.iscoroutinefunction(func)
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request: Request = kwargs.pop(_REQUEST_PARAM)
+
+            async def run_handler():
+                result = func(*args, **kwargs)
+                return await result if is_coroutine else result
+
+            db = kwargs.get(db_param)
+            if not HTTP_CACHE_ENABLED or not isinstance(db, AsyncSession):
+                return await run_handler()
+
+            variant = [request.url.path, str(sorted(request.query_params.multi_items())), date.today().isoformat()]
+            if per_user:
+                user = kwargs.get(user_param)
+                variant.append(str(getattr(user, "id", "")))
+            cache_key = "|".join(variant)
+
+            validator, last_modified = await compute_validator(db, tables)
+            digest = hashlib.blake2b(f"{cache_key}#{validator}".encode(), digest_size=16).hexdigest()
+            etag = f'W/"{digest}"'
+
+            headers: Dict[str, str] = {"ETag": etag, "Cache-Control": cache_control}
+            if last_modified is not None:
+                if last_modified.tzinfo is None:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+                headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+            # Only If-None-Match is honoured: a delete does not move
+            # max(updated_at), so If-Modified-Since alone could serve stale data.
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and _etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+
+            body = response_cache.get(cache_key, etag) if server_cache else None
+            if body is None:
+                result = await run_handler()
+                if isinstance(result, Response):
+                    return result
+                body = _render(result, adapter)
+                if server_cache:
+                    response_cache.put(cache_key, etag, body, table_set)
+
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        params = list(signature.parameters.values())
+        params.append(
+            inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        )
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorator
+
+
+# ------------------------------------------------------------------
+# In-process invalidation on ORM writes
+# ------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+    dirty = session.info.setdefault(_DIRTY_TABLES_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            dirty.add(table.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault(_DIRTY_TABLES_KEY, set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tables(session):
+    dirty = session.info.pop(_DIRTY_TABLES_KEY, None)
+    if dirty:
+        invalidate_tables(dirty)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tables(session):
+    session.info.pop(_DIRTY_TABLES_KEY, None)
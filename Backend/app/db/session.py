@@ -46,6 +46,11 @@ DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 5)
 DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
 DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
 
+# Decode NUMERIC columns straight to float inside the asyncpg codec so metrics
+# reads never allocate Decimal objects (models declare Numeric(asdecimal=False)).
+# Set DB_NUMERIC_AS_FLOAT=false to fall back to asyncpg's Decimal decoding.
+DB_NUMERIC_AS_FLOAT = os.getenv("DB_NUMERIC_AS_FLOAT", "true").lower() == "true"
+
 # Main application engine with asyncpg
 engine = create_async_engine(
     DATABASE_URL,
@@ -69,6 +74,16 @@ logger.info(
 @event.listens_for(engine.sync_engine, "connect")
 def receive_connect(dbapi_conn, connection_record):
     logger.debug("New async database connection created")
+    if DB_NUMERIC_AS_FLOAT:
+        dbapi_conn.run_async(
+            lambda conn: conn.set_type_codec(
+                "numeric",
+                schema="pg_catalog",
+                encoder=str,
+                decoder=float,
+                format="text",
+            )
+        )
 
 @event.listens_for(engine.sync_engine.pool, "checkout")
 def receive_checkout(dbapi_conn, connection_record, connection_proxy):
@@ -7,6 +7,9 @@ from app.api.admin import projects_daily
 from dotenv import load_dotenv
 from app.api import analytics
 from app.api import reports
+from app.utils.serialization import FastJSONResponse
+from app.middlewares.compression import CompressionMiddleware
+import os
 import time
 import logging
 import asyncio
@@ -20,7 +23,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Resource Management System")
+# orjson-backed default response class (falls back to stdlib json if orjson is missing)
+app = FastAPI(title="Resource Management System", default_response_class=FastJSONResponse)
 
 # Request logging middleware - MUST be first to catch all requests
 @app.middleware("http")
@@ -85,6 +89,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost: compresses JSON / CSV responses (gzip, br / zstd when installed)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+)
+
 from app.api import auth
 
 app.include_router(users.router)
@@ -133,15 +144,21 @@ app.include_router(project_manager.router)
 
 from app.api.admin import router as admin_router
 from app.api.admin import role_drilldown
+from app.api import jobs
+from app.api import search
 
 app.include_router(admin_router)
 app.include_router(role_drilldown.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
 
 from app.services.scheduler_service import (
     start_scheduler,
     stop_scheduler,
     set_scheduler_event_loop,
 )
+from app.services import live_feed, active_sessions, notification_outbox
+from app.services.jobs import job_manager
 
 @app.on_event("startup")
 async def startup_event():
@@ -153,6 +170,23 @@ async def startup_event():
         logger.info("▶️ Scheduler is ENABLED")
     except Exception as e:
         logger.error(f"Warning: Could not start scheduler: {e}")
+    try:
+        await live_feed.broker.start()
+    except Exception as e:
+        logger.error(f"Warning: Could not start live feed: {e}")
+    try:
+        await active_sessions.registry.warm()
+    except Exception as e:
+        logger.error(f"Warning: Could not warm active-session registry: {e}")
+    try:
+        await notification_outbox.dispatcher.start()
+    except Exception as e:
+        logger.error(f"Warning: Could not start notification dispatcher: {e}")
+    try:
+        job_manager.purge_expired()
+        job_manager.fail_orphaned()
+    except Exception as e:
+        logger.error(f"Warning: Could not purge expired jobs: {e}")
 
 @app.get("/health")
 async def health_check():
@@ -184,3 +218,15 @@ async def shutdown_event():
         stop_scheduler()
     except Exception as e:
         logger.error(f"Warning: Could not stop scheduler: {e}")
+    try:
+        await live_feed.broker.stop()
+    except Exception as e:
+        logger.error(f"Warning: Could not stop live feed: {e}")
+    try:
+        await notification_outbox.dispatcher.stop()
+    except Exception as e:
+        logger.error(f"Warning: Could not stop notification dispatcher: {e}")
+    try:
+        await job_manager.shutdown()
+    except Exception as e:
+        logger.error(f"Warning: Could not stop background jobs: {e}")
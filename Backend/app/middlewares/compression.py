@@ -0,0 +1,283 @@
+"""
+Response compression middleware (gzip, plus brotli / zstd when installed).
+
+Pure ASGI so streamed responses (StreamingResponse CSV reports) are compressed
+chunk by chunk and flushed as they go instead of being buffered.
+
+- The encoding is negotiated from Accept-Encoding (q-values honoured,
+  server preference zstd > br > gzip among the ones the client accepts).
+- Non-streamed bodies smaller than `minimum_size` are sent as-is.
+- Responses that already carry Content-Encoding, event streams and
+  already-compressed media types are passed through untouched.
+- Routes can opt out with the `no_compression` dependency or by path prefix
+  via `excluded_paths`.
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+
+SKIP_COMPRESSION_STATE_KEY = "skip_compression"
+
+DEFAULT_EXCLUDED_MEDIA_TYPES = (
+    "text/event-stream",
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+)
+
+
+def no_compression(request: Request) -> None:
+    """
+    Route dependency that disables compression for one endpoint:
+        @router.get("/x", dependencies=[Depends(no_compression)])
+    """
+    request.state.skip_compression = True
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31 -> gzip container
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings(
+    gzip_level: int = 6,
+    brotli_quality: int = 4,
+    zstd_level: int = 3,
+) -> Dict[str, Callable[[], object]]:
+    """Encoder factories in server preference order (best first)."""
+    encoders: Dict[str, Callable[[], object]] = {}
+    if zstandard is not None:
+        encoders["zstd"] = lambda: _ZstdEncoder(zstd_level)
+    if brotli is not None:
+        encoders["br"] = lambda: _BrotliEncoder(brotli_quality)
+    encoders["gzip"] = lambda: _GzipEncoder(gzip_level)
+    return encoders
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(header: str, preference: Iterable[str]) -> Optional[str]:
+    """
+    Pick the encoding to use: highest client q-value wins, ties are broken by
+    server preference order. Returns None when nothing acceptable is available.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*")
+    best: Optional[Tuple[float, int, str]] = None
+    for rank, coding in enumerate(preference):
+        q = accepted.get(coding, wildcard)
+        if not q or q <= 0:
+            continue
+        candidate = (q, -rank, coding)
+        if best is None or candidate > best:
+            best = candidate
+    return best[2] if best else None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        excluded_paths: Iterable[str] = (),
+        excluded_media_types: Iterable[str] = DEFAULT_EXCLUDED_MEDIA_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encodings(gzip_level, brotli_quality, zstd_level)
+        self.excluded_paths = tuple(excluded_paths)
+        self.excluded_media_types = tuple(excluded_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            self.excluded_paths and scope["path"].startswith(self.excluded_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""), self.encoders)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            self.app,
+            encoding,
+            self.encoders[encoding],
+            self.minimum_size,
+            self.excluded_media_types,
+        )
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        encoding: str,
+        encoder_factory: Callable[[], object],
+        minimum_size: int,
+        excluded_media_types: Tuple[str, ...],
+    ) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.encoder_factory = encoder_factory
+        self.minimum_size = minimum_size
+        self.excluded_media_types = excluded_media_types
+        self.scope: Scope = {}
+        self.send: Send = _unattached_send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.encoder = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.scope = scope
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_skip(self) -> bool:
+        if (self.scope.get("state") or {}).get(SKIP_COMPRESSION_STATE_KEY):
+            return True
+        headers = Headers(raw=self.initial_message["headers"])
+        if "content-encoding" in headers:
+            return True
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(self.excluded_media_types)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the start message until the first body chunk tells us
+            # whether (and how) to rewrite the headers.
+            self.initial_message = message
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self._should_skip() or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.encoder = self.encoder_factory()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(compressed))
+                message["body"] = compressed
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            # Streaming: length is unknown up front
+            del headers["Content-Length"]
+            await self.send(self.initial_message)
+
+        if more_body:
+            # Flush every chunk so clients see rows as they are produced
+            message["body"] = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            message["body"] = self.encoder.compress(body) + self.encoder.finish()
+        await self.send(message)
+
+
+async def _unattached_send(message: Message) -> None:
+    raise RuntimeError("send awaitable not set")  # pragma: no cover
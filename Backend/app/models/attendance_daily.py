@@ -37,7 +37,7 @@ class AttendanceDaily(Base):
 
     last_clock_out_at = Column(DateTime(timezone=True), nullable=True)
 
-    minutes_worked = Column(Numeric, nullable=True)
+    minutes_worked = Column(Numeric(asdecimal=False), nullable=True)
 
     request_id = Column(UUID(as_uuid=True), ForeignKey("attendance_requests.id"), nullable=True)
 
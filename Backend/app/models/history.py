@@ -37,7 +37,7 @@ class TimeHistory(Base):
     tasks_completed = Column(Integer, default=0, nullable=False)
     notes = Column(Text, nullable=True)
     # Add this line with the other columns
-    minutes_worked = Column(Numeric, nullable=True) 
+    minutes_worked = Column(Numeric(asdecimal=False), nullable=True) 
 
     # --- Approval (Manager Section) ---
     approved_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
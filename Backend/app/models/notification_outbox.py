@@ -0,0 +1,45 @@
+import uuid
+import enum
+from sqlalchemy import Column, Integer, DateTime, Text, Enum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"  # claimed by a dispatcher; retried once the lease expires
+    SENT = "SENT"
+    FAILED = "FAILED"  # gave up after NOTIFICATION_MAX_ATTEMPTS
+
+class NotificationOutbox(Base):
+    """
+    Emails waiting to be sent. Rows are written in the same transaction as
+    the change they announce and delivered by app/services/notification_outbox.py.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # e.g. "AUTO_ALLOCATION", "REQUEST_CREATED", "REQUEST_DECISION"
+    kind = Column(Text, nullable=False)
+    recipient_email = Column(Text, nullable=False)
+
+    # Body for the send-approval-email function
+    payload = Column(JSONB, nullable=False)
+
+    # Set for digest-mode rows: all pending rows with the same key are sent
+    # as one summary once the oldest is due (lower-cased recipient email)
+    digest_key = Column(Text, nullable=True)
+
+    status = Column(
+        Enum(OutboxStatus, name="notification_outbox_status", create_type=False),
+        default=OutboxStatus.PENDING,
+        nullable=False
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -23,11 +23,11 @@ class ProjectDailyMetrics(Base):
     # Aggregated Stats
     tasks_completed = Column(Integer, nullable=False, default=0)
     active_users_count = Column(Integer, nullable=False, default=0)
-    total_hours_worked = Column(Numeric(10, 2), nullable=False, default=0)
+    total_hours_worked = Column(Numeric(10, 2, asdecimal=False), nullable=False, default=0)
     
     # Benchmarks
-    avg_productivity_score = Column(Numeric(5, 2), nullable=True)
-    avg_hours_worked_per_user = Column(Numeric(5, 2), nullable=True)
+    avg_productivity_score = Column(Numeric(5, 2, asdecimal=False), nullable=True)
+    avg_hours_worked_per_user = Column(Numeric(5, 2, asdecimal=False), nullable=True)
     
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(
@@ -20,7 +20,7 @@ class ProjectDailyMetric(Base):
     # The Stats
     tasks_completed = Column(Integer, default=0)
     active_users_count = Column(Integer, default=0)
-    total_hours_worked = Column(Numeric(10, 2), default=0.00) # Numeric for precision
+    total_hours_worked = Column(Numeric(10, 2, asdecimal=False), default=0.00) # Numeric for precision
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -13,7 +13,7 @@ class ProjectQualityCurrent(Base):
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), primary_key=True)
     
     rating = Column(SqEnum(QualityRating), nullable=False) # GOOD, BAD, AVERAGE
-    quality_score = Column(Numeric(5, 2), nullable=True)
+    quality_score = Column(Numeric(5, 2, asdecimal=False), nullable=True)
     
     # Counters for the dashboard charts
     good_count = Column(Integer, nullable=False, default=0)
@@ -20,9 +20,9 @@ class UserDailyMetrics(Base):
     work_role = Column(String, nullable=False)
     metric_date = Column(Date, nullable=False)
 
-    hours_worked = Column(Numeric(5, 2), default=0)
+    hours_worked = Column(Numeric(5, 2, asdecimal=False), default=0)
     tasks_completed = Column(Integer, default=0)
-    productivity_score = Column(Numeric(5, 2), nullable=True)
+    productivity_score = Column(Numeric(5, 2, asdecimal=False), nullable=True)
 
     notes = Column(Text, nullable=True)
 
@@ -13,7 +13,7 @@ class UserProjectHistory(Base):
 
     work_role = Column(String, nullable=False)
 
-    total_hours_worked = Column(Numeric, default=0)
+    total_hours_worked = Column(Numeric(asdecimal=False), default=0)
     total_tasks_completed = Column(Integer, default=0)
 
     first_worked_date = Column(Date)
@@ -24,9 +24,9 @@ class UserQuality(Base):
     # 2. Use the Enum here
     rating = Column(SqEnum(QualityRating), nullable=False)
     
-    quality_score = Column(Numeric(5, 2), nullable=True)
-    accuracy = Column(Numeric(5, 2), nullable=True)  # Accuracy percentage (0-100)
-    critical_rate = Column(Numeric(5, 2), nullable=True)  # Critical rate percentage (0-100)
+    quality_score = Column(Numeric(5, 2, asdecimal=False), nullable=True)
+    accuracy = Column(Numeric(5, 2, asdecimal=False), nullable=True)  # Accuracy percentage (0-100)
+    critical_rate = Column(Numeric(5, 2, asdecimal=False), nullable=True)  # Critical rate percentage (0-100)
     notes = Column(Text, nullable=True)
     source = Column(String, nullable=False, default="MANUAL")
     
@@ -20,7 +20,7 @@ class UserQualityDaily(Base):
     rating = Column(String, nullable=False)
     
     # Stores the exact score (e.g. 10.0)
-    quality_score = Column(Numeric(5, 2), nullable=True)
+    quality_score = Column(Numeric(5, 2, asdecimal=False), nullable=True)
     
     work_role = Column(String, nullable=True)
     
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+class JobProgress(BaseModel):
+    done: int = 0
+    total: Optional[int] = None
+    percent: Optional[float] = None
+
+class JobArtifact(BaseModel):
+    filename: str
+    media_type: str
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    params: Dict[str, Any] = {}
+    progress: JobProgress
+    eta_seconds: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[Any] = None
+    # Download with GET /jobs/{id}/result once SUCCEEDED
+    artifact: Optional[JobArtifact] = None
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 # Input
 class MemberAssign(BaseModel):
@@ -22,4 +22,16 @@ class MemberResponse(BaseModel):
     user_name: Optional[str] = None 
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Bulk input: the complete list of active members for a project
+class MemberBulkItem(BaseModel):
+    user_id: UUID
+    work_role: str
+    assigned_from: Optional[date] = None  # defaults to today for new members
+    assigned_to: Optional[date] = None
+
+class BulkMembersUpdate(BaseModel):
+    members: List[MemberBulkItem]
+    # Deactivate active members that are not in `members`
+    deactivate_missing: bool = True
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from uuid import UUID
+from typing import List
+
+from app.models.user import UserRole
+
+class UserSearchHit(BaseModel):
+    id: UUID
+    name: str
+    email: str
+    role: UserRole
+    is_active: bool
+    score: float
+
+class ProjectSearchHit(BaseModel):
+    id: UUID
+    name: str
+    code: str
+    is_active: bool
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    users: List[UserSearchHit] = []
+    projects: List[ProjectSearchHit] = []
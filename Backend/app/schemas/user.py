@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID
 from typing import Optional, List
 from datetime import datetime, date
@@ -26,6 +26,13 @@ class UsersAdminSearchFilters(BaseModel):
     page: int = 1
     page_size: int = 10
 
+    # Keyset pagination: pass meta.next_cursor back as `cursor`. Without
+    # `limit` every matching user is returned (one page).
+    limit: Optional[int] = Field(None, ge=1, le=1000)
+    cursor: Optional[str] = None
+    # Exact meta.total via count(*) OVER () in the same query
+    include_total: bool = True
+
 
 class WeekoffDays(str, Enum):
     SUNDAY = "SUNDAY"
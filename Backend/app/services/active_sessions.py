@@ -0,0 +1,193 @@
+"""
+Per-process registry of active time sessions (history rows with
+clock_out_at IS NULL), keyed by user_id.
+
+It is warmed from the database at startup and kept current from live-feed
+clock_in / clock_out events: the worker's own commits are applied
+immediately, other workers' arrive through Postgres LISTEN. Read paths use
+it only while it is authoritative (warmed and the LISTEN connection is up)
+and fall back to the database otherwise. Write safety does not depend on
+it: the unique partial index on history(user_id) WHERE clock_out_at IS NULL
+rejects a second open session.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from app.services import live_feed
+
+logger = logging.getLogger(__name__)
+
+# history ids closed recently; a late clock_in NOTIFY for one of them is ignored
+_CLOSED_IDS_LIMIT = 4096
+
+
+def _parse_datetime(value: Any) -> Any:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _parse_date(value: Any) -> Any:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class ActiveSessionRegistry:
+    def __init__(self):
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+        self._warmed = False
+        self._warming = False
+        self._buffer: List[Dict[str, Any]] = []
+        self._warm_task: Optional[asyncio.Task] = None
+
+    @property
+    def authoritative(self) -> bool:
+        return self._warmed and live_feed.broker.listening
+
+    # -- reads -----------------------------------------------------------
+
+    def get(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        """Active session as a TimeHistoryResponse-shaped dict, or None."""
+        entry = self._sessions.get(str(user_id))
+        return dict(entry) if entry else None
+
+    def live_workers(self) -> List[Dict[str, Any]]:
+        """Rows shaped like GET /admin/dashboard/live, newest first."""
+        rows = []
+        for entry in sorted(self._sessions.values(), key=lambda e: e["clock_in_at"], reverse=True):
+            clock_in_at = entry["clock_in_at"]
+            delta = datetime.now(clock_in_at.tzinfo) - clock_in_at
+            rows.append({
+                "user_id": entry["user_id"],
+                "user_name": entry["user_name"] or "Unknown",
+                "project_name": entry["project_name"] or "Unknown",
+                "work_role": entry["work_role"],
+                "clock_in_time": clock_in_at,
+                "current_duration_minutes": int(delta.total_seconds() / 60),
+            })
+        return rows
+
+    # -- updates ---------------------------------------------------------
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """Apply a live-feed event. Idempotent; safe to see an event twice."""
+        kind = event.get("type")
+        if kind == "resync":
+            self.schedule_warm()
+            return
+        if self._warming:
+            self._buffer.append(event)
+            return
+
+        history_id = event.get("history_id")
+        user_id = event.get("user_id")
+        if not history_id or not user_id:
+            return
+
+        if kind == "clock_in":
+            if history_id in self._closed:
+                return
+            self._sessions[user_id] = {
+                "id": UUID(history_id),
+                "user_id": UUID(user_id),
+                "project_id": UUID(event["project_id"]),
+                "work_role": event.get("work_role"),
+                "status": "PENDING",
+                "minutes_worked": None,
+                "sheet_date": _parse_date(event.get("sheet_date")),
+                "clock_in_at": _parse_datetime(event.get("clock_in_time")),
+                "clock_out_at": None,
+                "tasks_completed": 0,
+                "notes": None,
+                "project_name": event.get("project_name"),
+                "user_name": event.get("user_name"),
+            }
+        elif kind == "clock_out":
+            self._closed[history_id] = None
+            while len(self._closed) > _CLOSED_IDS_LIMIT:
+                self._closed.popitem(last=False)
+            current = self._sessions.get(user_id)
+            if current and str(current["id"]) == history_id:
+                del self._sessions[user_id]
+
+    # -- warm-up ---------------------------------------------------------
+
+    async def warm(self) -> None:
+        """Load every open session; events seen meanwhile are replayed after."""
+        from sqlalchemy import select
+        from app.db.session import AsyncSessionLocal
+        from app.models.history import TimeHistory
+        from app.models.project import Project
+        from app.models.user import User
+
+        self._warming = True
+        self._warmed = False
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(
+                        TimeHistory.id,
+                        TimeHistory.user_id,
+                        TimeHistory.project_id,
+                        TimeHistory.work_role,
+                        TimeHistory.status,
+                        TimeHistory.sheet_date,
+                        TimeHistory.clock_in_at,
+                        TimeHistory.tasks_completed,
+                        TimeHistory.notes,
+                        Project.name.label("project_name"),
+                        User.name.label("user_name"),
+                    )
+                    .join(User, TimeHistory.user_id == User.id)
+                    .outerjoin(Project, TimeHistory.project_id == Project.id)
+                    .where(TimeHistory.clock_out_at.is_(None))
+                )
+                rows = result.all()
+        except Exception:
+            self._warming = False
+            self._buffer.clear()
+            raise
+
+        self._sessions = {
+            str(row.user_id): {
+                "id": row.id,
+                "user_id": row.user_id,
+                "project_id": row.project_id,
+                "work_role": row.work_role,
+                "status": row.status.value if hasattr(row.status, "value") else row.status,
+                "minutes_worked": None,
+                "sheet_date": row.sheet_date,
+                "clock_in_at": row.clock_in_at,
+                "clock_out_at": None,
+                "tasks_completed": row.tasks_completed,
+                "notes": row.notes,
+                "project_name": row.project_name,
+                "user_name": row.user_name,
+            }
+            for row in rows
+        }
+        self._warming = False
+        buffered, self._buffer = self._buffer, []
+        for event in buffered:
+            self.apply(event)
+        self._warmed = True
+        logger.info("Active-session registry warmed: %d open sessions", len(self._sessions))
+
+    def schedule_warm(self) -> None:
+        if self._warm_task and not self._warm_task.done():
+            return
+        self._warmed = False
+
+        async def _run():
+            try:
+                await self.warm()
+            except Exception as e:
+                logger.error(f"Active-session registry warm-up failed: {e}")
+
+        self._warm_task = asyncio.get_running_loop().create_task(_run())
+
+
+registry = ActiveSessionRegistry()
+live_feed.broker.add_listener(registry.apply)
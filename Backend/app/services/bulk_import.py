@@ -0,0 +1,430 @@
+"""
+Streaming CSV import for the admin bulk uploads (users, projects).
+
+The upload is read in BULK_IMPORT_READ_SIZE blocks and decoded
+incrementally, so memory is bounded by one chunk of rows, not the file.
+Rows are validated BULK_IMPORT_CHUNK_ROWS at a time in a worker thread,
+and valid ones are loaded with asyncpg copy_records_to_table into a
+temporary staging table. Once the file is consumed, a single set-based
+INSERT ... SELECT merges the staging rows into the real table.
+
+Everything runs in the request's transaction: the staging table is dropped
+on commit and nothing is written if the import fails half-way.
+"""
+import codecs
+import csv
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import UserRole
+
+logger = logging.getLogger(__name__)
+
+BULK_IMPORT_READ_SIZE = int(os.getenv("BULK_IMPORT_READ_SIZE", str(256 * 1024)))
+BULK_IMPORT_CHUNK_ROWS = int(os.getenv("BULK_IMPORT_CHUNK_ROWS", "5000"))
+# Longer error lists are truncated in the response (errors_total has the count)
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+
+# (line number of the record's first line, raw record text)
+Record = Tuple[int, str]
+# -> (values for the staging table or None, error messages)
+Validator = Callable[[int, Dict[str, str]], Tuple[Optional[tuple], List[str]]]
+
+
+class CsvImportError(Exception):
+    """The file as a whole is unusable (bad headers, empty, ...)."""
+
+    def __init__(self, detail: Any):
+        super().__init__(str(detail))
+        self.detail = detail
+
+
+# ------------------------------------------------------------------
+# Reading
+# ------------------------------------------------------------------
+
+async def iter_record_chunks(upload: UploadFile, chunk_rows: int = BULK_IMPORT_CHUNK_ROWS) -> AsyncIterator[List[Record]]:
+    """
+    Yield lists of up to `chunk_rows` complete CSV records. A record ends at
+    a line break outside quotes, so quoted fields may span lines.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()  # strips the BOM if present
+    pending = ""
+    record_lines: List[str] = []
+    quotes = 0
+    line_no = 0
+    record_start = 1
+    chunk: List[Record] = []
+
+    while True:
+        block = await upload.read(BULK_IMPORT_READ_SIZE)
+        pending += decoder.decode(block, final=not block)
+        lines = pending.splitlines(keepends=True)
+        # Keep an unterminated last line (or a "\r" that may precede "\n") for the next block
+        if block and lines and (not lines[-1].endswith(("\n", "\r")) or lines[-1].endswith("\r")):
+            pending = lines.pop()
+        else:
+            pending = ""
+
+        for line in lines:
+            line_no += 1
+            record_lines.append(line)
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+            chunk.append((record_start, "".join(record_lines)))
+            record_lines, quotes, record_start = [], 0, line_no + 1
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+
+        if not block:
+            break
+
+    if record_lines:
+        # Unbalanced quote at end of file: let the csv module report it
+        chunk.append((record_start, "".join(record_lines)))
+    if chunk:
+        yield chunk
+
+
+def parse_records(records: List[Record]) -> List[Tuple[int, List[str]]]:
+    reader = csv.reader(record for _, record in records)
+    return [(line_no, fields) for (line_no, _), fields in zip(records, reader)]
+
+
+def _validate_chunk(
+    records: List[Record],
+    header: List[str],
+    validate: Validator,
+) -> Tuple[List[tuple], List[str], int]:
+    """Parse and validate one chunk -> (staging rows, errors, data rows seen)."""
+    staged: List[tuple] = []
+    errors: List[str] = []
+    seen = 0
+    try:
+        parsed = parse_records(records)
+    except csv.Error as e:
+        return staged, [f"Line {records[0][0]}: could not parse CSV ({e})"], len(records)
+
+    for line_no, fields in parsed:
+        if not fields or all(not value.strip() for value in fields):
+            continue  # blank line
+        seen += 1
+        if len(fields) != len(header):
+            errors.append(f"Line {line_no}: 'row' should have exactly {len(header)} values")
+            continue
+        values, row_errors = validate(line_no, dict(zip(header, fields)))
+        if row_errors:
+            errors.extend(row_errors)
+        elif values is not None:
+            staged.append((line_no, *values))
+    return staged, errors, seen
+
+
+# ------------------------------------------------------------------
+# Loading
+# ------------------------------------------------------------------
+
+async def _asyncpg_connection(db: AsyncSession):
+    """
+    The session's asyncpg connection, inside the session's transaction.
+
+    SQLAlchemy's asyncpg adapter only sends BEGIN with the first statement
+    it executes; statements sent on the raw connection before that would
+    autocommit (and an ON COMMIT DROP table would be gone at once).
+    """
+    connection = await db.connection()
+    await connection.exec_driver_sql("SELECT 1")
+    raw = await connection.get_raw_connection()
+    return raw.driver_connection
+
+
+async def run_import(
+    db: AsyncSession,
+    upload: UploadFile,
+    *,
+    headers: Sequence[str],
+    validate: Validator,
+    staging_table: str,
+    staging_columns: Sequence[Tuple[str, str]],
+    rejected_sql: str,
+    merge_sql: str,
+) -> Dict[str, Any]:
+    """
+    Stream `upload` into `staging_table`, then run `rejected_sql` (rows of
+    (line_no, message) for rows the merge will skip) and `merge_sql`.
+    The caller commits.
+    """
+    started = time.perf_counter()
+    expected = set(headers)
+    header: Optional[List[str]] = None
+    errors: List[str] = []
+    rows_seen = 0
+    rows_staged = 0
+    column_names = ["line_no"] + [name for name, _ in staging_columns]
+    conn = None
+
+    async for records in iter_record_chunks(upload):
+        if header is None:
+            header_fields = parse_records(records[:1])
+            header = [name.strip() for name in header_fields[0][1]] if header_fields else []
+            records = records[1:]
+            if not header:
+                raise CsvImportError("CSV headers / column names are missing")
+            if set(header) != expected:
+                missing = expected - set(header)
+                extra = set(header) - expected
+                raise CsvImportError({
+                    "missing": 0 if not missing else f"count: {len(missing)}; {', '.join(missing)}",
+                    "extra": 0 if not extra else f"count: {len(extra)}; {', '.join(extra)}",
+                })
+            conn = await _asyncpg_connection(db)
+            columns_sql = ", ".join(f"{name} {pg_type}" for name, pg_type in staging_columns)
+            await conn.execute(
+                f"CREATE TEMP TABLE {staging_table} (line_no integer NOT NULL, {columns_sql}) ON COMMIT DROP"
+            )
+            if not records:
+                continue
+
+        staged, chunk_errors, seen = await run_in_threadpool(_validate_chunk, records, header, validate)
+        rows_seen += seen
+        errors.extend(chunk_errors)
+        if staged:
+            await conn.copy_records_to_table(staging_table, records=staged, columns=column_names)
+            rows_staged += len(staged)
+
+    if header is None:
+        raise CsvImportError("CSV headers / column names are missing")
+    if rows_seen == 0:
+        raise CsvImportError("CSV file is empty")
+
+    inserted = 0
+    rejected: List[Tuple[int, str]] = []
+    if rows_staged:
+        await conn.execute(f"ANALYZE {staging_table}")
+        rejected = [(row["line_no"], row["message"]) for row in await conn.fetch(rejected_sql)]
+        status = await conn.execute(merge_sql)
+        inserted = int(status.rsplit(" ", 1)[-1])  # "INSERT 0 <n>"
+
+    if rejected:
+        # Keep the report in file order
+        errors = [message for _, message in sorted(
+            [(_error_line(message), message) for message in errors]
+            + [(line_no, f"Line {line_no}: {message}") for line_no, message in rejected],
+            key=lambda item: item[0],
+        )]
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Bulk import into %s: %d rows, %d staged, %d inserted, %d errors in %.2fs",
+        staging_table, rows_seen, rows_staged, inserted, len(errors), elapsed,
+    )
+    return {
+        "inserted": inserted,
+        "errors": errors[:BULK_IMPORT_MAX_ERRORS],
+        "errors_total": len(errors),
+        "stats": {
+            "rows": rows_seen,
+            "staged": rows_staged,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "rows_per_second": round(rows_seen / elapsed, 1) if elapsed > 0 else None,
+        },
+    }
+
+
+def _error_line(message: str) -> int:
+    try:
+        return int(message.split(":", 1)[0].split()[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+# ------------------------------------------------------------------
+# Users
+# ------------------------------------------------------------------
+
+# email, name, role, date_of_joining, soul_id, work_role
+USER_HEADERS = ("email", "name", "role", "date_of_joining", "soul_id", "work_role")
+_USER_ROLES = {role.value for role in UserRole}
+
+
+def _validate_user(line_no: int, row: Dict[str, str]) -> Tuple[Optional[tuple], List[str]]:
+    for field in USER_HEADERS:
+        if not row[field].strip():
+            return None, [f"Line {line_no}: '{field}' is missing or 'row' has less than 6 values"]
+
+    errors = []
+    role = row["role"].strip().upper()
+    if role not in _USER_ROLES:
+        errors.append(f"Line {line_no}: Invalid 'role' '{row['role'].strip()}'. Must be one of {', '.join(sorted(_USER_ROLES))}")
+    try:
+        doj = _parse_date(row["date_of_joining"].strip())
+    except ValueError:
+        errors.append(f"Line {line_no}: Invalid 'date_of_joining' '{row['date_of_joining'].strip()}'. Use YYYY-MM-DD")
+    try:
+        soul_id = uuid.UUID(row["soul_id"].strip())
+    except ValueError:
+        errors.append(f"Line {line_no}: Invalid 'soul_id' '{row['soul_id'].strip()}'. Must be a UUID")
+    if errors:
+        return None, errors
+
+    return (
+        row["email"].strip().lower(),
+        row["name"].strip(),
+        role,
+        doj,
+        soul_id,
+        row["work_role"].strip(),
+    ), []
+
+
+_USERS_RANKED = """
+    WITH ranked AS (
+        SELECT s.*, row_number() OVER (PARTITION BY s.email ORDER BY s.line_no) AS rn
+        FROM users_import_stage s
+    )
+"""
+
+USERS_REJECTED_SQL = _USERS_RANKED + """
+    SELECT r.line_no,
+           CASE WHEN r.rn > 1 THEN 'email ''' || r.email || ''' appears earlier in the file'
+                ELSE 'email ''' || r.email || ''' already exists' END AS message
+    FROM ranked r
+    WHERE r.rn > 1 OR EXISTS (SELECT 1 FROM users u WHERE u.email = r.email)
+"""
+
+USERS_MERGE_SQL = _USERS_RANKED + """
+    INSERT INTO users (id, email, name, role, is_active, doj, work_role, soul_id, weekoffs, default_shift_id)
+    SELECT gen_random_uuid(), r.email, r.name, r.role::user_role, true, r.doj, r.work_role, r.soul_id,
+           ARRAY['SUNDAY']::weekoff_days[], NULL
+    FROM ranked r
+    WHERE r.rn = 1 AND NOT EXISTS (SELECT 1 FROM users u WHERE u.email = r.email)
+    ON CONFLICT DO NOTHING
+"""
+
+
+async def import_users(db: AsyncSession, upload: UploadFile) -> Dict[str, Any]:
+    return await run_import(
+        db,
+        upload,
+        headers=USER_HEADERS,
+        validate=_validate_user,
+        staging_table="users_import_stage",
+        staging_columns=[
+            ("email", "text"),
+            ("name", "text"),
+            ("role", "text"),
+            ("doj", "date"),
+            ("soul_id", "uuid"),
+            ("work_role", "text"),
+        ],
+        rejected_sql=USERS_REJECTED_SQL,
+        merge_sql=USERS_MERGE_SQL,
+    )
+
+
+# ------------------------------------------------------------------
+# Projects
+# ------------------------------------------------------------------
+
+# code, name, is_active, start_date, end_date
+PROJECT_HEADERS = ("code", "name", "is_active", "start_date", "end_date")
+
+
+def _validate_project(line_no: int, row: Dict[str, str]) -> Tuple[Optional[tuple], List[str]]:
+    code = row["code"].strip().lower()
+    if not code:
+        return None, []  # rows without a code are skipped
+
+    if not row["name"].strip():
+        return None, [f"Line {line_no}: 'name' is missing or 'row' has less than 5 values"]
+
+    errors = []
+    start_date_str = row["start_date"].strip()
+    end_date_str = row["end_date"].strip()
+
+    # start_date is required, end_date optional; both YYYY-MM-DD
+    start_date = None
+    if start_date_str:
+        try:
+            start_date = _parse_date(start_date_str)
+        except ValueError:
+            errors.append(
+                f"Line {line_no}: Invalid 'start_date' format '{start_date_str}'. Use YYYY-MM-DD format (e.g., 2024-01-15)"
+            )
+    else:
+        errors.append(f"Line {line_no}: 'start_date' is required and cannot be empty")
+
+    end_date = None
+    if end_date_str:
+        try:
+            end_date = _parse_date(end_date_str)
+        except ValueError:
+            errors.append(
+                f"Line {line_no}: Invalid 'end_date' format '{end_date_str}'. Use YYYY-MM-DD format (e.g., 2024-12-31) or leave empty"
+            )
+
+    if start_date and end_date and end_date < start_date:
+        errors.append(
+            f"Line {line_no}: 'end_date' ({end_date_str}) cannot be earlier than 'start_date' ({start_date_str})"
+        )
+    if errors:
+        return None, errors
+
+    is_active = row["is_active"].strip().upper() in ("TRUE", "1", "YES")
+    return (code, row["name"].strip(), is_active, start_date, end_date), []
+
+
+_PROJECTS_RANKED = """
+    WITH ranked AS (
+        SELECT s.*, row_number() OVER (PARTITION BY s.code ORDER BY s.line_no) AS rn
+        FROM projects_import_stage s
+    )
+"""
+
+PROJECTS_REJECTED_SQL = _PROJECTS_RANKED + """
+    SELECT r.line_no,
+           CASE WHEN r.rn > 1 THEN 'Project code ''' || r.code || ''' appears earlier in the file'
+                ELSE 'Project code ''' || r.code || ''' already exists' END AS message
+    FROM ranked r
+    WHERE r.rn > 1 OR EXISTS (SELECT 1 FROM projects p WHERE p.code = r.code)
+"""
+
+PROJECTS_MERGE_SQL = _PROJECTS_RANKED + """
+    INSERT INTO projects (id, code, name, is_active, start_date, end_date, updated_at)
+    SELECT gen_random_uuid(), r.code, r.name, r.is_active, r.start_date, r.end_date, now()
+    FROM ranked r
+    WHERE r.rn = 1 AND NOT EXISTS (SELECT 1 FROM projects p WHERE p.code = r.code)
+"""
+
+
+async def import_projects(db: AsyncSession, upload: UploadFile) -> Dict[str, Any]:
+    return await run_import(
+        db,
+        upload,
+        headers=PROJECT_HEADERS,
+        validate=_validate_project,
+        staging_table="projects_import_stage",
+        staging_columns=[
+            ("code", "text"),
+            ("name", "text"),
+            ("is_active", "boolean"),
+            ("start_date", "date"),
+            ("end_date", "date"),
+        ],
+        rejected_sql=PROJECTS_REJECTED_SQL,
+        merge_sql=PROJECTS_MERGE_SQL,
+    )
@@ -0,0 +1,248 @@
+"""
+In-process result cache for per-date dashboard endpoints.
+
+Entries are keyed by (endpoint, params) and tagged with the date (or date
+range) and project they were computed for. Concurrent identical requests are coalesced: the
+first one runs the query, the others await its result (single flight).
+
+Write paths call invalidate_on_commit(db, day=..., project_id=...); the
+matching entries are dropped once the transaction commits. A missing date or
+project acts as a wildcard on both sides, e.g. attendance writes invalidate a
+whole date because attendance_daily is read per user across projects.
+DASHBOARD_CACHE_TTL bounds staleness for writes made by other workers or
+paths that do not invalidate explicitly.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from datetime import date
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.timezone import today_ist
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_ENABLED = os.getenv("DASHBOARD_CACHE_ENABLED", "true").lower() == "true"
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "1024"))
+
+_PENDING_KEY = "dashboard_cache_invalidations"
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class DashboardCache:
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, value, date, project_id, until)
+        self._entries: Dict[CacheKey, Tuple[float, Any, Optional[date], Optional[str], Optional[date]]] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        # Bumped by every invalidation; a computation that overlapped one is
+        # returned to its callers but not stored.
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> CacheKey:
+        return endpoint, tuple(sorted((name, str(value)) for name, value in params.items()))
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        *,
+        day: Optional[date] = None,
+        project_id: Any = None,
+        until: Optional[date] = None,
+    ) -> Any:
+        key = self.make_key(endpoint, params)
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leading request was cancelled (client went away);
+                # retry and let this request run the query itself.
+                if future.cancelled():
+                    continue
+                raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        epoch = self._epoch
+        try:
+            value = await compute()
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                # Waiters re-raise it; avoid "exception never retrieved" noise
+                future.exception()
+            raise
+        else:
+            if epoch == self._epoch:
+                self._store(key, value, day, project_id, until)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(
+        self,
+        key: CacheKey,
+        value: Any,
+        day: Optional[date],
+        project_id: Any,
+        until: Optional[date] = None,
+    ) -> None:
+        if len(self._entries) >= self.max_entries:
+            now = time.monotonic()
+            for stale in [k for k, e in self._entries.items() if e[0] <= now]:
+                del self._entries[stale]
+            if len(self._entries) >= self.max_entries:
+                # Still full: evict the entry closest to expiry
+                del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+        project = str(project_id).lower() if project_id is not None else None
+        self._entries[key] = (time.monotonic() + self.ttl, value, day, project, until)
+
+    def invalidate(
+        self,
+        day: Optional[date] = None,
+        project_id: Any = None,
+        until: Optional[date] = None,
+    ) -> int:
+        """
+        Drop entries for `day` (or the range day..until) and `project_id`.
+        None matches everything, on the call side and on the entry side;
+        range entries are dropped when their range overlaps.
+        """
+        self._epoch += 1
+        project = str(project_id).lower() if project_id is not None else None
+        stale = [
+            key
+            for key, (_, _, entry_day, entry_project, entry_until) in self._entries.items()
+            if _matches_day(entry_day, entry_until, day, until)
+            and (project is None or entry_project is None or entry_project == project)
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+
+
+def _matches_day(
+    entry_day: Optional[date],
+    entry_until: Optional[date],
+    day: Optional[date],
+    until: Optional[date],
+) -> bool:
+    if day is None or entry_day is None:
+        return True
+    return entry_day <= (until or day) and day <= (entry_until or entry_day)
+
+
+dashboard_cache = DashboardCache(DASHBOARD_CACHE_TTL, DASHBOARD_CACHE_MAX_ENTRIES)
+
+
+def cached_dashboard(
+    endpoint: str,
+    date_param: Optional[str] = None,
+    project_param: Optional[str] = None,
+    until_param: Optional[str] = None,
+    ignore_params: Iterable[str] = ("db", "current_user", "_"),
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Memoize an endpoint's result through dashboard_cache.
+
+    The cache key is built from every argument except `ignore_params`, so
+    the endpoint's output must not depend on who is asking. Without a
+    `date_param`, or when its value is None, the entry is keyed and tagged
+    with today's IST date, the day write paths invalidate (the endpoint must
+    resolve None the same way); with `until_param` it covers the range
+    date_param..until_param. Put the decorator
+    below the @router.get line (above @run_with_sync_session, if any).
+    """
+    ignored = frozenset(ignore_params)
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        is_coroutine = inspect.iscoroutinefunction(func)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            result = func(*args, **kwargs)
+            return await result if is_coroutine else result
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not DASHBOARD_CACHE_ENABLED:
+                return await call(*args, **kwargs)
+            params = {name: value for name, value in kwargs.items() if name not in ignored}
+            day = kwargs.get(date_param) if date_param else None
+            if day is None:
+                day = today_ist()
+                if date_param:
+                    # A call without a date must not reuse yesterday's entry after midnight
+                    params[date_param] = day
+            return await dashboard_cache.get_or_compute(
+                endpoint,
+                params,
+                lambda: call(*args, **kwargs),
+                day=day,
+                project_id=kwargs.get(project_param) if project_param else None,
+                until=kwargs.get(until_param) if until_param else None,
+            )
+
+        wrapper.__signature__ = inspect.signature(func)
+        return wrapper
+
+    return decorator
+
+
+def invalidate_on_commit(
+    db: Any,
+    day: Optional[date] = None,
+    project_id: Any = None,
+    until: Optional[date] = None,
+) -> None:
+    """
+    Schedule a dashboard_cache invalidation for when `db` (Session or
+    AsyncSession) commits. Discarded on rollback.
+    """
+    session = getattr(db, "sync_session", db)
+    session.info.setdefault(_PENDING_KEY, []).append((day, project_id, until))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_invalidations(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    for day, project_id, until in pending or ():
+        dropped = dashboard_cache.invalidate(day, project_id, until)
+        if dropped:
+            logger.debug("dashboard_cache: dropped %d entries (date=%s project=%s)", dropped, day, project_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,317 @@
+"""
+Background jobs for work that outlives an HTTP request (bulk uploads,
+multi-month report exports, the all-projects metrics recalculation).
+
+    job = job_manager.submit("roster_export", run, owner_id=user.id, params={...})
+    # run(ctx) is a coroutine; it reports progress with ctx.progress(done, total)
+    # and writes its artifact to ctx.artifact_path(filename)
+
+Each worker runs at most JOBS_MAX_CONCURRENCY jobs at a time; the rest wait
+as QUEUED. Job state is a JSON file under JOBS_DIR/<job_id>/, next to its
+artifact, so any worker on the host can report progress, serve the result or
+request cancellation (a `cancel` marker file the owning worker picks up at
+its next progress update). The owning worker also touches the state file
+every HEARTBEAT_SECONDS; a QUEUED/RUNNING job whose file is older than
+JOBS_ORPHANED_SECONDS lost its worker (killed, crashed) and is marked FAILED
+on startup or when it is read. Finished jobs are removed after
+JOBS_RETENTION_SECONDS.
+"""
+import asyncio
+import enum
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(tempfile.gettempdir(), "rms-jobs"))
+JOBS_MAX_CONCURRENCY = int(os.getenv("JOBS_MAX_CONCURRENCY", "2"))
+JOBS_RETENTION_SECONDS = int(os.getenv("JOBS_RETENTION_SECONDS", "86400"))
+# Progress is persisted (and the cancel marker checked) at most this often
+PROGRESS_INTERVAL_SECONDS = 0.5
+# Unfinished jobs' state files are touched this often by their worker
+HEARTBEAT_SECONDS = 10 * PROGRESS_INTERVAL_SECONDS
+# Generous: a job that blocks the event loop also delays its heartbeat
+JOBS_ORPHANED_SECONDS = int(os.getenv("JOBS_ORPHANED_SECONDS", "60"))
+
+_STATE_FILE = "state.json"
+_CANCEL_FILE = "cancel"
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+FINISHED = {JobStatus.SUCCEEDED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobContext:
+    """Handed to the job coroutine: progress, cancellation and artifact paths."""
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self._manager = manager
+        self.job_id = job_id
+        self._last_flush = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        """
+        Record progress. Safe to call from sync code running in run_sync.
+        Raises asyncio.CancelledError once cancellation was requested.
+        """
+        state = self._manager._states[self.job_id]
+        state["progress"]["done"] = done
+        if total is not None:
+            state["progress"]["total"] = total
+        now = time.monotonic()
+        if now - self._last_flush < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_flush = now
+        self._manager._write_state(state)
+        if os.path.exists(self._manager.path(self.job_id, _CANCEL_FILE)):
+            raise asyncio.CancelledError()
+
+    def advance(self, count: int = 1) -> None:
+        state = self._manager._states[self.job_id]
+        self.progress(state["progress"]["done"] + count)
+
+    def artifact_path(self, filename: str) -> str:
+        return self._manager.path(self.job_id, os.path.basename(filename))
+
+    def set_artifact(self, path: str, filename: str, media_type: str) -> None:
+        self._manager._states[self.job_id]["artifact"] = {
+            "path": path,
+            "filename": filename,
+            "media_type": media_type,
+        }
+
+
+class ProgressReader:
+    """
+    File wrapper with an async read(), usable where an UploadFile is read
+    (e.g. bulk_import.run_import); reports bytes read as job progress.
+    """
+
+    def __init__(self, fileobj, ctx: JobContext):
+        self._file = fileobj
+        self._ctx = ctx
+
+    async def read(self, size: int = -1) -> bytes:
+        data = await run_in_threadpool(self._file.read, size)
+        self._ctx.advance(len(data))
+        return data
+
+
+class JobManager:
+    def __init__(self, root: str = JOBS_DIR, max_concurrency: int = JOBS_MAX_CONCURRENCY):
+        self.root = root
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    # -- files -------------------------------------------------------------
+
+    def path(self, job_id: str, *parts: str) -> str:
+        return os.path.join(self.root, job_id, *parts)
+
+    def _write_state(self, state: Dict[str, Any]) -> None:
+        target = self.path(state["id"], _STATE_FILE)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(state, fh, default=str)
+        os.replace(tmp, target)
+
+    def _read_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(job_id, _STATE_FILE)) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _fail_if_orphaned(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark an unfinished job FAILED if no worker has touched it lately."""
+        if state["status"] in FINISHED or state["id"] in self._tasks:
+            return state
+        try:
+            age = time.time() - os.path.getmtime(self.path(state["id"], _STATE_FILE))
+        except FileNotFoundError:
+            return state
+        if age < JOBS_ORPHANED_SECONDS:
+            return state
+        logger.warning(f"Job {state['id']} ({state['kind']}) has no live worker; marking it failed")
+        state.update(status=JobStatus.FAILED.value, error="worker exited", finished_at=_now())
+        self._write_state(state)
+        return state
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                os.utime(self.path(job_id, _STATE_FILE))
+            except FileNotFoundError:
+                return
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def create(self, kind: str, *, owner_id: Any, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Register a QUEUED job (its directory exists, nothing runs yet)."""
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.path(job_id), exist_ok=True)
+        state = {
+            "id": job_id,
+            "kind": kind,
+            "status": JobStatus.QUEUED.value,
+            "owner_id": str(owner_id) if owner_id is not None else None,
+            "params": params or {},
+            "progress": {"done": 0, "total": None},
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None,
+            "artifact": None,
+        }
+        self._states[job_id] = state
+        self._write_state(state)
+        return state
+
+    def start(self, job_id: str, fn: Callable[[JobContext], Awaitable[Any]]) -> Dict[str, Any]:
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job_id, fn))
+        return self._states[job_id]
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[JobContext], Awaitable[Any]],
+        *,
+        owner_id: Any,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        job = self.create(kind, owner_id=owner_id, params=params)
+        return self.start(job["id"], fn)
+
+    async def _run(self, job_id: str, fn: Callable[[JobContext], Awaitable[Any]]) -> None:
+        state = self._states[job_id]
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(job_id))
+        try:
+            async with self._semaphore:
+                if os.path.exists(self.path(job_id, _CANCEL_FILE)):
+                    raise asyncio.CancelledError()
+                state["status"] = JobStatus.RUNNING.value
+                state["started_at"] = _now()
+                self._write_state(state)
+                result = await fn(JobContext(self, job_id))
+            state["result"] = result
+            state["status"] = JobStatus.SUCCEEDED.value
+        except asyncio.CancelledError:
+            state["status"] = JobStatus.CANCELLED.value
+        except Exception as e:
+            logger.error(f"Job {job_id} ({state['kind']}) failed: {e}", exc_info=True)
+            state["status"] = JobStatus.FAILED.value
+            state["error"] = str(getattr(e, "detail", None) or e)
+        finally:
+            heartbeat.cancel()
+            state["finished_at"] = _now()
+            self._write_state(state)
+            self._tasks.pop(job_id, None)
+            self._states.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current state (from memory if this worker runs it, else from disk)."""
+        if not _valid_id(job_id):
+            return None
+        state = self._states.get(job_id)
+        if state is None:
+            state = self._read_state(job_id)
+            if state is None:
+                return None
+            state = self._fail_if_orphaned(state)
+        return with_eta(state)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued/running job, or delete a finished one with its artifact.
+        """
+        state = self.get(job_id)
+        if state is None:
+            return None
+        if state["status"] in FINISHED:
+            shutil.rmtree(self.path(job_id), ignore_errors=True)
+            return state
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            # Running on another worker: it checks for the marker on progress
+            open(self.path(job_id, _CANCEL_FILE), "w").close()
+        return state
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def purge_expired(self) -> None:
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+            return
+        cutoff = time.time() - JOBS_RETENTION_SECONDS
+        for job_id in os.listdir(self.root):
+            if job_id in self._states:
+                continue
+            state_path = self.path(job_id, _STATE_FILE)
+            try:
+                if os.path.getmtime(state_path) < cutoff:
+                    shutil.rmtree(self.path(job_id), ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+    def fail_orphaned(self) -> int:
+        """Mark every unfinished job without a live worker FAILED (run on startup)."""
+        if not os.path.isdir(self.root):
+            return 0
+        failed = 0
+        for job_id in os.listdir(self.root):
+            if job_id in self._states or not _valid_id(job_id):
+                continue
+            state = self._read_state(job_id)
+            if state is not None and state["status"] not in FINISHED:
+                failed += self._fail_if_orphaned(state)["status"] == JobStatus.FAILED.value
+        return failed
+
+
+def _valid_id(job_id: str) -> bool:
+    return len(job_id) == 32 and all(c in "0123456789abcdef" for c in job_id)
+
+
+def with_eta(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `state` with progress percent and eta_seconds filled in."""
+    state = dict(state, progress=dict(state["progress"]))
+    done, total = state["progress"]["done"], state["progress"]["total"]
+    state["progress"]["percent"] = round(100 * done / total, 1) if total else None
+    state["eta_seconds"] = None
+    if state["status"] == JobStatus.RUNNING.value and total and done and state["started_at"]:
+        elapsed = (datetime.now(timezone.utc) - datetime.fromisoformat(state["started_at"])).total_seconds()
+        state["eta_seconds"] = round(elapsed / done * max(total - done, 0), 1)
+    return state
+
+
+job_manager = JobManager()
@@ -0,0 +1,181 @@
+"""
+Live-workers event feed (clock-in / clock-out) for the admin dashboard.
+
+Write paths call publish_on_commit(db, event). With the default "postgres"
+backend the event is sent with pg_notify inside the same transaction, so it
+is only delivered if the write commits, and every worker receives it through
+its own LISTEN connection. The "memory" backend (LIVE_FEED_BACKEND=memory)
+fans events out in-process after commit - useful for local runs and tests
+without a database, but it only reaches subscribers of the same worker.
+
+Each worker keeps a single LISTEN connection and fans events out to its
+subscribers' queues, so N open dashboards cost one notification per event.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.utils.serialization import json_dumps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "live_workers"
+LIVE_FEED_BACKEND = os.getenv("LIVE_FEED_BACKEND", "postgres").lower()
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "256"))
+RECONNECT_DELAY_SECONDS = 5
+
+_PENDING_KEY = "live_feed_pending_events"
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+
+class LiveFeedBroker:
+    def __init__(self, backend: str = LIVE_FEED_BACKEND):
+        self.backend = backend
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._conn = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def listening(self) -> bool:
+        """True when events from every worker are being received."""
+        if self.backend == "memory":
+            return self._loop is not None
+        return self._conn is not None and not self._conn.is_closed()
+
+    # -- lifecycle -------------------------------------------------------
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self.backend != "postgres":
+            logger.info("Live feed: in-memory notifier (single worker only)")
+            return
+        await self._connect()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        if self._supervisor:
+            self._supervisor.cancel()
+            self._supervisor = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+        self._loop = None
+
+    async def _connect(self) -> None:
+        import asyncpg
+        from app.db.session import DATABASE_URL
+
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        try:
+            self._conn = await asyncpg.connect(dsn)
+            await self._conn.add_listener(CHANNEL, self._on_notify)
+            logger.info("Live feed: listening on channel %r", CHANNEL)
+        except Exception as e:
+            self._conn = None
+            logger.error(f"Live feed: LISTEN connection failed: {e}")
+
+    async def _supervise(self) -> None:
+        # Reconnect the dedicated LISTEN connection if it drops. Events sent
+        # while disconnected are lost, so subscribers are told to resync.
+        while True:
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            if self.listening:
+                continue
+            await self._connect()
+            if self.listening:
+                self._fanout({"type": "resync"})
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self._fanout(json.loads(payload))
+        except ValueError:
+            logger.warning("Live feed: dropped malformed payload %r", payload[:200])
+
+    # -- fan-out ---------------------------------------------------------
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """In-process hook called for every event (before subscribers)."""
+        self._listeners.append(callback)
+
+    def _fanout(self, event: Dict[str, Any]) -> None:
+        self.notify_listeners([event])
+        self._deliver(event)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and make it reload a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    def notify_listeners(self, events: List[Dict[str, Any]]) -> None:
+        for item in events:
+            for callback in self._listeners:
+                try:
+                    callback(item)
+                except Exception:
+                    logger.exception("Live feed: listener failed")
+
+    def publish_local(self, events: List[Dict[str, Any]]) -> None:
+        """Deliver committed events to this worker's subscribers (memory backend)."""
+        if self._loop is None:
+            return
+        for item in events:
+            self._loop.call_soon_threadsafe(self._deliver, item)
+
+
+broker = LiveFeedBroker()
+
+
+def publish_on_commit(db: Any, event_data: Dict[str, Any]) -> None:
+    """
+    Queue a live-feed event on `db` (Session or AsyncSession). It is sent
+    when the transaction commits and discarded on rollback.
+    """
+    session = getattr(db, "sync_session", db)
+    session.info.setdefault(_PENDING_KEY, []).append(event_data)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_in_transaction(session):
+    if broker.backend != "postgres":
+        return
+    for item in session.info.get(_PENDING_KEY, ()):
+        # NOTIFY is transactional: delivered only once this commit succeeds
+        session.execute(_NOTIFY_SQL, {"channel": CHANNEL, "payload": json_dumps(item).decode()})
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    # In-process listeners see this worker's own commits right away. With
+    # the postgres backend the NOTIFY echo is applied again later, so
+    # listeners must be idempotent; subscribers only get the echo.
+    broker.notify_listeners(pending)
+    if broker.backend != "postgres":
+        broker.publish_local(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
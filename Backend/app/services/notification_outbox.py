@@ -0,0 +1,371 @@
+"""
+Delivery of queued notification emails (the notification_outbox table).
+
+Every worker runs one OutboxDispatcher. It claims due rows with
+FOR UPDATE SKIP LOCKED - so workers never send the same row twice - and
+marks them SENDING with a lease before any HTTP call is made, which keeps
+no row locks open during delivery. Claimed rows are grouped by recipient;
+groups are sent concurrently through one pooled httpx.AsyncClient, bounded
+by NOTIFICATION_CONCURRENCY, one recipient's messages in order.
+
+Failures are retried with exponential backoff until NOTIFICATION_MAX_ATTEMPTS,
+then left as FAILED. A row whose worker died mid-send is picked up again
+once its lease expires, so delivery is at-least-once.
+
+Commits that enqueue rows wake the local dispatcher immediately; otherwise
+it polls every NOTIFICATION_POLL_SECONDS. NOTIFICATION_FUNCTION_URL can
+point the dispatcher at a local HTTP stub.
+
+Batch mode is opt-in and needs an email function this repo does not ship:
+the default - NOTIFICATION_BATCH_FUNCTION_URL unset - is one call per message
+to send-approval-email, grouped by recipient as above. With the URL set,
+claimed messages are posted up to NOTIFICATION_MESSAGES_PER_CALL per call as
+{"messages": [payload, ...]} (each payload exactly what the per-message call
+would send). A 2xx response delivers them all, unless it carries
+{"results": [{"ok": bool, "error": str}, ...]} in message order.
+
+Digest mode (NOTIFICATION_DIGEST_WINDOW_SECONDS > 0): rows of the kinds in
+NOTIFICATION_DIGEST_KINDS get a digest_key and are held for the window. When
+the oldest one for a recipient is due, all of that recipient's pending
+digest rows are claimed together and sent as one summary.
+"""
+import asyncio
+import logging
+import os
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_DISPATCHER_ENABLED = os.getenv("NOTIFICATION_DISPATCHER_ENABLED", "true").lower() == "true"
+NOTIFICATION_CONCURRENCY = int(os.getenv("NOTIFICATION_CONCURRENCY", "8"))
+# Rows claimed per pass
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "50"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "6"))
+NOTIFICATION_POLL_SECONDS = float(os.getenv("NOTIFICATION_POLL_SECONDS", "5"))
+NOTIFICATION_TIMEOUT_SECONDS = float(os.getenv("NOTIFICATION_TIMEOUT_SECONDS", "10"))
+NOTIFICATION_MESSAGES_PER_CALL = int(os.getenv("NOTIFICATION_MESSAGES_PER_CALL", "50"))
+NOTIFICATION_DIGEST_WINDOW_SECONDS = int(os.getenv("NOTIFICATION_DIGEST_WINDOW_SECONDS", "0"))
+NOTIFICATION_DIGEST_KINDS = frozenset(
+    kind.strip().upper()
+    for kind in os.getenv("NOTIFICATION_DIGEST_KINDS", "REQUEST_CREATED,AUTO_ALLOCATION").split(",")
+    if kind.strip()
+)
+# A SENDING row older than this is assumed lost and claimed again
+LEASE_SECONDS = max(60, int(NOTIFICATION_TIMEOUT_SECONDS * 6))
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+_ENQUEUED_KEY = "notification_outbox_enqueued"
+
+
+def function_url() -> Optional[str]:
+    url = os.getenv("NOTIFICATION_FUNCTION_URL")
+    if url:
+        return url
+    supabase_url = os.getenv("SUPABASE_URL")
+    return f"{supabase_url}/functions/v1/send-approval-email" if supabase_url else None
+
+
+def batch_function_url() -> Optional[str]:
+    return os.getenv("NOTIFICATION_BATCH_FUNCTION_URL") or None
+
+
+def digest_window(kind: str) -> int:
+    """Seconds to hold a `kind` notification for a digest (0 = send as is)."""
+    if NOTIFICATION_DIGEST_WINDOW_SECONDS > 0 and kind.upper() in NOTIFICATION_DIGEST_KINDS:
+        return NOTIFICATION_DIGEST_WINDOW_SECONDS
+    return 0
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number `attempts` (1-based), with +/-20% jitter."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _is_retryable(status_code: int) -> bool:
+    return status_code in (408, 425, 429) or status_code >= 500
+
+
+# (rows, payload): several rows when they are folded into one digest
+Message = Tuple[List[Any], Dict[str, Any]]
+# (row, error or None, retryable)
+Outcome = Tuple[Any, Optional[str], bool]
+
+
+class OutboxDispatcher:
+    def __init__(self):
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore = asyncio.Semaphore(NOTIFICATION_CONCURRENCY)
+        self.sent = 0
+        self.failed = 0
+
+    # -- lifecycle -------------------------------------------------------
+
+    async def start(self) -> None:
+        if not NOTIFICATION_DISPATCHER_ENABLED:
+            logger.info("Notification dispatcher disabled (NOTIFICATION_DISPATCHER_ENABLED=false)")
+            return
+        url = function_url()
+        if not (url or batch_function_url()) or not os.getenv("SUPABASE_SERVICE_ROLE_KEY"):
+            logger.warning("Notification dispatcher not started - missing SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY")
+            return
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            timeout=NOTIFICATION_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=NOTIFICATION_CONCURRENCY,
+                max_keepalive_connections=NOTIFICATION_CONCURRENCY,
+            ),
+            headers={
+                "Authorization": f"Bearer {os.getenv('SUPABASE_SERVICE_ROLE_KEY')}",
+                "Content-Type": "application/json",
+            },
+        )
+        self._url = url
+        self._batch_url = batch_function_url()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            "Notification dispatcher started (concurrency=%d, %s)",
+            NOTIFICATION_CONCURRENCY,
+            "batch calls" if self._batch_url else "one call per message",
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._loop = None
+
+    def wake(self) -> None:
+        """Start a drain now instead of at the next poll. Thread-safe."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification dispatcher: drain failed: {e}")
+                claimed = 0
+            if claimed >= NOTIFICATION_BATCH_SIZE:
+                continue  # more may be due right away
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), NOTIFICATION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # -- one pass ----------------------------------------------------------
+
+    async def drain_once(self) -> int:
+        """Claim one batch of due rows, deliver it and record the outcome."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        messages = build_messages(rows)
+        if self._batch_url:
+            chunks = [
+                messages[start:start + NOTIFICATION_MESSAGES_PER_CALL]
+                for start in range(0, len(messages), NOTIFICATION_MESSAGES_PER_CALL)
+            ]
+            results = await asyncio.gather(*(self._send_batch(chunk) for chunk in chunks))
+        else:
+            by_recipient: Dict[str, List[Message]] = defaultdict(list)
+            for message in messages:
+                by_recipient[message[0][0].recipient_email.lower()].append(message)
+            results = await asyncio.gather(*(self._send_group(group) for group in by_recipient.values()))
+        await self._record([outcome for group in results for outcome in group])
+        return len(rows)
+
+    async def _claim(self) -> List[Any]:
+        from app.db.session import AsyncSessionLocal
+
+        # Recipients with a due digest: their other pending digest rows are
+        # swept into the same claim even though they are not due yet
+        due_digests = select(NotificationOutbox.digest_key).where(
+            NotificationOutbox.digest_key.isnot(None),
+            NotificationOutbox.status == OutboxStatus.PENDING,
+            NotificationOutbox.next_attempt_at <= func.now(),
+        )
+        due = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.status.in_([OutboxStatus.PENDING, OutboxStatus.SENDING]),
+                or_(
+                    NotificationOutbox.next_attempt_at <= func.now(),
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.PENDING,
+                        NotificationOutbox.digest_key.in_(due_digests),
+                    ),
+                ),
+            )
+            .order_by(NotificationOutbox.next_attempt_at)
+            .limit(NOTIFICATION_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        claim = (
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(due.scalar_subquery()))
+            .values(
+                status=OutboxStatus.SENDING,
+                attempts=NotificationOutbox.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=LEASE_SECONDS),
+            )
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.recipient_email,
+                NotificationOutbox.payload,
+                NotificationOutbox.digest_key,
+                NotificationOutbox.attempts,
+                NotificationOutbox.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(claim)).all()
+            await db.commit()
+        return sorted(rows, key=lambda row: row.created_at)
+
+    async def _send_group(self, messages: List[Message]) -> List[Outcome]:
+        """Send one recipient's messages in order, one call each."""
+        outcomes = []
+        for rows, payload in messages:
+            async with self._semaphore:
+                error, retryable = await self._post(self._url, payload)
+            outcomes.extend((row, error, retryable) for row in rows)
+        return outcomes
+
+    async def _send_batch(self, messages: List[Message]) -> List[Outcome]:
+        """Send up to NOTIFICATION_MESSAGES_PER_CALL messages in one call."""
+        async with self._semaphore:
+            error, retryable, results = await self._post_batch([payload for _, payload in messages])
+        outcomes = []
+        for index, (rows, _) in enumerate(messages):
+            if error is None and results is not None and index < len(results):
+                result = results[index] or {}
+                if not result.get("ok", True):
+                    # Per-message failures are retried; the call itself succeeded
+                    outcomes.extend((row, str(result.get("error") or "rejected"), True) for row in rows)
+                    continue
+            outcomes.extend((row, error, retryable) for row in rows)
+        return outcomes
+
+    async def _post(self, url: str, payload: Dict[str, Any]) -> Tuple[Optional[str], bool]:
+        try:
+            response = await self._client.post(url, json=payload)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}", True
+        if response.is_success:
+            return None, False
+        return f"HTTP {response.status_code}: {response.text[:200]}", _is_retryable(response.status_code)
+
+    async def _post_batch(
+        self, payloads: List[Dict[str, Any]]
+    ) -> Tuple[Optional[str], bool, Optional[List[Dict[str, Any]]]]:
+        try:
+            response = await self._client.post(self._batch_url, json={"messages": payloads})
+        except Exception as e:
+            return f"{type(e).__name__}: {e}", True, None
+        if not response.is_success:
+            return f"HTTP {response.status_code}: {response.text[:200]}", _is_retryable(response.status_code), None
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        results = body.get("results") if isinstance(body, dict) else None
+        return None, False, results if isinstance(results, list) else None
+
+    async def _record(self, outcomes: List[Outcome]) -> None:
+        from app.db.session import AsyncSessionLocal
+
+        now = datetime.now(timezone.utc)
+        changes = []
+        for row, error, retryable in outcomes:
+            if error is None:
+                self.sent += 1
+                changes.append({"id": row.id, "status": OutboxStatus.SENT, "sent_at": now, "last_error": None})
+            elif retryable and row.attempts < NOTIFICATION_MAX_ATTEMPTS:
+                changes.append({
+                    "id": row.id,
+                    "status": OutboxStatus.PENDING,
+                    "next_attempt_at": now + timedelta(seconds=backoff_seconds(row.attempts)),
+                    "last_error": error,
+                })
+            else:
+                self.failed += 1
+                logger.error(f"Notification {row.id} to {row.recipient_email} failed permanently: {error}")
+                changes.append({"id": row.id, "status": OutboxStatus.FAILED, "last_error": error})
+
+        # Bulk UPDATE by primary key, grouped into one executemany per column set
+        by_columns: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+        for change in changes:
+            by_columns[tuple(sorted(change))].append(change)
+        async with AsyncSessionLocal() as db:
+            for params in by_columns.values():
+                await db.execute(update(NotificationOutbox), params)
+            await db.commit()
+
+
+def build_messages(rows: List[Any]) -> List[Message]:
+    """Fold digest rows into one summary per recipient; others go as they are."""
+    from app.services.notification_service import build_digest_payload
+
+    messages: List[Message] = []
+    digests: Dict[str, List[Any]] = defaultdict(list)
+    for row in rows:
+        if row.digest_key:
+            digests[row.digest_key].append(row)
+        else:
+            messages.append(([row], row.payload))
+    for group in digests.values():
+        if len(group) == 1:
+            messages.append((group, group[0].payload))
+        else:
+            messages.append((group, build_digest_payload([row.payload for row in group])))
+    return messages
+
+
+dispatcher = OutboxDispatcher()
+
+
+def mark_enqueued(db: Any) -> None:
+    """Wake the dispatcher when `db` (Session or AsyncSession) commits."""
+    session = getattr(db, "sync_session", db)
+    session.info[_ENQUEUED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    if session.info.pop(_ENQUEUED_KEY, None):
+        dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_enqueued(session):
+    session.info.pop(_ENQUEUED_KEY, None)
@@ -1,57 +1,134 @@
-import os
-from typing import Optional, List
-
-import requests
+"""
+Notification emails.
+
+Handlers call enqueue_* with their db session: the email is written to
+notification_outbox in the same transaction as the change it announces, so it
+is sent only if that change commits, and the request never waits on the email
+function. app/services/notification_outbox.py delivers the rows. The
+auto-allocation email is queued by an INSERT ... SELECT that runs inside the
+clock-in statement instead (auto_allocation_email_insert).
+
+With NOTIFICATION_DIGEST_WINDOW_SECONDS set, manager-facing kinds
+(NOTIFICATION_DIGEST_KINDS) are held for the window and folded into one
+summary email per recipient (build_digest_payload).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, List, Tuple
+
+from sqlalchemy import Insert, func, insert, literal, null, select, true
+
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.models.project import Project
+from app.models.project_owners import ProjectOwner
+from app.models.user import User
+from app.services.notification_outbox import digest_window, mark_enqueued
+
+
+def _enqueue(db: Any, kind: str, recipient_email: str, payload: dict) -> None:
+    row = NotificationOutbox(kind=kind, recipient_email=recipient_email, payload=payload)
+    window = digest_window(kind)
+    if window:
+        row.digest_key = recipient_email.lower()
+        row.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=window)
+    db.add(row)
+    mark_enqueued(db)
+
+
+def build_digest_payload(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One summary email for several queued payloads to the same recipient."""
+    lines = []
+    for item in payloads:
+        if item.get("decision") == "REQUESTED":
+            line = (
+                f"{item.get('requester_name') or 'Someone'} requested {item['request_type']} "
+                f"from {item['start_date']} to {item['end_date']}"
+            )
+            if item.get("comment"):
+                line += f": {item['comment']}"
+        else:
+            line = item.get("comment") or f"{item['decision']} {item['request_type']} {item['start_date']} - {item['end_date']}"
+        lines.append(f"- {line}")
+
+    projects = sorted({
+        name.strip()
+        for item in payloads
+        for name in (item.get("project_names") or "").split(",")
+        if name.strip()
+    })
+    first = payloads[0]
+    digest = {
+        "email": first["email"],
+        "name": first["name"],
+        "decision": "DIGEST",
+        "comment": "\n".join(lines),
+        "request_type": "DIGEST",
+        "start_date": min(item["start_date"] for item in payloads),
+        "end_date": max(item["end_date"] for item in payloads),
+        "items": payloads,
+    }
+    if projects:
+        digest["project_names"] = ", ".join(projects)
+    return digest
 
 
-def send_auto_allocation_email(
+def auto_allocation_email_insert(
+    allocated: Any,
     *,
-    pm_email: str,
-    pm_name: str,
+    project_id: Any,
     user_name: str,
     user_email: str,
-    project_name: str,
     work_role: str,
     allocation_date: str,
-) -> None:
+) -> Insert:
     """
-    Send email notification to PM when a user is auto-allocated to their project.
+    INSERT ... SELECT queuing the email to a PM when a user is
+    auto-allocated to their project, for use as a CTE of the write that
+    allocates: one row per row of `allocated` (e.g. the RETURNING of the
+    project_members insert) when the project has an owner with an email.
+    The owner is looked up in the same statement. The caller marks the
+    session with mark_enqueued() when a row was written.
     """
-    supabase_url = os.getenv("SUPABASE_URL")
-    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-    if not supabase_url or not service_role_key:
-        print("[EMAIL] Skipped auto-allocation email - Missing env vars")
-        return
-
-    function_url = f"{supabase_url}/functions/v1/send-approval-email"
-    payload = {
-        "email": pm_email,
-        "name": pm_name,
-        "decision": "AUTO_ALLOCATED",
-        "comment": f"{user_name} ({user_email}) has been auto-allocated to {project_name} as {work_role}",
-        "request_type": "PROJECT_ALLOCATION",
-        "start_date": allocation_date,
-        "end_date": allocation_date,
-        "requester_name": user_name,
-        "project_names": project_name,
-    }
-
-    headers = {
-        "Authorization": f"Bearer {service_role_key}",
-        "Content-Type": "application/json",
-    }
-
-    print(f"[EMAIL] Sending auto-allocation notification to PM {pm_email} for user {user_name} on project {project_name}...")
-
-    try:
-        response = requests.post(function_url, json=payload, headers=headers, timeout=10)
-        print(f"[EMAIL] Response: status={response.status_code}, body={response.text[:200] if response.text else 'empty'}")
-    except Exception as e:
-        print(f"[EMAIL] Failed to send auto-allocation email to {pm_email}: {e}")
+    owner = (
+        select(User.email, User.name)
+        .join(ProjectOwner, ProjectOwner.user_id == User.id)
+        .where(ProjectOwner.project_id == project_id, func.coalesce(User.email, "") != "")
+        .limit(1)
+        .subquery("project_owner")
+    )
+    project_name = func.coalesce(
+        select(Project.name).where(Project.id == project_id).scalar_subquery(), "Unknown Project"
+    )
+    payload = func.jsonb_build_object(
+        "email", owner.c.email,
+        "name", owner.c.name,
+        "decision", "AUTO_ALLOCATED",
+        "comment", func.format("%s (%s) has been auto-allocated to %s as %s", user_name, user_email, project_name, work_role),
+        "request_type", "PROJECT_ALLOCATION",
+        "start_date", allocation_date,
+        "end_date", allocation_date,
+        "requester_name", user_name,
+        "project_names", project_name,
+    )
+    window = digest_window("AUTO_ALLOCATION")
+    # Python-side column defaults are not applied to an INSERT in a CTE
+    rows = select(
+        func.gen_random_uuid(),
+        literal("AUTO_ALLOCATION"),
+        owner.c.email,
+        payload,
+        func.lower(owner.c.email) if window else null(),
+        literal(OutboxStatus.PENDING, NotificationOutbox.status.type),
+        literal(0),
+        func.now() + timedelta(seconds=window),
+    ).select_from(allocated).join(owner, true())
+    return insert(NotificationOutbox).from_select(
+        ["id", "kind", "recipient_email", "payload", "digest_key", "status", "attempts", "next_attempt_at"],
+        rows,
+    )
 
 
-def send_attendance_request_decision_email(
+def enqueue_attendance_request_decision_email(
+    db: Any,
     *,
     user_email: str,
     user_name: str,
@@ -63,15 +140,8 @@ def send_attendance_request_decision_email(
     requester_name: Optional[str] = None,
     project_names: Optional[str] = None,
     cc_emails: Optional[List[str]] = None,
+    kind: str = "REQUEST_DECISION",
 ) -> None:
-    supabase_url = os.getenv("SUPABASE_URL")
-    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-    if not supabase_url or not service_role_key:
-        print(f"[EMAIL] Skipped - Missing env vars. SUPABASE_URL={bool(supabase_url)}, SERVICE_ROLE_KEY={bool(service_role_key)}")
-        return
-
-    function_url = f"{supabase_url}/functions/v1/send-approval-email"
     payload = {
         "email": user_email,
         "name": user_name,
@@ -88,25 +158,14 @@ def send_attendance_request_decision_email(
     if project_names:
         payload["project_names"] = project_names
 
-    headers = {
-        "Authorization": f"Bearer {service_role_key}",
-        "Content-Type": "application/json",
-    }
-
-    print(f"[EMAIL] Sending {decision} notification to {user_email} for {request_type} request...")
-
-    try:
-        response = requests.post(function_url, json=payload, headers=headers, timeout=10)
-        print(f"[EMAIL] Response: status={response.status_code}, body={response.text[:200] if response.text else 'empty'}")
-    except Exception as e:
-        print(f"[EMAIL] Failed to send email to {user_email}: {e}")
-        return
+    print(f"[EMAIL] Queued {decision} notification to {user_email} for {request_type} request")
+    _enqueue(db, kind, user_email, payload)
 
 
-def send_attendance_request_created_email(
+def enqueue_attendance_request_created_emails(
+    db: Any,
     *,
-    recipient_email: str,
-    recipient_name: str,
+    recipients: Iterable[Tuple[str, str]],
     requester_name: str,
     request_type: str,
     start_date: str,
@@ -114,6 +173,11 @@ def send_attendance_request_created_email(
     reason: Optional[str],
     project_names: Optional[str],
 ) -> None:
+    """
+    Queue the "new request" email for every (email, name) in `recipients`.
+    The rows are delivered together (one call with a batch function URL,
+    or one summary per manager in digest mode).
+    """
     # TEMPORARILY COMMENTED OUT - CC to grootleave disabled
     # Uncomment below to re-enable CC emails
     # rpm_cc_email = os.getenv("RPM_CC_EMAIL")
@@ -122,16 +186,18 @@ def send_attendance_request_created_email(
     #     cc_emails = [email.strip() for email in rpm_cc_email.split(",") if email.strip()]
     cc_emails = None  # CC disabled temporarily
 
-    send_attendance_request_decision_email(
-        user_email=recipient_email,
-        user_name=recipient_name or recipient_email,
-        decision="REQUESTED",
-        comment=reason,
-        request_type=request_type,
-        start_date=start_date,
-        end_date=end_date,
-        requester_name=requester_name,
-        project_names=project_names,
-        cc_emails=cc_emails,
-    )
-
+    for recipient_email, recipient_name in recipients:
+        enqueue_attendance_request_decision_email(
+            db,
+            user_email=recipient_email,
+            user_name=recipient_name or recipient_email,
+            decision="REQUESTED",
+            comment=reason,
+            request_type=request_type,
+            start_date=start_date,
+            end_date=end_date,
+            requester_name=requester_name,
+            project_names=project_names,
+            cc_emails=cc_emails,
+            kind="REQUEST_CREATED",
+        )
@@ -0,0 +1,139 @@
+"""
+Set-based SCD Type 2 writes for manual quality assessments.
+
+submit_quality_assessments() records a batch of assessments in three
+statements instead of three per assessment:
+
+1. one SELECT on project_members for the work roles not given;
+2. one UPDATE ... FROM (VALUES ...) closing the current user_quality row of
+   every (user, project) pair (is_current = false, valid_to per pair);
+3. one multi-row INSERT of the new versions.
+
+Batches over CHUNK_PAIRS pairs split 1 and 2 to stay under the bind
+parameter limit.
+
+Several assessments for the same pair are applied in order, as if posted one
+after another: the last becomes current and the earlier ones are inserted
+already closed. Validation is the caller's job.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import DateTime, column, insert, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project_members import ProjectMember
+from app.models.user_quality import QualityRating, UserQuality
+from app.services.dashboard_cache import invalidate_on_commit
+
+# (user, project) pairs per statement; up to 3 bind parameters each, under the 32767 limit
+CHUNK_PAIRS = 5000
+
+
+@dataclass
+class QualityAssessmentItem:
+    user_id: UUID
+    project_id: UUID
+    metric_date: date
+    rating: QualityRating
+    quality_score: Optional[float] = None
+    accuracy: Optional[float] = None
+    critical_rate: Optional[float] = None
+    notes: Optional[str] = None
+    work_role: Optional[str] = None
+
+
+async def resolve_work_roles(db: AsyncSession, pairs: Sequence[Tuple[UUID, UUID]]) -> Dict[Tuple[UUID, UUID], str]:
+    """(user_id, project_id) -> work_role from project_members, active and latest assignment first."""
+    pairs = list(set(pairs))
+    rows = []
+    for start in range(0, len(pairs), CHUNK_PAIRS):
+        result = await db.execute(
+            select(ProjectMember.user_id, ProjectMember.project_id, ProjectMember.work_role)
+            .filter(tuple_(ProjectMember.user_id, ProjectMember.project_id).in_(pairs[start:start + CHUNK_PAIRS]))
+            .order_by(ProjectMember.is_active, ProjectMember.assigned_from)
+        )
+        rows.extend(result.all())
+    # Later rows win: active over inactive, then the latest assignment
+    return {(row.user_id, row.project_id): row.work_role for row in rows}
+
+
+async def submit_quality_assessments(
+    db: AsyncSession,
+    items: Sequence[QualityAssessmentItem],
+    assessed_by: Optional[UUID],
+    close_at_previous_day: bool = False,
+) -> List[UUID]:
+    """
+    Insert `items` as new current versions and return their ids (in order).
+    Does not commit; dashboard_cache is invalidated when the caller does.
+
+    Superseded rows get valid_to = now (like POST /admin/metrics/user_daily/quality),
+    or with close_at_previous_day the end of the day before the superseding
+    assessment's metric_date (like the CSV bulk upload).
+    """
+    if not items:
+        return []
+
+    now = datetime.now()
+    missing_roles = [(item.user_id, item.project_id) for item in items if not item.work_role]
+    roles = await resolve_work_roles(db, missing_roles)
+
+    def closing_time(next_item: QualityAssessmentItem) -> datetime:
+        if close_at_previous_day:
+            return datetime.combine(next_item.metric_date - timedelta(days=1), datetime.max.time())
+        return now
+
+    # Per pair, in submission order
+    by_pair: Dict[Tuple[UUID, UUID], List[int]] = {}
+    for index, item in enumerate(items):
+        by_pair.setdefault((item.user_id, item.project_id), []).append(index)
+
+    rows = []
+    ids = [uuid.uuid4() for _ in items]
+    for index, item in enumerate(items):
+        later = [i for i in by_pair[(item.user_id, item.project_id)] if i > index]
+        rows.append({
+            "id": ids[index],
+            "user_id": item.user_id,
+            "project_id": item.project_id,
+            "work_role": item.work_role or roles.get((item.user_id, item.project_id), "UNKNOWN"),
+            "rating": item.rating,
+            "quality_score": item.quality_score,
+            "accuracy": item.accuracy,
+            "critical_rate": item.critical_rate,
+            "notes": item.notes,
+            "source": "MANUAL",
+            "assessed_by_user_id": assessed_by,
+            "assessed_at": now,
+            "is_current": not later,
+            "valid_from": datetime.combine(item.metric_date, datetime.min.time()),
+            "valid_to": closing_time(items[later[0]]) if later else None,
+        })
+
+    pairs = [(user_id, project_id, closing_time(items[indexes[0]])) for (user_id, project_id), indexes in by_pair.items()]
+    for start in range(0, len(pairs), CHUNK_PAIRS):
+        closing = values(
+            column("user_id", PG_UUID(as_uuid=True)),
+            column("project_id", PG_UUID(as_uuid=True)),
+            column("valid_to", DateTime(timezone=True)),
+            name="closing",
+        ).data(pairs[start:start + CHUNK_PAIRS])
+        await db.execute(
+            update(UserQuality)
+            .where(
+                UserQuality.user_id == closing.c.user_id,
+                UserQuality.project_id == closing.c.project_id,
+                UserQuality.is_current == True,
+            )
+            .values(is_current=False, valid_to=closing.c.valid_to)
+            .execution_options(synchronize_session=False)
+        )
+    # Executemany of one INSERT: sent as multi-row VALUES batches
+    await db.execute(insert(UserQuality), rows)
+    invalidate_on_commit(db)
+    return ids
@@ -0,0 +1,186 @@
+"""
+Compaction of the user_quality SCD Type 2 history.
+
+The scheduler used to version every user on every graded day, so
+user_quality grew by users x projects x days even when nothing changed.
+compact_user_quality() shrinks the history in one transaction:
+
+1. merge: consecutive closed versions of a (user, project) with the same
+   work_role, rating, scores, notes, source and assessor, where each one starts no
+   later than a second after the previous one ends, become one version
+   (the first, with the run's last valid_to). The current version is
+   never merged, so its valid_from stays the date it was assessed for.
+2. archive (opt-in): with QUALITY_ARCHIVE_AFTER_DAYS set, closed versions
+   whose valid_to is more than that many days old move to
+   user_quality_archive (migrations/005_user_quality_archive.sql).
+
+Every day a merged run covered still resolves to a version with the same
+values, so quality lookups return what they did before. Archived versions
+are not read by the quality-ratings lookup or its updated_since deltas, so
+days before the archive cutoff stop resolving to a rating; that is why
+archiving is off unless QUALITY_ARCHIVE_AFTER_DAYS is set.
+
+It then VACUUMs user_quality and reports rows saved and the latency of the
+quality-ratings lookup (last LOOKUP_PROBE_DAYS days) before and after.
+"""
+import logging
+import os
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.http_cache import invalidate_tables
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# Unset: nothing is archived
+QUALITY_ARCHIVE_AFTER_DAYS: Optional[int] = (
+    int(os.environ["QUALITY_ARCHIVE_AFTER_DAYS"]) if os.getenv("QUALITY_ARCHIVE_AFTER_DAYS") else None
+)
+LOOKUP_PROBE_DAYS = 30
+LOOKUP_PROBE_RUNS = 3
+
+_COLUMNS = (
+    "id, user_id, project_id, work_role, rating, quality_score, accuracy, critical_rate, notes, "
+    "source, assessed_by_user_id, assessed_at, is_current, valid_from, valid_to, created_at, updated_at"
+)
+
+MERGE_RUNS_SQL = """
+    WITH ordered AS (
+        SELECT q.*,
+               lag(q.is_current) OVER w AS prev_is_current,
+               lag(q.valid_to) OVER w AS prev_valid_to,
+               q.work_role IS NOT DISTINCT FROM lag(q.work_role) OVER w
+               AND q.rating IS NOT DISTINCT FROM lag(q.rating) OVER w
+               AND q.quality_score IS NOT DISTINCT FROM lag(q.quality_score) OVER w
+               AND q.accuracy IS NOT DISTINCT FROM lag(q.accuracy) OVER w
+               AND q.critical_rate IS NOT DISTINCT FROM lag(q.critical_rate) OVER w
+               AND q.notes IS NOT DISTINCT FROM lag(q.notes) OVER w
+               AND q.source IS NOT DISTINCT FROM lag(q.source) OVER w
+               AND q.assessed_by_user_id IS NOT DISTINCT FROM lag(q.assessed_by_user_id) OVER w AS same_as_prev
+        FROM user_quality q
+        WINDOW w AS (PARTITION BY q.user_id, q.project_id ORDER BY q.valid_from, q.id)
+    ),
+    runs AS (
+        SELECT o.id, o.user_id, o.project_id, o.valid_from, o.valid_to,
+               sum(CASE WHEN NOT o.is_current
+                             AND o.prev_is_current IS FALSE
+                             AND o.same_as_prev
+                             AND o.valid_from <= o.prev_valid_to + interval '1 second'
+                        THEN 0 ELSE 1 END)
+                   OVER (PARTITION BY o.user_id, o.project_id ORDER BY o.valid_from, o.id) AS run_no
+        FROM ordered o
+    ),
+    spans AS (
+        SELECT r.user_id, r.project_id, r.run_no,
+               (array_agg(r.id ORDER BY r.valid_from, r.id))[1] AS keep_id,
+               max(r.valid_to) AS valid_to
+        FROM runs r
+        GROUP BY r.user_id, r.project_id, r.run_no
+        HAVING count(*) > 1
+    ),
+    extended AS (
+        UPDATE user_quality q
+        SET valid_to = s.valid_to, updated_at = now()
+        FROM spans s
+        WHERE q.id = s.keep_id
+        RETURNING q.id
+    ),
+    removed AS (
+        DELETE FROM user_quality q
+        USING runs r, spans s
+        WHERE q.id = r.id
+          AND r.user_id = s.user_id AND r.project_id = s.project_id AND r.run_no = s.run_no
+          AND r.id <> s.keep_id
+        RETURNING q.id
+    )
+    SELECT (SELECT count(*) FROM extended) AS runs, (SELECT count(*) FROM removed) AS removed
+"""
+
+ARCHIVE_SQL = f"""
+    WITH moved AS (
+        DELETE FROM user_quality
+        WHERE is_current = false AND valid_to < :cutoff
+        RETURNING {_COLUMNS}
+    )
+    INSERT INTO user_quality_archive ({_COLUMNS})
+    SELECT {_COLUMNS} FROM moved
+"""
+
+
+async def _count_rows(db: AsyncSession) -> int:
+    return (await db.execute(text("SELECT count(*) FROM user_quality"))).scalar_one()
+
+
+async def _lookup_ms(db: AsyncSession) -> float:
+    """Best of LOOKUP_PROBE_RUNS runs of the quality-ratings statement over the last LOOKUP_PROBE_DAYS days."""
+    from app.api.admin.user_daily import _quality_ratings_query
+
+    end = date.today()
+    statement = _quality_ratings_query(None, None, end - timedelta(days=LOOKUP_PROBE_DAYS), end, None, None, None)
+    best = float("inf")
+    for _ in range(LOOKUP_PROBE_RUNS):
+        started = time.perf_counter()
+        (await db.execute(statement)).all()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 1)
+
+
+async def _vacuum() -> None:
+    # VACUUM cannot run inside a transaction block
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM (ANALYZE) user_quality"))
+
+
+async def compact_user_quality(
+    db: AsyncSession,
+    archive_after_days: Optional[int] = QUALITY_ARCHIVE_AFTER_DAYS,
+    vacuum: bool = True,
+) -> Dict[str, Any]:
+    """
+    Merge identical consecutive versions, archive closed ones older than
+    `archive_after_days` (None: archive nothing) and commit; returns stats.
+    """
+    started = time.perf_counter()
+    rows_before = await _count_rows(db)
+    lookup_before = await _lookup_ms(db)
+
+    merged = (await db.execute(text(MERGE_RUNS_SQL))).one()
+    cutoff = None
+    archived = 0
+    if archive_after_days is not None:
+        cutoff = date.today() - timedelta(days=archive_after_days)
+        archived = (await db.execute(text(ARCHIVE_SQL), {"cutoff": cutoff})).rowcount
+    await db.commit()
+    # Raw SQL: the ORM events do not see these writes
+    invalidate_tables(["user_quality"])
+
+    if vacuum:
+        await _vacuum()
+    rows_after = await _count_rows(db)
+    lookup_after = await _lookup_ms(db)
+    await db.commit()
+
+    stats = {
+        "rows_before": rows_before,
+        "rows_after": rows_after,
+        "rows_saved": rows_before - rows_after,
+        "runs_merged": merged.runs,
+        "versions_merged": merged.removed,
+        "versions_archived": archived,
+        "archive_cutoff": cutoff.isoformat() if cutoff else None,
+        "lookup_ms_before": lookup_before,
+        "lookup_ms_after": lookup_after,
+        "lookup_ms_saved": round(lookup_before - lookup_after, 1),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(
+        "user_quality compaction: %d -> %d rows (%d merged into %d runs, %d archived), lookup %.1f -> %.1f ms",
+        rows_before, rows_after, merged.removed, merged.runs, archived, lookup_before, lookup_after,
+    )
+    return stats
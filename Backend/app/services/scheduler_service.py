@@ -19,6 +19,7 @@ from app.models.user_project_history import UserProjectHistory
 from app.models.project_members import ProjectMember
 from app.models.user_quality import UserQuality, QualityRating
 from app.models.user import User
+from app.services.dashboard_cache import invalidate_on_commit
 from sqlalchemy import func, cast, String
 from uuid import UUID
 
@@ -78,7 +79,7 @@ def calculate_daily_productivity_for_project(project_id: UUID, calculation_date:
 
     # --- STEP 2: Benchmarks ---
     total_project_tasks = sum(log.total_tasks for log in daily_logs)
-    total_project_hours = sum(float(log.total_mins or 0) for log in daily_logs) / 60
+    total_project_hours = sum((log.total_mins or 0) for log in daily_logs) / 60
     active_users = len(daily_logs)
     
     avg_tasks = total_project_tasks / active_users if active_users > 0 else 0
@@ -140,7 +141,7 @@ def calculate_daily_productivity_for_project(project_id: UUID, calculation_date:
             )
             db.add(u_metric)
 
-        u_metric.hours_worked = float(log.total_mins or 0) / 60
+        u_metric.hours_worked = (log.total_mins or 0) / 60
         u_metric.tasks_completed = log.total_tasks
         u_metric.productivity_score = score
         
@@ -163,6 +164,9 @@ def calculate_daily_productivity_for_project(project_id: UUID, calculation_date:
                 current_quality.quality_score = score
                 current_quality.assessed_at = func.now()
                 needs_new_version = False
+            elif current_quality.rating == rating_label and current_quality.quality_score == score:
+                # Same grade as the current version: it stays valid, no new history row
+                needs_new_version = False
             else:
                 # It's an old record. Archive it.
                 current_quality.is_current = False
@@ -208,6 +212,8 @@ def calculate_daily_productivity_for_project(project_id: UUID, calculation_date:
     if active_users > 0:
         p_metric.avg_productivity_score = total_score_sum / active_users
 
+    # Role drilldown reads these metrics for (project, date)
+    invalidate_on_commit(db, day=calculation_date, project_id=project_id)
     db.commit()
     
     return {
@@ -219,7 +225,7 @@ def calculate_daily_productivity_for_project(project_id: UUID, calculation_date:
     }
 
 
-def _calculate_all_projects_automatically_sync(db: Session):
+def _calculate_all_projects_automatically_sync(db: Session, progress=None):
     """
     Automatically calculates productivity and quality metrics for all active projects
     for dates that have APPROVED work logs. Only processes APPROVED entries - 
@@ -228,6 +234,8 @@ def _calculate_all_projects_automatically_sync(db: Session):
     all recent data is available for graphs.
     
     Runs inside AsyncSession.run_sync to safely use legacy sync ORM queries.
+    `progress(done, total)` is called per project (background jobs); returns
+    a summary of the run.
     """
     try:
         # Get all active projects
@@ -235,7 +243,7 @@ def _calculate_all_projects_automatically_sync(db: Session):
         
         if not active_projects:
             log_and_print("No active projects found for automatic calculation")
-            return
+            return {"projects": 0, "processed": 0, "skipped": 0, "errors": []}
         
         # Calculate for last 30 days to catch up on any missed calculations
         # This ensures graphs show data for the past month
@@ -255,7 +263,9 @@ def _calculate_all_projects_automatically_sync(db: Session):
         projects_with_data = set()
         projects_without_data = set()
         
-        for project in active_projects:
+        for project_index, project in enumerate(active_projects):
+            if progress:
+                progress(project_index, len(active_projects))
             project_has_data = False
             project_logs_found = 0
             project_logs_approved = 0
@@ -384,6 +394,14 @@ def _calculate_all_projects_automatically_sync(db: Session):
             log_and_print(f"Errors during automatic calculation: {errors[:5]}", level='warning')  # Show first 5 errors
             if len(errors) > 5:
                 log_and_print(f"... and {len(errors) - 5} more errors", level='warning')
+
+        return {
+            "projects": len(active_projects),
+            "processed": total_processed,
+            "skipped": total_skipped,
+            "projects_with_data": sorted(projects_with_data),
+            "errors": errors[:50],
+        }
             
     except Exception as e:
         logger.error(f"Critical error in automatic calculation: {str(e)}", exc_info=True)
@@ -413,6 +431,27 @@ def calculate_all_projects_automatically():
         logger.error(f"Critical error in automatic calculation: {str(e)}", exc_info=True)
 
 
+def compact_quality_history():
+    """Daily user_quality compaction (app/services/quality_compaction.py), same loop bridging as above."""
+    from app.services.quality_compaction import compact_user_quality
+
+    async def _run():
+        async with AsyncSessionLocal() as async_db:
+            return await compact_user_quality(async_db)
+
+    try:
+        if _app_event_loop and _app_event_loop.is_running():
+            stats = asyncio.run_coroutine_threadsafe(_run(), _app_event_loop).result()
+        else:
+            stats = asyncio.run(_run())
+        log_and_print(
+            f"Quality history compacted: {stats['rows_saved']} rows saved, "
+            f"lookup {stats['lookup_ms_before']} -> {stats['lookup_ms_after']} ms"
+        )
+    except Exception as e:
+        logger.error(f"Error in quality history compaction: {str(e)}", exc_info=True)
+
+
 def start_scheduler():
     """Start the background scheduler to run calculations every 6 hours"""
     if scheduler.running:
@@ -429,6 +468,15 @@ def start_scheduler():
         max_instances=1  # Prevent overlapping runs
     )
     
+    scheduler.add_job(
+        func=compact_quality_history,
+        trigger=IntervalTrigger(hours=24),
+        id='compact_quality_history',
+        name='Quality History Compaction',
+        replace_existing=True,
+        max_instances=1
+    )
+    
     scheduler.start()
     log_and_print("✅ Scheduler started - Automatic calculations will run every 6 hours")
     
@@ -0,0 +1,87 @@
+"""
+Fast JSON serialization helpers for large list endpoints.
+
+FastJSONResponse renders with orjson (date/datetime and Enum are handled
+natively; Decimal and UUID subclasses through a small default hook). serialize_rows turns trusted
+DB result rows into plain dicts so hot endpoints can return them directly and
+skip the per-row Pydantic model + response_model re-validation.
+"""
+from __future__ import annotations
+
+import json
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib encoder
+    orjson = None
+
+
+def _orjson_default(value: Any) -> Any:
+    """Encode types orjson does not support natively."""
+    if isinstance(value, Decimal):
+        return float(value)
+    # orjson only encodes uuid.UUID itself; asyncpg returns its pgproto.UUID subclass
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def json_dumps(content: Any) -> bytes:
+    """Serialize to compact JSON bytes (orjson when available)."""
+    if orjson is None:
+        return json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+    return orjson.dumps(
+        content,
+        default=_orjson_default,
+        option=orjson.OPT_NON_STR_KEYS,
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson when it is installed.
+    Used as the app's default response class and returned directly by
+    hot list endpoints together with serialize_rows().
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def serialize_rows(
+    rows: Iterable[Any],
+    keys: Iterable[str],
+    defaults: Optional[Mapping[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Convert trusted DB rows (SQLAlchemy Row tuples) into plain dicts.
+
+    No validation is performed - only use this for rows selected with explicit
+    columns whose types already match the response schema. `defaults` replaces
+    NULL values for the given keys (e.g. hours_worked -> 0.0).
+    """
+    keys = list(keys)
+    if not defaults:
+        return [dict(zip(keys, row)) for row in rows]
+
+    results = []
+    for row in rows:
+        item = dict(zip(keys, row))
+        for key, fallback in defaults.items():
+            if item[key] is None:
+                item[key] = fallback
+        results.append(item)
+    return results
@@ -0,0 +1,88 @@
+"""
+Compression benchmark: bytes saved vs CPU spent for typical large payloads.
+
+Payloads are a 5,000-row /admin/metrics/user_daily/ JSON body (same rows as
+bench_serialization) and the same rows rendered as a CSV report. Each encoder
+the CompressionMiddleware can negotiate is timed at a few levels, both as a
+single buffered body and streamed in 64 KiB chunks with a flush per chunk
+(what StreamingResponse CSV reports go through).
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_compression [--rows 5000] [--repeat 10]
+"""
+import argparse
+import csv
+import io
+import time
+
+from app.middlewares import compression
+from benchmarks.bench_serialization import KEYS, fast_path, make_rows
+
+CHUNK_SIZE = 64 * 1024
+
+
+def encoder_variants():
+    variants = [("gzip", level, lambda l=level: compression._GzipEncoder(l)) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        variants += [("br", q, lambda q=q: compression._BrotliEncoder(q)) for q in (1, 4, 6)]
+    if compression.zstandard is not None:
+        variants += [("zstd", level, lambda l=level: compression._ZstdEncoder(l)) for level in (1, 3, 9)]
+    return variants
+
+
+def make_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(KEYS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def compress_buffered(factory, payload: bytes) -> int:
+    encoder = factory()
+    return len(encoder.compress(payload) + encoder.finish())
+
+
+def compress_streamed(factory, payload: bytes) -> int:
+    encoder = factory()
+    size = 0
+    for start in range(0, len(payload), CHUNK_SIZE):
+        size += len(encoder.compress(payload[start:start + CHUNK_SIZE]) + encoder.flush())
+    return size + len(encoder.finish())
+
+
+def best_of(fn, factory, payload, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = fn(factory, payload)
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def report(name: str, payload: bytes, repeat: int):
+    print(f"{name}: {len(payload) / 1024:.1f} KiB uncompressed")
+    print(f"  {'encoding':<10}{'level':>6}{'KiB':>10}{'saved':>8}{'ms':>9}{'stream KiB':>12}{'stream ms':>11}")
+    for encoding, level, factory in encoder_variants():
+        elapsed, size = best_of(compress_buffered, factory, payload, repeat)
+        s_elapsed, s_size = best_of(compress_streamed, factory, payload, repeat)
+        saved = 100 * (1 - size / len(payload))
+        print(
+            f"  {encoding:<10}{level:>6}{size / 1024:>10.1f}{saved:>7.1f}%{elapsed * 1000:>9.2f}"
+            f"{s_size / 1024:>12.1f}{s_elapsed * 1000:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    report(f"user_daily JSON ({args.rows} rows)", fast_path(rows), args.repeat)
+    report(f"report CSV ({args.rows} rows)", make_csv(rows), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
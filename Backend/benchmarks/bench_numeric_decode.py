@@ -0,0 +1,109 @@
+"""
+Microbenchmark for the metrics NUMERIC read path (10k rows x 6 columns).
+
+Before: asyncpg decodes NUMERIC to Decimal and every endpoint calls float()
+per field per row. After: the connection's numeric codec decodes the wire
+text straight to float and SQLAlchemy's Numeric(asdecimal=False) processor is
+a no-op float() on a float.
+
+The synthetic mode needs no database. Pass --dsn to also time a real
+10k-row read through asyncpg with and without the float codec.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_numeric_decode [--rows 10000] [--dsn postgresql://...]
+"""
+import argparse
+import asyncio
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy.engine import processors
+
+COLUMNS = 6  # hours_worked, productivity_score, quality_score, accuracy, critical_rate, minutes_worked
+
+LIVE_QUERY = """
+    SELECT
+        round((random() * 10)::numeric, 2)  AS hours_worked,
+        round((random() * 10)::numeric, 2)  AS productivity_score,
+        round((random() * 10)::numeric, 2)  AS quality_score,
+        round((random() * 100)::numeric, 2) AS accuracy,
+        round((random() * 100)::numeric, 2) AS critical_rate,
+        round((random() * 600)::numeric, 2) AS minutes_worked
+    FROM generate_series(1, $1)
+"""
+
+
+def decimal_path(wire_rows):
+    # Driver builds a Decimal per value, the endpoint converts it again.
+    decoded = [tuple(Decimal(v) for v in row) for row in wire_rows]
+    return [tuple(float(v) for v in row) for row in decoded]
+
+
+def float_codec_path(wire_rows):
+    # Codec decodes once, SQLAlchemy's to_float processor sees a float.
+    to_float = processors.to_float
+    decoded = [tuple(float(v) for v in row) for row in wire_rows]
+    return [tuple(to_float(v) for v in row) for row in decoded]
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def live_read(dsn: str, rows: int, repeat: int):
+    import asyncpg
+
+    async def timed(use_float_codec: bool) -> float:
+        conn = await asyncpg.connect(dsn)
+        try:
+            if use_float_codec:
+                await conn.set_type_codec(
+                    "numeric", schema="pg_catalog", encoder=str, decoder=float, format="text"
+                )
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                records = await conn.fetch(LIVE_QUERY, rows)
+                values = [tuple(float(v) for v in r) for r in records]
+                best = min(best, time.perf_counter() - started)
+            assert len(values) == rows
+            return best
+        finally:
+            await conn.close()
+
+    return await timed(False), await timed(True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--dsn", help="Optional plain postgresql:// DSN for a live read")
+    args = parser.parse_args()
+
+    wire_rows = [
+        tuple(f"{random.uniform(0, 100):.2f}" for _ in range(COLUMNS))
+        for _ in range(args.rows)
+    ]
+    before = best_of(decimal_path, wire_rows, args.repeat)
+    after = best_of(float_codec_path, wire_rows, args.repeat)
+    print(f"synthetic decode, rows={args.rows} cols={COLUMNS}")
+    print(f"  Decimal + float() per field : {before * 1000:8.2f} ms")
+    print(f"  float codec                 : {after * 1000:8.2f} ms")
+    print(f"  speedup                     : {before / after:8.1f}x")
+
+    if args.dsn:
+        before, after = asyncio.run(live_read(args.dsn, args.rows, args.repeat))
+        print(f"live asyncpg read, rows={args.rows}")
+        print(f"  default Decimal codec       : {before * 1000:8.2f} ms")
+        print(f"  float codec                 : {after * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark for the user_quality compaction job (app/services/quality_compaction.py).
+
+Loads synthetic daily metrics and an auto-calc style quality history (one
+version per pair per day for --history days, the rating changing on
+--change of the days) into TEMP tables named like the real ones, then runs
+the job's merge statement (and the archive statement with --archive-after). Prints row counts and the
+quality-ratings statement (_quality_ratings_query, last --days days) under
+EXPLAIN ANALYZE before and after, and exits non-zero if its results
+changed.
+
+Needs a database to connect to; nothing is left behind (the tables are
+TEMP).
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_quality_compaction --dsn postgresql://... [--pairs 500] [--history 400] [--days 60] [--change 0.1] [--archive-after 365]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+SCHEMA = """
+CREATE TEMP TABLE user_daily_metrics (
+    id uuid PRIMARY KEY, user_id uuid NOT NULL, project_id uuid NOT NULL, work_role text NOT NULL,
+    metric_date date NOT NULL, hours_worked numeric(5,2), tasks_completed int, productivity_score numeric(5,2),
+    notes text, created_at timestamptz DEFAULT now(), updated_at timestamptz DEFAULT now()
+);
+CREATE TEMP TABLE user_quality (
+    id uuid PRIMARY KEY, user_id uuid NOT NULL, project_id uuid NOT NULL, work_role text NOT NULL,
+    rating text NOT NULL, quality_score numeric(5,2), accuracy numeric(5,2), critical_rate numeric(5,2),
+    notes text, source text NOT NULL, assessed_by_user_id uuid, assessed_at timestamptz NOT NULL,
+    is_current boolean NOT NULL, valid_from timestamptz NOT NULL, valid_to timestamptz,
+    created_at timestamptz NOT NULL DEFAULT now(), updated_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TEMP TABLE user_quality_archive (
+    LIKE user_quality INCLUDING DEFAULTS, archived_at timestamptz NOT NULL DEFAULT now(), PRIMARY KEY (id)
+);
+CREATE INDEX ON user_quality (valid_from DESC) WHERE is_current = true;
+CREATE INDEX idx_user_quality_scd_versions ON user_quality (user_id, project_id, valid_from DESC) INCLUDE (valid_to, id);
+CREATE INDEX ON user_daily_metrics (user_id, project_id, metric_date DESC);
+CREATE INDEX idx_user_daily_metrics_date_keys ON user_daily_metrics (metric_date, user_id, project_id);
+CREATE INDEX ON user_daily_metrics (project_id, metric_date) INCLUDE (user_id);
+"""
+
+RATINGS = {"GOOD": 10.0, "AVERAGE": 7.0, "BAD": 3.0}
+
+
+def synthetic(pairs: int, history: int, days: int, change: float, end: date, seed: int = 7):
+    """What the scheduler wrote before it skipped unchanged grades: a new version every day."""
+    rng = random.Random(seed)
+    first = end - timedelta(days=history - 1)
+    metrics, quality = [], []
+    for _ in range(pairs):
+        user_id, project_id = uuid.uuid4(), uuid.uuid4()
+        rating = rng.choice(list(RATINGS))
+        starts = [datetime.combine(first + timedelta(days=i), time(6), tzinfo=timezone.utc) for i in range(history)]
+        for i, since in enumerate(starts):
+            if rng.random() < change:
+                rating = rng.choice(list(RATINGS))
+            current = i == history - 1
+            quality.append((
+                uuid.uuid4(), user_id, project_id, "ANNOTATION", rating, RATINGS[rating], None, None, None,
+                "AUTO_CALC", since, current, since, None if current else starts[i + 1],
+            ))
+        for offset in range(days):
+            metrics.append((uuid.uuid4(), user_id, project_id, "ANNOTATION", end - timedelta(days=offset),
+                            rng.uniform(0, 9), rng.randint(0, 40), rng.uniform(0, 10)))
+    return metrics, quality
+
+
+async def run(dsn: str, pairs: int, history: int, days: int, change: float, archive_after: Optional[int], repeat: int) -> bool:
+    import asyncpg
+
+    os.environ.setdefault("DATABASE_URL", dsn)
+    # Imported to register every model: the mappers used below have
+    # relationships by class name and fail to configure without them
+    import app.main  # noqa: F401
+    from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+    from app.api.admin.user_daily import _quality_ratings_query
+    from app.services.quality_compaction import ARCHIVE_SQL, MERGE_RUNS_SQL
+
+    end = date.today()
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute(SCHEMA)
+        metrics, quality = synthetic(pairs, history, days, change, end)
+        await conn.copy_records_to_table("user_daily_metrics", records=metrics, columns=[
+            "id", "user_id", "project_id", "work_role", "metric_date",
+            "hours_worked", "tasks_completed", "productivity_score",
+        ])
+        await conn.copy_records_to_table("user_quality", records=quality, columns=[
+            "id", "user_id", "project_id", "work_role", "rating", "quality_score", "accuracy",
+            "critical_rate", "notes", "source", "assessed_at", "is_current", "valid_from", "valid_to",
+        ])
+
+        compiled = _quality_ratings_query(None, None, end - timedelta(days=days - 1), end, None, None, None).compile(
+            dialect=asyncpg_dialect.dialect()
+        )
+        params = compiled.construct_params()
+        args = [params[name] for name in compiled.positiontup]
+
+        async def measure(label: str):
+            await conn.execute("VACUUM ANALYZE pg_temp.user_quality")
+            best = float("inf")
+            for _ in range(repeat):
+                raw = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled.string}", *args)
+                best = min(best, json.loads(raw)[0]["Execution Time"])
+            rows = await conn.fetchval("SELECT count(*) FROM user_quality")
+            print(f"  {label:<7} user_quality {rows:>9} rows, lookup {best:9.2f} ms")
+            return sorted((tuple(record) for record in await conn.fetch(compiled.string, *args)), key=repr)
+
+        before = await measure("before")
+        merged = await conn.fetchrow(MERGE_RUNS_SQL)
+        archived = 0
+        if archive_after is not None:
+            status = await conn.execute(ARCHIVE_SQL.replace(":cutoff", "$1"), end - timedelta(days=archive_after))
+            archived = int(status.rsplit(" ", 1)[-1])
+        print(f"  merged {merged['removed']} versions into {merged['runs']} runs, archived {archived}")
+        after = await measure("after")
+
+        if before != after:
+            print(f"FAIL: quality ratings changed ({len(before)} rows before, {len(after)} after)")
+            return False
+        print(f"  quality ratings unchanged ({len(after)} rows)")
+        return True
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", required=True, help="Plain postgresql:// DSN")
+    parser.add_argument("--pairs", type=int, default=500, help="user/project pairs")
+    parser.add_argument("--history", type=int, default=400, help="Days of quality history (one version per day)")
+    parser.add_argument("--days", type=int, default=60, help="Days in the requested range")
+    parser.add_argument("--change", type=float, default=0.1, help="Chance the rating changes on a day")
+    parser.add_argument("--archive-after", type=int, default=None,
+                        help="Also archive versions closed this many days ago (off by default, like the job)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.dsn, args.pairs, args.history, args.days, args.change, args.archive_after, args.repeat))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark for GET /admin/metrics/user_daily/quality-ratings as history grows.
+
+Loads synthetic daily metrics (--pairs user/project pairs x --days days) and
+quality history into TEMP tables named like the real ones (they shadow them
+for this session only), creates the indexes from
+migrations/004_quality_ratings_indexes.sql, and runs the endpoint's single
+statement (_quality_ratings_query) under EXPLAIN ANALYZE twice: with one
+quality version per pair and with --versions per pair. Prints execution
+time and scan nodes, and exits non-zero if the SCD version probe is not an
+index-only scan.
+
+Needs a database to connect to; nothing is left behind (the tables are
+TEMP).
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_quality_ratings --dsn postgresql://... [--pairs 2000] [--days 60] [--versions 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+
+SCHEMA = """
+CREATE TEMP TABLE user_daily_metrics (
+    id uuid PRIMARY KEY, user_id uuid NOT NULL, project_id uuid NOT NULL, work_role text NOT NULL,
+    metric_date date NOT NULL, hours_worked numeric(5,2), tasks_completed int, productivity_score numeric(5,2),
+    notes text, created_at timestamptz DEFAULT now(), updated_at timestamptz DEFAULT now()
+);
+CREATE TEMP TABLE user_quality (
+    id uuid PRIMARY KEY, user_id uuid NOT NULL, project_id uuid NOT NULL, work_role text NOT NULL,
+    rating text NOT NULL, quality_score numeric(5,2), accuracy numeric(5,2), critical_rate numeric(5,2),
+    notes text, source text NOT NULL, assessed_by_user_id uuid, assessed_at timestamptz NOT NULL,
+    is_current boolean NOT NULL, valid_from timestamptz NOT NULL, valid_to timestamptz,
+    created_at timestamptz NOT NULL DEFAULT now(), updated_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX ON user_quality (valid_from DESC) WHERE is_current = true;
+CREATE INDEX idx_user_quality_scd_versions ON user_quality (user_id, project_id, valid_from DESC) INCLUDE (valid_to, id);
+CREATE INDEX ON user_daily_metrics (user_id, project_id, metric_date DESC);
+CREATE INDEX idx_user_daily_metrics_date_keys ON user_daily_metrics (metric_date, user_id, project_id);
+CREATE INDEX ON user_daily_metrics (project_id, metric_date) INCLUDE (user_id);
+"""
+
+
+def synthetic(pairs: int, days: int, versions: int, end: date, seed: int = 7):
+    rng = random.Random(seed)
+    start = end - timedelta(days=days - 1)
+    metrics, quality = [], []
+    for _ in range(pairs):
+        user_id, project_id = uuid.uuid4(), uuid.uuid4()
+        for offset in range(days):
+            if rng.random() < 0.8:
+                metrics.append((uuid.uuid4(), user_id, project_id, "ANNOTATION", start + timedelta(days=offset),
+                                rng.uniform(0, 9), rng.randint(0, 40), rng.uniform(0, 10)))
+        # Versions spread over the range and the year before it, newest current
+        valid_from = sorted(
+            datetime.combine(start - timedelta(days=rng.randint(-days + 1, 365)), time(), tzinfo=timezone.utc)
+            for _ in range(versions)
+        )
+        for i, since in enumerate(valid_from):
+            current = i == len(valid_from) - 1
+            quality.append((
+                uuid.uuid4(), user_id, project_id, "ANNOTATION", rng.choice(["GOOD", "AVERAGE", "BAD"]),
+                rng.uniform(0, 10), rng.uniform(0, 100), rng.uniform(0, 100), None, "MANUAL", since,
+                current, since, None if current else valid_from[i + 1],
+            ))
+    return start, metrics, quality
+
+
+def scan_nodes(plan):
+    """(node type, index name) for every scan node in an EXPLAIN JSON plan."""
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        nodes.append((plan["Node Type"], plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+async def run(dsn: str, pairs: int, days: int, versions: int, repeat: int) -> bool:
+    import asyncpg
+
+    os.environ.setdefault("DATABASE_URL", dsn)
+    # Imported to register every model: the mappers used below have
+    # relationships by class name and fail to configure without them
+    import app.main  # noqa: F401
+    from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+    from app.api.admin.user_daily import _quality_ratings_query
+
+    end = date.today()
+    conn = await asyncpg.connect(dsn)
+    ok = True
+    try:
+        for depth in (1, versions):
+            await conn.execute("DROP TABLE IF EXISTS pg_temp.user_daily_metrics, pg_temp.user_quality")
+            await conn.execute(SCHEMA)
+            start, metrics, quality = synthetic(pairs, days, depth, end)
+            await conn.copy_records_to_table("user_daily_metrics", records=metrics, columns=[
+                "id", "user_id", "project_id", "work_role", "metric_date",
+                "hours_worked", "tasks_completed", "productivity_score",
+            ])
+            await conn.copy_records_to_table("user_quality", records=quality, columns=[
+                "id", "user_id", "project_id", "work_role", "rating", "quality_score", "accuracy",
+                "critical_rate", "notes", "source", "assessed_at", "is_current", "valid_from", "valid_to",
+            ])
+            # All-visible pages, so index-only scans skip the heap
+            await conn.execute("VACUUM ANALYZE pg_temp.user_daily_metrics")
+            await conn.execute("VACUUM ANALYZE pg_temp.user_quality")
+
+            compiled = _quality_ratings_query(None, None, start, end, None, None, None).compile(
+                dialect=asyncpg_dialect.dialect()
+            )
+            params = compiled.construct_params()
+            args = [params[name] for name in compiled.positiontup]
+
+            best, nodes, rows = float("inf"), [], 0
+            for _ in range(repeat):
+                raw = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled.string}", *args)
+                result = json.loads(raw)[0]
+                best = min(best, result["Execution Time"])
+                nodes = scan_nodes(result["Plan"])
+                rows = result["Plan"]["Actual Rows"]
+            print(f"  {depth:>3} version(s)/pair: metrics {len(metrics)}, quality {len(quality)}, "
+                  f"rows {rows}, {best:9.2f} ms")
+            for node in sorted(set(nodes), key=str):
+                print(f"      {node}")
+            if ("Index Only Scan", "idx_user_quality_scd_versions") not in nodes:
+                print("FAIL: the SCD version probe is not an index-only scan")
+                ok = False
+        return ok
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", required=True, help="Plain postgresql:// DSN")
+    parser.add_argument("--pairs", type=int, default=2000, help="user/project pairs")
+    parser.add_argument("--days", type=int, default=60, help="Days in the requested range")
+    parser.add_argument("--versions", type=int, default=30, help="Quality versions per pair (history depth)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args.dsn, args.pairs, args.days, args.versions, args.repeat)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
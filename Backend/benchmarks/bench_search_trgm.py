@@ -0,0 +1,137 @@
+"""
+Benchmark for GET /search on a synthetic 100k-user table.
+
+Loads --rows synthetic users into a TEMP table, then runs the endpoint's
+ranked lookup (substring, prefix and misspelt terms) twice: before and after
+creating the pg_trgm GIN indexes from migrations/003_search_trgm.sql. Prints
+the plan's scan nodes and execution time per term, and exits non-zero if a
+lookup does not use a trigram index once it exists.
+
+Needs a database where pg_trgm can be created (nothing is left behind: the
+table is TEMP).
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_search_trgm --dsn postgresql://... [--rows 100000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import uuid
+
+FIRST = [
+    "Aarav", "Aditi", "Ananya", "Arjun", "Dev", "Diya", "Ishaan", "Kavya", "Krishna", "Meera",
+    "Neha", "Nikhil", "Priya", "Rahul", "Riya", "Rohan", "Sanya", "Shreya", "Tanvi", "Vikram",
+    "Emma", "Liam", "Olivia", "Noah", "Ava", "Lucas", "Mia", "Ethan", "Sofia", "Mateo",
+]
+LAST = [
+    "Agarwal", "Bhatt", "Chopra", "Desai", "Gupta", "Iyer", "Joshi", "Kapoor", "Khan", "Kumar",
+    "Mehta", "Nair", "Patel", "Rao", "Reddy", "Shah", "Sharma", "Singh", "Verma", "Yadav",
+    "Garcia", "Smith", "Johnson", "Brown", "Miller", "Davis", "Wilson", "Moore", "Taylor", "Clark",
+]
+
+# Same shape as app/api/search.py for users ($1 = term, $2 = escaped term)
+SEARCH_QUERY = """
+    SELECT id, name, email,
+           greatest(similarity(name, $1), similarity(email, $1)) AS score
+    FROM bench_users
+    WHERE name ILIKE '%' || $2 || '%' OR email ILIKE '%' || $2 || '%'
+       OR name % $1 OR email % $1
+    ORDER BY (name ILIKE $2 || '%' OR email ILIKE $2 || '%') DESC, score DESC, name
+    LIMIT 10
+"""
+
+TERMS = [
+    ("substring", "sharm"),
+    ("prefix", "vikram.pat"),
+    ("email", "4217@ex"),
+    ("misspelt", "Priya Kapor"),
+]
+
+
+def synthetic_users(rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(rows):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        yield (
+            uuid.uuid4(),
+            f"{first} {last} {i}",
+            f"{first.lower()}.{last.lower()}{i}@example.com",
+        )
+
+
+def scan_nodes(plan):
+    """(node type, index name) for every scan node in an EXPLAIN JSON plan."""
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        nodes.append((plan["Node Type"], plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+async def explain(conn, term: str):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    raw = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {SEARCH_QUERY}", term, escaped)
+    result = json.loads(raw)[0]
+    return result["Execution Time"], scan_nodes(result["Plan"])
+
+
+async def run(dsn: str, rows: int, repeat: int) -> bool:
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        await conn.execute("CREATE TEMP TABLE bench_users (id uuid PRIMARY KEY, name text NOT NULL, email text NOT NULL)")
+        await conn.copy_records_to_table(
+            "bench_users", records=synthetic_users(rows), columns=["id", "name", "email"]
+        )
+        await conn.execute("ANALYZE bench_users")
+        print(f"synthetic users: {rows}")
+
+        async def measure(label: str):
+            timings = {}
+            for kind, term in TERMS:
+                best, nodes = float("inf"), []
+                for _ in range(repeat):
+                    elapsed, nodes = await explain(conn, term)
+                    best = min(best, elapsed)
+                timings[kind] = (best, nodes)
+                print(f"  {label:<10} {kind:<10} {best:9.2f} ms  {nodes}")
+            return timings
+
+        before = await measure("no index")
+
+        await conn.execute("CREATE INDEX bench_users_name_trgm ON bench_users USING gin (name gin_trgm_ops)")
+        await conn.execute("CREATE INDEX bench_users_email_trgm ON bench_users USING gin (email gin_trgm_ops)")
+        await conn.execute("ANALYZE bench_users")
+        after = await measure("trgm gin")
+
+        ok = True
+        for kind, _ in TERMS:
+            used = {index for _, index in after[kind][1] if index}
+            if not used & {"bench_users_name_trgm", "bench_users_email_trgm"}:
+                print(f"FAIL: {kind} lookup did not use a trigram index")
+                ok = False
+            else:
+                print(f"  {kind:<10} speedup {before[kind][0] / after[kind][0]:6.1f}x")
+        return ok
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dsn", required=True, help="Plain postgresql:// DSN")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args.dsn, args.rows, args.repeat)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Serialization benchmark for large list responses (5,000 rows).
+
+Compares the old path for GET /admin/metrics/user_daily/ (one Pydantic model
+per row, re-validated against response_model, rendered with the stdlib json
+encoder) with the fast path (serialize_rows + FastJSONResponse/orjson).
+
+Rows carry the types the driver returns: asyncpg's pgproto.UUID (a
+uuid.UUID subclass orjson does not encode natively) and NUMERIC as float
+(DB_NUMERIC_AS_FLOAT). With --dsn they are fetched through asyncpg from a
+generate_series query instead of built locally.
+
+Usage (from the Backend directory):
+    python -m benchmarks.bench_serialization [--rows 5000] [--repeat 20] [--dsn postgresql://...]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+from asyncpg.pgproto.pgproto import UUID as DriverUUID
+
+from pydantic import TypeAdapter
+
+from app.schemas.user_daily_metrics import UserDailyMetricsResponse
+from app.utils.serialization import FastJSONResponse, orjson, serialize_rows
+
+KEYS = (
+    "id", "user_id", "project_id", "work_role", "metric_date",
+    "hours_worked", "tasks_completed", "productivity_score", "notes",
+)
+
+
+def _driver_uuid() -> DriverUUID:
+    return DriverUUID(uuid.uuid4().bytes)
+
+
+def make_rows(count: int) -> list:
+    """Rows shaped like the asyncpg result of the metrics query."""
+    users = [_driver_uuid() for _ in range(200)]
+    projects = [_driver_uuid() for _ in range(20)]
+    start = date(2025, 1, 1)
+    return [
+        (
+            _driver_uuid(),
+            random.choice(users),
+            random.choice(projects),
+            random.choice(["ANNOTATION", "QC", "PM"]),
+            start + timedelta(days=i % 365),
+            round(random.uniform(0, 10), 2),
+            random.randint(0, 200),
+            round(random.uniform(0, 10), 2) if i % 5 else None,
+            None,
+        )
+        for i in range(count)
+    ]
+
+
+FETCH_SQL = """
+    SELECT gen_random_uuid(), u.id, p.id, (ARRAY['ANNOTATION', 'QC', 'PM'])[1 + i % 3],
+           DATE '2025-01-01' + i % 365, round((random() * 10)::numeric, 2)::float8, (random() * 200)::int,
+           CASE WHEN i % 5 = 0 THEN NULL ELSE round((random() * 10)::numeric, 2)::float8 END, NULL::text
+    FROM generate_series(1, $1) AS i
+    JOIN (SELECT gen_random_uuid() AS id, n FROM generate_series(0, 199) AS n) u ON u.n = i % 200
+    JOIN (SELECT gen_random_uuid() AS id, n FROM generate_series(0, 19) AS n) p ON p.n = i % 20
+"""
+
+
+async def fetch_rows(dsn: str, count: int) -> list:
+    """The same rows from a real asyncpg connection (float8 stands in for the float NUMERIC codec)."""
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        return [tuple(record) for record in await conn.fetch(FETCH_SQL, count)]
+    finally:
+        await conn.close()
+
+
+def old_path(rows) -> bytes:
+    models = [
+        UserDailyMetricsResponse(
+            id=row[0],
+            user_id=row[1],
+            project_id=row[2],
+            work_role=row[3],
+            metric_date=row[4],
+            hours_worked=row[5] if row[5] is not None else 0.0,
+            tasks_completed=row[6] or 0,
+            productivity_score=row[7],
+            notes=row[8],
+        )
+        for row in rows
+    ]
+    # FastAPI validates the returned models against response_model again
+    # and then renders the jsonable output with json.dumps.
+    adapter = TypeAdapter(List[UserDailyMetricsResponse])
+    content = adapter.dump_python(adapter.validate_python(models), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows) -> bytes:
+    items = serialize_rows(rows, KEYS, defaults={"hours_worked": 0.0, "tasks_completed": 0})
+    return FastJSONResponse(items).body
+
+
+def timeit(fn, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--dsn", help="Fetch the rows through asyncpg from this postgresql:// DSN")
+    args = parser.parse_args()
+
+    rows = asyncio.run(fetch_rows(args.dsn, args.rows)) if args.dsn else make_rows(args.rows)
+    assert json.loads(old_path(rows)) == json.loads(fast_path(rows)), "payload mismatch"
+
+    old = timeit(old_path, rows, args.repeat)
+    fast = timeit(fast_path, rows, args.repeat)
+    print(f"rows={args.rows} source={'asyncpg' if args.dsn else 'local'} orjson={'yes' if orjson else 'no (stdlib fallback)'}")
+    print(f"  pydantic + re-validation : {old * 1000:8.2f} ms")
+    print(f"  serialize_rows + orjson  : {fast * 1000:8.2f} ms")
+    print(f"  speedup                  : {old / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
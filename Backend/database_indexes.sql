@@ -136,6 +136,11 @@ ON attendance_daily(attendance_date DESC);
 CREATE INDEX IF NOT EXISTS idx_attendance_daily_date_status 
 ON attendance_daily(attendance_date DESC, status);
 
+-- Per-day attendance status by user, index-only (GROUP BY user_id, max(status))
+-- Used by: /admin/users/users_with_filter attendance subquery
+CREATE INDEX IF NOT EXISTS idx_attendance_daily_date_user
+ON attendance_daily(attendance_date, user_id) INCLUDE (status);
+
 -- ============================================================================
 -- USERS TABLE INDEXES
 -- ============================================================================
@@ -195,3 +200,32 @@ ON attendance_requests(user_id, start_date DESC);
 -- Used by: Leave calendar, overlapping leaves
 CREATE INDEX IF NOT EXISTS idx_attendance_requests_date_range 
 ON attendance_requests(start_date, end_date, status);
+
+-- Approved leave covering a day (status = 'APPROVED' AND start_date <= d AND end_date >= d)
+-- Used by: /admin/users/users_with_filter leave subquery
+CREATE INDEX IF NOT EXISTS idx_attendance_requests_status_range
+ON attendance_requests(status, start_date, end_date);
+
+-- ============================================================================
+-- HTTP CACHE VALIDATOR INDEXES
+-- ============================================================================
+
+-- count(*) + max(updated_at) validators used by app/core/http_cache.py
+-- (index-only scans instead of heap scans on every conditional GET)
+CREATE INDEX IF NOT EXISTS idx_users_updated_at 
+ON users(updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_project_members_updated_at 
+ON project_members(updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_project_owners_updated_at 
+ON project_owners(updated_at);
+
+-- ============================================================================
+-- CLOCK-IN UNIQUENESS
+-- ============================================================================
+
+-- uq_history_user_active_session, uq_project_members_user_project_active and
+-- uq_attendance_daily_user_date (one open session per user, the clock-in
+-- upsert targets) are created by migrations/006_clock_in_unique_indexes.sql,
+-- which removes existing duplicates first.
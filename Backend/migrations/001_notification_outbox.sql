@@ -0,0 +1,32 @@
+-- Transactional outbox for notification emails (app/models/notification_outbox.py).
+-- Run in the Supabase SQL editor before deploying the outbox dispatcher.
+
+DO $$
+BEGIN
+    CREATE TYPE notification_outbox_status AS ENUM ('PENDING', 'SENDING', 'SENT', 'FAILED');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    kind TEXT NOT NULL,
+    recipient_email TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    status notification_outbox_status NOT NULL DEFAULT 'PENDING',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_error TEXT,
+    sent_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Dispatcher claim query: due rows that are pending or whose lease expired
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_due
+ON notification_outbox(next_attempt_at)
+WHERE status IN ('PENDING', 'SENDING');
+
+-- Housekeeping: delete delivered rows after a while, e.g.
+--   DELETE FROM notification_outbox
+--   WHERE status = 'SENT' AND sent_at < now() - interval '30 days';
@@ -0,0 +1,9 @@
+-- Digest mode for the notification outbox (NOTIFICATION_DIGEST_WINDOW_SECONDS).
+-- Requires 001_notification_outbox.sql.
+
+ALTER TABLE notification_outbox ADD COLUMN IF NOT EXISTS digest_key TEXT;
+
+-- Dispatcher sweep: pending digest rows of a recipient whose digest is due
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_digest
+ON notification_outbox(digest_key, next_attempt_at)
+WHERE status = 'PENDING' AND digest_key IS NOT NULL;
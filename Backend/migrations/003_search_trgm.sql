@@ -0,0 +1,21 @@
+-- Trigram indexes for user / project lookup (GET /search and the existing
+-- ILIKE '%term%' filters in list_users, search_with_filters, list_projects).
+-- gin_trgm_ops serves ILIKE '%term%', ILIKE 'term%' and the similarity
+-- operator (%); a plain b-tree cannot serve a leading wildcard.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm
+ON users USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm
+ON users USING gin (email gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_projects_name_trgm
+ON projects USING gin (name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_projects_code_trgm
+ON projects USING gin (code gin_trgm_ops);
+
+ANALYZE users;
+ANALYZE projects;
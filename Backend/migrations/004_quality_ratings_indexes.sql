@@ -0,0 +1,30 @@
+-- Indexes for GET /admin/metrics/user_daily/quality-ratings (one statement:
+-- a date spine from user_daily_metrics, each day LEFT JOIN LATERAL to the
+-- user_quality version valid on it) and for its updated_since deltas.
+
+-- SCD version probe: newest valid_from <= day per (user, project), checking
+-- valid_to and returning id from the index alone. Unlike
+-- idx_user_quality_scd_lookup this covers archived versions too, and the
+-- scan cost does not grow with a pair's history.
+CREATE INDEX IF NOT EXISTS idx_user_quality_scd_versions
+ON user_quality (user_id, project_id, valid_from DESC)
+INCLUDE (valid_to, id);
+
+-- Date spine (distinct user, project, day) as index-only scans. Filtering
+-- by user uses the existing idx_user_daily_metrics_user_project_date.
+CREATE INDEX IF NOT EXISTS idx_user_daily_metrics_date_keys
+ON user_daily_metrics (metric_date, user_id, project_id);
+
+CREATE INDEX IF NOT EXISTS idx_user_daily_metrics_project_date_keys
+ON user_daily_metrics (project_id, metric_date)
+INCLUDE (user_id);
+
+-- updated_since= deltas on /admin/metrics/user_daily/ and quality-ratings
+CREATE INDEX IF NOT EXISTS idx_user_daily_metrics_updated_at
+ON user_daily_metrics (updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_user_quality_updated_at
+ON user_quality (updated_at);
+
+ANALYZE user_quality;
+ANALYZE user_daily_metrics;
@@ -0,0 +1,15 @@
+-- Archive for closed user_quality versions (app/services/quality_compaction.py).
+-- The compaction job moves versions whose valid_to is older than
+-- QUALITY_ARCHIVE_AFTER_DAYS here, so SCD lookups on user_quality only walk
+-- recent history. Same columns as user_quality plus archived_at.
+
+CREATE TABLE IF NOT EXISTS user_quality_archive (
+    LIKE user_quality INCLUDING DEFAULTS,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+-- History lookups per (user, project), newest first
+CREATE INDEX IF NOT EXISTS idx_user_quality_archive_versions
+ON user_quality_archive (user_id, project_id, valid_from DESC);
+
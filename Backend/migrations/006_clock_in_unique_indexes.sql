@@ -0,0 +1,78 @@
+-- Unique indexes the clock-in path depends on (app/api/time/history.py):
+-- the single-statement clock-in uses the last two as ON CONFLICT targets and
+-- maps a violation of the first to HTTP 400. They were previously only in
+-- database_indexes.sql. Existing duplicates would make CREATE UNIQUE INDEX
+-- fail, so each index is preceded by a cleanup; all of it runs in one
+-- transaction.
+
+BEGIN;
+
+-- Several open sessions for a user: keep the newest open, close the others
+-- at their clock-in time (0 minutes) so they show up for review.
+WITH ranked AS (
+    SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY clock_in_at DESC, id DESC) AS n
+    FROM history
+    WHERE clock_out_at IS NULL
+)
+UPDATE history h
+SET clock_out_at = h.clock_in_at,
+    minutes_worked = 0,
+    notes = concat_ws(' ', h.notes, '[closed by migration 006: duplicate open session]'),
+    updated_at = now()
+FROM ranked r
+WHERE h.id = r.id AND r.n > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_history_user_active_session
+ON history(user_id)
+WHERE clock_out_at IS NULL;
+
+-- Several active allocations of a user to a project: keep the oldest one
+-- active, end the others.
+WITH ranked AS (
+    SELECT id, row_number() OVER (
+        PARTITION BY user_id, project_id ORDER BY assigned_from, created_at, id
+    ) AS n
+    FROM project_members
+    WHERE is_active = true
+)
+UPDATE project_members m
+SET is_active = false,
+    assigned_to = coalesce(m.assigned_to, m.assigned_from),
+    updated_at = now()
+FROM ranked r
+WHERE m.id = r.id AND r.n > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_project_members_user_project_active
+ON project_members(user_id, project_id)
+WHERE is_active = true;
+
+-- Several attendance rows for a user and date: keep the most informative
+-- one (a decided status over UNKNOWN/ABSENT, then the latest update) with
+-- the day's earliest clock-in and latest clock-out, delete the others.
+WITH ranked AS (
+    SELECT id, user_id, attendance_date,
+           row_number() OVER (
+               PARTITION BY user_id, attendance_date
+               ORDER BY status IN ('UNKNOWN', 'ABSENT'), updated_at DESC, id
+           ) AS n,
+           min(first_clock_in_at) OVER (PARTITION BY user_id, attendance_date) AS first_clock_in_at,
+           max(last_clock_out_at) OVER (PARTITION BY user_id, attendance_date) AS last_clock_out_at,
+           count(*) OVER (PARTITION BY user_id, attendance_date) AS copies
+    FROM attendance_daily
+),
+kept AS (
+    UPDATE attendance_daily a
+    SET first_clock_in_at = r.first_clock_in_at,
+        last_clock_out_at = r.last_clock_out_at,
+        updated_at = now()
+    FROM ranked r
+    WHERE a.id = r.id AND r.n = 1 AND r.copies > 1
+)
+DELETE FROM attendance_daily a
+USING ranked r
+WHERE a.id = r.id AND r.n > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_daily_user_date
+ON attendance_daily(user_id, attendance_date);
+
+COMMIT;
@@ -0,0 +1,58 @@
+"""Minimal rows for tests (flushed, not committed)."""
+import uuid
+from datetime import date
+
+from app.models.project import Project
+from app.models.project_members import ProjectMember
+from app.models.project_owners import ProjectOwner
+from app.models.user import User, UserRole
+
+
+async def make_user(db, name: str = "Test User", role: UserRole = UserRole.USER, **fields) -> User:
+    user = User(
+        id=uuid.uuid4(),
+        email=fields.pop("email", f"{uuid.uuid4().hex[:12]}@example.com"),
+        name=name,
+        role=role,
+        is_active=True,
+        **fields,
+    )
+    db.add(user)
+    await db.flush()
+    return user
+
+
+async def make_project(db, name: str = "Test Project", **fields) -> Project:
+    project = Project(
+        id=uuid.uuid4(),
+        code=fields.pop("code", f"P-{uuid.uuid4().hex[:6]}"),
+        name=name,
+        is_active=True,
+        start_date=fields.pop("start_date", date(2025, 1, 1)),
+        **fields,
+    )
+    db.add(project)
+    await db.flush()
+    return project
+
+
+async def make_member(db, user: User, project: Project, work_role: str = "ANNOTATION", **fields) -> ProjectMember:
+    member = ProjectMember(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        project_id=project.id,
+        work_role=work_role,
+        assigned_from=fields.pop("assigned_from", date(2025, 1, 1)),
+        is_active=fields.pop("is_active", True),
+        **fields,
+    )
+    db.add(member)
+    await db.flush()
+    return member
+
+
+async def make_owner(db, user: User, project: Project, work_role: str = "PM") -> ProjectOwner:
+    owner = ProjectOwner(id=uuid.uuid4(), project_id=project.id, user_id=user.id, work_role=work_role)
+    db.add(owner)
+    await db.flush()
+    return owner
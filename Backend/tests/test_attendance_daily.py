@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models.attendance_daily import AttendanceDaily
+from tests.factories import make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_second_entry_for_a_user_and_date_is_a_conflict(db, client):
+    user = await make_user(db)
+    project = await make_project(db)
+    await db.commit()
+
+    def entry(day):
+        return {"user_id": str(user.id), "project_id": str(project.id), "attendance_date": day,
+                "status": "PRESENT", "source": "MANUAL"}
+
+    first = await client.post("/attendance-daily/", json=entry("2025-05-05"))
+    assert first.status_code == 200, first.text
+    duplicate = await client.post("/attendance-daily/", json=entry("2025-05-05"))
+    assert duplicate.status_code == 409, duplicate.text
+    assert duplicate.json()["detail"] == "Attendance entry for this user and date already exists"
+
+    other_day = await client.post("/attendance-daily/", json=entry("2025-05-06"))
+    assert other_day.status_code == 200, other_day.text
+    moved = await client.put(f"/attendance-daily/{other_day.json()['id']}", json={"attendance_date": "2025-05-05"})
+    assert moved.status_code == 409, moved.text
+
+    assert await db.scalar(select(func.count()).select_from(AttendanceDaily)) == 2
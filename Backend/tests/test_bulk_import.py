@@ -0,0 +1,78 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models.project import Project
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+USER_HEADER = "email,name,role,date_of_joining,soul_id,work_role\n"
+
+
+def users_csv(*emails: str) -> bytes:
+    rows = "".join(f"{email},{email.split('@')[0]},USER,2025-01-06,{uuid.uuid4()},EMPLOYEE\n" for email in emails)
+    return (USER_HEADER + rows).encode()
+
+
+async def _upload(client, path: str, content: bytes):
+    return await client.post(path, files={"file": ("upload.csv", content, "text/csv")})
+
+
+async def test_consecutive_user_uploads_each_merge_through_the_staging_table(db, client):
+    first = await _upload(client, "/admin/bulk_uploads/users", users_csv("a@example.com", "b@example.com"))
+    assert first.status_code == 200, first.text
+    assert (first.json()["inserted"], first.json()["errors"]) == (2, [])
+
+    second = await _upload(client, "/admin/bulk_uploads/users", users_csv("b@example.com", "c@example.com", "c@example.com"))
+    assert second.status_code == 200, second.text
+    assert second.json()["inserted"] == 1
+    assert second.json()["errors"] == [
+        "Line 2: email 'b@example.com' already exists",
+        "Line 4: email 'c@example.com' appears earlier in the file",
+    ]
+
+    emails = (await db.execute(select(User.email).where(User.email != "admin@local.dev"))).scalars().all()
+    assert sorted(emails) == ["a@example.com", "b@example.com", "c@example.com"]
+
+
+async def test_rejected_files_leave_later_uploads_working(db, client):
+    bad = (USER_HEADER + "d@example.com,d,USER,2025-01-06,not-a-uuid,EMPLOYEE\n").encode()
+    response = await _upload(client, "/admin/bulk_uploads/users", bad)
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted"] == 0
+
+    response = await _upload(client, "/admin/bulk_uploads/projects", b"code,name\nP1,One\n")
+    assert response.status_code == 400
+
+    ok = await _upload(client, "/admin/bulk_uploads/projects", b"code,name,is_active,start_date,end_date\nP1,One,true,2025-01-01,\n")
+    assert ok.status_code == 200, ok.text
+    assert ok.json()["inserted"] == 1
+    assert (await db.execute(select(Project.code))).scalars().all() == ["p1"]
+
+
+async def _wait_for_job(client, job_id: str) -> dict:
+    for _ in range(200):
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] not in ("QUEUED", "RUNNING"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+async def test_background_import_jobs_run_in_their_own_transaction(db, client):
+    for emails, inserted in ((("a@example.com", "b@example.com"), 2), (("b@example.com", "c@example.com"), 1)):
+        started = await _upload(client, "/admin/bulk_uploads/users/jobs", users_csv(*emails))
+        assert started.status_code == 202, started.text
+
+        job = await _wait_for_job(client, started.json()["id"])
+
+        assert job["status"] == "SUCCEEDED", job["error"]
+        assert job["progress"]["done"] == job["progress"]["total"] > 0
+        result = (await client.get(f"/jobs/{job['id']}/result")).json()
+        assert result["inserted"] == inserted
+
+    emails = (await db.execute(select(User.email).where(User.email != "admin@local.dev"))).scalars().all()
+    assert sorted(emails) == ["a@example.com", "b@example.com", "c@example.com"]
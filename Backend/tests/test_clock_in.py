@@ -0,0 +1,89 @@
+from uuid import UUID
+
+import pytest
+from sqlalchemy import select
+
+from app.models.attendance_daily import AttendanceDaily, AttendanceStatus
+from app.models.history import TimeHistory
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.models.project_members import ProjectMember
+from app.models.user import User
+from tests.factories import make_member, make_owner, make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_first_clock_in_of_the_day_writes_member_attendance_and_session(db, client):
+    project = await make_project(db)
+    await db.commit()
+
+    response = await client.post("/time/clock-in", json={"project_id": str(project.id), "work_role": "ANNOTATION"})
+
+    assert response.status_code == 200, response.text
+    session = response.json()
+    assert session["project_name"] == project.name
+    assert session["clock_out_at"] is None
+
+    attendance = (await db.execute(select(AttendanceDaily))).scalar_one()
+    assert attendance.status == AttendanceStatus.PRESENT
+    assert attendance.minutes_late == 0
+    member = (await db.execute(select(ProjectMember))).scalar_one()
+    assert (member.project_id, member.work_role, member.is_active) == (project.id, "ANNOTATION", True)
+    history = (await db.execute(select(TimeHistory))).scalar_one()
+    assert str(history.id) == session["id"]
+    assert history.updated_at is not None
+
+
+async def test_second_clock_in_is_rejected_until_clock_out(db, client):
+    project = await make_project(db)
+    await db.commit()
+    payload = {"project_id": str(project.id), "work_role": "ANNOTATION"}
+
+    assert (await client.post("/time/clock-in", json=payload)).status_code == 200
+    again = await client.post("/time/clock-in", json=payload)
+    assert again.status_code == 400
+    assert "already clocked in" in again.json()["detail"]
+
+    out = await client.put("/time/clock-out", json={"tasks_completed": 3})
+    assert out.status_code == 200, out.text
+    assert out.json()["tasks_completed"] == 3
+    # Same day: the attendance row is updated, not duplicated
+    assert (await client.post("/time/clock-in", json=payload)).status_code == 200
+    assert len((await db.execute(select(AttendanceDaily))).scalars().all()) == 1
+
+
+async def test_auto_allocation_queues_the_owner_email_in_the_clock_in_statement(db, client):
+    project = await make_project(db, name="Atlas")
+    await make_owner(db, await make_user(db, name="Pat Manager", email="pm@example.com"), project)
+    await db.commit()
+
+    response = await client.post("/time/clock-in", json={"project_id": str(project.id), "work_role": "ANNOTATION"})
+
+    assert response.status_code == 200, response.text
+    email = (await db.execute(select(NotificationOutbox))).scalar_one()
+    assert (email.kind, email.recipient_email, email.status, email.attempts) == (
+        "AUTO_ALLOCATION", "pm@example.com", OutboxStatus.PENDING, 0
+    )
+    assert email.digest_key is None
+    assert email.payload["name"] == "Pat Manager"
+    assert email.payload["project_names"] == "Atlas"
+    assert email.payload["comment"] == "Local Admin (admin@local.dev) has been auto-allocated to Atlas as ANNOTATION"
+
+
+async def test_no_allocation_email_without_an_owner_or_for_existing_members(db, client):
+    orphan = await make_project(db)
+    staffed = await make_project(db)
+    await make_owner(db, await make_user(db), staffed)
+    await db.commit()
+
+    orphan_in = await client.post("/time/clock-in", json={"project_id": str(orphan.id), "work_role": "ANNOTATION"})
+    assert orphan_in.status_code == 200, orphan_in.text
+    assert (await client.put("/time/clock-out", json={"tasks_completed": 0})).status_code == 200
+    admin = await db.get(User, UUID(orphan_in.json()["user_id"]))
+    await make_member(db, admin, staffed)
+    await db.commit()
+
+    staffed_in = await client.post("/time/clock-in", json={"project_id": str(staffed.id), "work_role": "ANNOTATION"})
+
+    assert staffed_in.status_code == 200, staffed_in.text
+    assert (await db.execute(select(NotificationOutbox))).scalars().all() == []
@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+from app.services import dashboard_cache as cache_module
+from app.services.dashboard_cache import cached_dashboard, dashboard_cache
+from tests.factories import make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    dashboard_cache.clear()
+    yield
+    dashboard_cache.clear()
+
+
+async def test_undated_entries_are_tagged_with_the_ist_day(monkeypatch):
+    # Just after midnight IST the server's local date is still the previous day
+    monkeypatch.setattr(cache_module, "today_ist", lambda: date(2025, 6, 2))
+    calls = []
+
+    @cached_dashboard("kpi_cards")
+    async def kpi_cards():
+        calls.append(1)
+        return {"active": len(calls)}
+
+    assert await kpi_cards() == {"active": 1}
+    assert await kpi_cards() == {"active": 1}
+
+    assert dashboard_cache.invalidate(day=date(2025, 6, 1)) == 0
+    assert dashboard_cache.invalidate(day=date(2025, 6, 2)) == 1
+    assert await kpi_cards() == {"active": 2}
+
+
+async def test_member_writes_drop_cached_allocations(db, client):
+    user = await make_user(db)
+    project = await make_project(db)
+    await db.commit()
+    url = f"/admin/project-resource-allocation/?project_id={project.id}&target_date=2025-06-02"
+
+    async def total_resources():
+        response = await client.get(url)
+        assert response.status_code == 200, response.text
+        return response.json()["total_resources"]
+
+    assert await total_resources() == 0
+    response = await client.post(f"/admin/projects/{project.id}/members", json={
+        "user_id": str(user.id), "work_role": "ANNOTATION", "assigned_from": "2025-06-01",
+    })
+    assert response.status_code == 200, response.text
+    assert await total_resources() == 1
+
+    response = await client.delete(f"/admin/projects/{project.id}/members/{user.id}")
+    assert response.status_code == 200, response.text
+    assert await total_resources() == 0
+
+
+async def test_bulk_member_update_drops_cached_allocations(db, client):
+    users = [await make_user(db) for _ in range(2)]
+    project = await make_project(db)
+    await db.commit()
+    url = f"/admin/project-resource-allocation/?project_id={project.id}&target_date=2025-06-02"
+
+    assert (await client.get(url)).json()["total_resources"] == 0
+    response = await client.put(f"/admin/projects/{project.id}/members/bulk", json={"members": [
+        {"user_id": str(user.id), "work_role": "QC", "assigned_from": "2025-06-01"} for user in users
+    ]})
+    assert response.status_code == 200, response.text
+    assert (await client.get(url)).json()["total_resources"] == 2
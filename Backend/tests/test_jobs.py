@@ -0,0 +1,61 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services import jobs as jobs_module
+from app.services.jobs import JobManager, JobStatus
+
+pytestmark = pytest.mark.anyio
+
+
+def _age(manager, job_id, seconds):
+    then = time.time() - seconds
+    os.utime(manager.path(job_id, "state.json"), (then, then))
+
+
+def _orphan(manager, status):
+    """A job left behind by a worker that exited without shutdown()."""
+    state = manager.create("export", owner_id=None)
+    state["status"] = status
+    manager._write_state(state)
+    manager._states.clear()
+    return state["id"]
+
+
+async def test_unfinished_jobs_without_a_worker_are_marked_failed(tmp_path):
+    manager = JobManager(root=str(tmp_path))
+    running = _orphan(manager, JobStatus.RUNNING.value)
+    queued = _orphan(manager, JobStatus.QUEUED.value)
+    recent = _orphan(manager, JobStatus.RUNNING.value)
+    _age(manager, running, jobs_module.JOBS_ORPHANED_SECONDS + 1)
+    _age(manager, queued, jobs_module.JOBS_ORPHANED_SECONDS + 1)
+
+    job = manager.get(running)
+    assert (job["status"], job["error"]) == (JobStatus.FAILED.value, "worker exited")
+    assert job["finished_at"] is not None
+    assert JobManager(root=str(tmp_path)).fail_orphaned() == 1
+    assert manager.get(queued)["status"] == JobStatus.FAILED.value
+    # Touched recently: another worker may still own it
+    assert manager.get(recent)["status"] == JobStatus.RUNNING.value
+
+
+async def test_running_jobs_keep_their_state_file_fresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs_module, "HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(jobs_module, "JOBS_ORPHANED_SECONDS", 0.5)
+    owner = JobManager(root=str(tmp_path))
+    release = asyncio.Event()
+
+    async def run(ctx):
+        await release.wait()
+        return {"ok": True}
+
+    job_id = owner.submit("export", run, owner_id=None)["id"]
+    await asyncio.sleep(1)
+    # Read from disk as the other worker would
+    assert JobManager(root=str(tmp_path)).get(job_id)["status"] == JobStatus.RUNNING.value
+
+    release.set()
+    await owner._tasks[job_id]
+    assert owner.get(job_id)["status"] == JobStatus.SUCCEEDED.value
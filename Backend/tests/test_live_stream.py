@@ -0,0 +1,109 @@
+"""
+GET /admin/dashboard/live/stream with LIVE_FEED_BACKEND=memory.
+
+httpx's ASGITransport waits for the whole body, so the stream is read by
+calling the ASGI app directly and cancelled with an http.disconnect.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.main import app
+from app.services import live_feed
+from tests.factories import make_project
+
+pytestmark = pytest.mark.anyio
+
+EVENT_TIMEOUT = 5
+
+
+class SSEStream:
+    def __init__(self, path: str):
+        self.path = path
+        self.status = None
+        self._chunks: asyncio.Queue = asyncio.Queue()
+        self._buffer = b""
+        self._disconnected = asyncio.Event()
+        self._task = None
+
+    async def __aenter__(self):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": self.path, "raw_path": self.path.encode(), "root_path": "",
+            "query_string": b"", "headers": [(b"host", b"test")], "client": ("test", 1), "server": ("test", 80),
+        }
+
+        async def receive():
+            await self._disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.status = message["status"]
+            elif message.get("body"):
+                await self._chunks.put(message["body"])
+
+        self._task = asyncio.create_task(app(scope, receive, send))
+        return self
+
+    async def __aexit__(self, *exc):
+        self._disconnected.set()
+        await asyncio.wait_for(self._task, EVENT_TIMEOUT)
+
+    async def next_event(self):
+        """(event name, decoded data) of the next event; retry lines and comments are skipped."""
+        while True:
+            while b"\n\n" not in self._buffer:
+                self._buffer += await asyncio.wait_for(self._chunks.get(), EVENT_TIMEOUT)
+            block, self._buffer = self._buffer.split(b"\n\n", 1)
+            fields = dict(line.split(b": ", 1) for line in block.split(b"\n") if b": " in line and not line.startswith(b":"))
+            if b"event" in fields:
+                return fields[b"event"].decode(), json.loads(fields[b"data"])
+
+
+@pytest.fixture
+async def memory_broker():
+    assert live_feed.broker.backend == "memory"
+    await live_feed.broker.start()
+    yield live_feed.broker
+    await live_feed.broker.stop()
+
+
+async def test_stream_sends_snapshot_then_clock_in_and_clock_out(db, client, memory_broker):
+    project = await make_project(db)
+    await db.commit()
+
+    async with SSEStream("/admin/dashboard/live/stream") as stream:
+        assert await stream.next_event() == ("snapshot", [])
+        assert stream.status == 200
+
+        clock_in = await client.post("/time/clock-in", json={"project_id": str(project.id), "work_role": "ANNOTATION"})
+        assert clock_in.status_code == 200, clock_in.text
+        session = clock_in.json()
+
+        name, data = await stream.next_event()
+        assert name == "clock_in"
+        assert data["history_id"] == session["id"]
+        assert data["user_id"] == session["user_id"]
+        assert data["project_name"] == project.name
+
+        assert (await client.put("/time/clock-out", json={"tasks_completed": 1})).status_code == 200
+        assert await stream.next_event() == (
+            "clock_out", {"type": "clock_out", "history_id": session["id"], "user_id": session["user_id"]}
+        )
+
+
+async def test_stream_snapshot_lists_open_sessions(db, client, memory_broker):
+    project = await make_project(db)
+    await db.commit()
+    clock_in = await client.post("/time/clock-in", json={"project_id": str(project.id), "work_role": "ANNOTATION"})
+    assert clock_in.status_code == 200, clock_in.text
+
+    async with SSEStream("/admin/dashboard/live/stream") as stream:
+        name, rows = await stream.next_event()
+
+    assert name == "snapshot"
+    assert [(row["user_id"], row["project_name"], row["work_role"]) for row in rows] == [
+        (clock_in.json()["user_id"], project.name, "ANNOTATION")
+    ]
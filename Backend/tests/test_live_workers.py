@@ -0,0 +1,42 @@
+import pytest
+
+from app.services import live_feed
+from app.services.active_sessions import registry
+from tests.factories import make_project
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def open_session(db, client):
+    project = await make_project(db)
+    await db.commit()
+    response = await client.post("/time/clock-in", json={"project_id": str(project.id), "work_role": "ANNOTATION"})
+    assert response.status_code == 200, response.text
+    return project, response.json()
+
+
+def _assert_one_worker(response, project, session):
+    assert response.status_code == 200, response.text
+    [row] = response.json()
+    assert row["user_id"] == session["user_id"]
+    assert row["project_name"] == project.name
+    assert row["work_role"] == "ANNOTATION"
+    assert row["current_duration_minutes"] >= 0
+
+
+async def test_live_workers_from_the_database(client, open_session):
+    assert not registry.authoritative
+
+    _assert_one_worker(await client.get("/admin/dashboard/live"), *open_session)
+
+
+async def test_live_workers_from_a_registry_warmed_from_the_database(client, open_session):
+    await live_feed.broker.start()
+    try:
+        await registry.warm()
+        assert registry.authoritative
+
+        _assert_one_worker(await client.get("/admin/dashboard/live"), *open_session)
+    finally:
+        await live_feed.broker.stop()
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import engine
+from tests.factories import make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "migrations"
+CLOCK_IN_INDEXES = (
+    "uq_history_user_active_session",
+    "uq_project_members_user_project_active",
+    "uq_attendance_daily_user_date",
+)
+
+
+async def test_clock_in_indexes_migration_removes_duplicates_first(db):
+    user = await make_user(db)
+    project = await make_project(db)
+    await db.commit()
+    day = date(2025, 5, 5)
+    morning = datetime(2025, 5, 5, 4, tzinfo=timezone.utc)
+    params = {"user_id": user.id, "project_id": project.id, "day": day}
+
+    async with engine.begin() as conn:
+        for name in CLOCK_IN_INDEXES:
+            await conn.execute(text(f"DROP INDEX {name}"))
+        for offset in (0, 2):
+            await conn.execute(text(
+                "INSERT INTO history (id, user_id, project_id, work_role, status, sheet_date, clock_in_at, "
+                "tasks_completed, updated_at) VALUES (gen_random_uuid(), :user_id, :project_id, 'ANNOTATION', "
+                "'PENDING', :day, :at, 0, now())"
+            ), {**params, "at": morning + timedelta(hours=offset)})
+            await conn.execute(text(
+                "INSERT INTO project_members (id, user_id, project_id, work_role, assigned_from, is_active, updated_at) "
+                "VALUES (gen_random_uuid(), :user_id, :project_id, 'ANNOTATION', :assigned, true, now())"
+            ), {**params, "assigned": day - timedelta(days=10 - offset)})
+        for status, first_in in (("UNKNOWN", morning), ("PRESENT", morning + timedelta(hours=2))):
+            await conn.execute(text(
+                "INSERT INTO attendance_daily (id, user_id, project_id, attendance_date, status, minutes_late, "
+                "first_clock_in_at, source) VALUES (gen_random_uuid(), :user_id, :project_id, :day, :status, 0, :at, 'TEST')"
+            ), {**params, "status": status, "at": first_in})
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.execute((MIGRATIONS_DIR / "006_clock_in_unique_indexes.sql").read_text())
+
+    async with engine.connect() as conn:
+        indexes = (await conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE indexname = ANY(:names)"
+        ), {"names": list(CLOCK_IN_INDEXES)})).scalars().all()
+        sessions = (await conn.execute(text(
+            "SELECT clock_in_at, clock_out_at FROM history ORDER BY clock_in_at"
+        ))).all()
+        members = (await conn.execute(text(
+            "SELECT assigned_from, is_active FROM project_members ORDER BY assigned_from"
+        ))).all()
+        attendance = (await conn.execute(text(
+            "SELECT status::text, first_clock_in_at FROM attendance_daily"
+        ))).all()
+
+    assert sorted(indexes) == sorted(CLOCK_IN_INDEXES)
+    # The newest open session stays open, the older one is closed at its start
+    assert [(row.clock_in_at, row.clock_out_at) for row in sessions] == [
+        (morning, morning), (morning + timedelta(hours=2), None),
+    ]
+    assert [row.is_active for row in members] == [True, False]
+    assert attendance == [("PRESENT", morning)]
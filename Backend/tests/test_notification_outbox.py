@@ -0,0 +1,203 @@
+"""
+OutboxDispatcher against a local HTTP stub (NOTIFICATION_FUNCTION_URL).
+
+The dispatcher runs its real loop: commits that enqueue wake it, and the
+tests wait for the rows to reach the expected state.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.notification_outbox import NotificationOutbox, OutboxStatus
+from app.services import notification_outbox
+from app.services.notification_outbox import BACKOFF_BASE_SECONDS, dispatcher
+from app.services.notification_service import enqueue_attendance_request_decision_email
+
+pytestmark = pytest.mark.anyio
+
+WAIT_SECONDS = 10
+
+
+class EmailStub:
+    """Records posted bodies; `responses` are (status, body) popped per call, then 200."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        self.responses = []
+        self.in_flight = defaultdict(int)
+        self.max_in_flight = defaultdict(int)
+        self.max_total_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                key = body.get("email", "*")
+                with stub._lock:
+                    stub.requests.append((self.path, body))
+                    stub.in_flight[key] += 1
+                    stub.max_in_flight[key] = max(stub.max_in_flight[key], stub.in_flight[key])
+                    stub.max_total_in_flight = max(stub.max_total_in_flight, sum(stub.in_flight.values()))
+                    status, reply = stub.responses.pop(0) if stub.responses else (200, {"ok": True})
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.in_flight[key] -= 1
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def email_stub():
+    stub = EmailStub(delay=0.05)
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def dispatcher_env(email_stub, monkeypatch):
+    monkeypatch.setattr(notification_outbox, "NOTIFICATION_DISPATCHER_ENABLED", True)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+    monkeypatch.setenv("NOTIFICATION_FUNCTION_URL", f"{email_stub.url}/send")
+    monkeypatch.delenv("NOTIFICATION_BATCH_FUNCTION_URL", raising=False)
+    return monkeypatch
+
+
+@pytest.fixture
+async def running_dispatcher(db, dispatcher_env):
+    await dispatcher.start()
+    yield dispatcher
+    await dispatcher.stop()
+
+
+async def _enqueue(db, email: str, comment: str) -> None:
+    enqueue_attendance_request_decision_email(
+        db, user_email=email, user_name=email.split("@")[0], decision="APPROVED", comment=comment,
+        request_type="LEAVE", start_date="2025-05-05", end_date="2025-05-05",
+    )
+    # One transaction per row: created_at (now()) orders a recipient's messages
+    await db.commit()
+
+
+async def _rows(db):
+    db.expire_all()
+    return (await db.execute(select(NotificationOutbox).order_by(NotificationOutbox.created_at))).scalars().all()
+
+
+async def _wait_for(db, condition):
+    deadline = time.monotonic() + WAIT_SECONDS
+    while True:
+        rows = await _rows(db)
+        if condition(rows):
+            return rows
+        assert time.monotonic() < deadline, [(row.recipient_email, row.status, row.last_error) for row in rows]
+        await asyncio.sleep(0.05)
+
+
+async def test_delivers_queued_email(db, email_stub, running_dispatcher):
+    await _enqueue(db, "ana@example.com", "Approved")
+
+    [row] = await _wait_for(db, lambda rows: rows and rows[0].status == OutboxStatus.SENT)
+
+    assert row.attempts == 1
+    assert row.sent_at is not None and row.last_error is None
+    [(path, body)] = email_stub.requests
+    assert path == "/send"
+    assert body["email"] == "ana@example.com"
+    assert body["decision"] == "APPROVED"
+    assert body["comment"] == "Approved"
+
+
+async def test_retries_a_5xx_with_backoff(db, email_stub, running_dispatcher):
+    email_stub.responses = [(503, {"error": "unavailable"})]
+    before = datetime.now(timezone.utc)
+
+    await _enqueue(db, "ana@example.com", "Approved")
+
+    [row] = await _wait_for(db, lambda rows: rows and rows[0].last_error is not None)
+    assert row.status == OutboxStatus.PENDING
+    assert row.attempts == 1
+    assert row.last_error.startswith("HTTP 503")
+    # First retry: BACKOFF_BASE_SECONDS with +/-20% jitter
+    delay = row.next_attempt_at - before
+    assert timedelta(seconds=BACKOFF_BASE_SECONDS * 0.8) <= delay <= timedelta(seconds=BACKOFF_BASE_SECONDS * 1.2 + 5)
+    assert len(email_stub.requests) == 1
+
+    # Make the retry due now instead of waiting out the backoff
+    await db.execute(update(NotificationOutbox).values(next_attempt_at=datetime.now(timezone.utc)))
+    await db.commit()
+    dispatcher.wake()
+
+    [row] = await _wait_for(db, lambda rows: rows[0].status == OutboxStatus.SENT)
+    assert row.attempts == 2
+    assert row.last_error is None
+    assert len(email_stub.requests) == 2
+
+
+async def test_groups_by_recipient_in_order_and_sends_groups_concurrently(db, email_stub, dispatcher_env):
+    # Enqueue everything before the dispatcher starts, so one pass claims it all
+    for i in range(3):
+        await _enqueue(db, "ana@example.com", f"ana {i}")
+        await _enqueue(db, "Ben@example.com", f"ben {i}")
+
+    await dispatcher.start()
+    try:
+        rows = await _wait_for(db, lambda rows: len(rows) == 6 and all(r.status == OutboxStatus.SENT for r in rows))
+    finally:
+        await dispatcher.stop()
+
+    assert all(row.attempts == 1 for row in rows)
+    sent = defaultdict(list)
+    for _, body in email_stub.requests:
+        sent[body["email"]].append(body["comment"])
+    assert sent == {"ana@example.com": ["ana 0", "ana 1", "ana 2"], "Ben@example.com": ["ben 0", "ben 1", "ben 2"]}
+    # One call at a time per recipient, recipients in parallel
+    assert max(email_stub.max_in_flight.values()) == 1
+    assert email_stub.max_total_in_flight == 2
+
+
+async def test_batch_mode_posts_the_per_message_payloads_together(db, email_stub, dispatcher_env):
+    dispatcher_env.setenv("NOTIFICATION_BATCH_FUNCTION_URL", f"{email_stub.url}/batch")
+    email_stub.responses = [(200, {"results": [{"ok": True}, {"ok": False, "error": "bounced"}, {"ok": True}]})]
+    await _enqueue(db, "ana@example.com", "first")
+    await _enqueue(db, "ben@example.com", "second")
+    await _enqueue(db, "ana@example.com", "third")
+    payloads = [row.payload for row in await _rows(db)]
+
+    await dispatcher.start()
+    try:
+        rows = await _wait_for(db, lambda rows: all(row.status != OutboxStatus.SENDING and row.attempts for row in rows))
+    finally:
+        await dispatcher.stop()
+
+    [(path, body)] = email_stub.requests
+    assert path == "/batch"
+    assert body == {"messages": payloads}
+    assert [(row.payload["comment"], row.status, row.last_error) for row in rows] == [
+        ("first", OutboxStatus.SENT, None),
+        ("second", OutboxStatus.PENDING, "bounced"),
+        ("third", OutboxStatus.SENT, None),
+    ]
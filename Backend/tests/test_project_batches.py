@@ -0,0 +1,42 @@
+import uuid
+from datetime import date
+
+import pytest
+
+from app.api.admin import project_resource_allocation as allocation_module
+from app.api.admin.projects import MEMBERS_MAX_PROJECTS
+from app.models.attendance_daily import AttendanceDaily, AttendanceStatus
+from app.services import dashboard_cache as cache_module
+from tests.factories import make_member, make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_allocation_batch_without_a_date_follows_the_ist_day(db, client, monkeypatch):
+    user = await make_user(db)
+    project = await make_project(db)
+    await make_member(db, user, project)
+    db.add(AttendanceDaily(user_id=user.id, project_id=project.id, attendance_date=date(2025, 6, 2),
+                           status=AttendanceStatus.PRESENT, source="TEST"))
+    await db.commit()
+
+    async def batch_on(today):
+        monkeypatch.setattr(allocation_module, "today_ist", lambda: today)
+        monkeypatch.setattr(cache_module, "today_ist", lambda: today)
+        response = await client.get("/admin/project-resource-allocation/batch", params={"project_ids": str(project.id)})
+        assert response.status_code == 200, response.text
+        (entry,) = response.json()["projects"]
+        return entry["date"], entry["resources"][0]["attendance_status"]
+
+    assert await batch_on(date(2025, 6, 1)) == ("2025-06-01", "ABSENT")
+    # Next day: a new cache entry, not the one computed before midnight
+    assert await batch_on(date(2025, 6, 2)) == ("2025-06-02", "PRESENT")
+
+
+async def test_members_batch_rejects_too_many_projects(db, client):
+    project_ids = [str(uuid.uuid4()) for _ in range(MEMBERS_MAX_PROJECTS + 1)]
+
+    response = await client.get("/admin/projects/members", params={"project_ids": project_ids})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"At most {MEMBERS_MAX_PROJECTS} projects per request."
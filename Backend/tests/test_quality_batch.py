@@ -0,0 +1,65 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models.user_quality import UserQuality
+from tests.factories import make_member, make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batch_reports_unknown_ids_per_item_and_writes_the_rest(db, client):
+    user = await make_user(db)
+    project = await make_project(db)
+    await db.commit()
+    missing = str(uuid.uuid4())
+
+    def item(user_id, project_id, day, rating="GOOD"):
+        return {"user_id": user_id, "project_id": project_id, "metric_date": f"2025-04-0{day}",
+                "rating": rating, "work_role": "ANNOTATION"}
+
+    response = await client.post("/admin/metrics/user_daily/quality/batch", json={"items": [
+        item(str(user.id), str(project.id), 1),
+        item(missing, str(project.id), 1),
+        item(str(user.id), missing, 1),
+        item(str(user.id), str(project.id), 2, rating="SUPERB"),
+        item(str(user.id), str(project.id), 3, rating="AVERAGE"),
+    ]})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["errors"]) == (2, 3)
+    assert [(r["index"], r["status"], r["detail"]) for r in body["results"]][:3] == [
+        (0, "created", None),
+        (1, "error", f"User {missing} not found"),
+        (2, "error", f"Project {missing} not found"),
+    ]
+    assert body["results"][3]["status"] == "error"
+    assert body["results"][3]["detail"].startswith("Invalid rating")
+    assert body["results"][4]["status"] == "created"
+    versions = (await db.execute(
+        select(UserQuality.rating, UserQuality.is_current).order_by(UserQuality.valid_from)
+    )).all()
+    assert [(v.rating.value, v.is_current) for v in versions] == [("GOOD", False), ("AVERAGE", True)]
+
+
+async def test_batch_drops_cached_role_drilldown(db, client):
+    user = await make_user(db)
+    project = await make_project(db)
+    await make_member(db, user, project)
+    await db.commit()
+    url = f"/admin/role-drilldown/?project_id={project.id}&date=2025-04-01"
+
+    async def ratings():
+        response = await client.get(url)
+        assert response.status_code == 200, response.text
+        return [row["quality_rating"] for row in response.json()]
+
+    assert await ratings() == [None]
+    response = await client.post("/admin/metrics/user_daily/quality/batch", json={"items": [
+        {"user_id": str(user.id), "project_id": str(project.id), "metric_date": "2025-04-01",
+         "rating": "GOOD", "work_role": "ANNOTATION"},
+    ]})
+    assert response.status_code == 200, response.text
+    assert await ratings() == ["GOOD"]
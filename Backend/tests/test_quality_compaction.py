@@ -0,0 +1,70 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.models.user_quality import QualityRating, UserQuality
+from app.services.quality_compaction import compact_user_quality
+from tests.factories import make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _seed_daily_versions(db):
+    """A version per day for 500 days: AVERAGE for the first 100, then GOOD."""
+    user = await make_user(db)
+    project = await make_project(db)
+    today = date.today()
+    starts = [datetime.combine(today - timedelta(days=500 - i), time(), tzinfo=timezone.utc) for i in range(501)]
+    for i, since in enumerate(starts):
+        current = i == len(starts) - 1
+        db.add(UserQuality(
+            user_id=user.id, project_id=project.id, work_role="ANNOTATION",
+            rating=QualityRating.AVERAGE if i < 100 else QualityRating.GOOD, source="AUTO_CALC",
+            assessed_at=since, is_current=current, valid_from=since, valid_to=None if current else starts[i + 1],
+        ))
+    old_day, recent_day = today - timedelta(days=450), today - timedelta(days=10)
+    for day in (old_day, recent_day):
+        db.add(UserDailyMetrics(user_id=user.id, project_id=project.id, work_role="ANNOTATION", metric_date=day))
+    await db.commit()
+    return old_day, recent_day
+
+
+async def _ratings(client, *days):
+    response = await client.get("/admin/metrics/user_daily/quality-ratings", params={
+        "start_date": min(days).isoformat(), "end_date": max(days).isoformat(),
+    })
+    assert response.status_code == 200, response.text
+    return {row["metric_date"]: row["quality_rating"] for row in response.json() if row["metric_date"] in {d.isoformat() for d in days}}
+
+
+async def _count(db, table: str) -> int:
+    return (await db.execute(text(f"SELECT count(*) FROM {table}"))).scalar_one()
+
+
+async def test_compaction_merges_runs_and_archives_nothing_by_default(db, client):
+    old_day, recent_day = await _seed_daily_versions(db)
+    before = await _ratings(client, old_day, recent_day)
+
+    stats = await compact_user_quality(db, vacuum=False)
+
+    assert (stats["rows_before"], stats["rows_after"], stats["versions_archived"]) == (501, 3, 0)
+    assert stats["archive_cutoff"] is None
+    assert await _count(db, "user_quality_archive") == 0
+    assert await _ratings(client, old_day, recent_day) == before == {
+        old_day.isoformat(): "AVERAGE", recent_day.isoformat(): "GOOD",
+    }
+    current = (await db.execute(select(func.count()).where(UserQuality.is_current == True))).scalar_one()
+    assert current == 1
+
+
+async def test_archiving_is_opt_in_and_drops_days_before_the_cutoff(db, client):
+    old_day, recent_day = await _seed_daily_versions(db)
+
+    stats = await compact_user_quality(db, archive_after_days=365, vacuum=False)
+
+    # The AVERAGE run ended 400 days ago; the GOOD run ends today
+    assert (stats["rows_after"], stats["versions_archived"]) == (2, 1)
+    assert await _count(db, "user_quality_archive") == 1
+    assert await _ratings(client, old_day, recent_day) == {old_day.isoformat(): None, recent_day.isoformat(): "GOOD"}
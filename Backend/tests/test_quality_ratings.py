@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from app.models.user_daily_metrics import UserDailyMetrics
+from tests.factories import make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+URL = "/admin/metrics/user_daily"
+
+
+@pytest.fixture
+async def rated_pair(db, client):
+    user = await make_user(db)
+    project = await make_project(db)
+    for day in (1, 2, 3):
+        db.add(UserDailyMetrics(
+            user_id=user.id, project_id=project.id, work_role="ANNOTATION",
+            metric_date=date(2025, 3, day), hours_worked=8, tasks_completed=day,
+        ))
+    await db.commit()
+    response = await client.post(f"{URL}/quality", json={
+        "user_id": str(user.id), "project_id": str(project.id), "metric_date": "2025-03-02",
+        "rating": "GOOD", "quality_score": 9.5, "work_role": "ANNOTATION",
+    })
+    assert response.status_code == 200, response.text
+    return user, project, response.json()
+
+
+async def test_quality_ratings_resolve_the_version_valid_each_day(client, rated_pair):
+    user, project, assessment = rated_pair
+
+    response = await client.get(f"{URL}/quality-ratings", params={"start_date": "2025-03-01", "end_date": "2025-03-03"})
+
+    assert response.status_code == 200, response.text
+    rows = response.json()
+    assert [(row["metric_date"], row["quality_rating"], row["quality_score"]) for row in rows] == [
+        ("2025-03-03", "GOOD", 9.5),
+        ("2025-03-02", "GOOD", 9.5),
+        ("2025-03-01", None, None),
+    ]
+    assert {(row["user_id"], row["project_id"]) for row in rows} == {(str(user.id), str(project.id))}
+    assert rows[0]["assessed_by"] == assessment["assessed_by_user_id"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+async def test_quality_ratings_keyset_pages(client, rated_pair):
+    params = {"start_date": "2025-03-01", "end_date": "2025-03-03", "limit": 2}
+
+    first = await client.get(f"{URL}/quality-ratings", params=params)
+    assert first.status_code == 200, first.text
+    assert [row["metric_date"] for row in first.json()] == ["2025-03-03", "2025-03-02"]
+
+    rest = await client.get(f"{URL}/quality-ratings", params={**params, "cursor": first.headers["X-Next-Cursor"]})
+    assert rest.status_code == 200, rest.text
+    assert [row["metric_date"] for row in rest.json()] == ["2025-03-01"]
+    assert "X-Next-Cursor" not in rest.headers
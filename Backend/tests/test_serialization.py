@@ -0,0 +1,40 @@
+import uuid
+from datetime import date
+
+import orjson
+import pytest
+from asyncpg.pgproto.pgproto import UUID as DriverUUID
+
+from app.models.user_daily_metrics import UserDailyMetrics
+from app.utils.serialization import json_dumps
+from tests.factories import make_project, make_user
+
+
+def test_json_dumps_encodes_driver_uuids():
+    value = uuid.uuid4()
+    driver_value = DriverUUID(value.bytes)
+
+    assert orjson.loads(json_dumps({"id": driver_value, "ids": [driver_value]})) == {
+        "id": str(value),
+        "ids": [str(value)],
+    }
+
+
+@pytest.mark.anyio
+async def test_daily_metrics_list_renders_driver_rows(db, client):
+    user = await make_user(db)
+    project = await make_project(db)
+    db.add(UserDailyMetrics(
+        user_id=user.id, project_id=project.id, work_role="ANNOTATION",
+        metric_date=date(2025, 3, 3), hours_worked=7.5, tasks_completed=12,
+    ))
+    await db.commit()
+
+    response = await client.get("/admin/metrics/user_daily/")
+
+    assert response.status_code == 200
+    [row] = response.json()
+    assert row["user_id"] == str(user.id)
+    assert row["project_id"] == str(project.id)
+    assert row["metric_date"] == "2025-03-03"
+    assert row["hours_worked"] == 7.5
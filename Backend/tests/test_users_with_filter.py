@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from app.models.user import UserRole
+from tests.factories import make_member, make_project, make_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def _seed(db):
+    manager = await make_user(db, name="Mia Manager", role=UserRole.MANAGER)
+    ann = await make_user(db, name="Ann", rpm_user_id=manager.id)
+    bob = await make_user(db, name="Bob")
+    await make_member(db, ann, await make_project(db))
+    await db.commit()
+    return manager, ann, bob
+
+
+async def test_ndjson_stream_renders_driver_uuids(db, client):
+    manager, ann, bob = await _seed(db)
+
+    response = await client.post(
+        "/admin/users/users_with_filter",
+        json={"limit": 2, "is_active": True},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    *rows, meta = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["id"], row["name"]) for row in rows] == [(str(ann.id), "Ann"), (str(bob.id), "Bob")]
+    assert rows[0]["rpm_user_id"] == str(manager.id)
+    assert rows[0]["allocated_projects"] == 1
+    assert meta["meta"]["count"] == 2
+    assert meta["meta"]["next_cursor"]
+
+    rest = await client.post(
+        "/admin/users/users_with_filter",
+        json={"limit": 2, "is_active": True, "cursor": meta["meta"]["next_cursor"]},
+        headers={"Accept": "application/x-ndjson"},
+    )
+    *rows, meta = [json.loads(line) for line in rest.text.splitlines()]
+    assert [row["name"] for row in rows] == ["Local Admin", "Mia Manager"]
+    assert meta["meta"]["next_cursor"]
+
+
+async def test_json_page_renders_driver_uuids(db, client):
+    manager, ann, bob = await _seed(db)
+
+    response = await client.post("/admin/users/users_with_filter", json={"name": "Ann", "include_total": True})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [(item["id"], item["rpm_user_id"]) for item in body["items"]] == [(str(ann.id), str(manager.id))]
+    assert body["meta"]["total"] == 1
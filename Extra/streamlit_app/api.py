@@ -1,26 +1,123 @@
-import requests
+"""
+Shared HTTP client for the Streamlit pages.
+
+All calls go through one pooled requests.Session (keep-alive, so the TCP/TLS
+handshake is paid once per connection instead of per call), with the same
+timeouts and retry policy everywhere. Independent calls can be issued
+concurrently with gather():
+
+    users, projects = gather(
+        lambda: authenticated_request("GET", "/admin/users/"),
+        lambda: authenticated_request("GET", "/admin/projects/"),
+    )
+"""
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "60"))
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))
+API_MAX_WORKERS = int(os.getenv("API_MAX_WORKERS", "8"))
+
+DEFAULT_TIMEOUT = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=API_RETRIES,
+                    backoff_factor=0.3,
+                    status_forcelist=(502, 503, 504),
+                    # Only idempotent calls are retried; a POST may have been applied
+                    allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=10,
+                    pool_maxsize=API_POOL_SIZE,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
 
-def api_request(method, endpoint, token=None, json=None, params=None):
-    headers = {}
 
+def send_request(method, endpoint, token=None, json=None, params=None, timeout=None, **kwargs):
+    """
+    Issue a call against the API through the pooled session and return the
+    requests.Response (no status handling; see api_request for that).
+    """
+    headers = kwargs.pop("headers", None) or {}
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
-    response = requests.request(
+    return get_session().request(
         method=method,
         url=f"{API_BASE_URL}{endpoint}",
         headers=headers,
         json=json,
         params=params,
+        timeout=timeout or DEFAULT_TIMEOUT,
+        **kwargs,
     )
 
+
+def api_request(method, endpoint, token=None, json=None, params=None):
+    response = send_request(method, endpoint, token=token, json=json, params=params)
+
     if response.status_code >= 400:
         raise Exception(response.text)
 
     return response.json()
+
+
+def _script_run_ctx():
+    # Streamlit keeps st.session_state / st.error / st.cache_data per script
+    # run; worker threads need the caller's context to use them.
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx()
+
+
+def gather(*calls, max_workers=None):
+    """
+    Run independent zero-argument callables concurrently and return their
+    results in order. If any call raises, the first exception (in call
+    order) is re-raised once all calls have finished.
+    """
+    if len(calls) <= 1:
+        return [call() for call in calls]
+
+    ctx = _script_run_ctx()
+
+    def run(call):
+        if ctx is not None:
+            from streamlit.runtime.scriptrunner import add_script_run_ctx
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return call()
+
+    # A pool per call keeps nested gather() calls from waiting on each other
+    with ThreadPoolExecutor(max_workers=min(len(calls), max_workers or API_MAX_WORKERS)) as pool:
+        futures = [pool.submit(run, call) for call in calls]
+    return [future.result() for future in futures]
@@ -1,15 +1,12 @@
 import streamlit as st
-import requests
 import pandas as pd
-import os
 from datetime import date, timedelta
 import io
 from role_guard import get_user_role
+from api import send_request, gather
 from utils.timezone import today_ist
 
 # --- CONFIG ---
-API_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
-
 st.set_page_config(page_title="Reports Center", layout="wide")
 
 # Basic role check
@@ -25,20 +22,21 @@ if not token:
     st.warning("🔒 Please login first.")
     st.stop()
 
-headers = {"Authorization": f"Bearer {token}"}
-
 # --- 2. PRE-FETCH DATA ---
 projects = []
 users = []
 
 try:
-    p_res = requests.get(f"{API_URL}/admin/projects/", headers=headers)
+    # Projects and users are independent: fetch concurrently
+    p_res, u_res = gather(
+        lambda: send_request("GET", "/admin/projects/", token=token),
+        lambda: send_request("GET", "/auth/users/", token=token),
+    )
     if p_res.status_code == 200:
         projects = p_res.json()
     
-    u_res = requests.get(f"{API_URL}/auth/users/", headers=headers) 
     if u_res.status_code != 200:
-        u_res = requests.get(f"{API_URL}/admin/users/", headers=headers)
+        u_res = send_request("GET", "/admin/users/", token=token)
     
     if u_res.status_code == 200:
         users = u_res.json()
@@ -75,7 +73,7 @@ with tab1:
     else:
         # 1. Preview Button
         if st.button("🔎 Preview Roster"):
-            url = f"{API_URL}/reports/role-drilldown"
+            endpoint = "/reports/role-drilldown"
             params = {
                 "start_date": str(r_start_date),
                 "end_date": str(r_end_date)
@@ -87,7 +85,7 @@ with tab1:
                 params["project_id"] = r_proj_id
             
             try:
-                res = requests.get(url, headers=headers, params=params)
+                res = send_request("GET", endpoint, token=token, params=params)
                 if res.status_code == 200:
                     # 2. Show Table
                     df = pd.read_csv(io.BytesIO(res.content))
@@ -128,7 +126,7 @@ with tab2:
     else:
         if st.button("🔎 Preview History"):
             h_proj_id = project_map[h_proj_name]
-            url = f"{API_URL}/reports/project-history"
+            endpoint = "/reports/project-history"
             params = {
                 "project_id": h_proj_id,
                 "start_date": str(h_start_date),
@@ -136,7 +134,7 @@ with tab2:
             }
             
             try:
-                res = requests.get(url, headers=headers, params=params)
+                res = send_request("GET", endpoint, token=token, params=params)
                 if res.status_code == 200:
                     try:
                         df = pd.read_csv(io.BytesIO(res.content))
@@ -178,7 +176,7 @@ with tab3:
             
         if st.button("🔎 Preview Performance"):
             u_id = user_selection_map[selected_user_str]
-            url = f"{API_URL}/reports/user-performance"
+            endpoint = "/reports/user-performance"
             params = {
                 "user_id": u_id,
                 "start_date": str(start_d),
@@ -186,7 +184,7 @@ with tab3:
             }
             
             try:
-                res = requests.get(url, headers=headers, params=params)
+                res = send_request("GET", endpoint, token=token, params=params)
                 if res.status_code == 200:
                     try:
                         df = pd.read_csv(io.BytesIO(res.content))
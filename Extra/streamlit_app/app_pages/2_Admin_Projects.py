@@ -5,15 +5,16 @@ import pandas as pd
 import time
 from datetime import date, datetime, timedelta
 from role_guard import get_user_role
+from data_cache import cached, invalidate, get_user_name_mapping, get_user_email_mapping, get_project_name_mapping
 from utils.timezone import today_ist
 
-def clear_team_stats_cache():
-    """Clear caches related to team stats and project assignments.
+def clear_team_stats_cache(project_id):
+    """Drop cached data that depends on this project's members.
     This ensures that when a person is assigned to a new project, 
     the Team Stats page will show the updated information immediately."""
-    # Clear all cached data to ensure Team Stats page gets fresh data
-    # This is safe and ensures all related caches are cleared
-    st.cache_data.clear()
+    # Members feed team lists and allocations; the projects list carries
+    # the current user's role per project
+    invalidate(f"members:{project_id}", "projects")
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Admin | Project Manager", layout="wide")
@@ -118,6 +119,7 @@ with tab1:
                     "is_active": is_active
                 }
                 authenticated_request("POST", "/admin/projects/", data=payload)
+                invalidate("projects")
                 st.toast("Project created")
                 st.rerun()
     
@@ -183,6 +185,7 @@ with tab1:
                         if not response:
                             st.error("Error uploading file")
                         else:
+                            invalidate("projects")
                             st.success(f"Inserted: {response['inserted']}")
                             error = response["errors"]
                             if len(error) == 0:
@@ -256,10 +259,15 @@ with tab1:
         owners_map = {}  # Maps project_id to list of owner names
         owners_ids_map = {}  # Maps project_id to list of owner user_ids
 
+        # Members of all projects in one request
+        members_by_project = authenticated_request(
+            "GET", "/admin/projects/members", params={"project_ids": [p["id"] for p in projects_data]}
+        ) if projects_data else {}
+        members_by_project = {str(pid): members for pid, members in (members_by_project or {}).items()}
+
         for p in projects_data:
             # Get member count
-            members = authenticated_request("GET", f"/admin/projects/{p['id']}/members") or []
-            members_count[p["id"]] = len(members)
+            members_count[p["id"]] = len(members_by_project.get(str(p["id"])) or [])
             
             # Get project owners from project_owners table
             owners = authenticated_request("GET", f"/admin/projects/{p['id']}/owners") or []
@@ -405,6 +413,7 @@ with tab1:
 
                 authenticated_request("PUT", f"/admin/projects/{proj_id}", data=payload)
 
+            invalidate("projects")
             st.toast("Projects updated")
             time.sleep(1)
             st.rerun()
@@ -490,7 +499,7 @@ with tab2:
                             
                             if response:
                                 # Clear team stats cache so new assignment is reflected immediately
-                                clear_team_stats_cache()
+                                clear_team_stats_cache(selected_proj_id)
                                 st.success(f"✅ Member added successfully!")
                                 st.toast("Member added")
                                 time.sleep(1)
@@ -574,7 +583,7 @@ with tab2:
                                 response = authenticated_request("PUT", f"/admin/projects/{selected_proj_id}/members/{user_id_to_edit}", data=payload)
                                 if response is not None:
                                     # Clear team stats cache so updated role is reflected immediately
-                                    clear_team_stats_cache()
+                                    clear_team_stats_cache(selected_proj_id)
                                     st.success(f"✅ {selected_edit_row['Name']}'s role updated from '{current_role}' to '{new_role}'")
                                     st.toast("Role updated")
                                     time.sleep(1)
@@ -605,7 +614,7 @@ with tab2:
                     response = authenticated_request("DELETE", f"/admin/projects/{selected_proj_id}/members/{user_id_to_remove}")
                     if response is not None:
                         # Clear team stats cache so removal is reflected immediately
-                        clear_team_stats_cache()
+                        clear_team_stats_cache(selected_proj_id)
                         st.success(f"✅ {selected_row['Name']} removed from project")
                         st.toast("Member removed")
                         time.sleep(1)
@@ -719,30 +728,10 @@ with tab2:
 # TAB 3: QUALITY ASSESSMENT
 # ==========================================
 with tab3:
-    # Helper functions for quality assessment
-    @st.cache_data(ttl=300)
-    def get_user_name_mapping_qa() -> dict:
-        """Fetch all users and create UUID -> name mapping"""
-        users = authenticated_request("GET", "/admin/users/", params={"limit": 1000}) or []
-        if not users:
-            return {}
-        return {str(user["id"]): user["name"] for user in users}
-    
-    @st.cache_data(ttl=300)
-    def get_user_email_mapping_qa() -> dict:
-        """Fetch all users and create UUID -> email mapping"""
-        users = authenticated_request("GET", "/admin/users/", params={"limit": 1000}) or []
-        if not users:
-            return {}
-        return {str(user["id"]): user.get("email", "") for user in users}
-    
-    @st.cache_data(ttl=300)
-    def get_project_name_mapping_qa() -> dict:
-        """Fetch all projects and create UUID -> name mapping"""
-        projects = authenticated_request("GET", "/admin/projects/") or []
-        if not projects:
-            return {}
-        return {str(project["id"]): project["name"] for project in projects}
+    # Name mappings come from the shared cache (data_cache.py)
+    get_user_name_mapping_qa = get_user_name_mapping
+    get_user_email_mapping_qa = get_user_email_mapping
+    get_project_name_mapping_qa = get_project_name_mapping
     
     st.markdown("### ⭐ Quality Assessment")
     st.markdown("Manually assess quality ratings for users on specific dates")
@@ -878,10 +867,8 @@ with tab3:
                         if result:
                             st.success(f"✅ Quality assessment saved successfully!")
                             st.balloons()
-                            # Clear cache to refresh data
-                            get_user_name_mapping_qa.clear()
-                            get_user_email_mapping_qa.clear()
-                            get_project_name_mapping_qa.clear()
+                            # Quality is part of the project's daily metrics
+                            invalidate(f"metrics:{selected_project_id}")
                             # Force rerun to refresh the table
                             time.sleep(0.5)
                             st.rerun()
@@ -991,9 +978,8 @@ with tab3:
                                         st.text(error)
                             
                             st.balloons()
-                            get_user_name_mapping_qa.clear()
-                            get_user_email_mapping_qa.clear()
-                            get_project_name_mapping_qa.clear()
+                            # Rows may span any project
+                            invalidate("metrics")
                             time.sleep(0.5)
                             st.rerun()
                         else:
@@ -1049,7 +1035,7 @@ with tab4:
             pass
         return []
     
-    @st.cache_data(ttl=300)
+    @cached("users", ttl=300)
     def fetch_managers_for_rpm():
         token = st.session_state.get("token")
         if not token:
@@ -1148,7 +1134,7 @@ with tab4:
                         
                         if result:
                             st.success(f"✅ User '{new_user_name}' added successfully!")
-                            st.cache_data.clear()
+                            invalidate("users")
                             time.sleep(1)
                             st.rerun()
         
@@ -1308,7 +1294,7 @@ with tab4:
                                         st.warning(err)
                             
                             if success_count > 0:
-                                st.cache_data.clear()
+                                invalidate("users")
                                 st.info("Page will refresh in 2 seconds...")
                                 time.sleep(2)
                                 st.rerun()
@@ -1332,7 +1318,7 @@ with tab4:
             search_active = st.selectbox("Active Status", ["All", "Active Only", "Inactive Only"], key="user_search_active")
         
         # Fetch users based on search
-        @st.cache_data(ttl=60)
+        @cached("users", ttl=60)
         def search_users(name_filter, email_filter, active_filter):
             token = st.session_state.get("token")
             if not token:
@@ -1495,6 +1481,7 @@ with tab4:
                             
                             if result:
                                 st.success(f"✅ User '{edit_name}' updated successfully!")
-                                st.cache_data.clear()
+                                # Member lists and allocations show user details too
+                                invalidate("users", "members")
                                 time.sleep(1)
                                 st.rerun()
\ No newline at end of file
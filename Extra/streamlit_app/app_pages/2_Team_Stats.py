@@ -5,6 +5,7 @@ import os
 from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
 from role_guard import get_user_role
+from data_cache import cached, invalidate, get_projects
 from utils.timezone import today_ist
 import plotly.express as px
 import plotly.graph_objects as go
@@ -128,24 +129,14 @@ def export_csv(filename, rows):
         key=f"download_{filename}"
     )
 
-# Cached API functions
-@st.cache_data(ttl=300, show_spinner="Loading projects...")
+# Cached API functions (shared tag cache, see data_cache.py)
 def get_all_projects_cached(reference_date=None):
-    """Cache projects list for 5 minutes, optionally filtered by reference_date"""
-    params = {}
-    if reference_date:
-        params["reference_date"] = reference_date.isoformat()
-    return authenticated_request("GET", "/admin/projects", params=params) or []
+    """Projects list (shared cache), optionally filtered by reference_date"""
+    return get_projects(reference_date=reference_date) or []
 
-@st.cache_data(ttl=300, show_spinner="Loading your projects...")
 def get_user_projects_cached(reference_date=None):
     """Get projects where the current user is a member, optionally filtered by reference_date"""
-    # Pass reference_date to API if provided
-    params = {}
-    if reference_date:
-        params["reference_date"] = reference_date.isoformat()
-    
-    all_projects = authenticated_request("GET", "/admin/projects", params=params) or []
+    all_projects = get_all_projects_cached(reference_date)
     # Filter projects where current_user_role is not "N/A" (user is a member)
     user_projects = [
         p for p in all_projects 
@@ -153,7 +144,17 @@ def get_user_projects_cached(reference_date=None):
     ]
     return user_projects
 
-@st.cache_data(ttl=60, show_spinner="Loading team members...")
+def get_members_of_projects(project_ids):
+    """Members of several projects in one request: {project_id (str): [member, ...]}"""
+    project_ids = [str(pid) for pid in project_ids if pid]
+    if not project_ids:
+        return {}
+    members_by_project = authenticated_request(
+        "GET", "/admin/projects/members", params={"project_ids": project_ids}
+    ) or {}
+    return {str(pid): members for pid, members in members_by_project.items()}
+
+@cached("members:{user_project_ids}", ttl=60, show_spinner="Loading team members...")
 def get_team_members_cached(user_project_ids, selected_date=None):
     """Get all team members from user's projects, filtering by date if provided"""
     from datetime import date as date_type
@@ -161,8 +162,9 @@ def get_team_members_cached(user_project_ids, selected_date=None):
         selected_date = date_type.today()
     
     team_member_ids = set()
+    members_by_project = get_members_of_projects(user_project_ids)
     for project_id in user_project_ids:
-        members = authenticated_request("GET", f"/admin/projects/{project_id}/members") or []
+        members = members_by_project.get(str(project_id)) or []
         if not members:
             # Debug: Log if no members found for a project
             print(f"[DEBUG] No members returned for project {project_id}")
@@ -201,7 +203,7 @@ def get_team_members_cached(user_project_ids, selected_date=None):
                     team_member_ids.add(str(user_id))
     return team_member_ids
 
-@st.cache_data(ttl=60, show_spinner="Loading user data...")
+@cached("users", "allocation:{selected_date_str}", ttl=60, show_spinner="Loading user data...")
 def get_users_with_filter_cached(selected_date_str, silent_fail=False):
     """Cache user data for 1 minute. If silent_fail=True, don't show API error in UI (for fallback flow)."""
     response = authenticated_request(
@@ -224,8 +226,9 @@ def get_user_data_from_project_members(project_ids, selected_date):
     
     users_dict = {}  # {user_id: user_data}
     
+    members_by_project = get_members_of_projects(project_ids)
     for project_id in project_ids:
-        members = authenticated_request("GET", f"/admin/projects/{project_id}/members") or []
+        members = members_by_project.get(str(project_id)) or []
         for member in members:
             if isinstance(member, dict):
                 # Check if member is active and within date range
@@ -273,7 +276,7 @@ def get_user_data_from_project_members(project_ids, selected_date):
     
     return list(users_dict.values())
 
-@st.cache_data(ttl=10, show_spinner="Loading metrics...")  # Reduced to 10 seconds for more real-time updates
+@cached("metrics:{project_id}", ttl=10, show_spinner="Loading metrics...")  # Reduced to 10 seconds for more real-time updates
 def get_project_metrics_cached(project_id, start_date_str, end_date_str):
     """Cache project metrics for 10 seconds"""
     return authenticated_request("GET", "/admin/metrics/user_daily/", params={
@@ -282,7 +285,7 @@ def get_project_metrics_cached(project_id, start_date_str, end_date_str):
         "end_date": end_date_str
     }) or []
 
-@st.cache_data(ttl=10, show_spinner="Loading role counts...")  # Reduced to 10 seconds for more real-time updates
+@cached("metrics:{project_id}", "allocation:{target_date_str}", ttl=10, show_spinner="Loading role counts...")  # Reduced to 10 seconds for more real-time updates
 def get_project_role_counts_cached(project_id, target_date_str):
     """Cache project role counts for 10 seconds
     
@@ -304,7 +307,7 @@ def get_project_role_counts_cached(project_id, target_date_str):
     
     return result
 
-@st.cache_data(ttl=10, show_spinner="Loading allocation data...")  # Reduced to 10 seconds for more real-time updates
+@cached("members:{project_id}", "allocation:{target_date_str}", ttl=10, show_spinner="Loading allocation data...")  # Reduced to 10 seconds for more real-time updates
 def get_project_allocation_cached(project_id, target_date_str, only_active=True):
     """Cache project allocation for 10 seconds
     
@@ -352,7 +355,7 @@ def aggregate_by_user(rows):
                 existing["attendance_status"] = r["attendance_status"]
     return list(aggregated.values())
 
-@st.cache_data(ttl=10, show_spinner="Loading weekly metrics...")  # Reduced to 10 seconds for more real-time updates
+@cached("metrics", ttl=10, show_spinner="Loading weekly metrics...")  # Reduced to 10 seconds for more real-time updates
 def get_user_daily_metrics_cached(user_id=None, project_ids=None, start_date_str=None, end_date_str=None):
     """Get user daily metrics for a date range"""
     params = {}
@@ -380,13 +383,8 @@ with col_date:
 with col_refresh:
     st.write("")  # Spacing
     if st.button("🔄 Refresh Data", use_container_width=True, help="Clear cache and reload all data to see latest updates"):
-        # Clear all relevant caches
-        get_project_metrics_cached.clear()
-        get_user_daily_metrics_cached.clear()
-        get_team_members_cached.clear()
-        get_user_projects_cached.clear()
-        get_user_data_cached.clear()
-        st.cache_data.clear()  # Clear all remaining caches
+        # Drop everything this page shows from the shared cache
+        invalidate("projects", "members", "metrics", "allocation", "users")
         st.success("✅ Cache cleared! Data will refresh...")
         time.sleep(0.5)
         st.rerun()
@@ -1,15 +1,14 @@
 import streamlit as st
-import requests
 import time
-import os
 from datetime import datetime, date
 from role_guard import setup_role_access
+from api import send_request, gather
+from data_cache import invalidate
 from utils.timezone import now_ist, today_ist, parse_to_ist, IST
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Home", layout="wide")
 setup_role_access(__file__)
-API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 
 # --- CUSTOM CSS FOR DARK MODE UI ---
 st.markdown("""
@@ -63,18 +62,8 @@ st.markdown("""
 
 # --- HELPER FUNCTIONS ---
 def api_request(method, endpoint, token=None, json=None, params=None):
-    headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    
     try:
-        response = requests.request(
-            method=method,
-            url=f"{API_BASE_URL}{endpoint}",
-            headers=headers,
-            json=json,
-            params=params,
-        )
+        response = send_request(method, endpoint, token=token, json=json, params=params)
         if response.status_code >= 400:
             return None
         return response.json()
@@ -187,7 +176,15 @@ st.divider()
 # Single /time/home call for current session + today's sessions (faster than two separate calls)
 st.session_state.setdefault("home_data_version", 0)
 token = st.session_state.get("token")
-home_data = _cached_home_data(token, st.session_state["home_data_version"]) if token else {}
+if token:
+    # Independent calls: fetch concurrently (the project dropdown below reads
+    # _cached_projects from the cache)
+    home_data, _ = gather(
+        lambda: _cached_home_data(token, st.session_state["home_data_version"]),
+        lambda: _cached_projects(token),
+    )
+else:
+    home_data = {}
 current_session = home_data.get("current_session") if home_data else None
 
 # --- 3. MAIN DASHBOARD LAYOUT ---
@@ -311,6 +308,8 @@ with st.container(border=True):
                     })
                     if resp:
                         st.session_state["home_data_version"] = st.session_state.get("home_data_version", 0) + 1
+                        # Today's attendance and the project's history changed
+                        invalidate(f"allocation:{today_ist().isoformat()}", f"metrics:{proj_id}")
                         st.rerun()
                 else:
                     st.warning("Please select a project first.")
@@ -382,6 +381,7 @@ def clock_out_dialog():
                 st.success("Saved. Great work today.")
                 st.session_state['show_clockout_popup'] = False
                 st.session_state["home_data_version"] = st.session_state.get("home_data_version", 0) + 1
+                invalidate(f"allocation:{today_ist().isoformat()}", "metrics")
                 st.rerun()
 
     with c_cancel:
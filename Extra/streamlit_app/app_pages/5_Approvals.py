@@ -1,10 +1,10 @@
 import streamlit as st
-import requests
 import time
-import os
 import pandas as pd
 from datetime import date, datetime
 from role_guard import get_user_role
+from api import send_request, gather
+from data_cache import invalidate
 from utils.timezone import format_time_ist
 
 # --- CONFIGURATION ---
@@ -15,7 +15,6 @@ role = get_user_role()
 if not role or role not in ["ADMIN", "MANAGER"]:
     st.error("Access denied. Admin or Manager role required.")
     st.stop()
-API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 
 # --- HELPER FUNCTIONS ---
 def authenticated_request(method, endpoint, data=None, params=None):
@@ -24,12 +23,11 @@ def authenticated_request(method, endpoint, data=None, params=None):
         st.warning("🔒 Please login first.")
         st.stop()
 
-    headers = {"Authorization": f"Bearer {token}"}
     try:
         if method.upper() == "GET" and params:
-            response = requests.request(method, f"{API_BASE_URL}{endpoint}", headers=headers, params=params)
+            response = send_request(method, endpoint, token=token, params=params)
         else:
-            response = requests.request(method, f"{API_BASE_URL}{endpoint}", headers=headers, json=data)
+            response = send_request(method, endpoint, token=token, json=data)
         if response.status_code >= 400:
             st.error(f"Error {response.status_code}: {response.text}")
             return None
@@ -53,6 +51,8 @@ def submit_decision(history_id, action, notes=""):
     
     # 4. Handle Success
     if resp:
+        # Approved time feeds the daily metrics
+        invalidate("metrics")
         return True
     return False
 
@@ -75,7 +75,10 @@ st.markdown("Verify and approve team timesheets. Only project managers and admin
 st.markdown("---")
 
 # --- FETCH DATA ---
-pending_items = authenticated_request("GET", "/admin/dashboard/pending-approvals") or []
+pending_items, projects = gather(
+    lambda: authenticated_request("GET", "/admin/dashboard/pending-approvals") or [],
+    lambda: authenticated_request("GET", "/admin/projects/") or [],
+)
 
 # --- FILTERS ---
 st.subheader("🔍 Filters")
@@ -83,7 +86,6 @@ filter_col1, filter_col2, filter_col3, filter_col4 = st.columns(4)
 
 with filter_col1:
     # Project filter
-    projects = authenticated_request("GET", "/admin/projects/") or []
     project_options = ["All Projects"] + [p["name"] for p in projects]
     selected_project = st.selectbox("Project", options=project_options, key="filter_project")
 
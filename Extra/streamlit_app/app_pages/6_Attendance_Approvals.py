@@ -1,15 +1,14 @@
 import streamlit as st
-import requests
-import os
 import pandas as pd
 from datetime import datetime, timezone as tz
 import pytz
 from role_guard import setup_role_access
+from api import send_request, gather
+from data_cache import invalidate
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Attendance Request Approvals", layout="wide")
 setup_role_access(__file__)
-API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 
 # --- HELPER FUNCTIONS ---
 def authenticated_request(method, endpoint, data=None, params=None):
@@ -19,15 +18,8 @@ def authenticated_request(method, endpoint, data=None, params=None):
         st.warning("🔒 Please login first.")
         st.stop()
     
-    headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.request(
-            method, 
-            f"{API_BASE_URL}{endpoint}", 
-            headers=headers, 
-            json=data,
-            params=params
-        )
+        response = send_request(method, endpoint, token=token, json=data, params=params)
         if response.status_code >= 400:
             st.error(f"Error {response.status_code}: {response.text}")
             return None
@@ -80,25 +72,35 @@ def submit_approval(request_id, decision, comment=""):
         "decision": decision,
         "comment": comment
     }
-    return authenticated_request("POST", "/admin/attendance-request-approvals/", data=payload)
+    return _invalidate_leave(authenticated_request("POST", "/admin/attendance-request-approvals/", data=payload))
 
 
 def delete_approval(approval_id):
     """Delete an approval record"""
-    return authenticated_request("DELETE", f"/admin/attendance-request-approvals/{approval_id}")
+    return _invalidate_leave(authenticated_request("DELETE", f"/admin/attendance-request-approvals/{approval_id}"))
 
 
 def update_approval(approval_id, decision, comment):
     """Update an approval record"""
     payload = {"decision": decision, "comment": comment}
-    return authenticated_request("PUT", f"/admin/attendance-request-approvals/{approval_id}", data=payload)
+    return _invalidate_leave(authenticated_request("PUT", f"/admin/attendance-request-approvals/{approval_id}", data=payload))
+
+
+def _invalidate_leave(result):
+    """Approved leave changes allocation status for the request's dates"""
+    if result is not None:
+        invalidate("allocation")
+    return result
 
 
 # --- PAGE HEADER ---
 st.title("📋 Attendance Request Approvals")
 
 # --- LOAD FILTERS ---
-projects = authenticated_request("GET", "/admin/projects") or []
+projects, all_approvals = gather(
+    lambda: authenticated_request("GET", "/admin/projects") or [],
+    lambda: authenticated_request("GET", "/admin/attendance-request-approvals/") or [],
+)
 project_options = {"All Projects": None}
 for p in projects:
     project_options[p["name"]] = p["id"]
@@ -108,8 +110,7 @@ for p in projects:
 local_tz = pytz.timezone("Asia/Kolkata")  # Adjust to your timezone if different
 today_local = datetime.now(local_tz).date()
 
-# Fetch recent and filter client-side
-all_approvals = authenticated_request("GET", "/admin/attendance-request-approvals/") or []
+# Recent approvals (fetched with the projects above), filtered client-side
 
 # Filter approvals/rejections that were decided today (in local timezone)
 today_approvals = []
@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 from typing import Dict, List, Optional
 import time
 from role_guard import get_user_role
+from data_cache import cached, invalidate, get_projects, get_users, get_user_name_mapping
 from utils.timezone import today_ist, parse_to_ist, format_time_ist
 import base64
 
@@ -342,21 +343,10 @@ def authenticated_request(method, endpoint, params=None, json_data=None, retries
     return None
 
 # Cached API functions
-@st.cache_data(ttl=300, show_spinner="Loading projects...")
+# Cached API functions (shared tag cache, see data_cache.py)
 def get_all_projects_cached():
-    """Cache projects list for 5 minutes"""
-    return authenticated_request("GET", "/admin/projects") or []
-
-@st.cache_data(ttl=300, show_spinner="Loading user names...")
-def get_user_name_mapping():
-    """Cache user name mapping for 5 minutes"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000}, show_error=False)
-    if not users:
-        print(f"[DEBUG] get_user_name_mapping: API returned empty, returning empty dict")
-        return {}
-    mapping = {str(user["id"]): user.get("name", "Unknown") for user in users if isinstance(user, dict)}
-    print(f"[DEBUG] get_user_name_mapping: Created mapping with {len(mapping)} users")
-    return mapping
+    """Projects list (shared cache)"""
+    return get_projects() or []
 
 def get_user_name_mapping_from_data(users_data):
     """Create user name mapping from existing users_data (fallback when API fails)
@@ -384,7 +374,7 @@ def get_user_name_mapping_from_data(users_data):
         print(f"[DEBUG] Sample user names: {unique_names}")
     return mapping
 
-@st.cache_data(ttl=180, show_spinner="Loading user data...")
+@cached("users", "allocation:{selected_date_str}", ttl=180, show_spinner="Loading user data...")
 def get_users_with_filter_cached(selected_date_str, silent_fail=False):
     """Cache user data for 30 seconds. If silent_fail=True, don't show API error in UI (for fallback flow)."""
     response = authenticated_request(
@@ -404,7 +394,7 @@ def get_users_with_filter_cached(selected_date_str, silent_fail=False):
 
 def get_users_fallback():
     """Fallback: Get users from simpler /admin/users/ endpoint if users_with_filter fails"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000}, show_error=False) or []
+    users = get_users() or []
     print(f"[DEBUG] Fallback: Got {len(users)} users from /admin/users/ endpoint")
     # Convert to same format as users_with_filter returns
     # Add default values for fields that users_with_filter provides
@@ -437,7 +427,7 @@ def get_users_fallback():
     print(f"[DEBUG] Fallback: Converted to {len(result)} user objects")
     return result
 
-@st.cache_data(ttl=120, show_spinner="Loading metrics...")  # 2 minutes cache for better performance
+@cached("metrics:{project_id}", ttl=120, show_spinner="Loading metrics...")  # 2 minutes cache for better performance
 def get_project_metrics_cached(project_id, start_date_str, end_date_str):
     """Cache project metrics for 2 minutes"""
     return authenticated_request("GET", "/admin/metrics/user_daily/", params={
@@ -446,7 +436,7 @@ def get_project_metrics_cached(project_id, start_date_str, end_date_str):
         "end_date": end_date_str
     }) or []
 
-@st.cache_data(ttl=120, show_spinner="Loading metrics for multiple projects...")
+@cached("metrics:{project_ids}", ttl=120, show_spinner="Loading metrics for multiple projects...")
 def get_multiple_projects_metrics_cached(project_ids, start_date_str, end_date_str):
     """
     Batch fetch metrics for multiple projects at once.
@@ -466,7 +456,7 @@ def get_multiple_projects_metrics_cached(project_ids, start_date_str, end_date_s
     
     return result or []
 
-@st.cache_data(ttl=120, show_spinner="Loading role counts...")  # 2 minutes cache for better performance
+@cached("metrics:{project_id}", "allocation:{target_date_str}", ttl=120, show_spinner="Loading role counts...")  # 2 minutes cache for better performance
 def get_project_role_counts_cached(project_id, target_date_str):
     """Cache project role counts for 10 seconds
     
@@ -488,7 +478,7 @@ def get_project_role_counts_cached(project_id, target_date_str):
     
     return result
 
-@st.cache_data(ttl=120, show_spinner="Loading allocation data...")  # 2 minutes cache for better performance
+@cached("members:{project_id}", "allocation:{target_date_str}", ttl=120, show_spinner="Loading allocation data...")  # 2 minutes cache for better performance
 def get_project_allocation_cached(project_id, target_date_str, only_active=True):
     """Cache project allocation for 1 minute
     
@@ -516,7 +506,34 @@ def get_project_allocation_cached(project_id, target_date_str, only_active=True)
         print(f"[DEBUG] get_project_allocation_cached: project_id={project_id_str}, date={target_date_str}, API returned None")
     return result
 
-@st.cache_data(ttl=60, show_spinner="Loading user projects mapping...")
+@cached("members:{project_ids}", "allocation:{target_date_str}", ttl=120, show_spinner="Loading allocation data...")
+def get_project_allocations_batch_cached(project_ids, target_date_str, only_active=True):
+    """Allocation for several projects in one request (cached like get_project_allocation_cached)
+
+    Args:
+        project_ids: Tuple of project UUID strings
+        target_date_str: Date string in YYYY-MM-DD format
+        only_active: If True, only return active project members (default: True)
+
+    Returns {project_id: allocation} in the single-project response shape;
+    projects missing from the response (API error) are absent from the dict.
+    """
+    if not project_ids:
+        return {}
+
+    result = authenticated_request("GET", "/admin/project-resource-allocation/batch", params={
+        "project_ids": list(project_ids),
+        "target_date": target_date_str,
+        "only_active": only_active,
+        "include_role_counts": False
+    }, show_error=False)
+
+    if not result:
+        print(f"[DEBUG] get_project_allocations_batch_cached: {len(project_ids)} projects, date={target_date_str}, API returned None")
+        return {}
+    return {str(entry["project_id"]): entry for entry in result.get("projects", [])}
+
+@cached("projects", "members", "allocation:{target_date_str}", ttl=60, show_spinner="Loading user projects mapping...")
 def get_user_projects_mapping_cached(target_date_str):
     """Cache user to projects mapping for 1 minute
     Returns a dictionary mapping user_id (as string) to list of project names
@@ -527,7 +544,12 @@ def get_user_projects_mapping_cached(target_date_str):
     all_projects = get_all_projects_cached()
     user_projects_map = {}
     
-    # For each project, get allocation data and map users to project names
+    # Allocation data for all projects in one request
+    allocations = get_project_allocations_batch_cached(
+        tuple(str(p["id"]) for p in all_projects if p.get("id")), target_date_str, only_active=True
+    )
+    
+    # For each project, map users to project names
     for project in all_projects:
         project_id = project.get("id")
         project_name = project.get("name", "Unknown Project")
@@ -536,7 +558,7 @@ def get_user_projects_mapping_cached(target_date_str):
             continue
         
         # Get allocation data for this project
-        allocation_data = get_project_allocation_cached(project_id, target_date_str, only_active=True)
+        allocation_data = allocations.get(str(project_id))
         
         if allocation_data and allocation_data.get("resources"):
             for resource in allocation_data["resources"]:
@@ -628,14 +650,8 @@ with col_date:
 with col_refresh:
     st.write("")  # Spacing
     if st.button("🔄 Refresh Data", use_container_width=True, help="Clear cache and reload all data to see latest updates"):
-        # Clear all relevant caches
-        get_all_projects_cached.clear()
-        get_project_metrics_cached.clear()
-        get_project_allocation_cached.clear()
-        get_user_projects_mapping_cached.clear()
-        get_users_with_filter_cached.clear()
-        get_user_name_mapping.clear()
-        st.cache_data.clear()  # Clear all remaining caches
+        # Drop everything this page shows from the shared cache
+        invalidate("projects", "members", "metrics", "allocation", "users")
         st.success("✅ Cache cleared! Data will refresh...")
         time.sleep(0.5)
         st.rerun()
@@ -1203,6 +1219,12 @@ with tab1:
     projects_with_metrics = []
     date_str = selected_date.isoformat()
     
+    # Allocation data for all projects in one request; the only_active=False
+    # variant is fetched (also in one request) for the first project that needs it
+    all_project_ids = tuple(str(p["id"]) for p in all_projects)
+    allocations_active = get_project_allocations_batch_cached(all_project_ids, date_str, only_active=True)
+    allocations_all = None
+    
     for project in all_projects:
         project_id = project["id"]
         
@@ -1220,7 +1242,7 @@ with tab1:
             role_counts[role] = role_counts.get(role, 0) + 1
         
         # Get allocation data (cached) - try with only_active=True first (default)
-        allocation_data = get_project_allocation_cached(project_id, date_str, only_active=True)
+        allocation_data = allocations_active.get(str(project_id))
         
         total_users_in_project = 0
         total_user_role_members = 0  # Count USER role members only (to match Allocated card)
@@ -1259,7 +1281,9 @@ with tab1:
                 print(f"[DEBUG] Project {project.get('name', project_id)} (ID: {project_id}): No active USER role members found. "
                       f"Trying with only_active=False to check for inactive members...")
                 # Try with inactive members (different cache key, so no need to clear)
-                allocation_data_all = get_project_allocation_cached(project_id, date_str, only_active=False)
+                if allocations_all is None:
+                    allocations_all = get_project_allocations_batch_cached(all_project_ids, date_str, only_active=False)
+                allocation_data_all = allocations_all.get(str(project_id))
                 if allocation_data_all and allocation_data_all.get("resources"):
                     resources_all = aggregate_by_user(allocation_data_all["resources"])
                     # Still filter by USER role even for inactive members
@@ -1280,7 +1304,9 @@ with tab1:
         else:
             print(f"[DEBUG] Project {project.get('name', project_id)} (ID: {project_id}): allocation_data is None - API call failed or returned no data")
             # Try with only_active=False as fallback
-            allocation_data = get_project_allocation_cached(project_id, date_str, only_active=False)
+            if allocations_all is None:
+                allocations_all = get_project_allocations_batch_cached(all_project_ids, date_str, only_active=False)
+            allocation_data = allocations_all.get(str(project_id))
             if allocation_data and allocation_data.get("resources"):
                 resources = aggregate_by_user(allocation_data["resources"])
                 # Filter to count only USER role members
@@ -18,6 +18,7 @@ API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 # AUTH CHECK & ROLE GUARD
 # =====================================================================
 from role_guard import get_user_role
+from data_cache import invalidate, get_user_name_mapping, get_user_email_mapping, get_project_name_mapping
 
 if "token" not in st.session_state:
     st.warning("🔒 Please login first from the main page.")
@@ -56,29 +57,7 @@ def authenticated_request(method: str, endpoint: str, params: Optional[Dict] = N
         st.error(f"Request failed: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)
-def get_user_name_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> name mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): user["name"] for user in users}
-
-@st.cache_data(ttl=300)
-def get_user_email_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> email mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): user.get("email", "") for user in users}
-
-@st.cache_data(ttl=300)
-def get_project_name_mapping() -> Dict[str, str]:
-    """Fetch all projects and create UUID -> name mapping"""
-    projects = authenticated_request("GET", "/admin/projects/", params={"limit": 1000})
-    if not projects:
-        return {}
-    return {str(project["id"]): project["name"] for project in projects}
+# Name mappings come from the shared cache (data_cache.py)
 
 # =====================================================================
 # HEADER
@@ -218,10 +197,8 @@ if mode == "Individual Assessment":
                 if result:
                     st.success(f"✅ Quality assessment saved successfully!")
                     st.balloons()
-                    # Clear cache to refresh data
-                    get_user_name_mapping.clear()
-                    get_user_email_mapping.clear()
-                    get_project_name_mapping.clear()
+                    # Quality is part of the project's daily metrics
+                    invalidate(f"metrics:{selected_project_id}")
                     # Force rerun to refresh the table
                     time.sleep(0.5)
                     st.rerun()
@@ -345,7 +322,8 @@ else:
                                         st.text(error)
                             
                             st.balloons()
-                            st.cache_data.clear()
+                            # Rows may span any project
+                            invalidate("metrics")
                         else:
                             st.error(f"❌ Upload failed: {response.status_code} - {response.text}")
                     except Exception as e:
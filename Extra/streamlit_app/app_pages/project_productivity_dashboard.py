@@ -4,12 +4,14 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, date, timedelta
 import numpy as np
-import requests
 import os
 from dotenv import load_dotenv
 from typing import Dict, Optional, List
 from role_guard import get_user_role
 from utils.timezone import today_ist, now_ist
+from utils.productivity import merge_quality, quality_frame
+from api import send_request, gather
+from data_cache import cached, get_users, get_projects, get_daily_metrics, get_quality_ratings, get_user_name_mapping, get_user_email_mapping, get_project_name_mapping
 
 load_dotenv()
 
@@ -38,14 +40,8 @@ def authenticated_request(method: str, endpoint: str, params: Optional[Dict] = N
     if not token:
         return None
     
-    headers = {"Authorization": f"Bearer {token}"}
     try:
-        response = requests.request(
-            method=method,
-            url=f"{API_BASE_URL}{endpoint}",
-            headers=headers,
-            params=params
-        )
+        response = send_request(method, endpoint, token=token, params=params)
         if response.status_code >= 400:
             st.error(f"API Error: {response.status_code} - {response.text}")
             return None
@@ -54,65 +50,35 @@ def authenticated_request(method: str, endpoint: str, params: Optional[Dict] = N
         st.error(f"Request failed: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_user_name_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> name mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): user["name"] for user in users}
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_user_email_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> email mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): user.get("email", "") for user in users}
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_project_name_mapping() -> Dict[str, str]:
-    """Fetch all projects and create UUID -> name mapping"""
-    projects = authenticated_request("GET", "/admin/projects/", params={"limit": 1000})
-    if not projects:
-        return {}
-    return {str(project["id"]): project["name"] for project in projects}
-
-@st.cache_data(ttl=60, show_spinner="Loading productivity data...")  # Cache for 1 minute - data changes frequently
+@cached("metrics:{project_id}", ttl=60, show_spinner="Loading productivity data...")  # Cache for 1 minute - data changes frequently
 def fetch_project_productivity_data(start_date: Optional[date] = None, end_date: Optional[date] = None,
-                                     project_id: Optional[str] = None, fetch_all: bool = True) -> pd.DataFrame:
+                                     project_id: Optional[str] = None) -> pd.DataFrame:
     """
     Fetch real project productivity data from API.
     Combines ProjectDailyMetrics and UserDailyMetrics for comprehensive view.
+    Defaults to the last 90 days. Metrics and quality ratings come from the
+    shared partition cache, so widening the range only downloads the new weeks.
     """
-    # Get name mappings
+    if not start_date:
+        start_date = today_ist() - timedelta(days=90)
+    if not end_date:
+        end_date = today_ist()
+    
+    # Reference data (shared cache) and both data calls are independent: fetch concurrently
+    _, _, user_metrics, quality_data = gather(
+        get_users,
+        get_projects,
+        lambda: get_daily_metrics(start_date, end_date, project_id=project_id),
+        lambda: get_quality_ratings(start_date, end_date, project_id=project_id),
+    )
+    if not user_metrics:
+        return pd.DataFrame()
+    
+    # Name mappings (cache hits after the gather above)
     user_map = get_user_name_mapping()
     user_email_map = get_user_email_mapping()
     project_map = get_project_name_mapping()
     
-    # Fetch user daily metrics (aggregated by project)
-    params = {}
-    if project_id:
-        params["project_id"] = project_id
-    # Only add date filters if fetch_all is False (for optimization)
-    if not fetch_all:
-        if start_date:
-            params["start_date"] = str(start_date)
-        if end_date:
-            params["end_date"] = str(end_date)
-    else:
-        # Fetch last 90 days by default to avoid loading too much data
-        if not start_date:
-            start_date = today_ist() - timedelta(days=90)
-        if not end_date:
-            end_date = today_ist()
-        params["start_date"] = str(start_date)
-        params["end_date"] = str(end_date)
-    
-    user_metrics = authenticated_request("GET", "/admin/metrics/user_daily/", params=params)
-    if not user_metrics:
-        return pd.DataFrame()
-    
     # Convert to DataFrame
     df = pd.DataFrame(user_metrics)
     
@@ -139,122 +105,13 @@ def fetch_project_productivity_data(start_date: Optional[date] = None, end_date:
     df = df.merge(active_users_df, on=["project_id", "date_obj"], how="left")
     df["active_users"] = df["active_users"].fillna(0).astype(int)
     
-    # Fetch quality ratings from API
-    quality_params = {}
-    if project_id:
-        quality_params["project_id"] = project_id
-    if start_date:
-        quality_params["start_date"] = str(start_date)
-    if end_date:
-        quality_params["end_date"] = str(end_date)
-    
-    quality_data = authenticated_request("GET", "/admin/metrics/user_daily/quality-ratings", params=quality_params)
-    
-    # Create quality mapping: (user_id, project_id, date) -> quality info
-    quality_map = {}
-    quality_score_map = {}
-    quality_source_map = {}
-    accuracy_map = {}
-    critical_rate_map = {}
-    if quality_data:
-        for q in quality_data:
-            key = (str(q["user_id"]), str(q["project_id"]), pd.to_datetime(q["metric_date"]).date())
-            # Normalize rating: "GOOD" -> "Good", "AVERAGE" -> "Average", "BAD" -> "Bad", None -> "Not Assessed"
-            rating = q.get("quality_rating")
-            if rating == "GOOD":
-                quality_map[key] = "Good"
-            elif rating == "AVERAGE":
-                quality_map[key] = "Average"
-            elif rating == "BAD":
-                quality_map[key] = "Bad"
-            else:
-                quality_map[key] = "Not Assessed"
-            
-            # Store quality score and source
-            quality_score_map[key] = q.get("quality_score")
-            quality_source_map[key] = q.get("source", "MANUAL")
-            
-            # Store accuracy and critical_rate (new metrics)
-            accuracy_map[key] = q.get("accuracy")
-            critical_rate_map[key] = q.get("critical_rate")
-    
-    # Map quality ratings to metrics
-    df["quality_rating"] = df.apply(
-        lambda row: quality_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            "Not Assessed"  # Default if not found - quality must be manually assessed
-        ), axis=1
-    )
-    
-    # Map quality scores
-    df["quality_score"] = df.apply(
-        lambda row: quality_score_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    # Map quality source
-    df["quality_source"] = df.apply(
-        lambda row: quality_source_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    # Map accuracy and critical_rate
-    df["accuracy"] = df.apply(
-        lambda row: accuracy_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
+    # Quality is a keyed join on (user_id, project_id, date); ratings without
+    # a metrics row are appended as quality-only rows
+    df = merge_quality(
+        df, quality_frame(quality_data), user_map, user_email_map, project_map,
+        defaults={"active_users": 0},
     )
     
-    df["critical_rate"] = df.apply(
-        lambda row: critical_rate_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    # Add quality assessments that don't have corresponding metrics
-    # This ensures quality-only assessments show up in the dashboard
-    if quality_data:
-        for q in quality_data:
-            q_date = pd.to_datetime(q["metric_date"]).date()
-            q_user_id = str(q["user_id"])
-            q_project_id = str(q["project_id"])
-            
-            # Check if this quality assessment already has a corresponding metric row
-            existing = df[
-                (df["user_id"].astype(str) == q_user_id) &
-                (df["project_id"].astype(str) == q_project_id) &
-                (df["date_obj"] == q_date)
-            ]
-            
-            # If no metric exists for this quality assessment, create a row for it
-            if len(existing) == 0:
-                new_row = {
-                    "date": q["metric_date"],
-                    "date_obj": q_date,
-                    "user_id": q_user_id,
-                    "project_id": q_project_id,
-                    "user": user_map.get(q_user_id, "Unknown"),
-                    "email": user_email_map.get(q_user_id, ""),
-                    "project": project_map.get(q_project_id, "Unknown"),
-                    "role": "Unknown",
-                    "hours_worked": 0,
-                    "tasks_completed": 0,
-                    "productivity_score": 0,
-                    "quality_rating": "Good" if q.get("quality_rating") == "GOOD" else ("Average" if q.get("quality_rating") == "AVERAGE" else ("Bad" if q.get("quality_rating") == "BAD" else "Not Assessed")),
-                    "quality_score": q.get("quality_score"),
-                    "quality_source": q.get("source", "MANUAL"),
-                    "accuracy": q.get("accuracy"),
-                    "critical_rate": q.get("critical_rate"),
-                    "active_users": 0
-                }
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    
     # Select and reorder columns
     result_df = df[[
         "date", "project", "user", "email", "role", "hours_worked",
@@ -348,8 +205,15 @@ st.markdown("---")
 # =====================================================================
 # Fetch real data from API (will be filtered by date range below)
 with st.spinner("Loading data from API..."):
-    # Fetch all available data first, then filter by UI selections
-    df = fetch_project_productivity_data()
+    # Load the last 90 days, widened to the applied date filter (only the
+    # weeks not loaded yet are downloaded), then filter by UI selections
+    load_start = today_ist() - timedelta(days=90)
+    load_end = today_ist()
+    if st.session_state.get("project_filter_start_date"):
+        load_start = min(load_start, st.session_state.project_filter_start_date)
+    if st.session_state.get("project_filter_end_date"):
+        load_end = max(load_end, st.session_state.project_filter_end_date)
+    df = fetch_project_productivity_data(start_date=load_start, end_date=load_end)
     
     if df.empty:
         st.warning("⚠️ No data available. Please ensure metrics are calculated.")
@@ -397,7 +261,7 @@ with filter_col1:
     today = today_ist()
     
     # Allow selecting dates up to 1 year before the earliest data, or at least 1 year ago
-    # This allows users to select dates even if we haven't loaded that data yet
+    # Applying an earlier range loads the missing weeks on the next run
     min_date = min(data_min_date, today - timedelta(days=365))
     
     # Allow selecting up to today, even if data doesn't include today yet
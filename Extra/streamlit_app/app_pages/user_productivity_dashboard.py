@@ -11,6 +11,9 @@ import os
 from dotenv import load_dotenv
 from typing import Dict, Optional, List
 from utils.timezone import today_ist, now_ist
+from utils.productivity import attendance_frame, merge_attendance, merge_quality, quality_frame
+from api import send_request, gather
+from data_cache import cached, get_users, get_projects, get_daily_metrics, get_quality_ratings, get_user_name_mapping, get_user_email_mapping, get_project_name_mapping, get_user_soul_id_mapping
 
 load_dotenv()
 
@@ -39,7 +42,6 @@ def authenticated_request(method: str, endpoint: str, params: Optional[Dict] = N
     if not token:
         return None
     
-    headers = {"Authorization": f"Bearer {token}"}
     try:
         full_url = f"{API_BASE_URL}{endpoint}"
         # Debug logging
@@ -48,13 +50,7 @@ def authenticated_request(method: str, endpoint: str, params: Optional[Dict] = N
             if params:
                 st.write(f"🔍 Params: {params}")
         
-        response = requests.request(
-            method=method,
-            url=full_url,
-            headers=headers,
-            params=params,
-            timeout=30
-        )
+        response = send_request(method, endpoint, token=token, params=params, timeout=(5, 30))
         if response.status_code >= 400:
             error_text = response.text
             st.error(f"API Error: {response.status_code} - {error_text}")
@@ -76,76 +72,43 @@ def authenticated_request(method: str, endpoint: str, params: Optional[Dict] = N
         print(f"Request exception for {method} {endpoint}: {error_msg}")
         return None
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_user_name_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> name mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): user["name"] for user in users}
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_user_email_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> email mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): user.get("email", "") for user in users}
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_user_soul_id_mapping() -> Dict[str, str]:
-    """Fetch all users and create UUID -> soul_id mapping"""
-    users = authenticated_request("GET", "/admin/users/", params={"limit": 1000})
-    if not users:
-        return {}
-    return {str(user["id"]): str(user.get("soul_id", "")) if user.get("soul_id") else "" for user in users}
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_project_name_mapping() -> Dict[str, str]:
-    """Fetch all projects and create UUID -> name mapping"""
-    projects = authenticated_request("GET", "/admin/projects/", params={"limit": 1000})
-    if not projects:
-        return {}
-    return {str(project["id"]): project["name"] for project in projects}
-
-@st.cache_data(ttl=60, show_spinner="Loading productivity data...")  # Cache for 1 minute - data changes frequently
+@cached("metrics:{project_id}", ttl=60, show_spinner="Loading productivity data...")  # Cache for 1 minute - data changes frequently
 def fetch_user_productivity_data(start_date: Optional[date] = None, end_date: Optional[date] = None, 
-                                  user_id: Optional[str] = None, project_id: Optional[str] = None,
-                                  fetch_all: bool = True) -> pd.DataFrame:
+                                  user_id: Optional[str] = None, project_id: Optional[str] = None) -> pd.DataFrame:
     """
     Fetch real user productivity data from API and combine with user/project names,
     attendance.
+    Defaults to the last 90 days. Metrics and quality ratings come from the
+    shared partition cache, so widening the range only downloads the new weeks.
     """
-    # Get name mappings
-    user_map = get_user_name_mapping()
-    user_email_map = get_user_email_mapping()
-    project_map = get_project_name_mapping()
+    if not start_date:
+        start_date = today_ist() - timedelta(days=90)
+    if not end_date:
+        end_date = today_ist()
     
-    # Fetch user daily metrics
-    params = {}
+    # Attendance for the same filters
+    attendance_params = {}
     if user_id:
-        params["user_id"] = user_id
+        attendance_params["user_id"] = user_id
     if project_id:
-        params["project_id"] = project_id
-    # Only add date filters if fetch_all is False (for optimization)
-    if not fetch_all:
-        if start_date:
-            params["start_date"] = str(start_date)
-        if end_date:
-            params["end_date"] = str(end_date)
-    else:
-        # Fetch last 90 days by default to avoid loading too much data
-        if not start_date:
-            start_date = today_ist() - timedelta(days=90)
-        if not end_date:
-            end_date = today_ist()
-        params["start_date"] = str(start_date)
-        params["end_date"] = str(end_date)
+        attendance_params["project_id"] = project_id
     
-    metrics = authenticated_request("GET", "/admin/metrics/user_daily/", params=params)
+    # Reference data (shared cache) and the three data calls are independent: fetch concurrently
+    _, _, metrics, attendance_data, quality_data = gather(
+        get_users,
+        get_projects,
+        lambda: get_daily_metrics(start_date, end_date, user_id=user_id, project_id=project_id),
+        lambda: authenticated_request("GET", "/attendance-daily/", params=attendance_params),
+        lambda: get_quality_ratings(start_date, end_date, user_id=user_id, project_id=project_id),
+    )
     if not metrics:
         return pd.DataFrame()
     
+    # Name mappings (cache hits after the gather above)
+    user_map = get_user_name_mapping()
+    user_email_map = get_user_email_mapping()
+    project_map = get_project_name_mapping()
+    
     # Convert to DataFrame
     df_metrics = pd.DataFrame(metrics)
     
@@ -163,170 +126,15 @@ def fetch_user_productivity_data(start_date: Optional[date] = None, end_date: Op
         "productivity_score": "productivity_score"
     })
     
-    # Fetch attendance data for the same date range
-    attendance_params = {}
-    if user_id:
-        attendance_params["user_id"] = user_id
-    if project_id:
-        attendance_params["project_id"] = project_id
-    
-    attendance_data = authenticated_request("GET", "/attendance-daily/", params=attendance_params)
-    
-    # Create attendance mapping: (user_id, project_id, date) -> status
-    attendance_map = {}
-    if attendance_data:
-        for att in attendance_data:
-            att_date = pd.to_datetime(att.get("attendance_date")).date() if att.get("attendance_date") else None
-            if att_date and start_date and end_date:
-                if start_date <= att_date <= end_date:
-                    key = (str(att["user_id"]), str(att["project_id"]), att_date)
-                    attendance_map[key] = att.get("status", "UNKNOWN")
-    
-    # Map attendance status
+    # Attendance and quality are keyed joins on (user_id, project_id, date);
+    # ratings without a metrics row are appended as quality-only rows
     df_metrics["date_obj"] = pd.to_datetime(df_metrics["date"]).dt.date
-    df_metrics["attendance_status"] = df_metrics.apply(
-        lambda row: attendance_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]), 
-            "UNKNOWN"
-        ), axis=1
+    df_metrics = merge_attendance(df_metrics, attendance_frame(attendance_data, start_date, end_date))
+    df_metrics = merge_quality(
+        df_metrics, quality_frame(quality_data), user_map, user_email_map, project_map,
+        defaults={"attendance_status": "Absent"},
     )
     
-    # Normalize attendance status to match expected values
-    # Database uses: PRESENT, ABSENT, LEAVE, UNKNOWN, WFH (if applicable)
-    # Dashboard expects: Present, WFH, Leave, Absent
-    def normalize_status(status):
-        if pd.isna(status) or status is None:
-            return "Absent"
-        status_str = str(status).upper()
-        status_mapping = {
-            "PRESENT": "Present",
-            "WFH": "WFH",
-            "LEAVE": "Leave",
-            "ABSENT": "Absent",
-            "UNKNOWN": "Absent"
-        }
-        return status_mapping.get(status_str, "Absent")
-    
-    df_metrics["attendance_status"] = df_metrics["attendance_status"].apply(normalize_status)
-    
-    # Fetch quality ratings from API
-    quality_params = {}
-    if user_id:
-        quality_params["user_id"] = user_id
-    if project_id:
-        quality_params["project_id"] = project_id
-    if start_date:
-        quality_params["start_date"] = str(start_date)
-    if end_date:
-        quality_params["end_date"] = str(end_date)
-    
-    quality_data = authenticated_request("GET", "/admin/metrics/user_daily/quality-ratings", params=quality_params)
-    
-    # Create quality mapping: (user_id, project_id, date) -> quality info
-    quality_map = {}
-    quality_score_map = {}
-    quality_source_map = {}
-    accuracy_map = {}
-    critical_rate_map = {}
-    if quality_data:
-        for q in quality_data:
-            key = (str(q["user_id"]), str(q["project_id"]), pd.to_datetime(q["metric_date"]).date())
-            # Normalize rating: "GOOD" -> "Good", "AVERAGE" -> "Average", "BAD" -> "Bad", None -> "Not Assessed"
-            rating = q.get("quality_rating")
-            if rating == "GOOD":
-                quality_map[key] = "Good"
-            elif rating == "AVERAGE":
-                quality_map[key] = "Average"
-            elif rating == "BAD":
-                quality_map[key] = "Bad"
-            else:
-                quality_map[key] = "Not Assessed"
-            
-            # Store quality score and source
-            quality_score_map[key] = q.get("quality_score")
-            quality_source_map[key] = q.get("source", "MANUAL")
-            
-            # Store accuracy and critical_rate (new metrics)
-            accuracy_map[key] = q.get("accuracy")
-            critical_rate_map[key] = q.get("critical_rate")
-    
-    # Map quality ratings to metrics
-    df_metrics["quality_rating"] = df_metrics.apply(
-        lambda row: quality_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            "Not Assessed"  # Default if not found - quality must be manually assessed
-        ), axis=1
-    )
-    
-    # Map quality scores
-    df_metrics["quality_score"] = df_metrics.apply(
-        lambda row: quality_score_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    # Map quality source
-    df_metrics["quality_source"] = df_metrics.apply(
-        lambda row: quality_source_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    # Map accuracy and critical_rate
-    df_metrics["accuracy"] = df_metrics.apply(
-        lambda row: accuracy_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    df_metrics["critical_rate"] = df_metrics.apply(
-        lambda row: critical_rate_map.get(
-            (str(row["user_id"]), str(row["project_id"]), row["date_obj"]),
-            None
-        ), axis=1
-    )
-    
-    # Add quality assessments that don't have corresponding metrics
-    # This ensures quality-only assessments show up in the dashboard
-    if quality_data:
-        for q in quality_data:
-            q_date = pd.to_datetime(q["metric_date"]).date()
-            q_user_id = str(q["user_id"])
-            q_project_id = str(q["project_id"])
-            
-            # Check if this quality assessment already has a corresponding metric row
-            existing = df_metrics[
-                (df_metrics["user_id"].astype(str) == q_user_id) &
-                (df_metrics["project_id"].astype(str) == q_project_id) &
-                (df_metrics["date_obj"] == q_date)
-            ]
-            
-            # If no metric exists for this quality assessment, create a row for it
-            if len(existing) == 0:
-                new_row = {
-                    "date": q["metric_date"],
-                    "date_obj": q_date,
-                    "user_id": q_user_id,
-                    "project_id": q_project_id,
-                    "user": user_map.get(q_user_id, "Unknown"),
-                    "email": user_email_map.get(q_user_id, ""),
-                    "project": project_map.get(q_project_id, "Unknown"),
-                    "role": "Unknown",
-                    "hours_worked": 0,
-                    "tasks_completed": 0,
-                    "productivity_score": 0,
-                    "quality_rating": "Good" if q.get("quality_rating") == "GOOD" else ("Average" if q.get("quality_rating") == "AVERAGE" else ("Bad" if q.get("quality_rating") == "BAD" else "Not Assessed")),
-                    "quality_score": q.get("quality_score"),
-                    "quality_source": q.get("source", "MANUAL"),
-                    "accuracy": q.get("accuracy"),
-                    "critical_rate": q.get("critical_rate"),
-                    "attendance_status": "Absent"
-                }
-                df_metrics = pd.concat([df_metrics, pd.DataFrame([new_row])], ignore_index=True)
-    
     # Select and reorder columns to match expected format
     result_df = df_metrics[[
         "date", "user", "email", "project", "role", "hours_worked", 
@@ -421,8 +229,15 @@ st.markdown("---")
 # =====================================================================
 # Fetch real data from API (will be filtered by date range below)
 with st.spinner("Loading data from API..."):
-    # Fetch all available data first, then filter by UI selections
-    df = fetch_user_productivity_data()
+    # Load the last 90 days, widened to the applied date filter (only the
+    # weeks not loaded yet are downloaded), then filter by UI selections
+    load_start = today_ist() - timedelta(days=90)
+    load_end = today_ist()
+    if st.session_state.get("user_filter_start_date"):
+        load_start = min(load_start, st.session_state.user_filter_start_date)
+    if st.session_state.get("user_filter_end_date"):
+        load_end = max(load_end, st.session_state.user_filter_end_date)
+    df = fetch_user_productivity_data(start_date=load_start, end_date=load_end)
     
     if df.empty:
         st.warning("⚠️ No data available. Please ensure metrics are calculated.")
@@ -528,7 +343,7 @@ with filter_col1:
     today = today_ist()
     
     # Allow selecting dates up to 1 year before the earliest data, or at least 1 year ago
-    # This allows users to select dates even if we haven't loaded that data yet
+    # Applying an earlier range loads the missing weeks on the next run
     min_date = min(data_min_date, today - timedelta(days=365))
     
     # Allow selecting up to today, even if data doesn't include today yet
@@ -830,6 +645,7 @@ with chart_col4:
     # Count quality ratings
     quality_counts = df_filtered["quality_rating"].value_counts().reset_index()
     quality_counts.columns = ["quality_rating", "count"]
+    quality_counts = quality_counts[quality_counts["count"] > 0]
     
     if len(quality_counts) > 0 and quality_counts["count"].sum() > 0:
         # Order by quality rating
@@ -875,7 +691,7 @@ chart_col5, chart_col6 = st.columns(2)
 with chart_col5:
     st.markdown("#### Attendance Status Over Time")
     # Group by date and attendance status
-    attendance_by_date = df_filtered.groupby(["date", "attendance_status"]).size().reset_index(name="count")
+    attendance_by_date = df_filtered.groupby(["date", "attendance_status"], observed=True).size().reset_index(name="count")
     
     if len(attendance_by_date) > 0:
         attendance_pivot = attendance_by_date.pivot(index="date", columns="attendance_status", values="count").fillna(0)
@@ -0,0 +1,138 @@
+"""
+Page-load benchmark for the shared HTTP client (api.py).
+
+Replays the calls the User Productivity dashboard makes on load (users x3,
+projects, user_daily metrics, attendance, quality ratings) three ways:
+
+- bare:   requests.request per call, sequential (what the pages did before:
+          a new connection for every call)
+- pooled: api.send_request, sequential (keep-alive connections)
+- gather: api.send_request issued concurrently with api.gather()
+
+By default the calls go to a local stub server that adds --latency ms per
+request and --connect-cost ms per new connection (standing in for the
+network round trip and the TCP/TLS handshake), so the numbers do not depend
+on a running backend. Pass --base-url and --token to replay against a real
+API instead.
+
+Usage (from the Extra/streamlit_app directory):
+    python -m benchmarks.bench_page_load [--latency 40] [--connect-cost 30] [--repeat 5]
+    python -m benchmarks.bench_page_load --base-url http://127.0.0.1:8000 --token <jwt>
+"""
+import argparse
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import api
+
+_today = date.today()
+_range = {"start_date": str(_today - timedelta(days=90)), "end_date": str(_today)}
+PAGE_CALLS = [
+    ("/admin/users/", {"limit": 1000}),
+    ("/admin/users/", {"limit": 1000}),
+    ("/admin/users/", {"limit": 1000}),
+    ("/admin/projects/", {"limit": 1000}),
+    ("/admin/metrics/user_daily/", _range),
+    ("/attendance-daily/", {}),
+    ("/admin/metrics/user_daily/quality-ratings", _range),
+]
+
+
+def stub_server(latency: float, connect_cost: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        # Headers and body are separate writes; avoid the Nagle/delayed-ACK stall
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Once per connection
+            time.sleep(connect_cost)
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = b"[]"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_bare(token):
+    headers = {"Authorization": f"Bearer {token}"}
+    return [
+        requests.request("GET", f"{api.API_BASE_URL}{endpoint}", headers=headers, params=params).status_code
+        for endpoint, params in PAGE_CALLS
+    ]
+
+
+def load_pooled(token):
+    return [
+        api.send_request("GET", endpoint, token=token, params=params).status_code
+        for endpoint, params in PAGE_CALLS
+    ]
+
+
+def load_gather(token):
+    return [
+        response.status_code
+        for response in api.gather(*[
+            lambda endpoint=endpoint, params=params: api.send_request("GET", endpoint, token=token, params=params)
+            for endpoint, params in PAGE_CALLS
+        ])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="Replay against this API instead of the local stub")
+    parser.add_argument("--token", default="bench", help="Bearer token for --base-url")
+    parser.add_argument("--latency", type=float, default=40, help="Stub: ms per request")
+    parser.add_argument("--connect-cost", type=float, default=30, help="Stub: ms per new connection")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        api.API_BASE_URL = args.base_url.rstrip("/")
+    else:
+        server = stub_server(args.latency / 1000, args.connect_cost / 1000)
+        api.API_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"stub server: {args.latency:.0f} ms/request, {args.connect_cost:.0f} ms/connection")
+    print(f"page load = {len(PAGE_CALLS)} GET calls against {api.API_BASE_URL}")
+
+    try:
+        results = {}
+        for name, load in (("bare", load_bare), ("pooled", load_pooled), ("gather", load_gather)):
+            load(args.token)  # warm-up (fills the pool)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                statuses = load(args.token)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+            print(f"  {name:<7} {results[name]:8.1f} ms  (statuses {sorted(set(statuses))})")
+
+        print(f"  pooled vs bare  {results['bare'] / results['pooled']:5.1f}x")
+        print(f"  gather vs bare  {results['bare'] / results['gather']:5.1f}x")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Merge benchmark for the productivity dashboards (utils/productivity.py).
+
+Builds seeded synthetic inputs shaped like the API responses the User
+Productivity dashboard joins (user_daily metrics, attendance, quality
+ratings; --rows metrics rows) and times two pipelines:
+
+- legacy: dict lookups via df.apply(..., axis=1) per column, plus a
+          filter-and-concat per quality-only rating (what the page did before)
+- merge:  keyed DataFrame.merge on (user_id, project_id, date), one anti-join
+          and one concat for quality-only ratings, categorical status/rating
+
+Both outputs are compared before timings are reported. The legacy quality-only
+check filters the whole frame once per rating, so its cost grows with
+rows x ratings; raise --rated with care.
+
+Usage (from the Extra/streamlit_app directory):
+    python -m benchmarks.bench_productivity_merge [--rows 100000] [--rated 0.05] [--orphans 100] [--repeat 3] [--seed 7]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.productivity import attendance_frame, merge_attendance, merge_quality, quality_frame
+
+DAYS = 50
+PROJECTS = 4
+COLUMNS = [
+    "date", "user", "email", "project", "role", "hours_worked",
+    "tasks_completed", "quality_rating", "quality_score", "quality_source",
+    "accuracy", "critical_rate", "productivity_score", "attendance_status",
+]
+
+
+def synthetic_inputs(rows, rated_fraction, orphans, seed):
+    rng = np.random.default_rng(seed)
+    users = [str(uuid.UUID(int=int(rng.integers(1 << 62)))) for _ in range(max(1, rows // (DAYS * PROJECTS)))]
+    projects = [str(uuid.UUID(int=int(rng.integers(1 << 62)))) for _ in range(PROJECTS)]
+    start = date(2025, 1, 1)
+    days = [start + timedelta(days=i) for i in range(DAYS)]
+
+    keys = [(u, p, d) for u in users for p in projects for d in days][:rows]
+    metrics = [
+        {
+            "user_id": u, "project_id": p, "metric_date": d.isoformat(), "work_role": "ANNOTATION",
+            "hours_worked": float(h), "tasks_completed": int(t), "productivity_score": float(s),
+        }
+        for (u, p, d), h, t, s in zip(
+            keys, rng.uniform(0, 9, len(keys)), rng.integers(0, 40, len(keys)), rng.uniform(0, 100, len(keys))
+        )
+    ]
+    statuses = rng.choice(["PRESENT", "WFH", "LEAVE", "ABSENT", "UNKNOWN"], len(keys))
+    attendance = [
+        {"user_id": u, "project_id": p, "attendance_date": d.isoformat(), "status": s}
+        for (u, p, d), s, keep in zip(keys, statuses, rng.random(len(keys)) < 0.9)
+        if keep
+    ]
+    rated = [keys[i] for i in np.flatnonzero(rng.random(len(keys)) < rated_fraction)]
+    # Ratings for days without a metrics row (quality-only rows)
+    rated += [(users[i % len(users)], projects[0], start + timedelta(days=DAYS + i)) for i in range(orphans)]
+    quality = [
+        {
+            "user_id": u, "project_id": p, "metric_date": d.isoformat(),
+            "quality_rating": r, "quality_score": float(q), "source": "MANUAL",
+            "accuracy": float(a), "critical_rate": float(c),
+        }
+        for (u, p, d), r, q, a, c in zip(
+            rated, rng.choice(["GOOD", "AVERAGE", "BAD", None], len(rated)),
+            rng.uniform(0, 10, len(rated)), rng.uniform(0, 100, len(rated)), rng.uniform(0, 100, len(rated)),
+        )
+    ]
+    user_map = {u: f"User {i}" for i, u in enumerate(users)}
+    email_map = {u: f"user{i}@example.com" for i, u in enumerate(users)}
+    project_map = {p: f"Project {i}" for i, p in enumerate(projects)}
+    return metrics, attendance, quality, user_map, email_map, project_map, (start, start + timedelta(days=DAYS - 1))
+
+
+def _prepare(metrics, user_map, email_map, project_map):
+    df = pd.DataFrame(metrics)
+    df["user"] = df["user_id"].astype(str).map(user_map)
+    df["email"] = df["user_id"].astype(str).map(email_map)
+    df["project"] = df["project_id"].astype(str).map(project_map)
+    df["role"] = df["work_role"]
+    return df.rename(columns={"metric_date": "date"})
+
+
+def _rating_label(rating):
+    return {"GOOD": "Good", "AVERAGE": "Average", "BAD": "Bad"}.get(rating, "Not Assessed")
+
+
+def legacy(metrics, attendance, quality, user_map, email_map, project_map, date_range):
+    start_date, end_date = date_range
+    df = _prepare(metrics, user_map, email_map, project_map)
+
+    attendance_map = {}
+    for att in attendance:
+        att_date = pd.to_datetime(att.get("attendance_date")).date() if att.get("attendance_date") else None
+        if att_date and start_date <= att_date <= end_date:
+            attendance_map[(str(att["user_id"]), str(att["project_id"]), att_date)] = att.get("status", "UNKNOWN")
+
+    df["date_obj"] = pd.to_datetime(df["date"]).dt.date
+    df["attendance_status"] = df.apply(
+        lambda row: attendance_map.get((str(row["user_id"]), str(row["project_id"]), row["date_obj"]), "UNKNOWN"), axis=1
+    )
+    labels = {"PRESENT": "Present", "WFH": "WFH", "LEAVE": "Leave", "ABSENT": "Absent", "UNKNOWN": "Absent"}
+    df["attendance_status"] = df["attendance_status"].apply(lambda s: "Absent" if pd.isna(s) else labels.get(str(s).upper(), "Absent"))
+
+    maps = {column: {} for column in ("quality_rating", "quality_score", "quality_source", "accuracy", "critical_rate")}
+    for q in quality:
+        key = (str(q["user_id"]), str(q["project_id"]), pd.to_datetime(q["metric_date"]).date())
+        maps["quality_rating"][key] = _rating_label(q.get("quality_rating"))
+        maps["quality_score"][key] = q.get("quality_score")
+        maps["quality_source"][key] = q.get("source", "MANUAL")
+        maps["accuracy"][key] = q.get("accuracy")
+        maps["critical_rate"][key] = q.get("critical_rate")
+    for column, mapping in maps.items():
+        default = "Not Assessed" if column == "quality_rating" else None
+        df[column] = df.apply(
+            lambda row: mapping.get((str(row["user_id"]), str(row["project_id"]), row["date_obj"]), default), axis=1
+        )
+
+    for q in quality:
+        q_date = pd.to_datetime(q["metric_date"]).date()
+        q_user_id, q_project_id = str(q["user_id"]), str(q["project_id"])
+        existing = df[
+            (df["user_id"].astype(str) == q_user_id)
+            & (df["project_id"].astype(str) == q_project_id)
+            & (df["date_obj"] == q_date)
+        ]
+        if len(existing) == 0:
+            new_row = {
+                "date": q["metric_date"], "date_obj": q_date, "user_id": q_user_id, "project_id": q_project_id,
+                "user": user_map.get(q_user_id, "Unknown"), "email": email_map.get(q_user_id, ""),
+                "project": project_map.get(q_project_id, "Unknown"), "role": "Unknown",
+                "hours_worked": 0, "tasks_completed": 0, "productivity_score": 0,
+                "quality_rating": _rating_label(q.get("quality_rating")), "quality_score": q.get("quality_score"),
+                "quality_source": q.get("source", "MANUAL"), "accuracy": q.get("accuracy"),
+                "critical_rate": q.get("critical_rate"), "attendance_status": "Absent",
+            }
+            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+    return df[COLUMNS].copy()
+
+
+def merged(metrics, attendance, quality, user_map, email_map, project_map, date_range):
+    df = _prepare(metrics, user_map, email_map, project_map)
+    df["date_obj"] = pd.to_datetime(df["date"]).dt.date
+    df = merge_attendance(df, attendance_frame(attendance, *date_range))
+    df = merge_quality(df, quality_frame(quality), user_map, email_map, project_map, defaults={"attendance_status": "Absent"})
+    return df[COLUMNS].copy()
+
+
+def comparable(frame):
+    # Categoricals as plain values, None and NaN both as missing
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000, help="Metrics rows")
+    parser.add_argument("--rated", type=float, default=0.05, help="Fraction of metrics rows with a quality rating")
+    parser.add_argument("--orphans", type=int, default=100, help="Quality ratings without a metrics row")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the merge pipeline (median)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    inputs = synthetic_inputs(args.rows, args.rated, args.orphans, args.seed)
+    print(f"metrics {len(inputs[0])} rows, attendance {len(inputs[1])}, quality {len(inputs[2])} "
+          f"({args.orphans} quality-only), seed {args.seed}")
+
+    results, outputs = {}, {}
+    for name, pipeline in (("legacy", legacy), ("merge", merged)):
+        timings = []
+        # legacy takes minutes at 100k rows: run it once
+        for _ in range(args.repeat if pipeline is merged else 1):
+            start = time.perf_counter()
+            outputs[name] = pipeline(*inputs)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(timings)
+
+    pd.testing.assert_frame_equal(comparable(outputs["merge"]), comparable(outputs["legacy"]), check_dtype=False)
+    print(f"  outputs match ({len(outputs['merge'])} rows)")
+    for name, ms in results.items():
+        print(f"  {name:<7} {ms:9.1f} ms")
+    print(f"  merge vs legacy {results['legacy'] / results['merge']:5.1f}x")
+    memory = {name: output.memory_usage(deep=True).sum() / 2**20 for name, output in outputs.items()}
+    print(f"  result memory   legacy {memory['legacy']:.1f} MiB, merge {memory['merge']:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
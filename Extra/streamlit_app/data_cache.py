@@ -0,0 +1,445 @@
+"""
+Shared, tag-invalidated data cache for the Streamlit pages.
+
+    @cached("metrics:{project_id}", ttl=120, show_spinner="Loading metrics...")
+    def get_project_metrics(project_id, start_date_str, end_date_str): ...
+
+    # after a write
+    invalidate(f"metrics:{project_id}")
+
+Entries live in this module, so they survive reruns and page navigation and
+are shared by every page. They are keyed by function, arguments and the
+logged-in user (responses can depend on who asks), but invalidation is by
+tag and applies to all users: data changed for everyone.
+
+Tags are "<kind>" or "<kind>:<id>". A bare kind is a wildcard on both sides:
+invalidate("metrics") drops every metrics entry, and an entry tagged
+"metrics" (e.g. all projects) is dropped by invalidate("metrics:<id>").
+Tag templates are filled from the call's arguments; a list/tuple argument
+gives one tag per element and a None argument the bare kind.
+
+The reference data every page needs (users, projects and their name
+mappings) is defined here once instead of per page.
+
+Date-ranged lists (daily metrics, quality ratings) go through
+fetch_partitioned(), which keeps rows per week and only requests the weeks a
+call is missing; weeks already loaded are revalidated with the endpoint's
+updated_since= delta instead of being downloaded again.
+"""
+import copy
+import hashlib
+import inspect
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from string import Formatter
+
+import streamlit as st
+
+from api import send_request
+
+DATA_CACHE_MAX_ENTRIES = 512
+
+# Reference data changes rarely; writes invalidate it explicitly
+REFERENCE_TTL = 300
+
+# fetch_partitioned: week partitions, delta check interval, full reload age
+PARTITION_DAYS = 7
+PARTITION_REVALIDATE = 60
+PARTITION_MAX_AGE = 1800
+# updated_since is sent this much before the last sync, so rows written by
+# transactions still open at that time are not missed
+SYNC_OVERLAP = timedelta(minutes=2)
+PARTITION_MAX_SETS = 64
+
+
+class TagCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        # key -> (expires_at, value, tags)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None, False
+            return entry[1], True
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                for stale in [k for k, e in self._entries.items() if e[0] <= now]:
+                    del self._entries[stale]
+                if len(self._entries) >= self.max_entries:
+                    # Still full: evict the entry closest to expiry
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            self._entries[key] = (time.monotonic() + ttl, value, frozenset(tags))
+
+    def invalidate(self, *tags):
+        with self._lock:
+            stale = [
+                key
+                for key, (_, _, entry_tags) in self._entries.items()
+                if any(_tag_matches(entry_tag, tag) for entry_tag in entry_tags for tag in tags)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _tag_matches(entry_tag, tag):
+    entry_kind, _, entry_id = entry_tag.partition(":")
+    kind, _, tag_id = tag.partition(":")
+    return entry_kind == kind and (not entry_id or not tag_id or entry_id == tag_id)
+
+
+_cache = TagCache(DATA_CACHE_MAX_ENTRIES)
+
+
+def invalidate(*tags):
+    """
+    Drop every cached entry carrying one of `tags` (for all users). Matching
+    partition sets are kept but revalidated on their next use.
+    """
+    _partitions.mark_stale(*tags)
+    return _cache.invalidate(*tags)
+
+
+def clear():
+    _cache.clear()
+    _partitions.clear()
+
+
+def _user_scope():
+    token = st.session_state.get("token") or ""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def _expand(template, arguments):
+    fields = [name for _, name, _, _ in Formatter().parse(template) if name]
+    if not fields:
+        return [template]
+    kind = template.partition(":")[0]
+    value = arguments.get(fields[0])
+    if value is None or value == "":
+        return [kind]
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [template.format(**{fields[0]: item}) for item in value] or [kind]
+    return [template.format(**arguments)]
+
+
+def cached(*tags, ttl=REFERENCE_TTL, show_spinner=None):
+    """
+    Cache a fetcher in the shared tag cache. Like st.cache_data, but entries
+    are shared across pages and dropped by invalidate(tag). Callers get a
+    copy, so mutating a returned DataFrame/list does not touch the cache.
+    Empty results (None) are not cached so a failed call is retried on the
+    next run.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        # Pages all run as __main__: qualify by file so same-named fetchers
+        # on two pages do not share entries
+        name = f"{os.path.basename(func.__code__.co_filename)}:{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            key = (name, _user_scope(), repr(sorted(arguments.items())))
+
+            value, hit = _cache.get(key)
+            if hit:
+                return copy.deepcopy(value)
+            if show_spinner:
+                with st.spinner(show_spinner):
+                    value = func(*args, **kwargs)
+            else:
+                value = func(*args, **kwargs)
+            if value is not None:
+                entry_tags = [f"fn:{name}"] + [tag for template in tags for tag in _expand(template, arguments)]
+                _cache.set(key, value, ttl, entry_tags)
+            return copy.deepcopy(value)
+
+        # Drops this function's entries only, like st.cache_data's .clear()
+        wrapper.clear = lambda: invalidate(f"fn:{name}")
+        return wrapper
+
+    return decorator
+
+
+def _get_response(endpoint, params=None):
+    token = st.session_state.get("token")
+    if not token:
+        return None
+    try:
+        response = send_request("GET", endpoint, token=token, params=params)
+    except Exception as e:
+        print(f"[data_cache] GET {endpoint} failed: {e}")
+        return None
+    if response.status_code >= 400:
+        print(f"[data_cache] GET {endpoint} returned {response.status_code}: {response.text}")
+        return None
+    return response
+
+
+def _get(endpoint, params=None):
+    """GET as the logged-in user; None on any error (so nothing is cached)."""
+    response = _get_response(endpoint, params)
+    return response.json() if response is not None else None
+
+
+# ---------------------------------------------------------
+# Partitioned date-range lists
+# ---------------------------------------------------------
+
+def _partition_of(day):
+    # Ordinal 1 is a Monday, so 7-day partitions are Monday-aligned weeks
+    return day - timedelta(days=(day.toordinal() - 1) % PARTITION_DAYS)
+
+
+def _missing_ranges(partitions):
+    """Sorted partition starts -> [(start, end)] of contiguous runs."""
+    ranges = []
+    for start in partitions:
+        end = start + timedelta(days=PARTITION_DAYS - 1)
+        if ranges and ranges[-1][1] + timedelta(days=1) == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def _server_time(response):
+    # The Date header is the API server's clock, so client clock skew does
+    # not shift the updated_since watermark
+    try:
+        return parsedate_to_datetime(response.headers["Date"])
+    except (KeyError, TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+
+class _PartitionSet:
+    """Rows of one endpoint + filter, per week partition."""
+
+    def __init__(self, tags):
+        self.tags = frozenset(tags)
+        self.created_at = time.monotonic()
+        self.checked_at = self.created_at
+        self.stale = False
+        # partition start -> {row key: row}
+        self.partitions = {}
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+
+class _PartitionStore:
+    def __init__(self, max_sets):
+        self.max_sets = max_sets
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, tags):
+        with self._lock:
+            entry = self._sets.get(key)
+            if entry is None or time.monotonic() - entry.created_at > PARTITION_MAX_AGE:
+                if len(self._sets) >= self.max_sets and key not in self._sets:
+                    del self._sets[min(self._sets, key=lambda k: self._sets[k].created_at)]
+                entry = self._sets[key] = _PartitionSet(tags)
+            return entry
+
+    def mark_stale(self, *tags):
+        with self._lock:
+            for entry in self._sets.values():
+                if any(_tag_matches(entry_tag, tag) for entry_tag in entry.tags for tag in tags):
+                    entry.stale = True
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
+
+
+_partitions = _PartitionStore(PARTITION_MAX_SETS)
+
+
+def _fetch_pages(endpoint, params, page_size):
+    """All rows of a list endpoint (offset pages when page_size is set) and the server time."""
+    if not page_size:
+        response = _get_response(endpoint, params)
+        return (None, None) if response is None else (response.json(), _server_time(response))
+    rows, server_time, offset = [], None, 0
+    while True:
+        response = _get_response(endpoint, {**params, "limit": page_size, "offset": offset})
+        if response is None:
+            return None, None
+        page = response.json()
+        server_time = server_time or _server_time(response)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows, server_time
+        offset += page_size
+
+
+def fetch_partitioned(endpoint, start_date, end_date, params=None, *, tags=(), key, date_field,
+                      replace_by=None, page_size=None):
+    """
+    Rows of a date-ranged list endpoint for start_date..end_date, fetched per
+    week partition. Only weeks not loaded yet are requested; loaded weeks are
+    revalidated (at most every PARTITION_REVALIDATE seconds, or after an
+    invalidate() of one of `tags`) with updated_since=, and rebuilt from
+    scratch after PARTITION_MAX_AGE.
+
+    key(row) identifies a row; rows in a delta replace rows with the same
+    key. With replace_by(row), a delta instead replaces every loaded row of
+    each replace_by group it contains (for endpoints whose delta returns
+    whole groups, like quality ratings per (user, project)).
+
+    Returns None if a request fails.
+    """
+    params = dict(params or {})
+    set_key = (endpoint, _user_scope(), repr(sorted(params.items())))
+    entry = _partitions.get(set_key, tags)
+
+    wanted = []
+    day = _partition_of(start_date)
+    while day <= end_date:
+        wanted.append(day)
+        day += timedelta(days=PARTITION_DAYS)
+
+    with entry.lock:
+        if entry.partitions and (entry.stale or time.monotonic() - entry.checked_at > PARTITION_REVALIDATE):
+            loaded = sorted(entry.partitions)
+            delta_params = {
+                **params,
+                "start_date": str(loaded[0]),
+                "end_date": str(loaded[-1] + timedelta(days=PARTITION_DAYS - 1)),
+                "updated_since": (entry.synced_at - SYNC_OVERLAP).isoformat(),
+            }
+            rows, server_time = _fetch_pages(endpoint, delta_params, page_size)
+            if rows is None:
+                return None
+            if replace_by is not None:
+                groups = {replace_by(row) for row in rows}
+                for partition in entry.partitions.values():
+                    for row_key in [k for k, row in partition.items() if replace_by(row) in groups]:
+                        del partition[row_key]
+            for row in rows:
+                partition = entry.partitions.get(_partition_of(_row_date(row, date_field)))
+                if partition is not None:
+                    partition[key(row)] = row
+            entry.synced_at = server_time
+            entry.checked_at = time.monotonic()
+            entry.stale = False
+
+        for range_start, range_end in _missing_ranges([p for p in wanted if p not in entry.partitions]):
+            range_params = {**params, "start_date": str(range_start), "end_date": str(range_end)}
+            rows, server_time = _fetch_pages(endpoint, range_params, page_size)
+            if rows is None:
+                return None
+            fresh = {}
+            day = range_start
+            while day <= range_end:
+                fresh[day] = {}
+                day += timedelta(days=PARTITION_DAYS)
+            for row in rows:
+                fresh[_partition_of(_row_date(row, date_field))][key(row)] = row
+            entry.partitions.update(fresh)
+            # The set's watermark is its oldest sync
+            if entry.synced_at is None:
+                entry.synced_at = server_time
+                entry.checked_at = time.monotonic()
+
+        return [
+            row
+            for partition in wanted
+            for row in entry.partitions[partition].values()
+            if start_date <= _row_date(row, date_field) <= end_date
+        ]
+
+
+def _row_date(row, date_field):
+    value = row[date_field]
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+# ---------------------------------------------------------
+# Shared reference data
+# ---------------------------------------------------------
+
+@cached("users", show_spinner="Loading users...")
+def get_users():
+    """All users (/admin/users/, up to 1000)."""
+    return _get("/admin/users/", params={"limit": 1000})
+
+
+@cached("projects", show_spinner="Loading projects...")
+def get_projects(reference_date=None, is_active=None):
+    """Projects list, optionally for a reference date or active only."""
+    params = {"limit": 1000}
+    if reference_date:
+        params["reference_date"] = reference_date.isoformat()
+    if is_active is not None:
+        params["is_active"] = is_active
+    return _get("/admin/projects/", params=params)
+
+
+def get_user_name_mapping():
+    """UUID (str) -> name"""
+    return {str(user["id"]): user.get("name", "Unknown") for user in get_users() or [] if isinstance(user, dict)}
+
+
+def get_user_email_mapping():
+    """UUID (str) -> email"""
+    return {str(user["id"]): user.get("email", "") for user in get_users() or [] if isinstance(user, dict)}
+
+
+def get_user_soul_id_mapping():
+    """UUID (str) -> soul_id"""
+    return {str(user["id"]): str(user["soul_id"]) if user.get("soul_id") else "" for user in get_users() or [] if isinstance(user, dict)}
+
+
+def get_project_name_mapping():
+    """UUID (str) -> name"""
+    return {str(project["id"]): project["name"] for project in get_projects() or []}
+
+
+def _metric_filters(user_id, project_id):
+    params = {}
+    if user_id:
+        params["user_id"] = str(user_id)
+    if project_id:
+        params["project_id"] = str(project_id)
+    return params, [f"metrics:{project_id}" if project_id else "metrics"]
+
+
+def get_daily_metrics(start_date, end_date, user_id=None, project_id=None):
+    """/admin/metrics/user_daily/ rows for the range (partitioned, delta-revalidated)."""
+    params, tags = _metric_filters(user_id, project_id)
+    return fetch_partitioned(
+        "/admin/metrics/user_daily/", start_date, end_date, params,
+        tags=tags, key=lambda row: row["id"], date_field="metric_date", page_size=5000,
+    )
+
+
+def get_quality_ratings(start_date, end_date, user_id=None, project_id=None):
+    """/admin/metrics/user_daily/quality-ratings rows for the range (partitioned, delta-revalidated)."""
+    params, tags = _metric_filters(user_id, project_id)
+    return fetch_partitioned(
+        "/admin/metrics/user_daily/quality-ratings", start_date, end_date, params,
+        tags=tags,
+        key=lambda row: (row["user_id"], row["project_id"], row["metric_date"]),
+        replace_by=lambda row: (row["user_id"], row["project_id"]),
+        date_field="metric_date",
+    )
@@ -0,0 +1,131 @@
+"""
+Vectorized joins used by the user and project productivity dashboards.
+
+The metrics rows from /admin/metrics/user_daily/ are joined to attendance and
+quality ratings on (user_id, project_id, date) with DataFrame.merge instead
+of per-row dict lookups. Status and rating columns are categoricals.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable, Optional
+
+import pandas as pd
+
+ATTENDANCE_STATUS = pd.CategoricalDtype(["Present", "WFH", "Leave", "Absent"])
+QUALITY_RATING = pd.CategoricalDtype(["Good", "Average", "Bad", "Not Assessed"])
+
+QUALITY_COLUMNS = ["quality_rating", "quality_score", "quality_source", "accuracy", "critical_rate"]
+
+# Database status -> dashboard status (anything else is Absent)
+_STATUS_LABELS = {"PRESENT": "Present", "WFH": "WFH", "LEAVE": "Leave", "ABSENT": "Absent", "UNKNOWN": "Absent"}
+_RATING_LABELS = {"GOOD": "Good", "AVERAGE": "Average", "BAD": "Bad"}
+
+_KEY = ["_user_key", "_project_key", "_date_key"]
+
+
+def _with_key(df: pd.DataFrame, user_col: str, project_col: str, date_col: str) -> pd.DataFrame:
+    return df.assign(
+        _user_key=df[user_col].astype(str),
+        _project_key=df[project_col].astype(str),
+        _date_key=pd.to_datetime(df[date_col]).dt.normalize(),
+    )
+
+
+def _empty(columns: list) -> pd.DataFrame:
+    frame = pd.DataFrame({column: pd.Series(dtype=object) for column in columns})
+    frame["_date_key"] = pd.Series(dtype="datetime64[ns]")
+    return frame
+
+
+def attendance_frame(
+    attendance_data: Optional[Iterable[dict]],
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> pd.DataFrame:
+    """
+    Keyed attendance status within start_date..end_date (none without both
+    bounds); the last record wins for a repeated key.
+    """
+    att = pd.DataFrame(attendance_data or [])
+    if att.empty or not start_date or not end_date or "attendance_date" not in att.columns:
+        return _empty(_KEY + ["attendance_status"])
+    att = att[att["attendance_date"].notna()]
+    att = _with_key(att, "user_id", "project_id", "attendance_date")
+    in_range = (att["_date_key"] >= pd.Timestamp(start_date)) & (att["_date_key"] <= pd.Timestamp(end_date))
+    att = att[in_range]
+    status = att["status"] if "status" in att.columns else pd.Series("UNKNOWN", index=att.index)
+    att = att.assign(attendance_status=status.fillna("UNKNOWN"))
+    return att.drop_duplicates(_KEY, keep="last")[_KEY + ["attendance_status"]]
+
+
+def quality_frame(quality_data: Optional[Iterable[dict]]) -> pd.DataFrame:
+    """Keyed quality fields; the last rating wins for a repeated key."""
+    q = pd.DataFrame(quality_data or [])
+    if q.empty:
+        return _empty(_KEY + ["metric_date", "user_id", "project_id"] + QUALITY_COLUMNS)
+    for column in ("quality_rating", "quality_score", "accuracy", "critical_rate"):
+        if column not in q.columns:
+            q[column] = None
+    q = _with_key(q, "user_id", "project_id", "metric_date")
+    source = q["source"].fillna("MANUAL") if "source" in q.columns else "MANUAL"
+    q = q.assign(
+        quality_rating=q["quality_rating"].map(_RATING_LABELS).fillna("Not Assessed"),
+        quality_source=source,
+    )
+    return q.drop_duplicates(_KEY, keep="last")[_KEY + ["metric_date", "user_id", "project_id"] + QUALITY_COLUMNS]
+
+
+def merge_attendance(df: pd.DataFrame, attendance: pd.DataFrame) -> pd.DataFrame:
+    """Add a categorical attendance_status (Absent when there is no record)."""
+    df = _with_key(df, "user_id", "project_id", "date")
+    df = df.merge(attendance, on=_KEY, how="left")
+    status = df["attendance_status"].astype(object).str.upper().map(_STATUS_LABELS).fillna("Absent")
+    df["attendance_status"] = status.astype(ATTENDANCE_STATUS)
+    return df.drop(columns=_KEY)
+
+
+def merge_quality(
+    df: pd.DataFrame,
+    quality: pd.DataFrame,
+    user_map: dict,
+    user_email_map: dict,
+    project_map: dict,
+    defaults: Optional[dict] = None,
+) -> pd.DataFrame:
+    """
+    Add the quality columns to the metrics rows, and append a row for each
+    rating that has no metrics row (zero hours/tasks, so quality-only
+    assessments still show up). `defaults` fills other columns of those
+    rows.
+    """
+    df = _with_key(df, "user_id", "project_id", "date")
+    # Anti-join: ratings whose key has no metrics row
+    orphans = quality.merge(df[_KEY].drop_duplicates(), on=_KEY, how="left", indicator=True)
+    orphans = orphans[orphans["_merge"] == "left_only"]
+    df = df.merge(quality[_KEY + QUALITY_COLUMNS], on=_KEY, how="left")
+    if not orphans.empty:
+        user_ids = orphans["user_id"].astype(str)
+        project_ids = orphans["project_id"].astype(str)
+        extra = pd.DataFrame({
+            "date": orphans["metric_date"].to_numpy(),
+            "date_obj": orphans["_date_key"].dt.date.to_numpy(),
+            "user_id": user_ids.to_numpy(),
+            "project_id": project_ids.to_numpy(),
+            "user": user_ids.map(user_map).fillna("Unknown").to_numpy(),
+            "email": user_ids.map(user_email_map).fillna("").to_numpy(),
+            "project": project_ids.map(project_map).fillna("Unknown").to_numpy(),
+            "role": "Unknown",
+            "hours_worked": 0,
+            "tasks_completed": 0,
+            "productivity_score": 0,
+            **{column: orphans[column].to_numpy() for column in QUALITY_COLUMNS},
+            **(defaults or {}),
+        })
+        categoricals = {column: dtype for column, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)}
+        df = pd.concat([df.drop(columns=_KEY), extra], ignore_index=True).astype(categoricals)
+    else:
+        df = df.drop(columns=_KEY)
+
+    df["quality_rating"] = df["quality_rating"].fillna("Not Assessed").astype(QUALITY_RATING)
+    return df